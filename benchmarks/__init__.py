@@ -0,0 +1,9 @@
+"""
+Micro-benchmarks for the hot paths of the library.
+
+The layout follows the conventions of `asv <https://asv.readthedocs.io/>`_:
+Each ``bench_*.py`` module holds classes whose ``time_*`` methods are timed,
+optionally parametrized by the ``params`` and ``param_names`` class attributes
+and prepared by a ``setup`` method receiving the same parameters. Run them
+with ``python -m benchmarks``.
+"""
@@ -0,0 +1,171 @@
+"""
+Run the benchmarks and optionally compare them against a previous run.
+
+Usage::
+
+    python -m benchmarks [-k PATTERN] [-o results.json] [--compare baseline.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import pkgutil
+import platform
+import re
+import statistics
+import sys
+import time
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Pattern, Tuple
+
+
+def get_version() -> str:
+    """
+    Get the version of the benchmarked package.
+    """
+    try:
+        from importlib.metadata import version
+    except ImportError:  # Python < 3.8.
+        return "unknown"
+    try:
+        return version("hocr-tools-lib")
+    except Exception:
+        return "unknown"
+
+
+def discover(pattern: Optional[Pattern[str]] = None) -> Iterator[Tuple[str, Callable[[], None]]]:
+    """
+    Find all benchmarks, yielding the name and a callable which runs the
+    prepared benchmark once.
+
+    :param pattern: If set, only prepare and yield the benchmarks whose name
+                    matches this pattern.
+    """
+    package_path = [str(Path(__file__).parent)]
+    for module_info in sorted(pkgutil.iter_modules(package_path), key=lambda info: info.name):
+        if not module_info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(f"benchmarks.{module_info.name}")
+        for class_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__ or class_name.startswith("_"):
+                continue
+            params: List[List[Any]] = getattr(cls, "params", [])
+            for combination in itertools.product(*params):
+                for method_name in sorted(name for name in dir(cls) if name.startswith("time_")):
+                    name = f"{module_info.name[6:]}.{class_name}.{method_name}"
+                    if combination:
+                        name += "(" + ", ".join(map(str, combination)) + ")"
+                    # Filter before running the possibly expensive setup.
+                    if pattern is not None and not pattern.search(name):
+                        continue
+                    yield name, _prepare(cls, method_name, combination)
+
+
+def _prepare(cls: type, method_name: str, combination: Tuple[Any, ...]) -> Callable[[], None]:
+    def run() -> None:
+        method(*combination)
+
+    instance = cls()
+    setup = getattr(instance, "setup", None)
+    method = getattr(instance, method_name)
+    if setup is not None:
+        setup(*combination)
+    return run
+
+
+def measure(function: Callable[[], None], repeat: int, min_time: float) -> Dict[str, Any]:
+    """
+    Time the given function.
+
+    :param function: The function to time.
+    :param repeat: The number of samples to take.
+    :param min_time: The minimum duration of each sample in seconds.
+    :return: The number of calls per sample as well as the minimum, median and
+             maximum duration per call over all samples in seconds.
+    """
+    timer = timeit.Timer(function)
+    number = 1
+    while True:
+        duration = timer.timeit(number)
+        if duration >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(duration, 1e-9) * 1.2))
+    samples = [duration / number] + [timer.timeit(number) / number for _ in range(repeat - 1)]
+    return {
+        "number": number,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+    }
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Format the given duration with a suitable unit.
+    """
+    for unit, factor in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= factor:
+            return f"{seconds / factor:8.3f} {unit}"
+    return f"{seconds / 1e-9:8.1f} ns"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run the micro-benchmarks")
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name matches this regex")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="samples per benchmark, default: %(default)s")
+    parser.add_argument(
+        "--min-time", type=float, default=0.1, help="minimum duration per sample in seconds, default: %(default)s"
+    )
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=1.1, help="ratio above which a benchmark counts as slower, default: %(default)s"
+    )
+    args = parser.parse_args()
+
+    baseline: Dict[str, Any] = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fd:
+            baseline = json.load(fd)["benchmarks"]
+
+    pattern = re.compile(args.filter)
+    results: Dict[str, Any] = {}
+    slower = []
+    for name, function in discover(pattern):
+        result = measure(function, repeat=args.repeat, min_time=args.min_time)
+        results[name] = result
+        line = f"{name:<70} {format_duration(result['median'])}"
+        if name in baseline:
+            ratio = result["median"] / baseline[name]["median"]
+            line += f"  {ratio:6.2f}x"
+            if ratio > args.threshold:
+                line += "  SLOWER"
+                slower.append(name)
+        print(line, flush=True)
+
+    if args.output:
+        data = {
+            "version": get_version(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "benchmarks": results,
+        }
+        with open(args.output, mode="w", encoding="utf-8") as fd:
+            json.dump(data, fd, indent=2, sort_keys=True)
+            fd.write("\n")
+
+    if slower:
+        print(f"{len(slower)} benchmark(s) slower than {args.threshold}x the baseline.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import random
+
+from hocr_tools_lib.utils.edit_utils import align, edit_distance
+
+from benchmarks.common import make_line, make_typos, make_word
+
+
+class EditDistance:
+    params = [["word", "line"], ["equal", "typos", "different"]]
+    param_names = ["size", "similarity"]
+
+    def setup(self, size: str, similarity: str) -> None:
+        rng = random.Random(42)
+        make = make_word if size == "word" else make_line
+        self.a = make(rng)
+        if similarity == "equal":
+            # Use a copy to not hit the identity shortcut of the interpreter.
+            self.b = "".join(list(self.a))
+        elif similarity == "typos":
+            self.b = make_typos(rng, self.a, rate=0.2 if size == "word" else 0.05)
+        else:
+            self.b = make(rng)
+
+    def time_edit_distance(self, size: str, similarity: str) -> None:
+        edit_distance(self.a, self.b)
+
+    def time_edit_distance_threshold(self, size: str, similarity: str) -> None:
+        edit_distance(self.a, self.b, threshold=5)
+
+    def time_align(self, size: str, similarity: str) -> None:
+        align(self.a, self.b)
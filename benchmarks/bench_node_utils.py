@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import random
+
+from lxml import html
+
+from hocr_tools_lib.utils.node_utils import get_bbox, get_prop, get_text
+
+from benchmarks.common import LINE_TITLE, make_page
+
+
+class LineNode:
+    def setup(self) -> None:
+        self.line = html.fromstring(f"<span class='ocr_line' title='{LINE_TITLE}'>Alice was beginning</span>")
+
+    def time_get_prop_first(self) -> None:
+        get_prop(self.line, "bbox")
+
+    def time_get_prop_last(self) -> None:
+        get_prop(self.line, "x_ascenders")
+
+    def time_get_prop_missing(self) -> None:
+        get_prop(self.line, "x_wconf")
+
+    def time_get_bbox(self) -> None:
+        get_bbox(self.line)
+
+
+class Page:
+    params = [[50, 5000]]
+    param_names = ["boxes"]
+
+    def setup(self, boxes: int) -> None:
+        self.page = make_page(random.Random(42), boxes)
+        self.lines = self.page.xpath(".//*[@class='ocr_line']")
+        self.line = self.lines[0]
+
+    def time_get_bbox_all_lines(self, boxes: int) -> None:
+        for line in self.lines:
+            get_bbox(line)
+
+    def time_get_text_all_lines(self, boxes: int) -> None:
+        for line in self.lines:
+            get_text(line)
+
+    def time_get_text_page(self, boxes: int) -> None:
+        get_text(self.page)
+
+    def time_get_text_line(self, boxes: int) -> None:
+        get_text(self.line)
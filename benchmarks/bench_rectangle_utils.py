@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import random
+
+from hocr_tools_lib.utils.rectangle_utils import area, erode, intersect, mostly_non_overlapping, overlaps, relative_overlap
+
+from benchmarks.common import make_boxes
+
+
+class Rectangles:
+    params = [[50, 5000]]
+    param_names = ["boxes"]
+
+    def setup(self, boxes: int) -> None:
+        self.boxes = make_boxes(random.Random(42), boxes)
+        self.pairs = list(zip(self.boxes, self.boxes[1:] + self.boxes[:1]))
+
+    def time_area(self, boxes: int) -> None:
+        for box in self.boxes:
+            area(box)
+
+    def time_intersect(self, boxes: int) -> None:
+        for u, v in self.pairs:
+            intersect(u, v)
+
+    def time_overlaps(self, boxes: int) -> None:
+        for u, v in self.pairs:
+            overlaps(u, v)
+
+    def time_relative_overlap(self, boxes: int) -> None:
+        for u, v in self.pairs:
+            relative_overlap(u, v)
+
+    def time_erode(self, boxes: int) -> None:
+        for box in self.boxes:
+            erode(box, 5, 5)
+
+
+class MostlyNonOverlapping:
+    # Quadratic in the number of boxes for a valid segmentation, which makes
+    # 5,000 boxes take close to a minute per call.
+    params = [[50, 500]]
+    param_names = ["boxes"]
+
+    def setup(self, boxes: int) -> None:
+        self.boxes = make_boxes(random.Random(42), boxes)
+
+    def time_mostly_non_overlapping(self, boxes: int) -> None:
+        mostly_non_overlapping(self.boxes)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import random
+
+from hocr_tools_lib.utils.text_utils import normalize
+
+from benchmarks.common import make_line, make_word
+
+
+class Normalize:
+    params = [["word", "line", "page"]]
+    param_names = ["size"]
+
+    def setup(self, size: str) -> None:
+        rng = random.Random(42)
+        if size == "word":
+            self.text = make_word(rng)
+        elif size == "line":
+            self.text = make_line(rng)
+        else:
+            self.text = "\n".join(make_line(rng) for _ in range(50))
+
+    def time_normalize(self, size: str) -> None:
+        normalize(self.text)
@@ -0,0 +1,93 @@
+"""
+Deterministic input data shared by the benchmarks.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import List
+
+from lxml import html
+
+from hocr_tools_lib.utils.rectangle_utils import RectangleType
+
+
+WORDS = [
+    "Alice", "was", "beginning", "to", "get", "very", "tired", "of", "sitting", "by",
+    "her", "sister", "on", "the", "bank,", "and", "having", "nothing", "do:", "once",
+    "or", "twice", "she", "had", "peeped", "into", "book", "reading,", "but", "it",
+]
+
+
+def make_word(rng: random.Random) -> str:
+    """
+    Get a short word.
+    """
+    return rng.choice(WORDS)
+
+
+def make_line(rng: random.Random, length: int = 120) -> str:
+    """
+    Get a line of text with exactly the given number of characters.
+    """
+    words: List[str] = []
+    size = 0
+    while size < length:
+        word = make_word(rng)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+
+def make_typos(rng: random.Random, text: str, rate: float = 0.05) -> str:
+    """
+    Replace the given ratio of characters by other ones.
+    """
+    characters = list(text)
+    for index in range(len(characters)):
+        if rng.random() < rate:
+            characters[index] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(characters)
+
+
+def make_boxes(rng: random.Random, count: int) -> List[RectangleType | None]:
+    """
+    Get the given number of mostly non-overlapping line boxes on a grid.
+    """
+    columns = max(1, int(count ** 0.5) // 4)
+    rows = -(-count // columns)
+    boxes: List[RectangleType | None] = []
+    for index in range(count):
+        column, row = index % columns, index // columns
+        x0 = column * 1000 + rng.randint(0, 20)
+        y0 = row * 60 + rng.randint(0, 5)
+        boxes.append((x0, y0, x0 + rng.randint(600, 950), y0 + rng.randint(40, 55)))
+    assert len(boxes) == count <= columns * rows
+    return boxes
+
+
+LINE_TITLE = "bbox 461 648 2077 707; baseline 0.001 -13; x_size 58; x_descenders 13; x_ascenders 15"
+
+
+def make_page(rng: random.Random, line_count: int) -> html.HtmlElement:
+    """
+    Get a page element holding the given number of lines with word elements.
+    """
+    parts = ["<div class='ocr_page' title='image \"page.png\"; bbox 0 0 2488 3507; ppageno 0'>"]
+    for index, box in enumerate(make_boxes(rng, line_count)):
+        assert box is not None
+        parts.append(
+            f"<span class='ocr_line' id='line_{index}' title='bbox {box[0]} {box[1]} {box[2]} {box[3]}; "
+            "baseline 0.001 -13; x_size 58'>"
+        )
+        x = box[0]
+        for word_index in range(rng.randint(8, 14)):
+            word = make_word(rng)
+            parts.append(
+                f"<span class='ocrx_word' id='word_{index}_{word_index}' "
+                f"title='bbox {x} {box[1]} {x + 20 * len(word)} {box[3]}; x_wconf {rng.randint(60, 99)}'>{word}</span> "
+            )
+            x += 20 * len(word) + 15
+        parts.append("</span>\n")
+    parts.append("</div>")
+    return html.fromstring("".join(parts))
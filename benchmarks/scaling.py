@@ -0,0 +1,320 @@
+"""
+End-to-end scaling harness for the command line tools.
+
+Runs each console script of the package on generated inputs of increasing
+page counts, records the wall time and the peak RSS, fits the growth exponent
+``k`` of ``cost ~ pages ** k`` and fails if a tool grows faster than its
+declared bound.
+
+Usage::
+
+    python -m benchmarks.scaling [--sizes 1,10,100,1000] [--tools hocr-lines,...] [-o results.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+from hocr_tools_lib.tools import hocr_generate
+
+
+LINEAR = 1.25
+"""
+Default bound for the growth exponent, leaving some room for measurement noise.
+"""
+
+MIN_EXCESS_TIME = 0.05
+"""
+Minimum time above the startup time in seconds for a size to be used in the
+fit. Smaller differences are dominated by noise.
+"""
+
+MIN_EXCESS_RSS = 4 * 1024 * 1024
+"""
+Minimum peak RSS above the startup RSS in bytes for a size to be used in the
+fit.
+"""
+
+
+@dataclass
+class Inputs:
+    """
+    Generated inputs for one size.
+    """
+
+    pages: int
+    directory: Path
+    book: Path
+    book_actual: Path
+    book_text: Path
+    page_directory: Path
+    page_files: list[Path]
+    dublin_core: Path
+
+
+@dataclass
+class Case:
+    """
+    How to run a tool and how it may scale.
+    """
+
+    command: Callable[[Inputs, Path], list[str]]
+    """
+    Build the arguments for the given inputs and an empty output directory.
+    """
+
+    bound: float = LINEAR
+    """
+    Maximum growth exponent for both the time and the memory.
+    """
+
+    max_pages: int | None = None
+    """
+    Largest size to run the tool with, to keep the tools growing faster than
+    linearly from dominating the run time. ``None`` runs all sizes.
+    """
+
+
+CASES: dict[str, Case | None] = {
+    "hocr": Case(lambda inputs, output: ["lines", str(inputs.book)]),
+    "hocr-check": Case(lambda inputs, output: [str(inputs.book)]),
+    "hocr-combine": Case(lambda inputs, output: [str(path) for path in inputs.page_files]),
+    "hocr-cut": Case(lambda inputs, output: [str(_copy_book(inputs, output))]),
+    "hocr-eval": Case(lambda inputs, output: [str(inputs.book), str(inputs.book_actual)]),
+    "hocr-eval-geom": Case(lambda inputs, output: [str(inputs.book), str(inputs.book_actual)]),
+    # Each actual line is compared with all remaining true lines.
+    "hocr-eval-lines": Case(
+        lambda inputs, output: [str(inputs.book_text), str(inputs.book_actual)], bound=2.1, max_pages=100
+    ),
+    # Requires `tidy` and the Google 1000 books layout.
+    "hocr-extract-g1000": None,
+    "hocr-extract-images": Case(
+        lambda inputs, output: [
+            "-b", str(inputs.book.parent), "-p", str(output / "line-%06d.png"), str(inputs.book)
+        ]
+    ),
+    "hocr-generate": Case(lambda inputs, output: ["--pages", str(inputs.pages), "--no-images", str(output)]),
+    "hocr-lines": Case(lambda inputs, output: [str(inputs.book)]),
+    "hocr-merge-dc": Case(lambda inputs, output: [str(inputs.dublin_core), str(inputs.book)]),
+    "hocr-pdf": Case(lambda inputs, output: ["--savefile", str(output / "out.pdf"), str(inputs.page_directory)]),
+    "hocr-sidecar": Case(lambda inputs, output: ["-o", str(output / "book.hocrx"), str(inputs.book)]),
+    "hocr-split": Case(lambda inputs, output: [str(inputs.book), str(output / "page-%06d.html")]),
+    "hocr-wordfreq": Case(lambda inputs, output: [str(inputs.book)]),
+}
+"""
+Declared cases for all console scripts. ``None`` skips the tool. Console
+scripts without a declared case make the harness fail.
+"""
+
+DUBLIN_CORE = """<?xml version="1.0"?>
+<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <dc:title>Synthetic book</dc:title>
+  <dc:creator>hocr-tools-lib</dc:creator>
+</metadata>
+"""
+
+
+def _copy_book(inputs: Inputs, output: Path) -> Path:
+    # Cutting writes the images next to the source images.
+    target = output / inputs.book.name
+    shutil.copyfile(inputs.book, target)
+    for image in inputs.book.parent.glob("*.jpg"):
+        os.symlink(image, output / image.name)
+    return target
+
+
+def get_console_scripts() -> list[str]:
+    """
+    Get the names of the console scripts of the installed package.
+    """
+    from importlib.metadata import distribution
+
+    return sorted(
+        entry_point.name for entry_point in distribution("hocr-tools-lib").entry_points
+        if entry_point.group == "console_scripts"
+    )
+
+
+def generate_inputs(directory: Path, pages: int) -> Inputs:
+    """
+    Generate the inputs for the given number of pages.
+    """
+    configuration = hocr_generate.Configuration(
+        pages=pages, paragraphs=4, lines=4, words=8, columns=2, width=1240, height=1754, dpi=150, seed=pages
+    )
+    book_files = hocr_generate.generate(directory / "book", configuration, single_file=True)
+    page_files = hocr_generate.generate(directory / "pages", configuration)
+    dublin_core = directory / "dc.xml"
+    dublin_core.write_text(DUBLIN_CORE)
+    return Inputs(
+        pages=pages, directory=directory, book=book_files.truth[0], book_actual=book_files.actual[0],
+        book_text=book_files.text[0], page_directory=page_files.truth[0].parent, page_files=page_files.truth,
+        dublin_core=dublin_core,
+    )
+
+
+def run(command: Sequence[str], cwd: Path) -> tuple[float, int]:
+    """
+    Run the given command.
+
+    :return: The wall time in seconds and the peak RSS in bytes.
+    """
+    # Use a file for stderr, as a pipe might block the child before `wait4` returns.
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=stderr)
+        # Retrieve the resource usage of this child only.
+        _, status, usage = os.wait4(process.pid, 0)
+        duration = time.perf_counter() - start
+        process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        if process.returncode:
+            stderr.seek(0)
+            raise subprocess.CalledProcessError(process.returncode, command, stderr=stderr.read())
+    # Kilobytes on Linux, bytes on macOS.
+    factor = 1 if sys.platform == "darwin" else 1024
+    return duration, usage.ru_maxrss * factor
+
+
+def fit_exponent(sizes: Sequence[int], values: Sequence[float]) -> float | None:
+    """
+    Fit ``value ~ size ** k`` by least squares in log-log space.
+
+    :return: The exponent ``k``, or ``None`` if there are less than two
+             positive values.
+    """
+    points = [(math.log(size), math.log(value)) for size, value in zip(sizes, values) if value > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def measure_tool(
+        tool: str, case: Case, inputs_by_size: dict[int, Inputs], work_directory: Path, repeat: int
+) -> dict[str, Any]:
+    """
+    Measure the given tool for all sizes up to the maximum of its case.
+
+    The startup cost, measured by running the tool with ``--help``, is
+    subtracted before fitting the exponents. Sizes whose cost barely exceeds
+    the startup cost are ignored.
+    """
+    executable = shutil.which(tool)
+    if executable is None:
+        raise FileNotFoundError(f"{tool} is not installed")
+
+    baseline = [run([executable, "--help"], cwd=work_directory) for _ in range(repeat)]
+    startup_time = min(duration for duration, _ in baseline)
+    startup_rss = min(rss for _, rss in baseline)
+
+    sizes = [size for size in sorted(inputs_by_size) if case.max_pages is None or size <= case.max_pages]
+    times = []
+    memory = []
+    for size in sizes:
+        samples = []
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory(dir=work_directory) as output:
+                command = [executable] + case.command(inputs_by_size[size], Path(output))
+                samples.append(run(command, cwd=Path(output)))
+        times.append(min(duration for duration, _ in samples))
+        memory.append(min(rss for _, rss in samples))
+
+    time_exponent = fit_exponent(sizes, [_excess(value, startup_time, MIN_EXCESS_TIME) for value in times])
+    memory_exponent = fit_exponent(sizes, [_excess(value, startup_rss, MIN_EXCESS_RSS) for value in memory])
+    passed = all(exponent is None or exponent <= case.bound for exponent in (time_exponent, memory_exponent))
+    return {
+        "sizes": sizes,
+        "time": times,
+        "peak_rss": memory,
+        "startup_time": startup_time,
+        "startup_rss": startup_rss,
+        "time_exponent": time_exponent,
+        "memory_exponent": memory_exponent,
+        "bound": case.bound,
+        "passed": passed,
+    }
+
+
+def _excess(value: float, startup: float, minimum: float) -> float:
+    excess = value - startup
+    return excess if excess >= minimum else 0
+
+
+def _format_exponent(value: object) -> str:
+    return "   n/a" if value is None else f"{value:6.2f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.scaling",
+        description="Check how the command line tools scale with the number of pages"
+    )
+    parser.add_argument(
+        "--sizes", default="1,10,100,1000", help="comma-separated page counts, default: %(default)s"
+    )
+    parser.add_argument("--tools", help="comma-separated console scripts to run, default: all")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="runs per size, default: %(default)s")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    sizes = sorted({int(size) for size in args.sizes.split(",")})
+    scripts = get_console_scripts()
+    undeclared = sorted(set(scripts) - set(CASES))
+    if undeclared:
+        sys.exit(f"No scaling case declared for: {', '.join(undeclared)}")
+    tools = args.tools.split(",") if args.tools else scripts
+
+    results: dict[str, Any] = {}
+    failed = []
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        work_directory = Path(temporary_directory)
+        inputs_by_size = {}
+        for size in sizes:
+            print(f"Generating {size} page(s) ...", file=sys.stderr, flush=True)
+            inputs_by_size[size] = generate_inputs(work_directory / f"input-{size}", size)
+
+        print(f"{'tool':<22}" + "".join(f"{size:>10}" for size in sizes) + "  time_k  rss_k  bound", flush=True)
+        for tool in tools:
+            case = CASES[tool]
+            if case is None:
+                print(f"{tool:<22} skipped", flush=True)
+                continue
+            result = measure_tool(tool, case, inputs_by_size, work_directory, repeat=args.repeat)
+            results[tool] = result
+            durations = dict(zip(result["sizes"], result["time"]))
+            line = f"{tool:<22}" + "".join(
+                f"{durations[size]:9.2f}s" if size in durations else f"{'-':>10}" for size in sizes
+            )
+            line += f"  {_format_exponent(result['time_exponent'])} {_format_exponent(result['memory_exponent'])}"
+            line += f"  {case.bound:5.2f}"
+            if not result["passed"]:
+                line += "  FAILED"
+                failed.append(tool)
+            print(line, flush=True)
+
+    if args.output:
+        with open(args.output, mode="w", encoding="utf-8") as fd:
+            json.dump(results, fd, indent=2, sort_keys=True)
+            fd.write("\n")
+
+    if failed:
+        sys.exit(f"Scaling worse than declared: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
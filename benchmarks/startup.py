@@ -0,0 +1,110 @@
+"""
+Startup time of the command line tools.
+
+Runs each console script, as well as each subcommand of ``hocr``, with
+``--help`` and reports the fastest and the median wall time. This is the
+fixed cost paid by every invocation, for example from shell pipelines.
+
+Usage::
+
+    python -m benchmarks.startup [-r 20] [--tools hocr-lines,...] [-o results.json] [--compare baseline.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from typing import Iterator, Sequence
+
+from benchmarks.__main__ import format_duration
+from benchmarks.scaling import get_console_scripts
+from hocr_tools_lib.cli import COMMANDS
+
+
+def get_commands(tools: Sequence[str]) -> Iterator[tuple[str, list[str]]]:
+    """
+    Get the commands to measure for the given console scripts.
+
+    :param tools: The console scripts to measure.
+    :return: The name and the arguments of each command.
+    """
+    for tool in tools:
+        executable = shutil.which(tool)
+        if executable is None:
+            raise FileNotFoundError(f"{tool} is not installed")
+        if tool == "hocr":
+            yield tool, [executable, "--help"]
+            for name in COMMANDS:
+                yield f"{tool} {name}", [executable, name, "--help"]
+        else:
+            yield tool, [executable, "--help"]
+
+
+def measure(command: Sequence[str], repeat: int) -> dict[str, float]:
+    """
+    Time the given command.
+
+    :param command: The command to run.
+    :param repeat: The number of runs.
+    :return: The fastest and the median duration in seconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return {"min": min(samples), "median": statistics.median(samples)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.startup", description="Measure the startup time of the command line tools"
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=20, help="runs per command, default: %(default)s")
+    parser.add_argument("--tools", help="comma-separated console scripts to run, default: all")
+    parser.add_argument("-o", "--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=1.1,
+        help="ratio of the fastest run above which a command counts as slower, default: %(default)s"
+    )
+    args = parser.parse_args()
+
+    baseline: dict[str, dict[str, float]] = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fd:
+            baseline = json.load(fd)
+
+    tools = args.tools.split(",") if args.tools else get_console_scripts()
+    results: dict[str, dict[str, float]] = {}
+    slower = []
+    print(f"{'command':<30} {'fastest':>11} {'median':>11}", flush=True)
+    for name, command in get_commands(tools):
+        result = measure(command, repeat=args.repeat)
+        results[name] = result
+        line = f"{name:<30} {format_duration(result['min'])} {format_duration(result['median'])}"
+        if name in baseline:
+            ratio = result["min"] / baseline[name]["min"]
+            line += f"  {ratio:6.2f}x"
+            if ratio > args.threshold:
+                line += "  SLOWER"
+                slower.append(name)
+        print(line, flush=True)
+
+    if args.output:
+        with open(args.output, mode="w", encoding="utf-8") as fd:
+            json.dump(results, fd, indent=2, sort_keys=True)
+            fd.write("\n")
+
+    if slower:
+        print(f"{len(slower)} command(s) slower than {args.threshold}x the baseline.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
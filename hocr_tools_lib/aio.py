@@ -0,0 +1,514 @@
+"""
+Asynchronous counterparts of the tool functions for :mod:`asyncio` applications.
+
+The tools parse and render synchronously, which would block the event loop
+for the whole duration of a call. The coroutines in this module run them in an
+executor instead and return the results once they are available::
+
+    runner = Runner(max_concurrency=4)
+    lines = await aio.lines("page.hocr", runner=runner)
+
+Each call occupies one slot of the :class:`Runner` until the work has
+finished, thus at most `max_concurrency` calls of an event loop are processed
+at the same time and further calls wait for a free slot without blocking the
+event loop.
+
+Cancelling a call which is still waiting for a slot or for a worker drops it
+without doing any work. Work which has already started cannot be interrupted
+by the executor: the coroutine raises :class:`asyncio.CancelledError`
+immediately, but the slot is only released once the work has finished, so
+cancelled calls never push the load above the limit.
+
+Inputs given as paths are read inside the executor as well. When using a
+:class:`concurrent.futures.ProcessPoolExecutor`, the arguments and results
+have to be picklable, thus paths or bytes should be passed instead of open
+file objects.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import os
+import threading
+import weakref
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from types import TracebackType
+from typing import Any, Callable, Sequence, TYPE_CHECKING, TypeVar
+
+from hocr_tools_lib.utils.typing_utils import BufferType, InputType, SupportsRead
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+    from hocr_tools_lib.tools.hocr_eval_geom import Boxstats, MatchStats
+    from hocr_tools_lib.tools.hocr_eval_lines import LineResult
+    from hocr_tools_lib.utils.cache_utils import ResultCache
+    from hocr_tools_lib.utils.edit_utils import ErrorStats
+    from hocr_tools_lib.utils.image_utils import ImageOptions
+
+T = TypeVar("T")
+
+
+def _call(target: str, collect: bool, args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+    # Import the tool within the worker to keep the event loop responsive and
+    # to allow process pools, which only have to pickle the target name.
+    module_name, function_name = target.split(":")
+    function = getattr(importlib.import_module(module_name), function_name)
+    result = function(*args, **kwargs)
+    return list(result) if collect else result
+
+
+def _check(hocr_file: InputType, no_overlap: bool, fast: bool = False) -> list[tuple[bool, str]]:
+    from hocr_tools_lib.tools.hocr_check import CollectingChecker
+
+    checker = CollectingChecker(hocr_file=hocr_file, no_overlap=no_overlap, fast=fast)
+    checker.check()
+    return checker.results
+
+
+def _read_file(path: os.PathLike[str] | str) -> bytes:
+    with open(path, mode="rb") as fd:
+        return fd.read()
+
+
+def _write_file(path: os.PathLike[str] | str, data: BufferType) -> None:
+    with open(path, mode="wb") as fd:
+        fd.write(data)
+
+
+class Runner:
+    """
+    Run blocking functions in an executor with a concurrency limit.
+
+    A runner may be used from several event loops, like the default runner by
+    successive :func:`asyncio.run` calls. The slots are kept for each event
+    loop, thus the limit applies to each loop on its own.
+    """
+
+    def __init__(self, executor: Executor | None = None, max_concurrency: int | None = None) -> None:
+        """
+        :param executor: The executor to run the functions in. Defaults to a
+                         thread pool with `max_concurrency` workers, which is
+                         shut down by :meth:`close`. Executors passed in have
+                         to be shut down by the caller.
+        :param max_concurrency: Maximum number of functions to run at the same
+                                time. Defaults to the number of CPUs.
+        """
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self._owns_executor = executor is None
+        self.executor: Executor = executor or ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="hocr-aio"
+        )
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _get_semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        # A semaphore is bound to the loop it is used with first. Slots which
+        # are still occupied when a loop is closed are dropped with the loop.
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+            return semaphore
+
+    async def run(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run the given function once a slot is available.
+
+        :param function: The function to run. Has to be picklable for process
+                         pools.
+        :param args: The positional arguments to pass.
+        :param kwargs: The keyword arguments to pass.
+        :return: The return value of the function.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore(loop)
+        await semaphore.acquire()
+        try:
+            future: Future[T] = self.executor.submit(function, *args, **kwargs)
+        except BaseException:
+            semaphore.release()
+            raise
+
+        def release(_: Future[T]) -> None:
+            # Called from the worker thread once the function has finished or
+            # immediately when cancelling a function which did not start yet.
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                # The event loop has been closed in the meantime, together
+                # with its semaphore.
+                pass
+
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Shut down the executor if it has been created by the runner.
+
+        :param wait: Wait for the running functions to finish.
+        """
+        if self._owns_executor:
+            self.executor.shutdown(wait=wait)
+
+    async def __aenter__(self) -> Runner:
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc_val: BaseException | None,
+            exc_tb: TracebackType | None
+    ) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+_default_runner: Runner | None = None
+
+
+def get_default_runner() -> Runner:
+    """
+    Get the runner used if no explicit runner is passed.
+
+    :return: The runner set by :func:`set_default_runner` or a runner with the
+             default settings.
+    """
+    global _default_runner
+    if _default_runner is None:
+        _default_runner = Runner()
+    return _default_runner
+
+
+def set_default_runner(runner: Runner | None) -> None:
+    """
+    Set the runner used if no explicit runner is passed.
+
+    :param runner: The runner to use. `None` creates a runner with the default
+                   settings on the next call. The previous runner is not
+                   closed.
+    """
+    global _default_runner
+    _default_runner = runner
+
+
+async def _run_tool(
+        target: str, *args: Any, runner: Runner | None, collect: bool = False, **kwargs: Any
+) -> Any:
+    runner = runner or get_default_runner()
+    return await runner.run(_call, target, collect, args, kwargs)
+
+
+async def read_file(path: os.PathLike[str] | str) -> bytes:
+    """
+    Read the given file without blocking the event loop.
+
+    File operations run in the default executor of the event loop and do not
+    occupy any slot of the runners.
+
+    :param path: The file to read.
+    :return: The file content.
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, _read_file, path)
+
+
+async def write_file(path: os.PathLike[str] | str, data: BufferType) -> None:
+    """
+    Write the given file without blocking the event loop.
+
+    :param path: The file to write.
+    :param data: The content to write.
+    """
+    await asyncio.get_running_loop().run_in_executor(None, _write_file, path, data)
+
+
+async def check(
+        hocr_file: InputType, no_overlap: bool = False, fast: bool = False, *, runner: Runner | None = None
+) -> list[tuple[bool, str]]:
+    """
+    Asynchronous version of :class:`hocr_tools_lib.tools.hocr_check.Checker`.
+
+    :param hocr_file: hOCR file or content to check.
+    :param no_overlap: Disable the overlap checks.
+    :param fast: Only scan the classes and bounding boxes instead of building
+                 the document tree.
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    :return: The result and the message of each check.
+    """
+    runner = runner or get_default_runner()
+    return await runner.run(_check, hocr_file, no_overlap, fast)
+
+
+async def combine(filenames: list[InputType], *, runner: Runner | None = None) -> str:
+    """
+    Asynchronous version of :func:`hocr_tools_lib.tools.hocr_combine.combine`.
+
+    :param filenames: hOCR files or contents to combine.
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    :return: The combined hOCR data.
+    """
+    result: str = await _run_tool("hocr_tools_lib.tools.hocr_combine:combine", filenames, runner=runner)
+    return result
+
+
+async def cut(
+        hocr: InputType, debug: bool = False, write_hocr: bool = True, workers: int | None = None,
+        columns: int | None = None, *, runner: Runner | None = None
+) -> None:
+    """
+    Asynchronous version of :func:`hocr_tools_lib.tools.hocr_cut.cut`.
+
+    :param hocr: hOCR file or content to cut.
+    :param debug: Enable debugging.
+    :param write_hocr: Write the hOCR file of each half.
+    :param workers: The number of threads cutting the images.
+    :param columns: The number of columns to cut each page into. Defaults to
+                    two halves.
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    """
+    await _run_tool(
+        "hocr_tools_lib.tools.hocr_cut:cut", hocr, debug, write_hocr=write_hocr, workers=workers, columns=columns,
+        runner=runner
+    )
+
+
+async def evaluate(
+        truth: InputType,
+        actual: InputType,
+        img_file: SupportsRead[bytes] | BufferType | str | None = None,
+        debug: bool = False,
+        verbose: bool = False,
+        errors_file: os.PathLike[str] | str = "errors.png",
+        cache: ResultCache | None = None,
+        stats: ErrorStats | None = None,
+        *,
+        runner: Runner | None = None
+) -> tuple[Image.Image | None, int, int, int]:
+    """
+    Asynchronous version of :func:`hocr_tools_lib.tools.hocr_eval.evaluate`.
+
+    :param stats: The statistics to add the errors to. Process pools only
+                  update a copy, thus require a thread pool.
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    :return: The image with the bboxes and the number of segmentation, OCR
+             segmentation and OCR errors.
+    """
+    result: tuple[Image.Image | None, int, int, int] = await _run_tool(
+        "hocr_tools_lib.tools.hocr_eval:evaluate",
+        truth, actual, img_file, debug, verbose, errors_file, cache, stats,
+        runner=runner
+    )
+    return result
+
+
+async def evaluate_geometries(
+        truth: InputType, actual: InputType, element: str = 'ocr_line',
+        significant_overlap: float = 0.1, close_match: float = 0.9,
+        cache: ResultCache | None = None, fast: bool = False,
+        *,
+        runner: Runner | None = None
+) -> list[tuple[Boxstats, Boxstats]]:
+    """
+    Asynchronous version of
+    :func:`hocr_tools_lib.tools.hocr_eval_geom.evaluate_geometries`.
+
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    :return: The statistics for each set of pages.
+    """
+    result: list[tuple[Boxstats, Boxstats]] = await _run_tool(
+        "hocr_tools_lib.tools.hocr_eval_geom:evaluate_geometries",
+        truth, actual, element, significant_overlap, close_match, cache, fast,
+        runner=runner, collect=True
+    )
+    return result
+
+
+async def evaluate_matches(
+        truth: InputType, actual: InputType, element: str = 'ocr_line',
+        thresholds: Sequence[float] | None = None,
+        cache: ResultCache | None = None, fast: bool = False,
+        *,
+        runner: Runner | None = None
+) -> list[MatchStats]:
+    """
+    Asynchronous version of
+    :func:`hocr_tools_lib.tools.hocr_eval_geom.evaluate_matches`.
+
+    :param thresholds: The IoU thresholds. Defaults to
+                       :data:`~hocr_tools_lib.tools.hocr_eval_geom.DEFAULT_THRESHOLDS`.
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    :return: The statistics for each threshold.
+    """
+    arguments: dict[str, Any] = {} if thresholds is None else {"thresholds": thresholds}
+    result: list[MatchStats] = await _run_tool(
+        "hocr_tools_lib.tools.hocr_eval_geom:evaluate_matches",
+        truth, actual, element, cache=cache, fast=fast, runner=runner, **arguments
+    )
+    return result
+
+
+async def evaluate_lines(
+        tfile: SupportsRead[str],
+        hfile: InputType,
+        verbose: bool = False,
+        cache: ResultCache | None = None,
+        stats: ErrorStats | None = None,
+        words: bool = False,
+        line_results: list[LineResult] | None = None,
+        *,
+        runner: Runner | None = None
+) -> tuple[int, int]:
+    """
+    Asynchronous version of
+    :func:`hocr_tools_lib.tools.hocr_eval_lines.evaluate_lines`.
+
+    :param stats: The statistics to add the errors to. Process pools only
+                  update a copy, thus require a thread pool.
+    :param line_results: The list to append the line results to, which
+                         requires a thread pool as well.
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    :return: The number of segmentation and OCR errors.
+    """
+    result: tuple[int, int] = await _run_tool(
+        "hocr_tools_lib.tools.hocr_eval_lines:evaluate_lines", tfile, hfile, verbose, cache, stats, words,
+        line_results, runner=runner
+    )
+    return result
+
+
+async def export_pdf(
+        directory: str, default_dpi: int = 300, savefile: str | None = None, text_objects: str = 'word',
+        text_only: bool = False, merge_onto: str | None = None, image_options: ImageOptions | None = None,
+        image_workers: int | None = None, chunk_size: int | None = None, work_directory: str | None = None,
+        cache: ResultCache | None = None, *, runner: Runner | None = None
+) -> None:
+    """
+    Asynchronous version of :func:`hocr_tools_lib.tools.hocr_pdf.export_pdf`.
+
+    :param directory: Directory with the images and hOCR files.
+    :param default_dpi: Resolution to use if the images do not provide any.
+    :param savefile: The PDF file to write. Should always be set, as the
+                     default of writing to stdout is of little use here.
+    :param text_objects: How to emit the text layer.
+    :param text_only: Only create the invisible text layer.
+    :param merge_onto: Existing PDF file to merge the text layer onto.
+    :param image_options: Settings to re-encode the images with.
+    :param image_workers: The number of threads re-encoding the images.
+    :param chunk_size: The number of pages per resumable chunk.
+    :param work_directory: The directory of the chunks.
+    :param cache: Cache of the rendered pages.
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    """
+    await _run_tool(
+        "hocr_tools_lib.tools.hocr_pdf:export_pdf", directory, default_dpi, savefile, text_objects, text_only, merge_onto,
+        image_options, image_workers, chunk_size, work_directory, cache, runner=runner
+    )
+
+
+async def export_hocr_pdf(
+        hocr: InputType, savefile: str | None = None, images: Sequence[str] | None = None, default_dpi: int = 300,
+        title: str | None = None, text_objects: str = 'word', text_only: bool = False, merge_onto: str | None = None,
+        image_options: ImageOptions | None = None, image_workers: int | None = None, chunk_size: int | None = None,
+        work_directory: str | None = None, cache: ResultCache | None = None, *, runner: Runner | None = None
+) -> None:
+    """
+    Asynchronous version of :func:`hocr_tools_lib.tools.hocr_pdf.export_hocr_pdf`.
+
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    """
+    await _run_tool(
+        "hocr_tools_lib.tools.hocr_pdf:export_hocr_pdf",
+        hocr, savefile, images, default_dpi, title, text_objects, text_only, merge_onto, image_options, image_workers,
+        chunk_size, work_directory, cache, runner=runner
+    )
+
+
+async def extract_images(
+        hocr: InputType, basename: str, pattern: str = "line-%03d.png", element: str = "ocr_line",
+        pad: str | None = None, unicode_dammit: bool = False, *, runner: Runner | None = None
+) -> None:
+    """
+    Asynchronous version of
+    :func:`hocr_tools_lib.tools.hocr_extract_images.extract_images`.
+
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    """
+    await _run_tool(
+        "hocr_tools_lib.tools.hocr_extract_images:extract_images",
+        hocr, basename, pattern, element, pad, unicode_dammit,
+        runner=runner
+    )
+
+
+async def lines(hocr: InputType, *, runner: Runner | None = None) -> list[str]:
+    """
+    Asynchronous version of :func:`hocr_tools_lib.tools.hocr_lines.lines`.
+
+    :param hocr: hOCR or ``.hocrx`` sidecar file or content to read.
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    :return: The text lines.
+    """
+    result: list[str] = await _run_tool("hocr_tools_lib.tools.hocr_lines:lines", hocr, runner=runner, collect=True)
+    return result
+
+
+async def merge_dc(dc: InputType, hocr: InputType, *, runner: Runner | None = None) -> bytes:
+    """
+    Asynchronous version of :func:`hocr_tools_lib.tools.hocr_merge_dc.merge_dc`.
+
+    :param dc: XML file or content with the Dublin Core metadata.
+    :param hocr: hOCR file or content to merge the metadata into.
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    :return: The merged hOCR data.
+    """
+    result: bytes = await _run_tool("hocr_tools_lib.tools.hocr_merge_dc:merge_dc", dc, hocr, runner=runner)
+    return result
+
+
+async def create_sidecar(
+        hocr: InputType, output: os.PathLike[str] | str | None = None, *, runner: Runner | None = None
+) -> str:
+    """
+    Asynchronous version of
+    :func:`hocr_tools_lib.tools.hocr_sidecar.create_sidecar`.
+
+    :param hocr: hOCR file or content to convert.
+    :param output: The sidecar file to write.
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    :return: The path of the sidecar file.
+    """
+    result: str = await _run_tool("hocr_tools_lib.tools.hocr_sidecar:create_sidecar", hocr, output, runner=runner)
+    return result
+
+
+async def split(hocr: InputType, pattern: str = "base-%03d.html", *, runner: Runner | None = None) -> None:
+    """
+    Asynchronous version of :func:`hocr_tools_lib.tools.hocr_split.split`.
+
+    :param hocr: hOCR file or content to split.
+    :param pattern: Output file pattern to use.
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    """
+    await _run_tool("hocr_tools_lib.tools.hocr_split:split", hocr, pattern, runner=runner)
+
+
+async def word_frequencies(
+        hocr_in: InputType, case_insensitive: bool = False, spaces: bool = False,
+        dehyphenate: bool = False, max_hits: int = 10, *, runner: Runner | None = None
+) -> list[str]:
+    """
+    Asynchronous version of
+    :func:`hocr_tools_lib.tools.hocr_wordfreq.word_frequencies`.
+
+    :param runner: The runner to use. Defaults to :func:`get_default_runner`.
+    :return: Up to `max_hits` of the most used words.
+    """
+    result: list[str] = await _run_tool(
+        "hocr_tools_lib.tools.hocr_wordfreq:word_frequencies",
+        hocr_in, case_insensitive, spaces, dehyphenate, max_hits,
+        runner=runner, collect=True
+    )
+    return result
@@ -0,0 +1,93 @@
+"""
+Single ``hocr`` command dispatching to the individual tools.
+
+Only the module of the requested subcommand is imported, thus each call only
+pays for the dependencies it actually uses.
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+
+
+COMMANDS: dict[str, tuple[str, str]] = {
+    "check": ("hocr_tools_lib.tools.hocr_check:main", "check the given file for conformance with the hOCR format spec"),
+    "combine": ("hocr_tools_lib.tools.hocr_combine:main", "combine multiple hOCR documents into one"),
+    "cut": ("hocr_tools_lib.tools.hocr_cut:main", "cut a page horizontally into two pages"),
+    "eval": ("hocr_tools_lib.tools.hocr_eval:main", "compute statistics about the general quality of the hOCR data"),
+    "eval-geom": ("hocr_tools_lib.tools.hocr_eval_geom:main", "compare the segmentations at the level of an element"),
+    "eval-lines": ("hocr_tools_lib.tools.hocr_eval_lines:main", "evaluate hOCR output against plain text ground truth"),
+    "extract-g1000": ("hocr_tools_lib.tools.hocr_extract_g1000:main", "extract lines from Google 1000 book sample"),
+    "extract-images": ("hocr_tools_lib.tools.hocr_extract_images:main", "extract the images and texts of all lines"),
+    "generate": ("hocr_tools_lib.tools.hocr_generate:main", "generate synthetic ground truth and perturbed hOCR files"),
+    "lines": ("hocr_tools_lib.tools.hocr_lines:main", "extract the text within all the ocr_line elements"),
+    "merge-dc": ("hocr_tools_lib.tools.hocr_merge_dc:main", "merge Dublin Core metadata into hOCR header files"),
+    "pdf": ("hocr_tools_lib.tools.hocr_pdf:main", "create a searchable PDF from a pile of hOCR and image files"),
+    "request": ("hocr_tools_lib.client:main", "run an operation on a running service"),
+    "serve": ("hocr_tools_lib.service:main", "serve the tools to local clients to avoid the startup cost"),
+    "sidecar": ("hocr_tools_lib.tools.hocr_sidecar:main", "convert an hOCR file into a binary .hocrx sidecar"),
+    "split": ("hocr_tools_lib.tools.hocr_split:main", "split a multipage hOCR file into single pages"),
+    "wordfreq": ("hocr_tools_lib.tools.hocr_wordfreq:main", "calculate the word frequency in an hOCR file"),
+}
+"""
+Subcommands mapped to the ``module:function`` implementing them and a short
+description. The functions are called without arguments and parse
+``sys.argv`` themselves.
+"""
+
+USAGE = "usage: hocr [-h] <command> [<args>]"
+
+
+def format_help() -> str:
+    """
+    Get the help text listing all subcommands.
+
+    :return: The help text.
+    """
+    width = max(len(name) for name in COMMANDS)
+    lines = [
+        USAGE,
+        "",
+        "Advanced tools for hOCR integration.",
+        "",
+        "commands:",
+    ]
+    lines.extend(f"  {name:<{width}}  {description}" for name, (_, description) in COMMANDS.items())
+    lines.append("")
+    lines.append("Run 'hocr <command> --help' for the options of each command.")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Run the subcommand given on the command line.
+
+    The arguments are parsed manually instead of using `argparse` to keep
+    the startup of the subcommands fast.
+
+    :param argv: The arguments without the program name. Defaults to the
+                 arguments of the current process.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv or argv[0] in {"-h", "--help"}:
+        print(format_help())
+        return
+    name, arguments = argv[0], argv[1:]
+    if name not in COMMANDS:
+        import difflib
+
+        message = f"hocr: error: unknown command '{name}'"
+        matches = difflib.get_close_matches(name, COMMANDS, n=1)
+        if matches:
+            message += f", did you mean '{matches[0]}'?"
+        print(USAGE, file=sys.stderr)
+        print(message, file=sys.stderr)
+        sys.exit(2)
+
+    module_name, function_name = COMMANDS[name][0].split(":")
+    function = getattr(importlib.import_module(module_name), function_name)
+    # Let `argparse` of the subcommand report the correct program name.
+    sys.argv = [f"hocr {name}"] + arguments
+    function()
@@ -0,0 +1,148 @@
+"""
+Thin client for the service of :mod:`hocr_tools_lib.service`.
+
+Only depends on the standard library to keep its startup fast.
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+from typing import Any
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+TOKEN_VARIABLE = "HOCR_SERVICE_TOKEN"
+"""
+The environment variable holding the token of the service, if any.
+"""
+
+
+class ServiceError(RuntimeError):
+    """
+    The service rejected the request or the operation failed.
+    """
+
+    def __init__(self, status: int, message: str) -> None:
+        """
+        :param status: The HTTP status code of the response.
+        :param message: The error message of the service.
+        """
+        super().__init__(status, message)
+        self.status = status
+        self.message = message
+
+    def __str__(self) -> str:
+        return self.message
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """
+    HTTP connection over a Unix socket.
+    """
+
+    def __init__(self, path: str, timeout: float | None = None) -> None:
+        """
+        :param path: The path of the socket.
+        :param timeout: The timeout for the socket operations in seconds.
+        """
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.path)
+        self.sock = sock
+
+
+def request(
+        operation: str, arguments: dict[str, Any] | None = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+        unix_socket: str | None = None, timeout: float | None = None, token: str | None = None
+) -> Any:
+    """
+    Run an operation on the service.
+
+    :param operation: The name of the operation, see
+                      :data:`hocr_tools_lib.service.OPERATIONS`.
+    :param arguments: The keyword arguments of the operation. Paths are
+                      resolved by the service, thus should be absolute.
+    :param host: The host of the service.
+    :param port: The port of the service.
+    :param unix_socket: If set, connect to this Unix socket instead.
+    :param timeout: The timeout for the socket operations in seconds.
+    :param token: The token required by the service, if any.
+    :return: The result of the operation.
+    :raises ServiceError: The service rejected the request or the operation
+                          failed.
+    """
+    connection: http.client.HTTPConnection
+    if unix_socket:
+        connection = UnixHTTPConnection(unix_socket, timeout=timeout)
+    else:
+        connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    body = json.dumps({"operation": operation, "arguments": arguments or {}}).encode("UTF-8")
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    try:
+        connection.request("POST", "/", body=body, headers=headers)
+        response = connection.getresponse()
+        data = json.loads(response.read())
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise ServiceError(response.status, data.get("error", response.reason))
+    return data["result"]
+
+
+def _parse_argument(value: str) -> tuple[str, Any]:
+    name, separator, raw = value.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {value!r}")
+    try:
+        return name, json.loads(raw)
+    except ValueError:
+        return name, raw
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run an operation on a running hOCR tools service",
+        epilog=f"The token of the service is read from the environment variable {TOKEN_VARIABLE}."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help="default: %(default)s")
+    parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help="default: %(default)s")
+    parser.add_argument("-u", "--unix-socket", help="connect to this Unix socket instead of TCP")
+    parser.add_argument("--timeout", type=float, default=None, help="timeout in seconds")
+    parser.add_argument("operation", help="operation to run, for example 'lines'")
+    parser.add_argument(
+        "arguments", nargs="*", type=_parse_argument, metavar="NAME=VALUE",
+        help=(
+            "arguments of the operation, values are parsed as JSON if possible; "
+            "paths are resolved by the service, thus should be absolute"
+        )
+    )
+    args = parser.parse_args()
+
+    try:
+        result = request(
+            operation=args.operation, arguments=dict(args.arguments), host=args.host, port=args.port,
+            unix_socket=args.unix_socket, timeout=args.timeout, token=os.environ.get(TOKEN_VARIABLE)
+        )
+    except (ServiceError, OSError) as exception:
+        sys.exit(f"{parser.prog}: error: {exception}")
+
+    if result is None:
+        return
+    if isinstance(result, str):
+        print(result)
+    elif isinstance(result, list) and all(isinstance(item, str) for item in result):
+        print("\n".join(result))
+    else:
+        print(json.dumps(result, indent=2))
@@ -0,0 +1,225 @@
+"""
+Compose the tools on one parsed document without intermediate files.
+
+Each tool function parses its input and serializes its output, thus chaining
+them costs a full parse and serialization per stage. A :class:`Pipeline`
+parses the input once, hands the document from stage to stage in memory and
+only serializes it within the sinks::
+
+    pipeline = Pipeline.combine(["book-001.hocr", "book-002.hocr"])
+    pipeline.merge_dc("metadata.xml").check(strict=True)
+    pipeline.split("page-%03d.hocr")
+    pipeline.export_pdf("book.pdf")
+
+The stages modify the document in place and return the pipeline itself, the
+sinks leave the document unchanged.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import Executor
+from typing import BinaryIO, Sequence, TYPE_CHECKING
+
+from lxml import etree, html
+
+from hocr_tools_lib.tools.hocr_check import CollectingChecker
+from hocr_tools_lib.tools.hocr_combine import combine_documents
+from hocr_tools_lib.tools.hocr_merge_dc import merge_dc_documents
+from hocr_tools_lib.tools.hocr_pdf import get_page_image, write_pdf
+from hocr_tools_lib.tools.hocr_split import split_document
+from hocr_tools_lib.utils.input_utils import get_directory, parse_html
+from hocr_tools_lib.utils.profile_utils import PROFILER
+from hocr_tools_lib.utils.typing_utils import InputType
+
+
+if TYPE_CHECKING:
+    from hocr_tools_lib.utils.cache_utils import ResultCache
+    from hocr_tools_lib.utils.image_utils import ImageOptions
+
+
+class CheckFailedError(RuntimeError):
+    """
+    Error raised by strict checks if at least one check failed.
+    """
+
+    def __init__(self, failures: list[str]) -> None:
+        """
+        :param failures: The messages of the failed checks.
+        """
+        super().__init__(f"{len(failures)} check(s) failed: " + ", ".join(failures))
+        self.failures = failures
+
+
+class Pipeline:
+    """
+    A parsed hOCR document passed through the tools.
+    """
+
+    def __init__(self, document: etree._ElementTree[html.HtmlElement], directory: str = "") -> None:
+        """
+        :param document: The parsed hOCR document.
+        :param directory: The directory relative image paths of the pages
+                          refer to.
+        """
+        self.document = document
+        self.directory = directory
+        self.check_results: list[tuple[bool, str]] = []
+        """
+        The result and the message of each check of the latest
+        :meth:`check` call.
+        """
+
+    @classmethod
+    def load(cls, source: InputType) -> Pipeline:
+        """
+        Start a pipeline from a single hOCR document.
+
+        :param source: hOCR file or content to load.
+        :return: The new pipeline.
+        """
+        PROFILER.count_source(source)
+        with PROFILER.timer('html.parse'):
+            document = parse_html(source)
+        return cls(document, directory=get_directory(source))
+
+    @classmethod
+    def combine(cls, sources: Sequence[InputType]) -> Pipeline:
+        """
+        Start a pipeline from the combination of the given hOCR documents, see
+        :func:`~hocr_tools_lib.tools.hocr_combine.combine`.
+
+        :param sources: hOCR files or contents to combine.
+        :return: The new pipeline.
+        """
+        documents = []
+        for source in sources:
+            PROFILER.count_source(source)
+            with PROFILER.timer('html.parse'):
+                documents.append(parse_html(source))
+        return cls(combine_documents(documents), directory=get_directory(sources[0]))
+
+    @property
+    def pages(self) -> list[html.HtmlElement]:
+        """
+        The pages of the document.
+        """
+        return self.document.xpath("//*[@class='ocr_page']")  # type: ignore[no-any-return]
+
+    def merge_dc(self, dc: InputType) -> Pipeline:
+        """
+        Merge the Dublin Core metadata into the document, see
+        :func:`~hocr_tools_lib.tools.hocr_merge_dc.merge_dc`.
+
+        :param dc: The Dublin Core metadata file or content.
+        :return: The pipeline itself.
+        """
+        PROFILER.count_source(dc)
+        with PROFILER.timer('html.parse'):
+            dc_doc = parse_html(dc, html.XHTMLParser())
+        merge_dc_documents(dc_doc=dc_doc, hocr_doc=self.document)
+        return self
+
+    def check(self, no_overlap: bool = False, strict: bool = False) -> Pipeline:
+        """
+        Check the document for conformance with the hOCR format spec, see
+        :class:`~hocr_tools_lib.tools.hocr_check.Checker`. The results are
+        available from :attr:`check_results` afterwards.
+
+        :param no_overlap: Disable the overlap checks.
+        :param strict: Raise an error if any of the checks failed.
+        :return: The pipeline itself.
+        """
+        checker = CollectingChecker(hocr_file=self.document, no_overlap=no_overlap)
+        checker.check()
+        self.check_results = checker.results
+        failures = [message for ok, message in self.check_results if not ok]
+        if strict and failures:
+            raise CheckFailedError(failures)
+        return self
+
+    def tostring(self) -> bytes:
+        """
+        Serialize the document.
+
+        :return: The hOCR data.
+        """
+        with PROFILER.timer('serialize'):
+            return etree.tostring(self.document, pretty_print=True)
+
+    def write(self, target: os.PathLike[str] | str | BinaryIO) -> None:
+        """
+        Write the document.
+
+        :param target: The file to write to.
+        """
+        with PROFILER.timer('serialize'):
+            self.document.write(target, pretty_print=True)
+
+    def split(self, pattern: str = "base-%03d.html") -> list[str]:
+        """
+        Write each page into its own file, see
+        :func:`~hocr_tools_lib.tools.hocr_split.split`.
+
+        :param pattern: Naming pattern for the output files.
+        :return: The names of the written files.
+        """
+        filenames = []
+        for index, page_doc in enumerate(split_document(self.document), start=1):
+            filename = pattern % index
+            with PROFILER.timer('serialize'):
+                page_doc.write(filename, pretty_print=True)
+            filenames.append(filename)
+        return filenames
+
+    def export_pdf(
+            self, savefile: str, images: Sequence[str] | None = None, default_dpi: int = 300, title: str = "",
+            text_objects: str = "word", text_only: bool = False, merge_onto: str | None = None,
+            image_options: ImageOptions | None = None, image_executor: Executor | None = None,
+            chunk_size: int | None = None, work_directory: str | None = None, cache: ResultCache | None = None
+    ) -> None:
+        """
+        Create a searchable PDF of the pages, see
+        :func:`~hocr_tools_lib.tools.hocr_pdf.export_pdf`.
+
+        :param savefile: The PDF file to write.
+        :param images: The image file for each page. Defaults to the
+                       ``image`` property of the pages, relative to
+                       :attr:`directory`.
+        :param default_dpi: The image resolution to use if the image does not
+                            provide it.
+        :param title: The title of the PDF document.
+        :param text_objects: How to emit the text layer, see
+                             :data:`~hocr_tools_lib.tools.hocr_pdf.TEXT_OBJECT_MODES`.
+        :param text_only: Only create the invisible text layer, sized
+                          according to the pages, without any images.
+        :param merge_onto: Existing PDF file to merge the text layer onto page
+                           by page. Implies `text_only`.
+        :param image_options: If set, downsample and re-encode the images
+                              according to these settings.
+        :param image_executor: The executor to prepare the images in.
+                               Defaults to a thread pool.
+        :param chunk_size: If set, render this many pages at once into
+                           resumable intermediate files, see
+                           :func:`~hocr_tools_lib.tools.hocr_pdf.write_chunked_pdf`.
+        :param work_directory: The directory of the intermediate files.
+        :param cache: If set, only render the pages whose image or hOCR data
+                      changed and take the others from this cache.
+        """
+        pages = self.pages
+        if text_only or merge_onto:
+            write_pdf(
+                pages=((None, page) for page in pages), title=title, default_dpi=default_dpi, savefile=savefile,
+                text_objects=text_objects, merge_onto=merge_onto, chunk_size=chunk_size, work_directory=work_directory,
+                cache=cache
+            )
+            return
+        if images is None:
+            images = [get_page_image(page, index, directory=self.directory) for index, page in enumerate(pages)]
+        if len(images) != len(pages):
+            raise ValueError(f"Got {len(images)} images for {len(pages)} pages.")
+        write_pdf(
+            pages=zip(images, pages), title=title, default_dpi=default_dpi, savefile=savefile, text_objects=text_objects,
+            image_options=image_options, image_executor=image_executor, chunk_size=chunk_size,
+            work_directory=work_directory, cache=cache
+        )
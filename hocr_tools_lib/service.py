@@ -0,0 +1,582 @@
+"""
+Long-running local service exposing the tools over HTTP.
+
+Starting the interpreter and importing the dependencies usually takes longer
+than processing a single page. The service pays for this once and then
+answers JSON requests of the form::
+
+    {"operation": "lines", "arguments": {"hocr": "/path/to/page.hocr"}}
+
+with ``{"result": ...}`` or ``{"error": "..."}``. Paths are interpreted by the
+service, thus should be absolute. Inputs are parsed for each request and never
+kept afterwards, unless the evaluation operations get an explicit
+``cache_dir``.
+
+The service listens on localhost or on a Unix socket and only accepts requests
+addressed to a local host name, which protects against DNS rebinding. If a
+token is configured, each request has to send it as
+``Authorization: Bearer <token>``. This does not replace a proper
+authentication, so the service should never be exposed to other hosts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hmac
+import inspect
+import json
+import logging
+import os
+import socketserver
+import sys
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+from hocr_tools_lib.client import DEFAULT_HOST, DEFAULT_PORT, TOKEN_VARIABLE
+
+
+logger = logging.getLogger(__name__)
+del logging
+
+MAX_REQUEST_SIZE = 16 * 1024 * 1024
+"""
+Upper bound for the size of a request body in bytes.
+"""
+
+LOCAL_HOSTS = frozenset({"localhost", "127.0.0.1", "[::1]"})
+"""
+Host names accepted in the ``Host`` header besides the one listened on.
+"""
+
+
+def _get_cache(arguments: dict[str, Any]) -> Any:
+    cache_directory = arguments.pop("cache_dir", None)
+    if cache_directory is None:
+        return None
+    from hocr_tools_lib.utils.cache_utils import ResultCache
+
+    return ResultCache(cache_directory)
+
+
+def _check(hocr: str, no_overlap: bool = False, fast: bool = False) -> list[dict[str, Any]]:
+    from hocr_tools_lib.tools.hocr_check import CollectingChecker
+
+    checker = CollectingChecker(hocr_file=hocr, no_overlap=no_overlap, fast=fast)
+    checker.check()
+    return [{"ok": ok, "message": message} for ok, message in checker.results]
+
+
+def _combine(filenames: list[str]) -> str:
+    from hocr_tools_lib.tools.hocr_combine import combine
+
+    return combine(filenames)
+
+
+def _cut(hocr: str, debug: bool = False, write_hocr: bool = True, columns: int | None = None) -> None:
+    from hocr_tools_lib.tools.hocr_cut import cut
+
+    cut(hocr=hocr, debug=debug, write_hocr=write_hocr, columns=columns)
+
+
+def _eval(truth: str, actual: str, **arguments: Any) -> dict[str, Any]:
+    from hocr_tools_lib.tools.hocr_eval import evaluate
+    from hocr_tools_lib.utils.edit_utils import ErrorStats
+
+    cache = _get_cache(arguments)
+    image = arguments.pop("image", None)
+    stats = ErrorStats() if arguments.pop("stats", False) else None
+    _, segmentation_errors, segmentation_ocr_errors, ocr_errors = evaluate(
+        truth=truth, actual=actual, img_file=image, cache=cache, stats=stats, **arguments
+    )
+    result: dict[str, Any] = {
+        "segmentation_errors": segmentation_errors,
+        "segmentation_ocr_errors": segmentation_ocr_errors,
+        "ocr_errors": ocr_errors,
+    }
+    if stats is not None:
+        result["stats"] = stats.to_dict()
+    return result
+
+
+def _eval_geom(truth: str, actual: str, **arguments: Any) -> list[list[tuple[int, int, float, int]]]:
+    from hocr_tools_lib.tools.hocr_eval_geom import evaluate_geometries
+
+    cache = _get_cache(arguments)
+    return [
+        [truth_stats.to_tuple(), actual_stats.to_tuple()]
+        for truth_stats, actual_stats in evaluate_geometries(truth=truth, actual=actual, cache=cache, **arguments)
+    ]
+
+
+def _eval_lines(text: str, hocr: str, **arguments: Any) -> dict[str, Any]:
+    from dataclasses import asdict
+
+    from hocr_tools_lib.tools.hocr_eval_lines import evaluate_lines, LineResult
+    from hocr_tools_lib.utils.edit_utils import ErrorStats
+
+    cache = _get_cache(arguments)
+    stats = ErrorStats() if arguments.pop("stats", False) else None
+    line_results: list[LineResult] | None = [] if arguments.pop("lines", False) else None
+    with open(text, encoding="utf-8") as tfile:
+        segmentation_errors, ocr_errors = evaluate_lines(
+            tfile=tfile, hfile=hocr, cache=cache, stats=stats, line_results=line_results, **arguments
+        )
+    result: dict[str, Any] = {"segmentation_errors": segmentation_errors, "ocr_errors": ocr_errors}
+    if stats is not None:
+        result["stats"] = stats.to_dict()
+    if line_results is not None:
+        result["lines"] = [asdict(line) for line in line_results]
+    return result
+
+
+def _extract_images(hocr: str, basename: str, **arguments: Any) -> None:
+    from hocr_tools_lib.tools.hocr_extract_images import extract_images
+
+    extract_images(hocr=hocr, basename=basename, **arguments)
+
+
+def _lines(hocr: str) -> list[str]:
+    from hocr_tools_lib.tools.hocr_lines import lines
+
+    return list(lines(hocr))
+
+
+def _merge_dc(dc: str, hocr: str) -> str:
+    from hocr_tools_lib.tools.hocr_merge_dc import merge_dc
+
+    return merge_dc(dc=dc, hocr=hocr).decode("UTF-8")
+
+
+def _pdf(savefile: str, directory: str | None = None, hocr: str | None = None, **arguments: Any) -> None:
+    from hocr_tools_lib.tools.hocr_pdf import export_hocr_pdf, export_pdf
+
+    image_options = arguments.pop("image_options", None)
+    if image_options is not None:
+        from hocr_tools_lib.utils.image_utils import ImageOptions
+
+        arguments["image_options"] = ImageOptions(**image_options)
+    arguments["cache"] = _get_cache(arguments)
+    if hocr is not None:
+        export_hocr_pdf(hocr=hocr, savefile=savefile, **arguments)
+    elif directory is not None:
+        export_pdf(directory=directory, savefile=savefile, **arguments)
+    else:
+        raise InvalidArgumentsError("Either the directory or the hOCR file is required.")
+
+
+def _sidecar(hocr: str, output: str | None = None) -> str:
+    from hocr_tools_lib.tools.hocr_sidecar import create_sidecar
+
+    return create_sidecar(hocr=hocr, output=output)
+
+
+def _split(hocr: str, pattern: str) -> None:
+    from hocr_tools_lib.tools.hocr_split import split
+
+    split(hocr=hocr, pattern=pattern)
+
+
+def _wordfreq(hocr: str, **arguments: Any) -> list[str]:
+    from hocr_tools_lib.tools.hocr_wordfreq import word_frequencies
+
+    return list(word_frequencies(hocr_in=hocr, **arguments))
+
+
+def _eval_matches(truth: str, actual: str, **arguments: Any) -> list[dict[str, float]]:
+    from hocr_tools_lib.tools.hocr_eval_geom import evaluate_matches
+
+    cache = _get_cache(arguments)
+    return [
+        {
+            "threshold": stats.threshold, "precision": stats.precision, "recall": stats.recall, "f1": stats.f1,
+            "mean_iou": stats.mean_iou,
+        }
+        for stats in evaluate_matches(truth=truth, actual=actual, cache=cache, **arguments)
+    ]
+
+
+OPERATIONS: dict[str, Callable[..., Any]] = {
+    "check": _check,
+    "combine": _combine,
+    "cut": _cut,
+    "eval": _eval,
+    "eval-geom": _eval_geom,
+    "eval-lines": _eval_lines,
+    "eval-matches": _eval_matches,
+    "extract-images": _extract_images,
+    "lines": _lines,
+    "merge-dc": _merge_dc,
+    "pdf": _pdf,
+    "sidecar": _sidecar,
+    "split": _split,
+    "wordfreq": _wordfreq,
+}
+"""
+Operations mapped to the functions implementing them. The functions are
+called with the arguments of the request as keyword arguments and return a
+value serializable as JSON.
+"""
+
+
+class UnknownOperationError(ValueError):
+    """
+    The requested operation does not exist.
+    """
+    pass
+
+
+class InvalidArgumentsError(ValueError):
+    """
+    The arguments do not match the requested operation.
+    """
+    pass
+
+
+class ServiceBusyError(RuntimeError):
+    """
+    The maximum number of concurrent requests has been reached.
+    """
+    pass
+
+
+def validate_arguments(operation: str, arguments: dict[str, Any]) -> None:
+    """
+    Check the arguments against the signature of the given operation.
+
+    Arguments passed on to the underlying tool are checked by the tool
+    itself.
+
+    :param operation: The name of the operation.
+    :param arguments: The keyword arguments of the operation.
+    :raises UnknownOperationError: The operation does not exist.
+    :raises InvalidArgumentsError: Arguments are missing or unexpected.
+    """
+    try:
+        function = OPERATIONS[operation]
+    except KeyError:
+        raise UnknownOperationError(f"Unknown operation {operation!r}") from None
+    try:
+        inspect.signature(function).bind(**arguments)
+    except TypeError as exception:
+        raise InvalidArgumentsError(f"Invalid arguments for {operation!r}: {exception}") from None
+
+
+def run_operation(operation: str, arguments: dict[str, Any]) -> Any:
+    """
+    Run the given operation inside the current process.
+
+    :param operation: The name of the operation.
+    :param arguments: The keyword arguments of the operation.
+    :return: The result of the operation.
+    """
+    try:
+        function = OPERATIONS[operation]
+    except KeyError:
+        raise UnknownOperationError(f"Unknown operation {operation!r}") from None
+    return function(**arguments)
+
+
+def _preload() -> None:
+    # Import all tools once when starting a worker instead of on the first request.
+    import importlib
+
+    for name in [
+        "hocr_check", "hocr_combine", "hocr_cut", "hocr_eval", "hocr_eval_geom", "hocr_eval_lines",
+        "hocr_extract_images", "hocr_lines", "hocr_merge_dc", "hocr_pdf", "hocr_sidecar", "hocr_split", "hocr_wordfreq",
+    ]:
+        importlib.import_module(f"hocr_tools_lib.tools.{name}")
+    import PIL.Image
+    import reportlab.pdfgen.canvas  # type: ignore[import-untyped]  # noqa: F401
+
+    PIL.Image.init()
+
+
+class Service:
+    """
+    Run the operations in a pool of worker processes with a limit on the
+    number of concurrent requests.
+    """
+
+    def __init__(self, workers: int | None = None, max_requests: int | None = None) -> None:
+        """
+        :param workers: The number of worker processes. Use ``0`` to run the
+                        operations inside the threads handling the requests,
+                        ``None`` for one worker per CPU.
+        :param max_requests: The maximum number of requests being processed or
+                             waiting for a worker at the same time. Further
+                             requests are rejected. Defaults to twice the
+                             number of workers.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.max_requests = max_requests or 2 * (workers or os.cpu_count() or 1)
+        self._slots = threading.BoundedSemaphore(self.max_requests)
+        self._lock = threading.Lock()
+        self._executor: Executor | None = None
+        if workers == 0:
+            _preload()
+        else:
+            self._executor = self._create_executor()
+
+    def _create_executor(self) -> Executor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_preload)
+
+    def run(self, operation: str, arguments: dict[str, Any]) -> Any:
+        """
+        Run the given operation.
+
+        :param operation: The name of the operation.
+        :param arguments: The keyword arguments of the operation.
+        :return: The result of the operation.
+        :raises InvalidArgumentsError: The arguments do not match the
+                                       operation.
+        :raises ServiceBusyError: The maximum number of concurrent requests
+                                  has been reached.
+        """
+        validate_arguments(operation, arguments)
+        if not self._slots.acquire(blocking=False):
+            raise ServiceBusyError(f"More than {self.max_requests} concurrent requests")
+        try:
+            if self._executor is None:
+                return run_operation(operation, arguments)
+            executor = self._executor
+            try:
+                return executor.submit(run_operation, operation, arguments).result()
+            except BrokenProcessPool:
+                # A worker died, for example due to running out of memory.
+                # Replace the pool to keep serving further requests.
+                with self._lock:
+                    if self._executor is executor:
+                        logger.error("Worker pool broken, restarting it.")
+                        self._executor = self._create_executor()
+                raise
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """
+        Stop the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Handle the HTTP requests of the service.
+
+    ``POST /`` runs an operation, ``GET /`` reports the available operations.
+    """
+
+    server: ServiceHTTPServer | ServiceUnixHTTPServer
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: HTTPStatus, data: Any) -> None:
+        body = json.dumps(data).encode("UTF-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reject(self, status: HTTPStatus, message: str) -> None:
+        # The body has not been read, thus the connection cannot be reused.
+        self.close_connection = True
+        self._send_json(status, {"error": message})
+
+    def _check_access(self) -> bool:
+        allowed_hosts = self.server.allowed_hosts
+        if allowed_hosts is not None:
+            host = self.headers.get("Host", "")
+            if not host.endswith("]"):
+                # Strip the port, but keep IPv6 addresses in brackets.
+                host = host.rpartition(":")[0] or host
+            if host.lower() not in allowed_hosts:
+                self._reject(HTTPStatus.FORBIDDEN, "Host not allowed")
+                return False
+        token = self.server.token
+        if token is not None:
+            authorization = self.headers.get("Authorization", "")
+            if not hmac.compare_digest(authorization.encode("UTF-8"), f"Bearer {token}".encode("UTF-8")):
+                self._reject(HTTPStatus.UNAUTHORIZED, "Invalid or missing token")
+                return False
+        return True
+
+    def do_GET(self) -> None:  # noqa: N802
+        if not self._check_access():
+            return
+        self._send_json(HTTPStatus.OK, {"status": "ok", "operations": sorted(OPERATIONS)})
+
+    def do_POST(self) -> None:  # noqa: N802
+        if not self._check_access():
+            return
+        if self.headers.get_content_type() != "application/json":
+            self._reject(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Expected application/json")
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._reject(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+            return
+        if length > MAX_REQUEST_SIZE:
+            self._reject(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request too large")
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+            operation = request["operation"]
+            arguments = request.get("arguments") or {}
+            if not isinstance(operation, str) or not isinstance(arguments, dict):
+                raise TypeError("Invalid types of the operation or arguments")
+        except (ValueError, KeyError, TypeError, AttributeError) as exception:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": f"Invalid request: {exception}"})
+            return
+
+        try:
+            result = self.server.service.run(operation, arguments)
+        except UnknownOperationError as exception:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": str(exception)})
+        except ServiceBusyError as exception:
+            self._send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(exception)})
+        except InvalidArgumentsError as exception:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(exception)})
+        except Exception as exception:
+            logger.warning("Operation %s failed: %s", operation, exception)
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(exception).__name__}: {exception}"})
+        else:
+            self._send_json(HTTPStatus.OK, {"result": result})
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        # The client address is not available for Unix sockets.
+        logger.info(format, *args)
+
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    """
+    HTTP server listening on a TCP port.
+    """
+
+    service: Service
+    allowed_hosts: frozenset[str] | None
+    token: str | None
+
+
+if sys.platform != "win32":
+    class ServiceUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """
+        HTTP server listening on a Unix socket. Not available on Windows.
+        """
+
+        daemon_threads = True
+        service: Service
+        allowed_hosts: frozenset[str] | None
+        token: str | None
+else:  # pragma: no cover
+    ServiceUnixHTTPServer = None
+
+
+def create_server(
+        service: Service, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_socket: str | None = None,
+        token: str | None = None
+) -> ServiceHTTPServer | ServiceUnixHTTPServer:
+    """
+    Create the HTTP server for the given service.
+
+    :param service: The service to run the operations with.
+    :param host: The host to listen on for TCP connections. Requests over TCP
+                 have to address this host or one of :data:`LOCAL_HOSTS`.
+    :param port: The port to listen on for TCP connections. Use ``0`` to
+                 choose a free port.
+    :param unix_socket: If set, listen on this Unix socket instead.
+    :param token: If set, the token each request has to send as
+                  ``Authorization: Bearer <token>``.
+    :return: The server, not serving yet.
+    """
+    server: ServiceHTTPServer | ServiceUnixHTTPServer
+    if unix_socket:
+        if ServiceUnixHTTPServer is None:
+            raise OSError("Unix sockets are not supported on this platform")
+        server = ServiceUnixHTTPServer(unix_socket, RequestHandler)
+        # Other hosts cannot connect to a Unix socket at all.
+        server.allowed_hosts = None
+    else:
+        server = ServiceHTTPServer((host, port), RequestHandler)
+        server.allowed_hosts = LOCAL_HOSTS | {f"[{host}]" if ":" in host else host.lower()}
+    server.service = service
+    server.token = token
+    return server
+
+
+def serve(
+        host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_socket: str | None = None,
+        workers: int | None = None, max_requests: int | None = None, token: str | None = None
+) -> None:
+    """
+    Run the service until interrupted.
+
+    :param host: The host to listen on for TCP connections.
+    :param port: The port to listen on for TCP connections.
+    :param unix_socket: If set, listen on this Unix socket instead.
+    :param workers: The number of worker processes, see :class:`~Service`.
+    :param max_requests: The maximum number of concurrent requests, see
+                         :class:`~Service`.
+    :param token: If set, the token each request has to send, see
+                  :func:`create_server`.
+    """
+    service = Service(workers=workers, max_requests=max_requests)
+    try:
+        server = create_server(service, host=host, port=port, unix_socket=unix_socket, token=token)
+        try:
+            logger.info(
+                "Serving on %s with %s worker(s) and at most %s concurrent requests",
+                unix_socket or f"http://{host}:{port}", service.workers, service.max_requests
+            )
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if unix_socket:
+                os.unlink(unix_socket)
+    finally:
+        service.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Serve the tools to local clients to avoid the startup cost for "
+            "each invocation"
+        ),
+        epilog=f"If the environment variable {TOKEN_VARIABLE} is set, requests have to send its value as a token."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help="default: %(default)s")
+    parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help="default: %(default)s")
+    parser.add_argument("-u", "--unix-socket", help="listen on this Unix socket instead of TCP")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="number of worker processes, 0 to run inside the server process, default: one per CPU"
+    )
+    parser.add_argument(
+        "--max-requests", type=int, default=None,
+        help="maximum number of concurrent requests, default: twice the number of workers"
+    )
+    args = parser.parse_args()
+
+    import logging
+    import signal
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    # Clean up the socket and the workers when being stopped by a service manager.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    serve(
+        host=args.host, port=args.port, unix_socket=args.unix_socket,
+        workers=args.workers, max_requests=args.max_requests, token=os.environ.get(TOKEN_VARIABLE) or None
+    )
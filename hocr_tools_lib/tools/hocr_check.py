@@ -6,12 +6,15 @@ from __future__ import annotations
 
 import argparse
 import sys
-from os import PathLike
 
 from lxml import etree, html
 
+from hocr_tools_lib.utils.input_utils import parse_html
 from hocr_tools_lib.utils.node_utils import get_bbox, get_prop
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
 from hocr_tools_lib.utils.rectangle_utils import mostly_non_overlapping
+from hocr_tools_lib.utils.scan_utils import GeometryScan, scan_geometry
+from hocr_tools_lib.utils.typing_utils import InputType
 
 
 class Checker:
@@ -24,14 +27,33 @@ class Checker:
     Number of checks performed.
     """
 
-    def __init__(self, hocr_file: PathLike[str], no_overlap: bool = False) -> None:
+    def __init__(
+            self, hocr_file: InputType | etree._ElementTree[html.HtmlElement], no_overlap: bool = False,
+            fast: bool = False
+    ) -> None:
         """
-        :param hocr_file: hOCR file to check.
+        :param hocr_file: hOCR file or content to check, or the already
+                          parsed document.
         :param no_overlap: Disable the overlap checks.
+        :param fast: Only scan the classes and bounding boxes of the file
+                     instead of building its document tree, see
+                     :func:`~hocr_tools_lib.utils.scan_utils.scan_geometry`.
+                     Ignored for parsed documents.
         """
         self.test_counter = 0
         self.no_overlap = no_overlap
-        self.doc: etree._ElementTree[html.HtmlElement] = html.parse(hocr_file)
+        self.doc: etree._ElementTree[html.HtmlElement] | None = None
+        self.scan: GeometryScan | None = None
+        if isinstance(hocr_file, etree._ElementTree):
+            self.doc = hocr_file
+            return
+        PROFILER.count_source(hocr_file)
+        if fast:
+            with PROFILER.timer('html.scan'):
+                self.scan = scan_geometry(hocr_file)
+            return
+        with PROFILER.timer('html.parse'):
+            self.doc = parse_html(hocr_file)
 
     def test_ok(self, v: bool, msg: str) -> None:
         """
@@ -49,9 +71,11 @@ class Checker:
         """
         Top-level check method executing all checks.
         """
-        self.check_xml_structure()
+        with PROFILER.timer('check.structure'):
+            self.check_xml_structure()
         if not self.no_overlap:
-            self.check_geometry()
+            with PROFILER.timer('check.geometry'):
+                self.check_geometry()
 
         # FIXME add many other checks:
         # - containment of paragraphs, careas, etc.
@@ -68,6 +92,10 @@ class Checker:
         """
         Check the XML structure.
         """
+        if self.scan is not None:
+            self._check_scanned_structure(self.scan)
+            return
+        assert self.doc is not None
         # Check for presence of meta information.
         self.test_ok(
             self.doc.xpath("//meta[@name='ocr-system']") != [],
@@ -85,6 +113,7 @@ class Checker:
 
         # Check that lines are inside pages.
         lines = self.doc.xpath("//*[@class='ocr_line']")
+        PROFILER.count('elements', len(lines))
         for line_idx, line in enumerate(lines):
             self.test_ok(
                 line.xpath("./ancestor::*[@class='ocr_page']"),
@@ -93,6 +122,7 @@ class Checker:
 
         # Check that pars are inside pages.
         pars = self.doc.xpath("//*[@class='ocr_par']")
+        PROFILER.count('elements', len(pars))
         for par_idx, par in enumerate(pars):
             self.test_ok(
                 par.xpath("./ancestor::*[@class='ocr_page']"),
@@ -101,19 +131,43 @@ class Checker:
 
         # Check that careas are inside pages.
         careas = self.doc.xpath("//*[@class='ocr_carea']")
+        PROFILER.count('elements', len(careas))
         for carea_idx, carea in enumerate(careas):
             self.test_ok(
                 carea.xpath("./ancestor::*[@class='ocr_page']"),
                 f"ocr_carea {carea_idx:2d} in an ocr_page"
             )
 
+    def _check_scanned_structure(self, scan: GeometryScan) -> None:
+        # The same checks as above on the scanned elements.
+        self.test_ok('ocr-system' in scan.meta_names, "//meta[@name='ocr-system']")
+        self.test_ok('ocr-capabilities' in scan.meta_names, "//meta[@name='ocr-capabilities']")
+
+        pages = scan.find('ocr_page')
+        self.test_ok(pages != [], "has a page")
+
+        # Mark the descendants of all pages at once.
+        in_page = bytearray(len(scan))
+        for page in pages:
+            in_page[page + 1:scan.ends[page]] = b'\x01' * (scan.ends[page] - page - 1)
+        for class_name in ('ocr_line', 'ocr_par', 'ocr_carea'):
+            indices = scan.find(class_name)
+            PROFILER.count('elements', len(indices))
+            for idx, index in enumerate(indices):
+                self.test_ok(bool(in_page[index]), f"{class_name} {idx:2d} in an ocr_page")
+
     def check_geometry(self) -> None:
         """
         Check geometry-related aspects.
         """
+        if self.scan is not None:
+            self._check_scanned_geometry(self.scan)
+            return
+        assert self.doc is not None
         for page in self.doc.xpath("//*[@class='ocr_page']"):
+            PROFILER.count('pages')
             # Check lines.
-            objs = page.xpath("//*[@class='ocr_line']")
+            objs = page.xpath(".//*[@class='ocr_line']")
             line_bboxes = [
                 get_bbox(obj) for obj in objs if get_prop(obj, 'bbox')
             ]
@@ -122,7 +176,7 @@ class Checker:
                 'mostly_nonoverlapping/line'
             )
             # Check paragraphs.
-            objs = page.xpath("//*[@class='ocr_par']")
+            objs = page.xpath(".//*[@class='ocr_par']")
             par_bboxes = [
                 get_bbox(obj) for obj in objs if get_prop(obj, 'bbox')
             ]
@@ -130,7 +184,7 @@ class Checker:
                 mostly_non_overlapping(par_bboxes), 'mostly_nonoverlapping/par'
             )
             # Check careas.
-            objs = page.xpath("//*[@class='ocr_carea']")
+            objs = page.xpath(".//*[@class='ocr_carea']")
             carea_bboxes = [
                 get_bbox(obj) for obj in objs if get_prop(obj, 'bbox')
             ]
@@ -139,6 +193,47 @@ class Checker:
                 'mostly_nonoverlapping/carea'
             )
 
+    def _check_scanned_geometry(self, scan: GeometryScan) -> None:
+        # The same checks as above on the scanned elements.
+        for page in scan.find('ocr_page'):
+            PROFILER.count('pages')
+            for class_name, name in (('ocr_line', 'line'), ('ocr_par', 'par'), ('ocr_carea', 'carea')):
+                bboxes = [scan.get_bbox(index) for index in scan.find(class_name, page, scan.ends[page])]
+                self.test_ok(
+                    mostly_non_overlapping([bbox for bbox in bboxes if bbox is not None]),
+                    f'mostly_nonoverlapping/{name}'
+                )
+
+
+class CollectingChecker(Checker):
+    """
+    Checker collecting the results instead of reporting them to stderr.
+    """
+
+    def __init__(
+            self, hocr_file: InputType | etree._ElementTree[html.HtmlElement], no_overlap: bool = False,
+            fast: bool = False
+    ) -> None:
+        """
+        :param hocr_file: hOCR file or content to check, or the already
+                          parsed document.
+        :param no_overlap: Disable the overlap checks.
+        :param fast: Only scan the classes and bounding boxes of the file
+                     instead of building its document tree.
+        """
+        super().__init__(hocr_file=hocr_file, no_overlap=no_overlap, fast=fast)
+        self.results: list[tuple[bool, str]] = []
+
+    def test_ok(self, v: bool, msg: str) -> None:
+        """
+        Record the status of the current check.
+
+        :param v: The test result.
+        :param msg: The message describing the check.
+        """
+        self.test_counter += 1
+        self.results.append((bool(v), msg))
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(
@@ -159,9 +254,16 @@ def main() -> None:
         help="Disable the overlap checks",
         action="store_true"
     )
+    parser.add_argument(
+        "--fast",
+        help="Only scan the classes and bounding boxes instead of building the document tree",
+        action="store_true"
+    )
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    checker = Checker(hocr_file=args.file, no_overlap=args.nooverlap)
-    checker.check()
+    with profiling_from_arguments(args):
+        checker = Checker(hocr_file=args.file, no_overlap=args.nooverlap, fast=args.fast)
+        checker.check()
 
     args.file.close()
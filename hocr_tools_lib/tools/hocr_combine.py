@@ -5,28 +5,53 @@ Combine multiple hOCR documents into one.
 from __future__ import annotations
 
 import argparse
+from typing import Sequence
 
 from lxml import etree, html
 
+from hocr_tools_lib.utils.input_utils import parse_html
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
+from hocr_tools_lib.utils.typing_utils import InputType
 
-def combine(filenames: list[str]) -> str:
+
+def combine(filenames: Sequence[InputType]) -> str:
     """
     Combine the given hOCR documents into one.
 
-    :param filenames: hOCR documents to combine.
+    :param filenames: hOCR files or contents to combine.
     :return: The combined hOCR document content.
     """
-    doc = html.parse(filenames[0])
+    documents = []
+    for filename in filenames:
+        PROFILER.count_source(filename)
+        with PROFILER.timer('html.parse'):
+            documents.append(parse_html(filename))
+    doc = combine_documents(documents)
+
+    with PROFILER.timer('serialize'):
+        return etree.tostring(doc, pretty_print=True).decode('UTF-8')
+
+
+def combine_documents(documents: Sequence[etree._ElementTree[html.HtmlElement]]) -> etree._ElementTree[html.HtmlElement]:
+    """
+    Combine the given parsed hOCR documents into one.
+
+    :param documents: Parsed hOCR documents to combine. The pages of the
+                      further documents are moved into the first one.
+    :return: The first document, now holding all pages.
+    """
+    doc = documents[0]
     pages = doc.xpath("//*[@class='ocr_page']")
+    PROFILER.count('pages', len(pages))
     container = pages[-1].getparent()
 
-    for filename in filenames[1:]:
-        doc2 = html.parse(filename)
+    for doc2 in documents[1:]:
         pages = doc2.xpath("//*[@class='ocr_page']")
+        PROFILER.count('pages', len(pages))
         for page in pages:
             container.append(page)
 
-    return etree.tostring(doc, pretty_print=True).decode('UTF-8')
+    return doc
 
 
 def main() -> None:
@@ -36,7 +61,9 @@ def main() -> None:
     parser.add_argument(
         "filenames", help="hOCR files", nargs='+'
     )
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    combined = combine(args.filenames)
-    print(combined)
+    with profiling_from_arguments(args):
+        combined = combine(args.filenames)
+        print(combined)
@@ -7,120 +7,484 @@ nicely, e.g. cutting double pages or double columns.
 from __future__ import annotations
 
 import argparse
+import copy
 import logging
 import os
 import sys
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import Iterable, List, Sequence, Tuple
 
-from lxml import html
+from lxml.html import HtmlElement
 from PIL import Image, ImageDraw
 
+from hocr_tools_lib.tools.hocr_split import split_document
+from hocr_tools_lib.utils.input_utils import get_directory, parse_html
 from hocr_tools_lib.utils.node_utils import get_bbox, get_prop
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
+from hocr_tools_lib.utils.rectangle_utils import RectangleType
+from hocr_tools_lib.utils.typing_utils import InputType
 
 
 logger = logging.getLogger(__name__)
 del logging
 
+SIDES = ('left', 'right')
+"""
+The halves of a cut page.
+"""
+
+_COORDINATE_PROPS = ('bbox', 'x_bboxes')
+
+_DebugMarksType = Tuple[List[Tuple[RectangleType, int]], List[Tuple[float, int, int]]]
+
+
+@dataclass
+class PageCut:
+    """
+    The position to cut a page at.
+    """
+
+    position: int
+    """
+    The x coordinate of the cut.
+    """
+
+    middle_left: float
+    """
+    The median right edge of the lines of the left half.
+    """
+
+    middle_right: float
+    """
+    The median left edge of the lines of the right half.
+    """
+
+    lines: List[Tuple[RectangleType, str]] = field(default_factory=list)
+    """
+    The bounding box and the side of each line.
+    """
+
 
-def cut(hocr: os.PathLike[str], debug: bool = False) -> None:
+def get_side(bbox: RectangleType, middle: float) -> str:
+    """
+    Get the half of the page the given box mostly belongs to.
+
+    :param bbox: The box to locate.
+    :param middle: The x coordinate separating the halves.
+    :return: The side, see :data:`SIDES`.
+    """
+    if bbox[0] > middle:
+        return "right"
+    if bbox[2] < middle:
+        return "left"
+    if bbox[2] - middle > middle - bbox[0]:
+        return "right"
+    return "left"
+
+
+def find_cut(page: HtmlElement) -> PageCut:
+    """
+    Find the position to cut the given page at, between the median right edge
+    of the lines on the left and the median left edge of the lines on the
+    right of the middle of the page.
+
+    :param page: The page to cut.
+    :return: The cut of the page.
+    """
+    bbox = get_bbox(page)
+    assert bbox is not None
+    middle = bbox[2] / 2
+
+    lines = []
+    left_ends = []
+    right_starts = []
+    for line in page.xpath(".//*[@class='ocr_line']"):
+        PROFILER.count('elements')
+        b = get_bbox(line)
+        assert b is not None
+        side = get_side(b, middle)
+        if side == "right":
+            right_starts.append(b[0])
+        else:
+            left_ends.append(b[2])
+        lines.append((b, side))
+
+    left_ends.sort()
+    right_starts.sort()
+    # Fall back to the middle of the page for a half without any lines.
+    middle_left = left_ends[len(left_ends) // 2] if left_ends else middle
+    middle_right = right_starts[len(right_starts) // 2] if right_starts else middle
+    position = int((middle_left + middle_right) / 2)
+    return PageCut(position=position, middle_left=middle_left, middle_right=middle_right, lines=lines)
+
+
+def get_coverage(boxes: Iterable[RectangleType], width: int) -> array[int]:
+    """
+    Get the horizontal projection profile of the given boxes.
+
+    Each box only marks its start and its end in a difference array, which is
+    summed up at once afterwards, thus this runs in linear time of the number
+    of boxes plus the width.
+
+    :param boxes: The boxes to project, usually the lines of a page.
+    :param width: The width of the page.
+    :return: The number of boxes covering each x coordinate of the page.
+    """
+    delta = array('l', [0]) * (width + 1)
+    for box in boxes:
+        start = min(max(int(box[0]), 0), width)
+        end = min(max(int(box[2]), start), width)
+        delta[start] += 1
+        delta[end] -= 1
+    return array('l', accumulate(delta[:width]))
+
+
+def _find_gutter(coverage: array[int], start: int, end: int) -> int:
+    # The center of the widest run of the least covered x coordinates.
+    window = coverage[start:end]
+    minimum = min(window)
+    best_start, best_length = 0, 0
+    run_start = -1
+    for index, value in enumerate(window):
+        if value == minimum:
+            if run_start < 0:
+                run_start = index
+            if index + 1 - run_start > best_length:
+                best_start, best_length = run_start, index + 1 - run_start
+        else:
+            run_start = -1
+    return start + best_start + best_length // 2
+
+
+def find_columns(page: HtmlElement, columns: int) -> list[int]:
+    """
+    Find the positions to cut the given page into columns at.
+
+    The text area spanned by the lines is divided into columns of equal width,
+    and each cut is placed into the gutter with the least coverage by lines
+    around the expected column boundary, see :func:`get_coverage`. Lines
+    spanning several columns, like headlines, thus do not prevent a cut.
+
+    :param page: The page to cut.
+    :param columns: The number of columns, at least two.
+    :return: The x coordinates of the ``columns - 1`` cuts, from left to
+             right.
+    """
+    if columns < 2:
+        raise ValueError(f"At least two columns are required, got {columns}.")
+    bbox = get_bbox(page)
+    assert bbox is not None
+    width = int(bbox[2])
+    boxes = []
+    for line in page.xpath(".//*[@class='ocr_line']"):
+        PROFILER.count('elements')
+        line_bbox = get_bbox(line)
+        if line_bbox is not None:
+            boxes.append(line_bbox)
+    if boxes:
+        text_start = max(min(int(box[0]) for box in boxes), 0)
+        text_end = min(max(int(box[2]) for box in boxes), width)
+    else:
+        text_start, text_end = 0, width
+    if text_end <= text_start:
+        text_start, text_end = 0, width
+    with PROFILER.timer('coverage'):
+        coverage = get_coverage(boxes, width)
+
+    column_width = (text_end - text_start) / columns
+    positions = []
+    for index in range(1, columns):
+        expected = text_start + index * column_width
+        start = max(int(expected - column_width / 2), 0)
+        end = min(int(expected + column_width / 2) + 1, width)
+        positions.append(_find_gutter(coverage, start, end) if start < end else int(expected))
+    return positions
+
+
+def get_column(bbox: RectangleType, boundaries: Sequence[float]) -> int:
+    """
+    Get the column the given box mostly belongs to.
+
+    :param bbox: The box to locate.
+    :param boundaries: The x coordinates of the column boundaries, including
+                       the left and the right edge of the page.
+    :return: The index of the column with the largest overlap, or the nearest
+             one for boxes outside of all columns.
+    """
+    best_index, best_overlap = 0, None
+    for index in range(len(boundaries) - 1):
+        overlap = min(bbox[2], boundaries[index + 1]) - max(bbox[0], boundaries[index])
+        if best_overlap is None or overlap > best_overlap:
+            best_index, best_overlap = index, overlap
+    return best_index
+
+
+def _get_output_name(filename: str, side: str, suffix: str | None = None) -> str:
+    if filename[-4] == ".":
+        name = filename[:-3]
+        if suffix is None:
+            suffix = filename[-3:]
+    else:
+        name = filename
+        if suffix is None:
+            suffix = ""
+    return name + side + "." + suffix
+
+
+def _has_lines(element: HtmlElement) -> bool:
+    return bool(element.xpath("boolean(.//*[@class='ocr_line'])"))
+
+
+def _set_bbox(element: HtmlElement, bbox: RectangleType) -> None:
+    title = element.get('title', '')
+    props = [prop.strip() for prop in title.split(';') if prop.strip()]
+    props = [prop for prop in props if prop.split(None, 1)[0] != 'bbox']
+    props.insert(0, 'bbox %d %d %d %d' % bbox)
+    element.set('title', '; '.join(props))
+
+
+def _drop(element: HtmlElement) -> None:
+    # Also drop the line break separating the element from the next one.
+    following = element.getnext()
+    if following is not None and following.tag == 'br' and not (element.tail or '').strip():
+        following.drop_tree()
+    element.drop_tree()
+
+
+def _prune(element: HtmlElement, boundaries: Sequence[float], column: int) -> None:
+    for child in list(element):
+        if not isinstance(child.tag, str):
+            continue
+        if child.get('class') != 'ocr_line' and _has_lines(child):
+            # Keep the parts of the areas and paragraphs in this column.
+            _prune(child, boundaries, column)
+            boxes = [box for box in map(get_bbox, child) if box is not None]
+            if not boxes:
+                _drop(child)
+            elif get_bbox(child) is not None:
+                _set_bbox(child, (
+                    min(box[0] for box in boxes), min(box[1] for box in boxes),
+                    max(box[2] for box in boxes), max(box[3] for box in boxes)
+                ))
+            continue
+        bbox = get_bbox(child)
+        if bbox is not None and get_column(bbox, boundaries) != column:
+            _drop(child)
+
+
+def _shift_coordinates(element: HtmlElement, offset: int, width: int) -> None:
+    for node in element.xpath("descendant-or-self::*[@title]"):
+        props = []
+        for prop in node.get('title').split(';'):
+            prop = prop.strip()
+            if not prop:
+                continue
+            key, _, args = prop.partition(' ')
+            if key in _COORDINATE_PROPS:
+                values = [int(value) for value in args.split()]
+                for index in range(0, len(values), 2):
+                    values[index] = min(max(values[index] - offset, 0), width)
+                prop = ' '.join([key] + [str(value) for value in values])
+            props.append(prop)
+        node.set('title', '; '.join(props))
+
+
+def crop_page(page: HtmlElement, positions: Sequence[int], column: int, image: str | None = None) -> HtmlElement:
+    """
+    Create one column of the given page.
+
+    The column keeps the lines mostly inside of it, see :func:`get_column`,
+    together with the areas and paragraphs holding them. All coordinates are
+    shifted into the frame of the column and clipped to it. Baselines are
+    relative to the line boxes, thus stay unchanged.
+
+    :param page: The page to cut, which is left unchanged.
+    :param positions: The x coordinates to cut the page at, from left to
+                      right.
+    :param column: The index of the column to create.
+    :param image: The image file of the column. Defaults to the image of the
+                  page.
+    :return: The new page.
+    """
+    if not 0 <= column <= len(positions):
+        raise ValueError(f"Column {column} is out of range for {len(positions)} cut(s).")
+    bbox = get_bbox(page)
+    assert bbox is not None
+    boundaries = [0, *positions, int(bbox[2])]
+    cropped = copy.deepcopy(page)
+    _prune(cropped, boundaries, column)
+    _shift_coordinates(cropped, boundaries[column], boundaries[column + 1] - boundaries[column])
+    if image is not None:
+        props = [prop.strip() for prop in cropped.get('title', '').split(';') if prop.strip()]
+        props = [prop for prop in props if prop.split(None, 1)[0] != 'image']
+        props.insert(0, f'image "{image}"')
+        cropped.set('title', '; '.join(props))
+    return cropped
+
+
+def cut_page(page: HtmlElement, page_cut: PageCut, side: str, image: str | None = None) -> HtmlElement:
+    """
+    Create one half of the given page, see :func:`crop_page`.
+
+    :param page: The page to cut, which is left unchanged.
+    :param page_cut: The cut of the page, see :func:`find_cut`.
+    :param side: The half to create, see :data:`SIDES`.
+    :param image: The image file of the half. Defaults to the image of the
+                  page.
+    :return: The new page.
+    """
+    if side not in SIDES:
+        raise ValueError(f"Unknown side {side!r}.")
+    return crop_page(page, [page_cut.position], SIDES.index(side), image=image)
+
+
+def _get_debug_marks(page_cut: PageCut) -> _DebugMarksType:
+    boxes = [(b, 32 if side == "right" else 96) for b, side in page_cut.lines]
+    rules = [(page_cut.middle_left, 64, 3), (page_cut.middle_right, 64, 3), (page_cut.position, 128, 5)]
+    return boxes, rules
+
+
+def _get_column_debug_marks(page: HtmlElement, positions: list[int]) -> _DebugMarksType:
+    bbox = get_bbox(page)
+    assert bbox is not None
+    boundaries = [0, *positions, int(bbox[2])]
+    boxes = []
+    for line in page.xpath(".//*[@class='ocr_line']"):
+        b = get_bbox(line)
+        if b is not None:
+            boxes.append((b, 32 + 64 * (get_column(b, boundaries) % 3)))
+    return boxes, [(position, 128, 5) for position in positions]
+
+
+def _has_image(filename: str) -> bool:
+    # Only reads the header, the image is decoded when cutting it.
+    try:
+        with Image.open(filename):
+            return True
+    except IOError:
+        logger.warning("Warning: Image %s not found!", filename)
+        return False
+
+
+def _cut_image(filename: str, positions: list[int], labels: Sequence[str], debug_marks: _DebugMarksType | None) -> None:
+    with PROFILER.timer('pil.decode'), Image.open(filename) as image:
+        image.load()
+
+    if debug_marks is not None:
+        debug_image = image.copy()
+        dr = ImageDraw.Draw(debug_image)
+        boxes, rules = debug_marks
+        for b, fill in boxes:
+            dr.rectangle(b, fill=fill)
+        for x, fill, width in rules:
+            dr.line((x, 0, x, debug_image.size[1]), fill=fill, width=width)
+        debug_output = _get_output_name(filename, "cut")
+        with PROFILER.timer('pil.encode'):
+            debug_image.save(debug_output)
+        logger.info("Debug output is saved in %s", debug_output)
+
+    boundaries = [0, *positions, image.size[0]]
+    for index, label in enumerate(labels):
+        crop = image.crop((boundaries[index], 0, boundaries[index + 1], image.size[1]))
+        crop_name = _get_output_name(filename, label)
+        with PROFILER.timer('pil.encode'):
+            crop.save(crop_name)
+        PROFILER.count('crops_written')
+        logger.info("Page %s is saved in %s", label, crop_name)
+
+
+def cut(
+        hocr: InputType, debug: bool = False, write_hocr: bool = True, workers: int | None = None,
+        columns: int | None = None
+) -> None:
     """
     Cut the given hOCR file.
 
     Generates an image file for both columns with the same basename
     as the input file, only adding the suffix `.left` and `.right`
-    before the extension.
+    before the extension, and the corresponding hOCR files with the
+    extension `.hocr`, see :func:`cut_page`.
+
+    With `columns`, each page is cut into this number of columns at the
+    gutters instead, see :func:`find_columns`, which adds the suffixes `.col1`,
+    `.col2` and so on.
+
+    Each image is decoded once, and the images of the pages are cut in a
+    thread pool while the hOCR files are written. Pages whose image cannot be
+    opened are skipped with a warning, as their hOCR files would reference
+    missing images.
 
-    :param hocr: hOCR file to cut.
+    :param hocr: hOCR file or content to cut. Relative image paths are
+                 resolved against the directory of the file, or the current
+                 working directory for content.
     :param debug: Create a third image file with the suffix `.cut`
                   with some debugging output.
+    :param write_hocr: Write the hOCR file of each half.
+    :param workers: The number of threads cutting the images.
+    :param columns: The number of columns to cut each page into. Defaults to
+                    two halves, cut between the median line edges.
     """
-    doc = html.parse(hocr)
+    if columns is not None and columns < 2:
+        raise ValueError(f"At least two columns are required, got {columns}.")
+    labels: Sequence[str] = SIDES if columns is None else [f"col{index}" for index in range(1, columns + 1)]
+    PROFILER.count_source(hocr)
+    with PROFILER.timer('html.parse'):
+        doc = parse_html(hocr)
 
-    pages = doc.xpath("//*[@class='ocr_page']")
+    if not doc.xpath("//*[@class='ocr_page']"):
+        return
+    directory = get_directory(hocr)
 
-    for page in pages:
-        filename = get_prop(page, 'image')
-        assert filename is not None
-        filename = os.path.join(os.path.dirname(hocr), filename)
+    futures: list[Future[None]] = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
         try:
-            image = Image.open(filename)
-            debug_image = Image.open(filename)
-            dr = ImageDraw.Draw(debug_image)
-            image_found = True
-        except IOError:
-            logger.warning("Warning: Image %s not found!", filename)
-            debug = False
-            image_found = False
-
-        bbox = get_bbox(page)
-        assert bbox is not None
-        middle = bbox[2] / 2
-
-        left_ends = []
-        right_starts = []
-        for line in doc.xpath("//*[@class='ocr_line']"):
-            b = get_bbox(line)
-            assert b is not None
-            if b[0] > middle:
-                pos = "right"
-            elif b[2] < middle:
-                pos = "left"
-            elif b[2] - middle > middle - b[1]:
-                pos = "right"
-            else:
-                pos = "left"
-            if pos == "right":
-                right_starts.append(b[0])
-                if debug:
-                    dr.rectangle(b, fill=32)
-            else:
-                left_ends.append(b[2])
-                if debug:
-                    dr.rectangle(b, fill=96)
-
-        left_ends.sort()
-        right_starts.sort()
-        n = len(left_ends)
-        m = len(right_starts)
-        middle_left = left_ends[n // 2]
-        middle_right = right_starts[m // 2]
-
-        middle = int((middle_left + middle_right) / 2)
-        logger.info("Cutting at %s", middle)
-
-        if image_found:
-            if filename[-4] == ".":
-                name = filename[:-3]
-                suffix = filename[-3:]
-            else:
-                name = filename
-                suffix = ""
-
-            if debug:
-                dr.line(
-                    (middle_left, 0, middle_left, debug_image.size[1]),
-                    fill=64,
-                    width=3
-                )
-                dr.line(
-                    (middle_right, 0, middle_right, debug_image.size[1]),
-                    fill=64,
-                    width=3
-                )
-                dr.line(
-                    (middle, 0, middle, debug_image.size[1]), fill=128, width=5
-                )
-                debug_output = name + "cut." + suffix
-                debug_image.save(debug_output)
-                logger.info("Debug output is saved in %s", debug_output)
-
-            left = image.crop((0, 0, middle, image.size[1]))
-            left_name = name + "left." + suffix
-            left.save(left_name)
-            logger.info("Left page is saved in %s", left_name)
-            right = image.crop((middle, 0, image.size[0], image.size[1]))
-            right_name = name + "right." + suffix
-            right.save(right_name)
-            logger.info("Right page is saved in %s", right_name)
+            for page_doc in split_document(doc):
+                page = page_doc.xpath("//*[@class='ocr_page']")[0]
+                filename = get_prop(page, 'image', strip_value=True)
+                assert filename is not None
+                filename = os.path.join(directory, filename)
+                if not _has_image(filename):
+                    continue
+
+                debug_marks = None
+                if columns is None:
+                    page_cut = find_cut(page)
+                    positions = [page_cut.position]
+                    if debug:
+                        debug_marks = _get_debug_marks(page_cut)
+                else:
+                    positions = find_columns(page, columns)
+                    if debug:
+                        debug_marks = _get_column_debug_marks(page, positions)
+                logger.info("Cutting at %s", ", ".join(map(str, positions)))
+                futures.append(executor.submit(_cut_image, filename, positions, labels, debug_marks))
+                if not write_hocr:
+                    continue
+
+                parent = page.getparent()
+                for index, label in enumerate(labels):
+                    with PROFILER.timer('cut_page'):
+                        cropped = crop_page(
+                            page, positions, index, image=os.path.basename(_get_output_name(filename, label))
+                        )
+                    hocr_name = _get_output_name(filename, label, suffix="hocr")
+                    parent.replace(page, cropped)
+                    try:
+                        with PROFILER.timer('serialize'):
+                            page_doc.write(hocr_name, method='html', encoding='utf-8')
+                    finally:
+                        parent.replace(cropped, page)
+                    logger.info("Page %s hOCR is saved in %s", label, hocr_name)
+            for future in futures:
+                future.result()
+        except BaseException:
+            # Do not cut the remaining images after an error.
+            for future in futures:
+                future.cancel()
+            raise
 
 
 def main() -> None:
@@ -133,6 +497,20 @@ def main() -> None:
     )
     parser.add_argument('file', nargs='?', default=sys.stdin)
     parser.add_argument('-d', '--debug', action="store_true")
+    parser.add_argument(
+        '--no-hocr', dest='write_hocr', action='store_false',
+        help="do not write the hOCR files of the halves"
+    )
+    parser.add_argument(
+        '-n', '--columns', type=int, default=None,
+        help="cut each page into this number of columns at the gutters instead of two halves"
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=None,
+        help="number of threads cutting the images, default: depending on the CPUs"
+    )
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    cut(hocr=args.file, debug=args.debug)
+    with profiling_from_arguments(args):
+        cut(hocr=args.file, debug=args.debug, write_hocr=args.write_hocr, workers=args.jobs, columns=args.columns)
@@ -5,18 +5,30 @@ Compute statistics about the general quality of the hOCR data.
 from __future__ import annotations
 
 import argparse
+import csv
+import io
+import json
 import logging
 import os
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Any, Iterable, TextIO, TYPE_CHECKING
+from urllib.parse import quote
 
-from lxml import html
-from PIL import Image, ImageDraw
-
-from hocr_tools_lib.utils.edit_utils import edit_distance, remove_tex
-from hocr_tools_lib.utils.node_utils import get_bbox, get_text
+from hocr_tools_lib.utils.cache_utils import add_cache_arguments, cache_from_arguments, read_source, ResultCache
+from hocr_tools_lib.utils.edit_utils import edit_distance, ErrorStats, remove_tex
+from hocr_tools_lib.utils.input_utils import is_buffer, parse_html
+from hocr_tools_lib.utils.node_utils import get_bbox, get_texts
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
 from hocr_tools_lib.utils.rectangle_utils import area, erode, height, intersect, \
     width
 from hocr_tools_lib.utils.text_utils import normalize
-from hocr_tools_lib.utils.typing_utils import SupportsRead
+from hocr_tools_lib.utils.typing_utils import BufferType, InputType, SupportsRead
+
+
+if TYPE_CHECKING:
+    from PIL import Image
 
 
 logger = logging.getLogger(__name__)
@@ -28,30 +40,66 @@ VTOL = 80
 HPIX = 5
 VPIX = 5
 
+# File suffixes considered when pairing files across directory trees.
+HOCR_SUFFIXES = ('.hocr', '.html', '.htm', '.xhtml')
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.tif', '.tiff')
+
 
 def evaluate(
-        truth: os.PathLike[str],
-        actual: os.PathLike[str],
-        img_file: SupportsRead[bytes] | None = None,
+        truth: InputType,
+        actual: InputType,
+        img_file: SupportsRead[bytes] | BufferType | str | None = None,
         debug: bool = False,
-        verbose: bool = False
+        verbose: bool = False,
+        errors_file: os.PathLike[str] | str = "errors.png",
+        cache: ResultCache | None = None,
+        stats: ErrorStats | None = None
 ) -> tuple[Image.Image | None, int, int, int]:
     """
     Perform the evaluation.
 
-    :param truth: hOCR file with ground truth.
-    :param actual: hOCR file with actual data.
-    :param img_file: Optional image file. If set, draw the bboxes of the lines
-                     onto it and save it to ``errors.png``.
+    :param truth: hOCR file or content with ground truth.
+    :param actual: hOCR file or content with actual data.
+    :param img_file: Optional image file or content. If set, draw the bboxes of the lines
+                     onto it and save it to `errors_file`.
     :param debug: Log additional debug information.
     :param verbose: Log additional error data.
+    :param errors_file: Where to save the image with the bboxes.
+    :param cache: Optional cache to look up and store the results. Not used
+                  when drawing onto an image. Cache hits do not log anything.
+    :param stats: If set, align the normalized texts of the lines and add
+                  the character and word errors to these statistics. True
+                  lines without any actual line count as deleted.
     :return: The image with the bboxes, the number of segmentation errors (expected
              and actual bboxes not similar enough), the number of OCR segmentation
              errors (number of differing characters due to segmentation) and the
              number of OCR errors (number of differing characters).
     """
+    truth_source: Any = truth
+    actual_source: Any = actual
+    cache_key = None
+    if cache is not None and not img_file:
+        truth_data = read_source(truth)
+        actual_data = read_source(actual)
+        parameters: dict[str, Any] = {"HTOL": HTOL, "VTOL": VTOL, "HPIX": HPIX, "VPIX": VPIX}
+        if stats is not None:
+            parameters["stats"] = True
+        cache_key = cache.make_key("hocr_eval", [truth_data, actual_data], parameters)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            if stats is not None:
+                stats.merge(ErrorStats.from_dict(cached[3]))
+            return None, cached[0], cached[1], cached[2]
+        truth_source = truth_data
+        actual_source = actual_data
+
     if img_file:
-        im = Image.open(img_file)
+        # Only import PIL if required to keep the startup fast.
+        from PIL import Image, ImageDraw
+
+        with PROFILER.timer('pil.decode'):
+            im = Image.open(io.BytesIO(img_file) if is_buffer(img_file) else img_file)  # type: ignore[arg-type]
+            im.load()
         logger.info(
             "Image %s: size=%r, format=%r, mode=%r",
             img_file, im.size, im.format, im.mode
@@ -61,8 +109,11 @@ def evaluate(
         im = None
 
     # Get pages from inputs.
-    truth_doc = html.parse(truth)
-    actual_doc = html.parse(actual)
+    PROFILER.count_source(truth_source)
+    PROFILER.count_source(actual_source)
+    with PROFILER.timer('html.parse'):
+        truth_doc = parse_html(truth_source)
+        actual_doc = parse_html(actual_source)
 
     # Parse pages.
     truth_pages = truth_doc.xpath("//*[@class='ocr_page']")
@@ -75,27 +126,34 @@ def evaluate(
     segmentation_errors = 0
     segmentation_ocr_errors = 0
     ocr_errors = 0
+    # Collect the statistics of this call separately to cache them.
+    local_stats = None if stats is None else ErrorStats()
 
     for truth_page, actual_page in pages:
-        true_lines = truth_page.xpath("//*[@class='ocr_line']")
-        actual_lines = actual_page.xpath("//*[@class='ocr_line']")
+        true_lines = get_texts(truth_page, 'ocr_line')
+        actual_lines = get_texts(actual_page, 'ocr_line')
+        if PROFILER.enabled:
+            PROFILER.count('pages')
+            PROFILER.count('elements', len(true_lines) + len(actual_lines))
+        true_bboxes = [get_bbox(line) for line, _ in true_lines]
+        actual_boxes = [(get_bbox(line), text) for line, text in actual_lines]
         tx = [
-            min(HPIX, (100 - HTOL) * width(get_bbox(line)) / 100)
-            for line in true_lines
+            min(HPIX, (100 - HTOL) * width(line_bbox) / 100)
+            for line_bbox in true_bboxes
         ]
         ty = [
-            min(VPIX, (100 - VTOL) * height(get_bbox(line)) / 100)
-            for line in true_lines
+            min(VPIX, (100 - VTOL) * height(line_bbox) / 100)
+            for line_bbox in true_bboxes
         ]
-        for index, true_line in enumerate(true_lines):
-            bbox = get_bbox(true_line)
+        for index, (_, true_line_text) in enumerate(true_lines):
+            bbox = true_bboxes[index]
             bbox_small = erode(bbox, tx[index], ty[index])
             candidates = [
                 (
-                    area(intersect(get_bbox(line), bbox)),
-                    get_bbox(line),
-                    get_text(line)
-                ) for line in actual_lines
+                    area(intersect(line_bbox, bbox)),
+                    line_bbox,
+                    line_text
+                ) for line_bbox, line_text in actual_boxes
             ]
             q: float = 0
             tight_overlap = False
@@ -117,29 +175,37 @@ def evaluate(
                         "segmentation_error: area_overlap = %s true_bbox %s",
                         q * 1.0 / area(bbox), bbox
                     )
-                    logger.warning("\t%s", get_text(true_line))
+                    logger.warning("\t%s", true_line_text)
                 segmentation_errors += 1
 
                 if candidates:
-                    true_text = remove_tex(get_text(true_line))
-                    segmentation_ocr_errors += edit_distance(
-                        normalize(true_text), normalize(actual_line)
-                    )
+                    true_text = remove_tex(true_line_text)
+                    if local_stats is not None:
+                        segmentation_ocr_errors += local_stats.add(normalize(true_text), normalize(actual_line))
+                    else:
+                        segmentation_ocr_errors += edit_distance(
+                            normalize(true_text), normalize(actual_line)
+                        )
                 else:
-                    segmentation_ocr_errors += len(get_text(true_line))
+                    segmentation_ocr_errors += len(true_line_text)
+                    if local_stats is not None:
+                        local_stats.add(normalize(remove_tex(true_line_text)), "")
 
                 if img_file and bbox is not None:
                     draw.rectangle(bbox, outline="#ff0000")
                     if candidates and actual_bbox is not None:
                         draw.rectangle(actual_bbox, outline="#0000ff")
                 continue
-            true_text = remove_tex(get_text(true_line))
+            true_text = remove_tex(true_line_text)
             actual_text = actual_line
             if debug:
                 logger.info("overlap %s true_bbox %s", q, bbox)
                 logger.info("\t%s", true_text)
                 logger.info("\t%s", actual_text)
-            error = edit_distance(normalize(true_text), normalize(actual_text))
+            if local_stats is not None:
+                error = local_stats.add(normalize(true_text), normalize(actual_text))
+            else:
+                error = edit_distance(normalize(true_text), normalize(actual_text))
             if verbose and error > 0:
                 logger.info("ocr_error %s true_bbox %s", error, bbox)
                 logger.info("\t%s", true_text)
@@ -147,22 +213,412 @@ def evaluate(
             ocr_errors += error
 
     if img_file and im is not None:
-        im.save("errors.png")
+        with PROFILER.timer('pil.encode'):
+            im.save(os.fspath(errors_file))
         im.close()
 
+    if cache is not None and cache_key is not None:
+        values: list[Any] = [segmentation_errors, segmentation_ocr_errors, ocr_errors]
+        if local_stats is not None:
+            values.append(local_stats.to_dict())
+        cache.put(cache_key, values)
+    if stats is not None and local_stats is not None:
+        stats.merge(local_stats)
+
     return im, segmentation_errors, segmentation_ocr_errors, ocr_errors
 
 
+@dataclass
+class CorpusEntry:
+    """
+    One page pair of a corpus.
+    """
+
+    truth: str
+    """
+    hOCR file with ground truth.
+    """
+
+    actual: str
+    """
+    hOCR file with actual data.
+    """
+
+    image: str | None = None
+    """
+    Optional image file to draw the errors onto.
+    """
+
+    key: str | None = None
+    """
+    Name of the page pair within the corpus without the file suffix, like
+    ``a/0001``. The error image is named after it, defaulting to the name of
+    the actual file.
+    """
+
+
+@dataclass
+class PageResult:
+    """
+    Evaluation result for one page pair of a corpus.
+    """
+
+    truth: str
+    """
+    hOCR file with ground truth.
+    """
+
+    actual: str
+    """
+    hOCR file with actual data.
+    """
+
+    segmentation_errors: int = 0
+    """
+    Number of segmentation errors.
+    """
+
+    segmentation_ocr_errors: int = 0
+    """
+    Number of OCR errors due to segmentation.
+    """
+
+    ocr_errors: int = 0
+    """
+    Number of OCR errors.
+    """
+
+    error: str | None = None
+    """
+    Error message if the evaluation of this pair failed.
+    """
+
+    stats: ErrorStats | None = None
+    """
+    Character and word error statistics, if requested.
+    """
+
+
+@dataclass
+class CorpusResult:
+    """
+    Evaluation result for a whole corpus.
+    """
+
+    pages: list[PageResult] = field(default_factory=list)
+    """
+    The results for each page pair, in input order.
+    """
+
+    def totals(self) -> dict[str, int]:
+        """
+        Aggregate the page results.
+
+        :return: The summed up error counts together with the number of
+                 evaluated and failed page pairs.
+        """
+        valid = [page for page in self.pages if page.error is None]
+        return {
+            "pages": len(valid),
+            "failed": len(self.pages) - len(valid),
+            "segmentation_errors": sum(page.segmentation_errors for page in valid),
+            "segmentation_ocr_errors": sum(page.segmentation_ocr_errors for page in valid),
+            "ocr_errors": sum(page.ocr_errors for page in valid),
+        }
+
+    def total_stats(self) -> ErrorStats | None:
+        """
+        Merge the character and word error statistics of the pages.
+
+        :return: The merged statistics, `None` if not requested.
+        """
+        total = None
+        for page in self.pages:
+            if page.error is None and page.stats is not None:
+                if total is None:
+                    total = ErrorStats()
+                total.merge(page.stats)
+        return total
+
+    def write_json(self, fd: TextIO) -> None:
+        """
+        Write the per-page and aggregated results as JSON.
+
+        :param fd: The file to write to.
+        """
+        pages = []
+        for page in self.pages:
+            page_data = asdict(page)
+            if page.stats is None:
+                del page_data["stats"]
+            else:
+                page_data["stats"] = page.stats.to_dict()
+            pages.append(page_data)
+        total: dict[str, Any] = dict(self.totals())
+        total_stats = self.total_stats()
+        if total_stats is not None:
+            total["stats"] = total_stats.to_dict()
+        json.dump({"pages": pages, "total": total}, fd, indent=2)
+        fd.write("\n")
+
+    def write_csv(self, fd: TextIO) -> None:
+        """
+        Write the per-page results as CSV, followed by a ``TOTAL`` row with
+        the aggregated values.
+
+        :param fd: The file to write to.
+        """
+        names = [
+            "truth", "actual", "segmentation_errors",
+            "segmentation_ocr_errors", "ocr_errors", "error"
+        ]
+        writer = csv.DictWriter(fd, fieldnames=names, lineterminator="\n")
+        writer.writeheader()
+        for page in self.pages:
+            writer.writerow({name: getattr(page, name) for name in names})
+        totals = self.totals()
+        writer.writerow({
+            "truth": "TOTAL", "actual": "",
+            "segmentation_errors": totals["segmentation_errors"],
+            "segmentation_ocr_errors": totals["segmentation_ocr_errors"],
+            "ocr_errors": totals["ocr_errors"],
+            "error": "",
+        })
+
+
+def _find_by_stem(directory: Path, suffixes: Iterable[str]) -> dict[str, Path]:
+    result: dict[str, Path] = {}
+    for path in sorted(directory.rglob("*")):
+        if path.suffix.lower() not in suffixes or not path.is_file():
+            continue
+        key = path.relative_to(directory).with_suffix("").as_posix()
+        result.setdefault(key, path)
+    return result
+
+
+def pair_directories(
+        truth_directory: os.PathLike[str] | str,
+        actual_directory: os.PathLike[str] | str,
+        image_directory: os.PathLike[str] | str | None = None
+) -> list[CorpusEntry]:
+    """
+    Pair the hOCR files of two directory trees by name.
+
+    Files are paired by their path relative to the given directory, ignoring
+    the file suffix, thus ``truth/a/0001.html`` and ``actual/a/0001.hocr``
+    form a pair. Files without a counterpart are skipped with a warning.
+
+    :param truth_directory: Directory tree with the ground truth.
+    :param actual_directory: Directory tree with the actual data.
+    :param image_directory: Optional directory tree with the page images,
+                            paired the same way.
+    :return: The page pairs, sorted by name.
+    """
+    truths = _find_by_stem(Path(truth_directory), HOCR_SUFFIXES)
+    actuals = _find_by_stem(Path(actual_directory), HOCR_SUFFIXES)
+    images = {}
+    if image_directory is not None:
+        images = _find_by_stem(Path(image_directory), IMAGE_SUFFIXES)
+
+    for key in sorted(set(truths).symmetric_difference(actuals)):
+        logger.warning("No counterpart found for %s, skipping.", key)
+
+    entries = []
+    for key in sorted(set(truths).intersection(actuals)):
+        image = images.get(key)
+        entries.append(
+            CorpusEntry(
+                truth=str(truths[key]), actual=str(actuals[key]),
+                image=str(image) if image else None, key=key
+            )
+        )
+    return entries
+
+
+def read_manifest(manifest: os.PathLike[str] | str) -> list[CorpusEntry]:
+    """
+    Read the page pairs from the given manifest file.
+
+    Each line holds the ground truth file, the actual file and optionally an
+    image file, separated by tabs. Relative paths are resolved against the
+    directory of the manifest. The actual file as written names the page pair.
+    Empty lines and lines starting with ``#`` are ignored.
+
+    :param manifest: The manifest file to read.
+    :return: The page pairs in manifest order.
+    """
+    base = Path(manifest).parent
+    entries = []
+    with open(manifest, encoding="utf-8") as fd:
+        for number, line in enumerate(fd, start=1):
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            columns = line.split("\t")
+            if len(columns) not in {2, 3}:
+                raise ValueError(
+                    f"{manifest}:{number}: Expected 2 or 3 tab-separated columns, got {len(columns)}"
+                )
+            truth, actual, *image = [str(base / column) for column in columns]
+            key = PurePosixPath(columns[1].replace(os.sep, "/")).with_suffix("").as_posix()
+            entries.append(CorpusEntry(truth=truth, actual=actual, image=image[0] if image else None, key=key))
+    return entries
+
+
+def _get_error_image_path(entry: CorpusEntry, directory: str) -> str:
+    key = entry.key or os.path.splitext(os.path.basename(entry.actual))[0]
+    path = PurePosixPath(key)
+    if path.is_absolute() or ".." in path.parts:
+        # Never write outside of the directory, but keep the names unique.
+        return os.path.join(directory, quote(key, safe="") + ".errors.png")
+    # Keep the subdirectories, thus pages of the same name do not collide.
+    filename = os.path.join(directory, *path.parts) + ".errors.png"
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    return filename
+
+
+def _evaluate_entry(
+        entry: CorpusEntry, error_image_directory: str | None, cache: ResultCache | None, stats: bool = False
+) -> PageResult:
+    result = PageResult(truth=entry.truth, actual=entry.actual, stats=ErrorStats() if stats else None)
+    img_file = None
+    errors_file = "errors.png"
+    if entry.image and error_image_directory is not None:
+        img_file = entry.image
+        errors_file = _get_error_image_path(entry, error_image_directory)
+    try:
+        _, result.segmentation_errors, result.segmentation_ocr_errors, result.ocr_errors = evaluate(
+            truth=entry.truth, actual=entry.actual, img_file=img_file,
+            errors_file=errors_file, cache=cache, stats=result.stats
+        )
+    except Exception as exception:
+        logger.warning("Evaluation of %s failed: %s", entry.actual, exception)
+        result.error = f"{type(exception).__name__}: {exception}"
+        result.stats = None
+    return result
+
+
+def _profile_entry(
+        entry: CorpusEntry, error_image_directory: str | None, cache: ResultCache | None, stats: bool = False
+) -> tuple[PageResult, dict[str, Any]]:
+    # Collect the values of each worker process to merge them afterwards.
+    PROFILER.reset()
+    PROFILER.enabled = True
+    try:
+        result = _evaluate_entry(entry, error_image_directory, cache, stats)
+    finally:
+        PROFILER.enabled = False
+    return result, PROFILER.report()
+
+
+def evaluate_corpus(
+        entries: Iterable[CorpusEntry],
+        workers: int | None = None,
+        error_image_directory: os.PathLike[str] | str | None = None,
+        cache: ResultCache | None = None,
+        stats: bool = False
+) -> CorpusResult:
+    """
+    Evaluate a whole corpus of page pairs.
+
+    A failing page pair does not abort the evaluation, but is reported
+    with its error message instead.
+
+    :param entries: The page pairs to evaluate.
+    :param workers: The number of worker processes. Use ``1`` to evaluate
+                    inside the current process, ``None`` for one worker per CPU.
+    :param error_image_directory: If set, draw the errors onto the images of
+                                  the entries which have one and save them
+                                  into this directory, named after
+                                  :attr:`CorpusEntry.key`. Otherwise, images
+                                  are never opened.
+    :param cache: Optional cache to look up and store the page results.
+    :param stats: Collect the character and word error statistics of each
+                  page, see :meth:`CorpusResult.total_stats`.
+    :return: The per-page results.
+    """
+    entries = list(entries)
+    image_directory = None
+    if error_image_directory is not None:
+        image_directory = os.fspath(error_image_directory)
+        os.makedirs(image_directory, exist_ok=True)
+    arguments = [image_directory] * len(entries)
+    caches = [cache] * len(entries)
+    flags = [stats] * len(entries)
+
+    if workers == 1:
+        return CorpusResult(pages=list(map(_evaluate_entry, entries, arguments, caches, flags)))
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Larger chunks reduce the IPC overhead for many small pages.
+        chunksize = max(1, len(entries) // ((workers or os.cpu_count() or 1) * 4))
+        if not PROFILER.enabled:
+            pages = list(executor.map(_evaluate_entry, entries, arguments, caches, flags, chunksize=chunksize))
+            return CorpusResult(pages=pages)
+        pages = []
+        for page, report in executor.map(_profile_entry, entries, arguments, caches, flags, chunksize=chunksize):
+            pages.append(page)
+            PROFILER.merge(report)
+    return CorpusResult(pages=pages)
+
+
+def _open_output(path: str) -> TextIO:
+    if path == "-":
+        return sys.stdout
+    return open(path, mode="w", encoding="utf-8", newline="")
+
+
+def _corpus_main(args: argparse.Namespace, cache: ResultCache | None) -> None:
+    if args.manifest:
+        entries = read_manifest(args.manifest)
+    else:
+        entries = pair_directories(
+            truth_directory=args.truth, actual_directory=args.actual,
+            image_directory=args.image_directory
+        )
+
+    result = evaluate_corpus(
+        entries=entries, workers=args.jobs,
+        error_image_directory=args.error_images, cache=cache, stats=args.stats
+    )
+
+    for path, writer in ((args.json, result.write_json), (args.csv, result.write_csv)):
+        if not path:
+            continue
+        fd = _open_output(path)
+        try:
+            writer(fd)
+        finally:
+            if fd is not sys.stdout:
+                fd.close()
+
+    # Keep the results written to stdout parseable.
+    report = sys.stderr if "-" in (args.json, args.csv) else sys.stdout
+    totals = result.totals()
+    print("pages", totals["pages"], file=report)
+    print("failed", totals["failed"], file=report)
+    print("segmentation_errors", totals["segmentation_errors"], file=report)
+    print("segmentation_ocr_errors", totals["segmentation_ocr_errors"], file=report)
+    print("ocr_errors", totals["ocr_errors"], file=report)
+    total_stats = result.total_stats()
+    if total_stats is not None:
+        print(total_stats.format_report(confusions=args.confusions), file=report)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument(
-        "truth", help="hOCR file with ground truth",
-        type=argparse.FileType('r')
+        "truth", nargs="?",
+        help="hOCR file with ground truth (directory tree in corpus mode)"
     )
     parser.add_argument(
-        "actual",
-        help="hOCR file from the actual recognition",
-        type=argparse.FileType('r')
+        "actual", nargs="?",
+        help=(
+            "hOCR file from the actual recognition (directory tree in "
+            "corpus mode)"
+        )
     )
     parser.add_argument("-d", "--debug", action="store_true")
     parser.add_argument("-v", "--verbose", action="store_true")
@@ -175,19 +631,69 @@ def main() -> None:
     #     help="default: %(default)s"
     # )
     parser.add_argument("-i", "--imgfile", type=argparse.FileType('r'))
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="report the character and word error rates and the character confusions"
+    )
+    parser.add_argument(
+        "--confusions", type=int, default=10,
+        help="number of most frequent character confusions to report, default: %(default)s"
+    )
+    corpus = parser.add_argument_group("corpus mode")
+    corpus.add_argument(
+        "--corpus", action="store_true",
+        help="pair the files of the truth and actual directory trees by name"
+    )
+    corpus.add_argument(
+        "--manifest",
+        help="file with tab-separated truth, actual and optional image paths"
+    )
+    corpus.add_argument(
+        "-j", "--jobs", type=int, default=None,
+        help="number of worker processes, default: one per CPU"
+    )
+    corpus.add_argument(
+        "--json", help="write the results as JSON to this file, '-' for stdout, which moves the summary to stderr"
+    )
+    corpus.add_argument(
+        "--csv", help="write the results as CSV to this file, '-' for stdout, which moves the summary to stderr"
+    )
+    corpus.add_argument(
+        "--image-directory",
+        help="directory tree with the page images, paired by name"
+    )
+    corpus.add_argument(
+        "--error-images",
+        help="render the errors onto the page images and save them here"
+    )
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    cache = cache_from_arguments(args)
 
-    image, segmentation_errors, segmentation_ocr_errors, ocr_errors = evaluate(
-        truth=args.truth, actual=args.actual, img_file=args.imgfile,
-        debug=args.debug, verbose=args.verbose
-    )
+    if args.manifest or args.corpus:
+        if not args.manifest and (not args.truth or not args.actual):
+            parser.error("--corpus requires the truth and actual directories")
+        if args.json == "-" and args.csv == "-":
+            parser.error("only one of --json and --csv can be written to stdout")
+        with profiling_from_arguments(args):
+            _corpus_main(args, cache=cache)
+        return
+    if not args.truth or not args.actual:
+        parser.error("the truth and actual files are required")
+
+    stats = ErrorStats() if args.stats else None
+    with profiling_from_arguments(args):
+        image, segmentation_errors, segmentation_ocr_errors, ocr_errors = evaluate(
+            truth=args.truth, actual=args.actual, img_file=args.imgfile,
+            debug=args.debug, verbose=args.verbose, cache=cache, stats=stats
+        )
 
     print("segmentation_errors", segmentation_errors)
     print("segmentation_ocr_errors", segmentation_ocr_errors)
     print("ocr_errors", ocr_errors)
+    if stats is not None:
+        print(stats.format_report(confusions=args.confusions))
 
     if image:
         image.show("errors.png")
-
-    args.truth.close()
-    args.actual.close()
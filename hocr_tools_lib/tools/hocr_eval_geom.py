@@ -6,14 +6,24 @@ segmentation at the level of the given hOCR element.
 from __future__ import annotations
 
 import argparse
-import os
 from dataclasses import dataclass
-from typing import Generator
-
-from lxml import html
+from typing import Any, Generator, Sequence
 
+from hocr_tools_lib.utils.cache_utils import add_cache_arguments, cache_from_arguments, read_source, ResultCache
+from hocr_tools_lib.utils.input_utils import parse_html
+from hocr_tools_lib.utils.match_utils import get_overlap_graph, match_boxes
 from hocr_tools_lib.utils.node_utils import get_bbox
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
 from hocr_tools_lib.utils.rectangle_utils import overlaps, relative_overlap, RectangleType
+from hocr_tools_lib.utils.scan_utils import GeometryScan, scan_geometry
+from hocr_tools_lib.utils.sidecar_utils import open_sidecar, Sidecar
+from hocr_tools_lib.utils.typing_utils import InputType
+
+
+DEFAULT_THRESHOLDS = tuple(round(0.5 + 0.05 * step, 2) for step in range(10))
+"""
+The IoU thresholds from 0.5 to 0.95 in steps of 0.05.
+"""
 
 
 @dataclass
@@ -71,16 +81,129 @@ def boxstats(
         matching = [o for o in oas if o > close_match]
         if len(matching) < 1:
             result.missing += 1
-        elif len(matching) > 1:
-            raise AttributeError(
-                "Multiple close matches: your segmentation files are bad"
-            )
         else:
-            result.error += 1.0 - matching[0]
+            # Multiple close matches are counted as multiple already.
+            result.error += 1.0 - max(matching)
             result.count += 1
     return result
 
 
+@dataclass
+class MatchStats:
+    """
+    Quality of the one-to-one matching of the boxes for one IoU threshold.
+    """
+
+    threshold: float
+    """
+    Lower bound for the intersection over union of matching boxes.
+    """
+
+    matches: int = 0
+    """
+    Number of matched pairs, id est true positives.
+    """
+
+    truths: int = 0
+    """
+    Number of ground truth boxes.
+    """
+
+    actuals: int = 0
+    """
+    Number of actual boxes.
+    """
+
+    iou: float = 0.0
+    """
+    Sum of the intersection over union of the matched pairs.
+    """
+
+    @property
+    def precision(self) -> float:
+        """
+        The fraction of actual boxes with a match.
+        """
+        return self.matches / self.actuals if self.actuals else 0.0
+
+    @property
+    def recall(self) -> float:
+        """
+        The fraction of ground truth boxes with a match.
+        """
+        return self.matches / self.truths if self.truths else 0.0
+
+    @property
+    def f1(self) -> float:
+        """
+        The harmonic mean of precision and recall.
+        """
+        total = self.truths + self.actuals
+        return 2 * self.matches / total if total else 0.0
+
+    @property
+    def mean_iou(self) -> float:
+        """
+        The mean intersection over union of the matched pairs.
+        """
+        return self.iou / self.matches if self.matches else 0.0
+
+    def to_tuple(self) -> tuple[float, int, int, int, float]:
+        """
+        Convert to a tuple.
+
+        :return: The values ``(threshold, matches, truths, actuals, iou)``.
+        """
+        return (self.threshold, self.matches, self.truths, self.actuals, self.iou)
+
+
+def match_page(
+        truths: list[RectangleType | None], actuals: list[RectangleType | None],
+        thresholds: Sequence[float] = DEFAULT_THRESHOLDS
+) -> list[MatchStats]:
+    """
+    Match the boxes of one page one-to-one for each of the given thresholds.
+
+    The graph of the overlapping boxes is built once for the lowest threshold
+    and filtered for the higher ones, see
+    :mod:`~hocr_tools_lib.utils.match_utils`.
+
+    :param truths: Ground truth boxes.
+    :param actuals: Actual boxes.
+    :param thresholds: Lower bounds for the intersection over union of
+                       matching boxes.
+    :return: The statistics for each threshold, in the given order.
+    """
+    if not thresholds:
+        return []
+    edges = get_overlap_graph(truths, actuals, min_iou=min(thresholds))
+    result = []
+    for threshold in thresholds:
+        matches = match_boxes(edges, min_iou=threshold)
+        result.append(MatchStats(
+            threshold=threshold, matches=len(matches), truths=len(truths), actuals=len(actuals),
+            iou=sum(value for _, _, value in matches)
+        ))
+    return result
+
+
+def parse_thresholds(value: str) -> list[float]:
+    """
+    Parse the thresholds given as comma-separated values or as range
+    ``start:stop:step`` including the stop value.
+
+    :param value: The value to parse, like ``0.5:0.95:0.05`` or ``0.5,0.75``.
+    :return: The thresholds.
+    """
+    if ':' not in value:
+        return [float(part) for part in value.split(',')]
+    start, stop, step = (float(part) for part in value.split(':'))
+    if step <= 0:
+        raise ValueError(f"Invalid step {step}.")
+    # Round to not lose the stop value to floating point errors.
+    return [round(start + index * step, 10) for index in range(int(round((stop - start) / step, 10)) + 1)]
+
+
 def check_bad_partition(boxes: list[RectangleType | None], significant_overlap: float = 0.1) -> bool:
     """
     Check if the given boxes are badly partitioned as they overlap too much.
@@ -97,44 +220,161 @@ def check_bad_partition(boxes: list[RectangleType | None], significant_overlap:
 
 
 def evaluate_geometries(
-        truth: os.PathLike[str], actual: os.PathLike[str], element: str = 'ocr_line',
-        significant_overlap: float = 0.1, close_match: float = 0.9
+        truth: InputType, actual: InputType, element: str = 'ocr_line',
+        significant_overlap: float = 0.1, close_match: float = 0.9,
+        cache: ResultCache | None = None, fast: bool = False
 ) -> Generator[tuple[Boxstats, Boxstats], None, None]:
     """
     Evaluate the geometries for the given files.
 
-    :param truth: hOCR file with ground truth.
-    :param actual: hOCR file with actual data.
+    :param truth: hOCR or ``.hocrx`` sidecar file or content with ground truth.
+    :param actual: hOCR or ``.hocrx`` sidecar file or content with actual data.
     :param element: hOCR element to look at.
     :param significant_overlap: Lower bound for a significant overlap.
     :param close_match: Lower bound for an overlap.
+    :param cache: Optional cache to look up and store the results.
+    :param fast: Only scan the classes and bounding boxes of the hOCR files
+                 instead of building their document trees, see
+                 :func:`~hocr_tools_lib.utils.scan_utils.scan_geometry`.
     :return: For each set of pages, a tuple of the statistics checking the
              actual values against the truth values and vice versa.
     """
+    if cache is None:
+        yield from _evaluate_geometries(truth, actual, element, significant_overlap, close_match, fast)
+        return
+
+    truth_data = read_source(truth)
+    actual_data = read_source(actual)
+    key = cache.make_key(
+        'hocr_eval_geom', [truth_data, actual_data],
+        {'element': element, 'significant_overlap': significant_overlap, 'close_match': close_match}
+    )
+    cached = cache.get(key)
+    if cached is None:
+        results = list(_evaluate_geometries(
+            truth_data, actual_data, element, significant_overlap, close_match, fast
+        ))
+        cache.put(key, [[truth_stats.to_tuple(), actual_stats.to_tuple()] for truth_stats, actual_stats in results])
+        yield from results
+        return
+    for truth_values, actual_values in cached:
+        yield Boxstats(*truth_values), Boxstats(*actual_values)
+
+
+def _get_indexed_page_boxes(
+        elements: Sidecar | GeometryScan, element: str
+) -> list[list[RectangleType | None]]:
+    return [
+        [elements.get_bbox(index) for index in elements.find(element, page, elements.ends[page])]
+        for page in elements.find('ocr_page')
+    ]
+
+
+def _get_page_boxes(source: Any, element: str, fast: bool = False) -> list[list[RectangleType | None]]:
+    # Get the boxes of the given element for each page.
+    PROFILER.count_source(source)
+    sidecar = open_sidecar(source)
+    if sidecar is not None:
+        with sidecar:
+            return _get_indexed_page_boxes(sidecar, element)
+
+    if fast:
+        with PROFILER.timer('html.scan'):
+            scan = scan_geometry(source)
+        return _get_indexed_page_boxes(scan, element)
+
+    with PROFILER.timer('html.parse'):
+        doc = parse_html(source)
+    return [
+        [get_bbox(node) for node in page.xpath(f"descendant-or-self::*[@class='{element}']")]
+        for page in doc.xpath("//*[@class='ocr_page']")
+    ]
+
+
+def _evaluate_geometries(
+        truth: Any, actual: Any, element: str, significant_overlap: float, close_match: float, fast: bool = False
+) -> Generator[tuple[Boxstats, Boxstats], None, None]:
     # Read the hOCR files.
-    truth_doc = html.parse(truth)
-    actual_doc = html.parse(actual)
-    truth_pages = truth_doc.xpath("//*[@class='ocr_page']")
-    actual_pages = actual_doc.xpath("//*[@class='ocr_page']")
+    truth_pages = _get_page_boxes(truth, element, fast)
+    actual_pages = _get_page_boxes(actual, element, fast)
     assert len(truth_pages) == len(actual_pages)
     pages = zip(truth_pages, actual_pages)
 
     # Compute statistics.
-    for truth_page, actual_page in pages:
-        tobjs = truth_page.xpath(f"//*[@class='{element}']")
-        aobjs = actual_page.xpath(f"//*[@class='{element}']")
-        tboxes = [get_bbox(n) for n in tobjs]
+    for tboxes, aboxes in pages:
+        if PROFILER.enabled:
+            PROFILER.count('pages')
+            PROFILER.count('elements', len(tboxes) + len(aboxes))
         if check_bad_partition(tboxes, significant_overlap):
             raise ValueError(
                 "Ground truth data is not an acceptable segmentation"
             )
-        aboxes = [get_bbox(n) for n in aobjs]
         if check_bad_partition(aboxes, significant_overlap):
             raise ValueError("Actual data is not an acceptable segmentation")
-        yield (
-            boxstats(tboxes, aboxes, significant_overlap, close_match),
-            boxstats(aboxes, tboxes, significant_overlap, close_match)
+        with PROFILER.timer('boxstats'):
+            result = (
+                boxstats(tboxes, aboxes, significant_overlap, close_match),
+                boxstats(aboxes, tboxes, significant_overlap, close_match)
+            )
+        yield result
+
+
+def evaluate_matches(
+        truth: InputType, actual: InputType, element: str = 'ocr_line',
+        thresholds: Sequence[float] = DEFAULT_THRESHOLDS,
+        cache: ResultCache | None = None, fast: bool = False
+) -> list[MatchStats]:
+    """
+    Match the boxes of the given files one-to-one and determine precision,
+    recall and F1 score for each of the given IoU thresholds in one pass.
+
+    Unlike :func:`evaluate_geometries`, this does not require the boxes to be
+    a proper partition.
+
+    :param truth: hOCR or ``.hocrx`` sidecar file or content with ground truth.
+    :param actual: hOCR or ``.hocrx`` sidecar file or content with actual data.
+    :param element: hOCR element to look at.
+    :param thresholds: Lower bounds for the intersection over union of
+                       matching boxes.
+    :param cache: Optional cache to look up and store the results.
+    :param fast: Only scan the classes and bounding boxes of the hOCR files,
+                 see :func:`evaluate_geometries`.
+    :return: The statistics summed up over all pages for each threshold, in
+             the given order.
+    """
+    thresholds = list(thresholds)
+    truth_source: Any = truth
+    actual_source: Any = actual
+    key = None
+    if cache is not None:
+        truth_source = read_source(truth)
+        actual_source = read_source(actual)
+        key = cache.make_key(
+            'hocr_eval_geom.matches', [truth_source, actual_source], {'element': element, 'thresholds': thresholds}
         )
+        cached = cache.get(key)
+        if cached is not None:
+            return [MatchStats(*values) for values in cached]
+
+    truth_pages = _get_page_boxes(truth_source, element, fast)
+    actual_pages = _get_page_boxes(actual_source, element, fast)
+    assert len(truth_pages) == len(actual_pages)
+    result = [MatchStats(threshold=threshold) for threshold in thresholds]
+    for tboxes, aboxes in zip(truth_pages, actual_pages):
+        if PROFILER.enabled:
+            PROFILER.count('pages')
+            PROFILER.count('elements', len(tboxes) + len(aboxes))
+        with PROFILER.timer('match'):
+            page_stats = match_page(tboxes, aboxes, thresholds)
+        for total, stats in zip(result, page_stats):
+            total.matches += stats.matches
+            total.truths += stats.truths
+            total.actuals += stats.actuals
+            total.iou += stats.iou
+
+    if cache is not None and key is not None:
+        cache.put(key, [stats.to_tuple() for stats in result])
+    return result
 
 
 def main() -> None:
@@ -146,16 +386,19 @@ def main() -> None:
         epilog=(
             "The output is a 4-tuple (multiple,missing,error,count) "
             "for the truth compared with the actual and then again "
-            "another 4-tuple in the other direction"
+            "another 4-tuple in the other direction. With --thresholds, "
+            "the output is one line per threshold with the threshold, "
+            "precision, recall, F1 score and mean IoU of the one-to-one "
+            "matching of the boxes"
         )
     )
     parser.add_argument(
-        "truth", help="hOCR file with ground truth",
+        "truth", help="hOCR or .hocrx sidecar file with ground truth",
         type=argparse.FileType('r')
     )
     parser.add_argument(
         "actual",
-        help="hOCR file from the actual recognition",
+        help="hOCR or .hocrx sidecar file from the actual recognition",
         type=argparse.FileType('r')
     )
     parser.add_argument(
@@ -178,17 +421,51 @@ def main() -> None:
         default=0.9,
         help="default: %(default)s"
     )
+    parser.add_argument(
+        "-t",
+        "--thresholds",
+        type=parse_thresholds,
+        help=(
+            "match the boxes one-to-one for these IoU thresholds, given as "
+            "comma-separated values or as range start:stop:step like 0.5:0.95:0.05"
+        )
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="only scan the classes and bounding boxes instead of building the document tree"
+    )
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    results = evaluate_geometries(
-        truth=args.truth, actual=args.actual, element=args.element,
-        significant_overlap=args.significant_overlap,
-        close_match=args.close_match
-    )
+    if args.thresholds is not None:
+        with profiling_from_arguments(args):
+            match_results = evaluate_matches(
+                truth=args.truth, actual=args.actual, element=args.element,
+                thresholds=args.thresholds, cache=cache_from_arguments(args),
+                fast=args.fast
+            )
+        for stats in match_results:
+            print(
+                f"{stats.threshold:g}", f"{stats.precision:.4f}", f"{stats.recall:.4f}", f"{stats.f1:.4f}",
+                f"{stats.mean_iou:.4f}"
+            )
+        args.truth.close()
+        args.actual.close()
+        return
+
+    with profiling_from_arguments(args):
+        results = evaluate_geometries(
+            truth=args.truth, actual=args.actual, element=args.element,
+            significant_overlap=args.significant_overlap,
+            close_match=args.close_match, cache=cache_from_arguments(args),
+            fast=args.fast
+        )
 
-    for result in results:
-        truth_stats, actual_stats = result
-        print(truth_stats.to_tuple(), actual_stats.to_tuple())
+        for result in results:
+            truth_stats, actual_stats = result
+            print(truth_stats.to_tuple(), actual_stats.to_tuple())
 
     args.truth.close()
     args.actual.close()
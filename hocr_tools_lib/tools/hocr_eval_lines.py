@@ -7,66 +7,185 @@ from __future__ import annotations
 
 import argparse
 import logging
-import os
-
-from lxml import html
-
-from hocr_tools_lib.utils.edit_utils import edit_distance
-from hocr_tools_lib.utils.node_utils import get_text
+from array import array
+from dataclasses import astuple, dataclass
+from typing import Any, Sequence
+
+from hocr_tools_lib.utils.cache_utils import add_cache_arguments, cache_from_arguments, read_source, ResultCache
+from hocr_tools_lib.utils.edit_utils import edit_distance, ErrorStats
+from hocr_tools_lib.utils.input_utils import parse_html
+from hocr_tools_lib.utils.node_utils import get_texts
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
 from hocr_tools_lib.utils.text_utils import normalize
-from hocr_tools_lib.utils.typing_utils import SupportsRead
+from hocr_tools_lib.utils.typing_utils import InputType, SupportsRead
 
 
 logger = logging.getLogger(__name__)
 del logging
 
 
+@dataclass
+class LineResult:
+    """
+    Evaluation result for one true line.
+    """
+
+    truth: str
+    """
+    The normalized true line.
+    """
+
+    actual: str
+    """
+    The normalized actual line matched with the true line, empty if none is
+    left.
+    """
+
+    errors: int
+    """
+    The number of character or word edits between both lines.
+    """
+
+    length: int
+    """
+    The number of characters or words of the true line.
+    """
+
+
+def get_word_ids(lines: list[str], ids: dict[str, int]) -> list[array[int]]:
+    """
+    Split the given lines into words and replace each distinct word by an
+    integer id.
+
+    :param lines: The lines to split.
+    :param ids: The ids of the words seen so far, updated with the new words.
+    :return: The word ids of each line.
+    """
+    result = []
+    for line in lines:
+        words = line.split()
+        for word in words:
+            if word not in ids:
+                ids[word] = len(ids)
+        result.append(array('i', [ids[word] for word in words]))
+    return result
+
+
 def evaluate_lines(
         tfile: SupportsRead[str],
-        hfile: os.PathLike[str],
-        verbose: bool = False
+        hfile: InputType,
+        verbose: bool = False,
+        cache: ResultCache | None = None,
+        stats: ErrorStats | None = None,
+        words: bool = False,
+        line_results: list[LineResult] | None = None
 ) -> tuple[int, int]:
     """
     Run the evaluation.
 
     :param tfile: Text file with the true lines.
-    :param hfile: hOCR file with the actually recognized lines.
+    :param hfile: hOCR file or content with the actually recognized lines.
     :param verbose: Whether to log additional information for each line.
-    :return: The number of segmentation and OCR errors.
+    :param cache: Optional cache to look up and store the results. Cache hits
+                  do not log anything.
+    :param stats: If set, align each actual line with its matching true line
+                  and add the character and word errors to these statistics.
+                  True lines without a match count as deleted.
+    :param words: Compare words instead of characters. The words are mapped
+                  to integer ids, see :func:`get_word_ids`, thus the lines are
+                  matched by comparing much shorter integer sequences.
+    :param line_results: If set, append the result of each actual line and
+                         its matched true line, followed by the true lines
+                         without a match.
+    :return: The number of segmentation and OCR errors, counted in words if
+             `words` is set.
     """
-    truth_lines = tfile.read().split('\n')
-    actual_doc = html.parse(hfile)
-    actual_lines = [
-        get_text(node) for node in actual_doc.xpath("//*[@class='ocr_line']")
-    ]
+    truth_text = tfile.read()
+    hocr_source: Any = hfile
+    cache_key = None
+    if cache is not None:
+        hocr_data = read_source(hfile)
+        parameters = {
+            name: True for name, value in [
+                ('stats', stats is not None), ('words', words), ('lines', line_results is not None)
+            ] if value
+        }
+        cache_key = cache.make_key('hocr_eval_lines', [truth_text.encode('UTF-8'), hocr_data], parameters or None)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            if stats is not None:
+                stats.merge(ErrorStats.from_dict(cached[2]))
+            if line_results is not None:
+                line_results.extend(LineResult(*values) for values in cached[3])
+            return cached[0], cached[1]
+        hocr_source = hocr_data
+
+    truth_lines = truth_text.split('\n')
+    PROFILER.count_source(hocr_source)
+    with PROFILER.timer('html.parse'):
+        actual_doc = parse_html(hocr_source)
+    actual_lines = [text for _, text in get_texts(actual_doc.getroot(), 'ocr_line')]
 
     truth_lines = [normalize(s) for s in truth_lines]
     truth_lines = [s for s in truth_lines if s != ""]
     actual_lines = [normalize(s) for s in actual_lines]
     actual_lines = [s for s in actual_lines if s != ""]
 
-    remaining = [] + truth_lines
+    PROFILER.count('elements', len(actual_lines))
+    truth_sequences: list[Sequence[Any]] = list(truth_lines)
+    actual_sequences: list[Sequence[Any]] = list(actual_lines)
+    if words:
+        ids: dict[str, int] = {}
+        truth_sequences = list(get_word_ids(truth_lines, ids))
+        actual_sequences = list(get_word_ids(actual_lines, ids))
+        PROFILER.count('words', len(ids))
+    remaining = list(range(len(truth_lines)))
     ocr_errors = 0
-    for actual_line in actual_lines:
+    # Collect the statistics of this call separately to cache them.
+    local_stats = None if stats is None else ErrorStats()
+    local_lines: list[LineResult] = []
+    for actual_line, actual_sequence in zip(actual_lines, actual_sequences):
         min_d = 999999
         min_i = -1
         for index in range(len(remaining)):
-            true_line = remaining[index]
-            d = edit_distance(true_line, actual_line, min_d)
+            d = edit_distance(truth_sequences[remaining[index]], actual_sequence, min_d)
             if d < min_d:
                 min_d = d
                 min_i = index
+        assert min_i >= 0
+        true_index = remaining.pop(min_i)
         if verbose and min_d > 0:
             logger.info("distance %s", min_d)
-            logger.info("\t%s" + actual_line)
-            logger.info("\t%s" + remaining[min_i])
-        assert min_i >= 0
-        del remaining[min_i]
+            logger.info("\t%s", actual_line)
+            logger.info("\t%s", truth_lines[true_index])
+        if local_stats is not None:
+            local_stats.add(truth_lines[true_index], actual_line)
+        if line_results is not None:
+            local_lines.append(
+                LineResult(truth_lines[true_index], actual_line, min_d, len(truth_sequences[true_index]))
+            )
         ocr_errors += min_d
 
     segmentation_errors = 0
-    for s in remaining:
-        segmentation_errors += len(s)
+    for true_index in remaining:
+        length = len(truth_sequences[true_index])
+        segmentation_errors += length
+        if local_stats is not None:
+            local_stats.add(truth_lines[true_index], '')
+        if line_results is not None:
+            local_lines.append(LineResult(truth_lines[true_index], '', length, length))
+
+    if cache is not None and cache_key is not None:
+        values: list[Any] = [segmentation_errors, ocr_errors, None, None]
+        if local_stats is not None:
+            values[2] = local_stats.to_dict()
+        if line_results is not None:
+            values[3] = [astuple(line) for line in local_lines]
+        cache.put(cache_key, values)
+    if stats is not None and local_stats is not None:
+        stats.merge(local_stats)
+    if line_results is not None:
+        line_results.extend(local_lines)
 
     return segmentation_errors, ocr_errors
 
@@ -87,14 +206,42 @@ def main() -> None:
         type=argparse.FileType('r')
     )
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument(
+        "-w", "--words", action="store_true",
+        help="count word instead of character errors"
+    )
+    parser.add_argument(
+        "-l", "--lines", action="store_true",
+        help="print the errors, the length, the true and the actual text of each line, separated by tabs"
+    )
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="report the character and word error rates and the character confusions"
+    )
+    parser.add_argument(
+        "--confusions", type=int, default=10,
+        help="number of most frequent character confusions to report, default: %(default)s"
+    )
+    add_cache_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    segmentation_errors, ocr_errors = evaluate_lines(
-        tfile=args.tfile, hfile=args.hfile, verbose=args.verbose
-    )
+    stats = ErrorStats() if args.stats else None
+    line_results: list[LineResult] | None = [] if args.lines else None
+    with profiling_from_arguments(args):
+        segmentation_errors, ocr_errors = evaluate_lines(
+            tfile=args.tfile, hfile=args.hfile, verbose=args.verbose,
+            cache=cache_from_arguments(args), stats=stats, words=args.words,
+            line_results=line_results
+        )
+
+    for line in line_results or []:
+        print(line.errors, line.length, line.truth, line.actual, sep="\t")
 
     print("segmentation_errors", segmentation_errors)
     print("ocr_errors", ocr_errors)
+    if stats is not None:
+        print(stats.format_report(confusions=args.confusions))
 
     args.tfile.close()
     args.hfile.close()
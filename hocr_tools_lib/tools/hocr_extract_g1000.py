@@ -16,6 +16,7 @@ from typing import cast, Any, Callable
 from PIL import Image
 
 from hocr_tools_lib.utils.node_utils import get_prop
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
 
 
 USAGE = """
@@ -85,7 +86,9 @@ def extract_g1000(hocr: str, image_pattern: str, output_prefix: str) -> None:
             configuration=configuration
         )
         parser.setContentHandler(handler)
-        parser.parse(stream)  # type: ignore[no-untyped-call]
+        PROFILER.count_source(hocr)
+        with PROFILER.timer('sax.parse'):
+            parser.parse(stream)  # type: ignore[no-untyped-call]
 
 
 def get_image_list(image_pattern: str) -> list[str]:
@@ -263,7 +266,10 @@ class DocumentHandler(xml.sax.handler.ContentHandler):
             self.lineno = -1
             self.pageno += 1
             self.page = self.image_list[self.pageno]
-            self.image = Image.open(self.page)
+            PROFILER.count('pages')
+            with PROFILER.timer('pil.decode'):
+                self.image = Image.open(self.page)
+                self.image.load()
         if attrs.get("class", "") == self.element:
             self.lineno += 1
             props = attrs.get("title", None)
@@ -294,7 +300,9 @@ class DocumentHandler(xml.sax.handler.ContentHandler):
                 basedir = os.path.dirname(base)
                 if not os.path.exists(basedir):
                     os.mkdir(basedir)
-                limage.save(base + "." + self.configuration.output_format)
+                with PROFILER.timer('pil.encode'):
+                    limage.save(base + "." + self.configuration.output_format)
+                PROFILER.count('crops_written')
                 limage.close()
                 write_string(base + ".txt", self.text)
                 write_string(base + ".bbox", self.bbox)
@@ -319,9 +327,11 @@ def main() -> None:
     parser.add_argument('image_pattern')
     parser.add_argument('output_pattern')
 
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    extract_g1000(
-        hocr=args.hocr, image_pattern=args.image_pattern,
-        output_prefix=args.output_prefix
-    )
+    with profiling_from_arguments(args):
+        extract_g1000(
+            hocr=args.hocr, image_pattern=args.image_pattern,
+            output_prefix=args.output_prefix
+        )
@@ -14,18 +14,21 @@ from typing import cast, Tuple  # TODO: Drop `Tuple` after dropping Python 3.8.
 from lxml import html
 from PIL import Image
 
-from hocr_tools_lib.utils.node_utils import get_prop, get_text
-from hocr_tools_lib.utils.typing_utils import SupportsReadClose
+from hocr_tools_lib.utils.cache_utils import read_source
+from hocr_tools_lib.utils.input_utils import parse_html
+from hocr_tools_lib.utils.node_utils import get_prop, get_texts
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
+from hocr_tools_lib.utils.typing_utils import InputType
 
 
 def extract_images(
-        hocr: SupportsReadClose[str], basename: str, pattern: str = "line-%03d.png", element: str = "ocr_line",
+        hocr: InputType, basename: str, pattern: str = "line-%03d.png", element: str = "ocr_line",
         pad: str | None = None, unicode_dammit: bool = False
 ) -> None:
     """
     Extract the images from the given document.
 
-    :param hocr: hOCR file to use.
+    :param hocr: hOCR file or content to use.
     :param basename: Image directory.
     :param pattern: Output file pattern to use.
     :param element: hOCR element to look into.
@@ -45,14 +48,18 @@ def extract_images(
     if pattern[-4] == '.':
         txt_pattern = pattern[:-3] + 'txt'
 
-    if unicode_dammit:
-        from bs4 import UnicodeDammit  # type: ignore[attr-defined]
-        content = hocr.read()
-        doc = UnicodeDammit(content, is_html=True)
-        parser = html.HTMLParser(encoding=doc.original_encoding)
-        doc = html.document_fromstring(content.encode('UTF-8'), parser=parser)
-    else:
-        doc = html.parse(hocr)
+    PROFILER.count_source(hocr)
+    with PROFILER.timer('html.parse'):
+        if unicode_dammit:
+            from bs4 import UnicodeDammit  # type: ignore[attr-defined]
+            content = read_source(hocr)
+            # Only use the detected encoding and let `lxml` decode the original bytes.
+            encoding = UnicodeDammit(
+                content if isinstance(content, bytes) else bytes(content), is_html=True
+            ).original_encoding
+            doc = parse_html(content, parser=html.HTMLParser(encoding=encoding))
+        else:
+            doc = parse_html(hocr)
 
     pages = doc.xpath('//*[@class="ocr_page"]')
     for page in pages:
@@ -64,10 +71,14 @@ def extract_images(
             image_name = os.path.join(basename, os.path.basename(image_name))
         if not os.path.exists(image_name):
             raise FileNotFoundError(image_name)
-        image = Image.open(image_name)
-        lines = page.xpath(f"//*[@class='{element}']")
+        PROFILER.count('pages')
+        with PROFILER.timer('pil.decode'):
+            image = Image.open(image_name)
+            image.load()
+        lines = get_texts(page, element)
+        PROFILER.count('elements', len(lines))
         line_count = 1
-        for line in lines:
+        for line, text in lines:
             bbox_prop = get_prop(line, 'bbox')
             assert bbox_prop
             bbox = [int(x) for x in bbox_prop.split()]
@@ -80,11 +91,13 @@ def extract_images(
             if bbox[0] > bbox[2] or bbox[1] >= bbox[3]:
                 continue
             line_image = image.crop(cast(Tuple[int, int, int, int], tuple(bbox)))
-            line_image.save(pattern % line_count)
+            with PROFILER.timer('pil.encode'):
+                line_image.save(pattern % line_count)
+            PROFILER.count('crops_written')
             with open(
                     txt_pattern % line_count, mode='w', encoding='utf-8'
             ) as fd:
-                fd.write(get_text(line))
+                fd.write(text)
             line_count += 1
         image.close()
 
@@ -131,11 +144,13 @@ def main() -> None:
             "issues"
         )
     )
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    extract_images(
-        hocr=args.file, basename=args.basename, pattern=args.pattern,
-        element=args.element, pad=args.pad, unicode_dammit=args.unicodedammit
-    )
+    with profiling_from_arguments(args):
+        extract_images(
+            hocr=args.file, basename=args.basename, pattern=args.pattern,
+            element=args.element, pad=args.pad, unicode_dammit=args.unicodedammit
+        )
 
     args.file.close()
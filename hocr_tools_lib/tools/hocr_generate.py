@@ -0,0 +1,502 @@
+"""
+Generate synthetic hOCR documents with matching blank images for scale testing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import math
+import os
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Generator, Tuple  # TODO: Drop `Tuple` after dropping Python 3.8.
+from xml.sax.saxutils import escape
+
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
+
+
+LATIN_WORDS = [
+    "Alice", "was", "beginning", "to", "get", "very", "tired", "of", "sitting", "by", "her", "sister",
+    "on", "the", "bank,", "and", "having", "nothing", "do:", "once", "or", "twice", "she", "had",
+    "peeped", "into", "book", "reading,", "but", "it", "no", "pictures", "conversations", "in",
+    "`and", "what", "is", "use", "a", "thought", "without", "conversation?", "So", "considering",
+    "own", "mind", "(as", "well", "as", "could,", "for", "hot", "day", "made", "feel", "sleepy",
+]
+"""
+Vocabulary for plain ASCII words.
+"""
+
+UNICODE_WORDS = [
+    "Mädchen", "café", "naïve", "Straße", "Łódź", "Ørsted", "façade", "Ελλάδα", "Москва", "señor",
+    "über", "crème", "brûlée", "Ærø", "žluťoučký", "€100", "—", "„Hase“", "fiancée", "São",
+]
+"""
+Vocabulary for left-to-right words with non-ASCII characters.
+"""
+
+RTL_WORDS = [
+    "שלום", "עולם", "ספר", "ילדה", "ארנב", "سلام", "كتاب", "أرنب", "عالم", "حديقة",
+]
+"""
+Vocabulary for right-to-left words.
+"""
+
+ERROR_CHARACTERS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.,;:'-"
+"""
+Characters used for substitutions and insertions in the perturbed copy.
+"""
+
+HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
+    "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">
+ <head>
+  <title></title>
+  <meta http-equiv="Content-Type" content="text/html;charset=utf-8"/>
+  <meta name='ocr-system' content='hocr-tools-lib generator'/>
+  <meta name='ocr-capabilities' content='ocr_page ocr_carea ocr_par ocr_line ocrx_word ocrp_wconf'/>
+ </head>
+ <body>
+"""
+
+FOOTER = """ </body>
+</html>
+"""
+
+
+@dataclass
+class Configuration:
+    """
+    Parameters of the generated documents.
+    """
+
+    pages: int = 1
+    """
+    Number of pages.
+    """
+
+    paragraphs: int = 4
+    """
+    Number of paragraphs per page.
+    """
+
+    lines: int = 6
+    """
+    Number of lines per paragraph.
+    """
+
+    words: int = 10
+    """
+    Number of words per line.
+    """
+
+    columns: int = 1
+    """
+    Number of text columns per page. The paragraphs are distributed evenly.
+    """
+
+    overlap_rate: float = 0.0
+    """
+    Ratio of lines which overlap the previous line vertically by half of their height.
+    """
+
+    baseline: bool = True
+    """
+    Add the ``baseline`` and ``x_size`` properties to the lines.
+    """
+
+    x_wconf: bool = True
+    """
+    Add the ``x_wconf`` property to the words.
+    """
+
+    unicode_ratio: float = 0.0
+    """
+    Ratio of words with non-ASCII characters.
+    """
+
+    rtl_ratio: float = 0.0
+    """
+    Ratio of right-to-left words.
+    """
+
+    error_rate: float = 0.05
+    """
+    Ratio of characters which are substituted, deleted or followed by an
+    insertion in the perturbed copy.
+    """
+
+    width: int = 2480
+    """
+    Page width in pixels.
+    """
+
+    height: int = 3508
+    """
+    Page height in pixels.
+    """
+
+    dpi: int = 300
+    """
+    Resolution of the images.
+    """
+
+    images: bool = True
+    """
+    Write a blank JPEG image for each page.
+    """
+
+    seed: int = 0
+    """
+    Seed for the random number generator. The same seed and configuration
+    always yield the same output.
+    """
+
+
+@dataclass
+class GeneratedFiles:
+    """
+    Paths of the generated files.
+    """
+
+    truth: list[Path] = field(default_factory=list)
+    """
+    hOCR files with the ground truth.
+    """
+
+    actual: list[Path] = field(default_factory=list)
+    """
+    hOCR files with the perturbed copy, in the same order as the truth files.
+    """
+
+    text: list[Path] = field(default_factory=list)
+    """
+    Text files with the ground truth lines, in the same order as the truth files.
+    """
+
+    images: list[Path] = field(default_factory=list)
+    """
+    Image files for all pages.
+    """
+
+
+# Bounding box and text of a word.
+_Word = Tuple[Tuple[int, int, int, int], str]
+
+
+class _Perturbator:
+    """
+    Inject character errors following a Bernoulli process with the configured
+    rate, drawing one random number per error instead of one per character.
+    """
+
+    def __init__(self, rng: random.Random, error_rate: float) -> None:
+        self.rng = rng
+        self.log_keep = math.log(1.0 - error_rate) if 0 < error_rate < 1 else None
+        self.always = error_rate >= 1
+        self.skip = self._next_skip()
+
+    def _next_skip(self) -> int:
+        if self.always:
+            return 0
+        if self.log_keep is None:
+            return -1
+        return int(math.log(1.0 - self.rng.random()) / self.log_keep)
+
+    def perturb(self, word: str) -> str:
+        if self.skip < 0 or self.skip >= len(word):
+            if self.skip >= 0:
+                self.skip -= len(word)
+            return word
+        characters = list(word)
+        position = 0
+        while 0 <= self.skip < len(characters) - position:
+            position += self.skip
+            choice = self.rng.random()
+            replacement = self.rng.choice(ERROR_CHARACTERS)
+            if choice < 0.7:
+                characters[position] = replacement
+                position += 1
+            elif choice < 0.85:
+                del characters[position]
+            else:
+                characters.insert(position + 1, replacement)
+                position += 2
+            self.skip = self._next_skip()
+        if self.skip >= 0:
+            self.skip -= len(characters) - position
+        return "".join(characters)
+
+
+def _choose_word(rng: random.Random, configuration: Configuration) -> str:
+    value = rng.random()
+    if value < configuration.rtl_ratio:
+        return rng.choice(RTL_WORDS)
+    if value < configuration.rtl_ratio + configuration.unicode_ratio:
+        return rng.choice(UNICODE_WORDS)
+    return rng.choice(LATIN_WORDS)
+
+
+def _layout_page(rng: random.Random, configuration: Configuration) -> list[list[list[list[_Word]]]]:
+    """
+    Determine the words with their boxes, grouped by column, paragraph and line.
+    """
+    margin = configuration.width // 20
+    gutter = configuration.width // 25 if configuration.columns > 1 else 0
+    column_width = (configuration.width - 2 * margin - (configuration.columns - 1) * gutter) // configuration.columns
+    paragraphs_per_column = -(-configuration.paragraphs // configuration.columns)
+    # Each paragraph is followed by a gap with the height of one line.
+    pitch = min(
+        70.0,
+        (configuration.height - 2 * margin) / max(1, paragraphs_per_column * (configuration.lines + 1))
+    )
+    line_height = max(2, int(pitch * 0.8))
+
+    columns: list[list[list[list[_Word]]]] = []
+    paragraph_index = 0
+    for column_index in range(configuration.columns):
+        x_start = margin + column_index * (column_width + gutter)
+        y = float(margin)
+        column: list[list[list[_Word]]] = []
+        for _ in range(paragraphs_per_column):
+            if paragraph_index >= configuration.paragraphs:
+                break
+            paragraph_index += 1
+            paragraph: list[list[_Word]] = []
+            for _ in range(configuration.lines):
+                texts = [_choose_word(rng, configuration) for _ in range(configuration.words)]
+                characters = sum(len(text) for text in texts) + len(texts) - 1
+                character_width = min(30.0, column_width / max(1, characters))
+                y0 = int(y)
+                if paragraph and rng.random() < configuration.overlap_rate:
+                    y0 -= line_height // 2
+                y1 = y0 + line_height
+                x = float(x_start)
+                line: list[_Word] = []
+                for text in texts:
+                    x1 = x + len(text) * character_width
+                    line.append(((int(x), y0, max(int(x) + 1, int(x1)), y1), text))
+                    x = x1 + character_width
+                paragraph.append(line)
+                y += pitch
+            column.append(paragraph)
+            y += pitch
+        columns.append(column)
+    return columns
+
+
+def _union(boxes: list[tuple[int, int, int, int]]) -> str:
+    return (
+        f"{min(box[0] for box in boxes)} {min(box[1] for box in boxes)} "
+        f"{max(box[2] for box in boxes)} {max(box[3] for box in boxes)}"
+    )
+
+
+def _render_page(
+        columns: list[list[list[list[_Word]]]], page_number: int, image_name: str,
+        configuration: Configuration, confidences: list[int], perturbator: _Perturbator | None
+) -> tuple[str, list[str]]:
+    """
+    Render the page as hOCR, returning the markup and the text lines.
+    """
+    parts = [
+        f"  <div class='ocr_page' id='page_{page_number}' title='image \"{image_name}\"; "
+        f"bbox 0 0 {configuration.width} {configuration.height}; ppageno {page_number - 1}'>\n"
+    ]
+    text_lines = []
+    block_number = paragraph_number = line_number = word_number = 0
+    confidence_index = 0
+    for column in columns:
+        for paragraph in column:
+            block_number += 1
+            paragraph_number += 1
+            boxes = [word[0] for line in paragraph for word in line]
+            box = _union(boxes)
+            parts.append(f"   <div class='ocr_carea' id='block_{page_number}_{block_number}' title='bbox {box}'>\n")
+            parts.append(f"    <p class='ocr_par' id='par_{page_number}_{paragraph_number}' title='bbox {box}'>\n")
+            for line in paragraph:
+                line_number += 1
+                line_box = _union([word[0] for word in line])
+                title = f"bbox {line_box}"
+                if configuration.baseline:
+                    height = line[0][0][3] - line[0][0][1]
+                    title += f"; baseline 0.001 -{height // 5}; x_size {height}"
+                parts.append(f"     <span class='ocr_line' id='line_{page_number}_{line_number}' title='{title}'>")
+                texts = []
+                for (x0, y0, x1, y1), text in line:
+                    word_number += 1
+                    if perturbator is not None:
+                        text = perturbator.perturb(text)
+                    texts.append(text)
+                    title = f"bbox {x0} {y0} {x1} {y1}"
+                    if configuration.x_wconf:
+                        title += f"; x_wconf {confidences[confidence_index]}"
+                    confidence_index += 1
+                    # Hebrew and Arabic blocks.
+                    direction = " dir='rtl'" if text[:1] and "\u0590" <= text[0] <= "\u08ff" else ""
+                    parts.append(
+                        f"<span class='ocrx_word' id='word_{page_number}_{word_number}' title='{title}'{direction}>"
+                        f"{escape(text)}</span> "
+                    )
+                parts.append("</span>\n")
+                text_lines.append(" ".join(texts))
+            parts.append("    </p>\n   </div>\n")
+    parts.append("  </div>\n")
+    return "".join(parts), text_lines
+
+
+def generate_pages(configuration: Configuration) -> Generator[tuple[str, str, list[str]], None, None]:
+    """
+    Generate the pages.
+
+    :param configuration: The parameters of the pages.
+    :return: For each page, the hOCR markup of the ground truth page, the
+             hOCR markup of the perturbed page and the ground truth lines.
+    """
+    rng = random.Random(configuration.seed)
+    # Use a separate generator for the errors to keep the ground truth
+    # independent of the error rate.
+    perturbator = _Perturbator(random.Random(configuration.seed + 1), configuration.error_rate)
+    for page_number in range(1, configuration.pages + 1):
+        columns = _layout_page(rng, configuration)
+        word_count = sum(len(line) for column in columns for paragraph in column for line in paragraph)
+        confidences = [rng.randint(50, 99) for _ in range(word_count)]
+        image_name = _image_name(page_number)
+        truth, text_lines = _render_page(columns, page_number, image_name, configuration, confidences, None)
+        actual, _ = _render_page(columns, page_number, image_name, configuration, confidences, perturbator)
+        yield truth, actual, text_lines
+
+
+def _image_name(page_number: int) -> str:
+    return f"page-{page_number:04d}.jpg"
+
+
+def _blank_image(configuration: Configuration) -> bytes:
+    from PIL import Image
+
+    output = io.BytesIO()
+    with Image.new('L', (configuration.width, configuration.height), 255) as image:
+        image.save(output, format='JPEG', dpi=(configuration.dpi, configuration.dpi))
+    return output.getvalue()
+
+
+def generate(
+        directory: os.PathLike[str] | str, configuration: Configuration | None = None, single_file: bool = False
+) -> GeneratedFiles:
+    """
+    Generate a corpus of ground truth and perturbed hOCR files.
+
+    The ground truth is written to the ``truth`` subdirectory, together with
+    the text lines and the images, while the perturbed copy is written to the
+    ``actual`` subdirectory using the same file names.
+
+    :param directory: The output directory.
+    :param configuration: The parameters of the documents.
+    :param single_file: Write all pages into one ``book.hocr`` file instead of
+                        one ``page-NNNN.hocr`` file per page.
+    :return: The paths of the generated files.
+    """
+    configuration = configuration or Configuration()
+    truth_directory = Path(directory) / 'truth'
+    actual_directory = Path(directory) / 'actual'
+    truth_directory.mkdir(parents=True, exist_ok=True)
+    actual_directory.mkdir(parents=True, exist_ok=True)
+
+    result = GeneratedFiles()
+    with PROFILER.timer('pil.encode'):
+        image_data = _blank_image(configuration) if configuration.images else b''
+
+    def open_files(stem: str) -> tuple[io.TextIOWrapper, io.TextIOWrapper, io.TextIOWrapper]:
+        result.truth.append(truth_directory / f'{stem}.hocr')
+        result.actual.append(actual_directory / f'{stem}.hocr')
+        result.text.append(truth_directory / f'{stem}.txt')
+        files = (
+            open(result.truth[-1], mode='w', encoding='utf-8'),
+            open(result.actual[-1], mode='w', encoding='utf-8'),
+            open(result.text[-1], mode='w', encoding='utf-8'),
+        )
+        files[0].write(HEADER)
+        files[1].write(HEADER)
+        return files
+
+    def close_files(files: tuple[io.TextIOWrapper, io.TextIOWrapper, io.TextIOWrapper]) -> None:
+        files[0].write(FOOTER)
+        files[1].write(FOOTER)
+        for fd in files:
+            fd.close()
+
+    files = open_files('book') if single_file else None
+    for page_number, (truth, actual, text_lines) in enumerate(generate_pages(configuration), start=1):
+        if not single_file:
+            files = open_files(f'page-{page_number:04d}')
+        assert files is not None
+        PROFILER.count('pages')
+        files[0].write(truth)
+        files[1].write(actual)
+        files[2].write('\n'.join(text_lines) + '\n')
+        if not single_file:
+            close_files(files)
+        if configuration.images:
+            image_path = truth_directory / _image_name(page_number)
+            image_path.write_bytes(image_data)
+            result.images.append(image_path)
+    if single_file and files is not None:
+        close_files(files)
+
+    return result
+
+
+def main() -> None:
+    defaults = Configuration()
+    parser = argparse.ArgumentParser(
+        description=(
+            "Generate synthetic ground truth and perturbed hOCR files with "
+            "matching blank images for scale testing"
+        )
+    )
+    parser.add_argument("directory", help="output directory")
+    parser.add_argument("-p", "--pages", type=int, default=defaults.pages, help="default: %(default)s")
+    parser.add_argument("--paragraphs", type=int, default=defaults.paragraphs, help="per page, default: %(default)s")
+    parser.add_argument("--lines", type=int, default=defaults.lines, help="per paragraph, default: %(default)s")
+    parser.add_argument("--words", type=int, default=defaults.words, help="per line, default: %(default)s")
+    parser.add_argument("--columns", type=int, default=defaults.columns, help="per page, default: %(default)s")
+    parser.add_argument(
+        "--overlap-rate", type=float, default=defaults.overlap_rate,
+        help="ratio of overlapping lines, default: %(default)s"
+    )
+    parser.add_argument("--no-baseline", action="store_true", help="omit the baseline property of the lines")
+    parser.add_argument("--no-wconf", action="store_true", help="omit the x_wconf property of the words")
+    parser.add_argument(
+        "--unicode-ratio", type=float, default=defaults.unicode_ratio,
+        help="ratio of words with non-ASCII characters, default: %(default)s"
+    )
+    parser.add_argument(
+        "--rtl-ratio", type=float, default=defaults.rtl_ratio,
+        help="ratio of right-to-left words, default: %(default)s"
+    )
+    parser.add_argument(
+        "-e", "--error-rate", type=float, default=defaults.error_rate,
+        help="character error rate of the perturbed copy, default: %(default)s"
+    )
+    parser.add_argument("--width", type=int, default=defaults.width, help="page width in pixels, default: %(default)s")
+    parser.add_argument("--height", type=int, default=defaults.height, help="page height in pixels, default: %(default)s")
+    parser.add_argument("--dpi", type=int, default=defaults.dpi, help="image resolution, default: %(default)s")
+    parser.add_argument("--no-images", action="store_true", help="do not write any images")
+    parser.add_argument("-s", "--seed", type=int, default=defaults.seed, help="default: %(default)s")
+    parser.add_argument(
+        "--single-file", action="store_true",
+        help="write all pages into one book.hocr file instead of one file per page"
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    configuration = Configuration(
+        pages=args.pages, paragraphs=args.paragraphs, lines=args.lines, words=args.words, columns=args.columns,
+        overlap_rate=args.overlap_rate, baseline=not args.no_baseline, x_wconf=not args.no_wconf,
+        unicode_ratio=args.unicode_ratio, rtl_ratio=args.rtl_ratio, error_rate=args.error_rate,
+        width=args.width, height=args.height, dpi=args.dpi, images=not args.no_images, seed=args.seed,
+    )
+    with profiling_from_arguments(args):
+        generate(directory=args.directory, configuration=configuration, single_file=args.single_file)
@@ -5,25 +5,39 @@ Extract the text within all the ``ocr_line`` elements within the hOCR file.
 from __future__ import annotations
 
 import argparse
-import os
 import re
 import sys
 from typing import Generator
 
-from lxml import html
+from hocr_tools_lib.utils.input_utils import parse_html
+from hocr_tools_lib.utils.node_utils import get_texts
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
+from hocr_tools_lib.utils.sidecar_utils import open_sidecar
+from hocr_tools_lib.utils.typing_utils import InputType
 
 
-def lines(hocr: os.PathLike[str]) -> Generator[str, None, None]:
+def lines(hocr: InputType) -> Generator[str, None, None]:
     """
     Extract the lines from the given document.
 
-    :param hocr: hOCR file to extract from.
+    :param hocr: hOCR or ``.hocrx`` sidecar file or content to extract from.
     :return: The corresponding lines.
     """
-    doc = html.parse(hocr)
+    PROFILER.count_source(hocr)
+    sidecar = open_sidecar(hocr)
+    if sidecar is not None:
+        with sidecar:
+            for index in sidecar.find('ocr_line'):
+                PROFILER.count('elements')
+                yield re.sub(r'\s+', '\x20', sidecar.get_text(index)).strip()
+        return
 
-    for line in doc.xpath("//*[@class='ocr_line']"):
-        yield re.sub(r'\s+', '\x20', line.text_content()).strip()
+    with PROFILER.timer('html.parse'):
+        doc = parse_html(hocr)
+
+    for _, text in get_texts(doc.getroot(), 'ocr_line'):
+        PROFILER.count('elements')
+        yield text.strip()
 
 
 def main() -> None:
@@ -33,8 +47,10 @@ def main() -> None:
             'within the hOCR file'
         )
     )
-    parser.add_argument('file', nargs='?', default=sys.stdin)
+    parser.add_argument('file', nargs='?', default=sys.stdin, help='hOCR or .hocrx sidecar file')
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    result = lines(hocr=args.file)
-    print('\n'.join(result))
+    with profiling_from_arguments(args):
+        result = lines(hocr=args.file)
+        print('\n'.join(result))
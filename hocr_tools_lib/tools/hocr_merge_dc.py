@@ -5,12 +5,14 @@ Merge Dublin Core metadata into hOCR header files.
 from __future__ import annotations
 
 import argparse
-import os
 import re
 
 from lxml import etree, html
 
+from hocr_tools_lib.utils.input_utils import parse_html
 from hocr_tools_lib.utils.node_utils import get_text
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
+from hocr_tools_lib.utils.typing_utils import InputType
 
 
 DC_KNOWN = [
@@ -20,17 +22,34 @@ DC_KNOWN = [
 ]
 
 
-def merge_dc(dc: os.PathLike[str], hocr: os.PathLike[str]) -> bytes:
+def merge_dc(dc: InputType, hocr: InputType) -> bytes:
     """
     Merge the metadata into the hOCR file.
 
-    :param dc: The Dublin Core metadata file.
-    :param hocr: The hOCR input file.
+    :param dc: The Dublin Core metadata file or content.
+    :param hocr: The hOCR input file or content.
     :return: The generated hOCR data.
     """
-    dc_doc = etree.parse(dc, html.XHTMLParser())
-    hocr_doc = html.parse(hocr)
+    PROFILER.count_source(dc)
+    PROFILER.count_source(hocr)
+    with PROFILER.timer('html.parse'):
+        dc_doc = parse_html(dc, html.XHTMLParser())
+        hocr_doc = parse_html(hocr)
+    merge_dc_documents(dc_doc=dc_doc, hocr_doc=hocr_doc)
 
+    with PROFILER.timer('serialize'):
+        return etree.tostring(hocr_doc, pretty_print=True)
+
+
+def merge_dc_documents(
+        dc_doc: etree._ElementTree[html.HtmlElement], hocr_doc: etree._ElementTree[html.HtmlElement]
+) -> None:
+    """
+    Merge the metadata into the parsed hOCR document in place.
+
+    :param dc_doc: The parsed Dublin Core metadata.
+    :param hocr_doc: The parsed hOCR document to modify.
+    """
     # Remove all existing META tags representing Dublin Core metadata.
     hocr_meta = hocr_doc.xpath("//HEAD|//head")
     assert hocr_meta != []
@@ -44,6 +63,7 @@ def merge_dc(dc: os.PathLike[str], hocr: os.PathLike[str]) -> bytes:
     dc_nodes = dc_doc.xpath(
         "//dc:*", namespaces={"dc": "http://purl.org/dc/elements/1.1/"}
     )
+    PROFILER.count('elements', len(dc_nodes))
     for node in dc_nodes:
         node_tag = re.sub(
             r'^{http://purl.org/dc/elements/1.1/}', 'dc:', node.tag
@@ -60,8 +80,6 @@ def merge_dc(dc: os.PathLike[str], hocr: os.PathLike[str]) -> bytes:
             hnode.attrib['content'] = value
             hocr_meta.append(hnode)
 
-    return etree.tostring(hocr_doc, pretty_print=True)
-
 
 def main() -> None:
     parser = argparse.ArgumentParser(
@@ -73,10 +91,12 @@ def main() -> None:
         type=argparse.FileType('r')
     )
     parser.add_argument("hocr", help="hOCR file", type=argparse.FileType('r'))
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    merged = merge_dc(dc=args.dc, hocr=args.hocr)
-    print(merged)
+    with profiling_from_arguments(args):
+        merged = merge_dc(dc=args.dc, hocr=args.hocr)
+        print(merged)
 
     args.dc.close()
     args.hocr.close()
@@ -21,25 +21,41 @@ from __future__ import annotations
 
 import argparse
 import base64
+import dataclasses
 import glob
+import hashlib
 import io
+import itertools
+import json
+import logging
 import os
 import re
+import shutil
 import sys
 import zlib
-from typing import Any
-
-try:
-    from bidi import get_display  # type: ignore[import-untyped]
-except ImportError:
-    # For version < 0.5.
-    from bidi.algorithm import get_display  # type: ignore[import-untyped]
-from reportlab.pdfbase import pdfmetrics  # type: ignore[import-untyped]
-from reportlab.pdfbase.ttfonts import TTFont  # type: ignore[import-untyped]
-from reportlab.pdfgen.canvas import Canvas  # type: ignore[import-untyped]
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Deque, Generator, Iterable, Sequence, TYPE_CHECKING
 
 from lxml import etree, html
-from PIL import Image
+
+from hocr_tools_lib.utils.cache_utils import add_cache_arguments, cache_from_arguments, read_source, ResultCache
+from hocr_tools_lib.utils.input_utils import get_directory, iter_pages
+from hocr_tools_lib.utils.node_utils import get_bbox, get_prop
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
+from hocr_tools_lib.utils.typing_utils import InputType
+
+
+logger = logging.getLogger(__name__)
+del logging
+
+
+# `reportlab`, `python-bidi` and PIL are only imported when creating a PDF
+# to keep the startup fast.
+if TYPE_CHECKING:
+    from reportlab.pdfgen.canvas import Canvas  # type: ignore[import-untyped]
+
+    from hocr_tools_lib.utils.image_utils import ImageOptions, PreparedImage
 
 
 class StdoutWrapper:
@@ -55,6 +71,35 @@ class StdoutWrapper:
         sys.stdout.write(data)
 
 
+TEXT_OBJECT_MODES = ('word', 'line')
+"""
+Supported modes of emitting the text layer: One PDF text object per word,
+each setting up the whole text state, or one text object per line, setting
+the font and the render mode once and positioning the words relatively.
+"""
+
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.tif', '.tiff')
+"""
+Suffixes of the images to look for in the input directory. If there are
+multiple images for the same hOCR file, the first suffix wins.
+"""
+
+
+PAGE_CACHE_SIZE = 4096 * 1024 * 1024
+"""
+Default size of the cache of the rendered pages in bytes. The cached pages
+include their images, thus this is larger than the default of the other tools.
+"""
+
+
+CHECKPOINT_FILE = 'checkpoint.json'
+"""
+Name of the file recording the completed chunks inside the work directory of
+:func:`write_chunked_pdf`.
+"""
+
+
 class NoImagesFoundError(RuntimeError):
     """
     Custom error class when no images could be found.
@@ -62,7 +107,12 @@ class NoImagesFoundError(RuntimeError):
     pass
 
 
-def export_pdf(directory: str, default_dpi: int = 300, savefile: str | None = None) -> None:
+def export_pdf(
+        directory: str, default_dpi: int = 300, savefile: str | None = None, text_objects: str = 'word',
+        text_only: bool = False, merge_onto: str | None = None, image_options: ImageOptions | None = None,
+        image_workers: int | None = None, chunk_size: int | None = None, work_directory: str | None = None,
+        cache: ResultCache | None = None
+) -> None:
     """
     Create a searchable PDF from a pile of HOCR + JPEG.
 
@@ -70,36 +120,625 @@ def export_pdf(directory: str, default_dpi: int = 300, savefile: str | None = No
     :param default_dpi: The image resolution to use.
     :param savefile: If set, save the PDF file to this file instead of
                      displaying it on stdout.
+    :param text_objects: How to emit the text layer, see
+                         :data:`TEXT_OBJECT_MODES`.
+    :param text_only: Only create the invisible text layer from the hOCR
+                      files in the directory, without any images.
+    :param merge_onto: Existing PDF file to merge the text layer onto page by
+                       page. Implies `text_only`.
+    :param image_options: If set, downsample and re-encode the images
+                          according to these settings before embedding them.
+    :param image_workers: The number of threads preparing the images.
+    :param chunk_size: If set, render this many pages at once into resumable
+                       intermediate files, see :func:`write_chunked_pdf`.
+    :param work_directory: The directory of the intermediate files.
+    :param cache: If set, only render the pages whose inputs changed and
+                  take the others from this cache, see :func:`write_pdf`.
+    """
+    pages: Iterable[tuple[str | None, etree._ElementTree[html.HtmlElement] | html.HtmlElement | None]]
+    if text_only or merge_onto:
+        hocr_files = sorted(glob.glob(os.path.join(directory, '*.hocr')))
+        if len(hocr_files) == 0:
+            raise FileNotFoundError(f"No hOCR files found in the folder {directory}.")
+        pages = ((None, page) for page in _iter_hocr_pages(hocr_files))
+    else:
+        images = _find_images(directory)
+        if len(images) == 0:
+            raise NoImagesFoundError(
+                f"WARNING: No JPG, PNG or TIFF images found in the folder {directory}"
+                "\nScript cannot proceed without them and will terminate now.\n"
+            )
+        pages = ((image, None) for image in images)
+    write_pdf(
+        pages=pages, title=os.path.basename(directory),
+        default_dpi=default_dpi, savefile=savefile, text_objects=text_objects, merge_onto=merge_onto,
+        image_options=image_options, image_workers=image_workers, chunk_size=chunk_size, work_directory=work_directory,
+        cache=cache
+    )
+
+
+def _find_images(directory: str) -> list[str]:
+    images: dict[str, str] = {}
+    for suffix in reversed(IMAGE_SUFFIXES):
+        for image in glob.glob(os.path.join(directory, '*' + suffix)):
+            images[os.path.splitext(image)[0]] = image
+    return sorted(images.values())
+
+
+def export_hocr_pdf(
+        hocr: InputType, savefile: str | None = None, images: Sequence[str] | None = None, default_dpi: int = 300,
+        title: str | None = None, text_objects: str = 'word', text_only: bool = False, merge_onto: str | None = None,
+        image_options: ImageOptions | None = None, image_workers: int | None = None, chunk_size: int | None = None,
+        work_directory: str | None = None, cache: ResultCache | None = None
+) -> None:
+    """
+    Create a searchable PDF from a multi-page hOCR file.
+
+    The hOCR file is parsed incrementally and each page is added to the PDF
+    as soon as it has been parsed, thus the document is neither split nor
+    held in memory completely.
+
+    :param hocr: The multi-page hOCR file or content.
+    :param savefile: If set, save the PDF file to this file instead of
+                     displaying it on stdout.
+    :param images: The images of the pages, see :func:`get_page_image`.
+                   Defaults to the ``image`` property of the pages.
+    :param default_dpi: The image resolution to use if neither the image nor
+                        the hOCR page provide it.
+    :param title: The title of the PDF document. Defaults to the name of the
+                  hOCR file.
+    :param text_objects: How to emit the text layer, see
+                         :data:`TEXT_OBJECT_MODES`.
+    :param text_only: Only create the invisible text layer, sized according
+                      to the pages, without any images.
+    :param merge_onto: Existing PDF file to merge the text layer onto page by
+                       page. Implies `text_only`.
+    :param image_options: If set, downsample and re-encode the images
+                          according to these settings before embedding them.
+    :param image_workers: The number of threads preparing the images.
+    :param chunk_size: If set, render this many pages at once into resumable
+                       intermediate files, see :func:`write_chunked_pdf`.
+    :param work_directory: The directory of the intermediate files.
+    :param cache: If set, only render the pages whose inputs changed and
+                  take the others from this cache, see :func:`write_pdf`.
+    """
+    if title is None:
+        title = os.path.splitext(os.path.basename(hocr))[0] if isinstance(hocr, (str, os.PathLike)) else ''
+    PROFILER.count_source(hocr)
+    pages: Iterable[tuple[str | None, html.HtmlElement]]
+    if text_only or merge_onto:
+        pages = ((None, page) for page in iter_pages(hocr))
+    else:
+        directory = get_directory(hocr)
+        pages = (
+            (get_page_image(page, index, directory=directory, images=images), page)
+            for index, page in enumerate(iter_pages(hocr))
+        )
+    write_pdf(
+        pages=pages, title=title, default_dpi=default_dpi, savefile=savefile, text_objects=text_objects,
+        merge_onto=merge_onto, image_options=image_options, image_workers=image_workers, chunk_size=chunk_size,
+        work_directory=work_directory, cache=cache
+    )
+
+
+def get_page_image(
+        page: html.HtmlElement, index: int, directory: str = '', images: Sequence[str] | None = None
+) -> str:
+    """
+    Determine the image of the given page.
+
+    :param page: The hOCR page.
+    :param index: The position of the page in the document.
+    :param directory: The directory the ``image`` property is relative to.
+    :param images: The images of all pages, for example from
+                   :func:`read_manifest`. They are selected by the
+                   ``ppageno`` property of the page, falling back to the
+                   position of the page.
+    :return: The image file.
+    """
+    if images is not None:
+        ppageno = get_prop(page, 'ppageno')
+        if ppageno is not None:
+            index = int(ppageno)
+        if not 0 <= index < len(images):
+            raise NoImagesFoundError(f"No image given for page {page.get('id')} at position {index}.")
+        return images[index]
+    image = get_prop(page, 'image', strip_value=True)
+    if image is None:
+        raise NoImagesFoundError(f"Page {page.get('id')} does not refer to an image.")
+    return os.path.join(directory, image)
+
+
+def read_manifest(manifest: str) -> list[str]:
+    """
+    Read the images of the pages from the given manifest file.
+
+    The manifest lists one image per line, in the order of the physical page
+    numbers. Relative paths refer to the directory of the manifest. Empty
+    lines and lines starting with ``#`` are ignored.
+
+    :param manifest: The manifest file.
+    :return: The image files.
+    """
+    directory = os.path.dirname(manifest)
+    images = []
+    with open(manifest, encoding='utf-8') as fd:
+        for line in fd:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                images.append(os.path.join(directory, line))
+    return images
+
+
+def _iter_hocr_pages(hocr_files: Iterable[str]) -> Generator[html.HtmlElement, None, None]:
+    for hocr_file in hocr_files:
+        PROFILER.count_source(hocr_file)
+        yield from iter_pages(hocr_file)
+
+
+def write_pdf(
+        pages: Iterable[tuple[str | None, etree._ElementTree[html.HtmlElement] | html.HtmlElement | None]],
+        title: str = '', default_dpi: int = 300, savefile: str | BinaryIO | None = None, text_objects: str = 'word',
+        merge_onto: str | BinaryIO | None = None, image_options: ImageOptions | None = None,
+        image_executor: Executor | None = None, image_workers: int | None = None, chunk_size: int | None = None,
+        work_directory: str | None = None, cache: ResultCache | None = None
+) -> None:
+    """
+    Create a searchable PDF from the given images and their hOCR data.
+
+    :param pages: The image path and the already parsed hOCR document or
+                  page for each page. If the hOCR data is `None`, the hOCR
+                  file next to the image with the ``.hocr`` suffix is used.
+                  If the image is `None`, the page only holds the invisible
+                  text layer and is sized according to the hOCR page, see
+                  :func:`get_page_size`.
+    :param title: The title of the PDF document.
+    :param default_dpi: The image resolution to use if neither the image nor
+                        the hOCR page provide it.
+    :param savefile: If set, save the PDF file to this file instead of
+                     displaying it on stdout.
+    :param text_objects: How to emit the text layer, see
+                         :data:`TEXT_OBJECT_MODES`.
+    :param merge_onto: Existing PDF file to merge the created pages onto page
+                       by page, see :func:`merge_text_layer`.
+    :param image_options: If set, downsample and re-encode the images
+                          according to these settings, see
+                          :func:`~hocr_tools_lib.utils.image_utils.prepare_image`.
+                          The images are prepared ahead of the page assembly
+                          and the page size and the text layer keep referring
+                          to the original image.
+    :param image_executor: The executor to prepare the images in, for example
+                           a process pool. Defaults to a thread pool.
+    :param image_workers: The number of threads of the default thread pool.
+    :param chunk_size: If set, render this many pages at once into resumable
+                       intermediate files, see :func:`write_chunked_pdf`.
+                       Requires the `savefile` to be a path.
+    :param work_directory: The directory of the intermediate files.
+    :param cache: If set, each page is rendered into its own PDF, which is
+                  stored in this cache keyed by the content of the image, the
+                  hOCR data and the settings. Pages found in the cache are not
+                  rendered again, but copied into the result like the others.
+                  This requires `pypdf`, available by the ``overlay`` extra.
     """
-    images = sorted(glob.glob(os.path.join(directory, '*.jpg')))
-    if len(images) == 0:
-        raise NoImagesFoundError(
-            f"WARNING: No JPG images found in the folder {directory}"
-            "\nScript cannot proceed without them and will terminate now.\n"
+    if text_objects not in TEXT_OBJECT_MODES:
+        raise ValueError(f"Unknown text object mode {text_objects!r}.")
+    if chunk_size is not None:
+        if not isinstance(savefile, str) or merge_onto is not None:
+            raise ValueError("Chunked mode requires a path to save to and does not support merging onto a PDF.")
+        write_chunked_pdf(
+            pages=pages, savefile=savefile, chunk_size=chunk_size, work_directory=work_directory, title=title,
+            default_dpi=default_dpi, text_objects=text_objects, image_options=image_options,
+            image_executor=image_executor, image_workers=image_workers, cache=cache
+        )
+        return
+    if merge_onto is not None:
+        text_layer = io.BytesIO()
+        write_pdf(
+            pages=pages, title=title, default_dpi=default_dpi, savefile=text_layer, text_objects=text_objects,
+            cache=cache
         )
+        text_layer.seek(0)
+        merge_text_layer(text_layer=text_layer, base=merge_onto, savefile=savefile)
+        return
+    if cache is not None:
+        if image_options is not None and image_executor is None:
+            # Share the pool between the pages instead of one pool per page.
+            with ThreadPoolExecutor(max_workers=image_workers) as executor:
+                write_pdf(
+                    pages=pages, title=title, default_dpi=default_dpi, savefile=savefile, text_objects=text_objects,
+                    image_options=image_options, image_executor=executor, cache=cache
+                )
+            return
+        page_pdfs = _iter_cached_pages(
+            pages, cache=cache, default_dpi=default_dpi, text_objects=text_objects, image_options=image_options,
+            image_executor=image_executor
+        )
+        concatenate_pdfs(page_pdfs, savefile=savefile if savefile else StdoutWrapper(), title=title)
+        return
+    from PIL import Image
+    from reportlab.pdfgen.canvas import Canvas
+
     load_invisible_font()
     pdf = Canvas(savefile if savefile else StdoutWrapper(), pageCompression=1)
     pdf.setCreator('hocr-tools')
-    pdf.setTitle(os.path.basename(directory))
+    pdf.setTitle(title)
+    prepared_pages: Iterable[tuple[str | None, Any, PreparedImage | None]]
+    if image_options is None:
+        prepared_pages = ((image, hocr, None) for image, hocr in pages)
+    else:
+        prepared_pages = _prepare_pages(
+            pages, default_dpi=default_dpi, options=image_options, executor=image_executor, workers=image_workers
+        )
+    for index, (image, hocr, prepared) in enumerate(prepared_pages):
+        PROFILER.count('pages')
+        if prepared is not None:
+            PROFILER.count_source(image)
+            dpi = prepared.dpi
+            # Keep the original size, thus the text layer still matches.
+            width = prepared.original_width * 72 / dpi
+            height = prepared.original_height * 72 / dpi
+            pdf.setPageSize((width, height))
+            with PROFILER.timer('reportlab.image'):
+                _draw_prepared_image(pdf, prepared, f'PreparedImage{index}', width, height)
+        elif image is None:
+            if hocr is None:
+                raise ValueError("Pages without an image require the hOCR data.")
+            w, h, dpi = get_page_size(hocr, default_dpi)
+            width = w * 72 / dpi
+            height = h * 72 / dpi
+            pdf.setPageSize((width, height))
+        else:
+            PROFILER.count_source(image)
+            im = Image.open(image)
+            w, h = im.size
+            # Resolve the resolution for each page on its own, like the cached
+            # and the chunked output do.
+            dpi = float(im.info.get('dpi', (default_dpi,))[0])
+            width = w * 72 / dpi
+            height = h * 72 / dpi
+            pdf.setPageSize((width, height))
+            with PROFILER.timer('reportlab.image'):
+                pdf.drawImage(image, 0, 0, width=width, height=height)
+            im.close()
+        with PROFILER.timer('text_layer'):
+            add_text_layer(pdf, image, height, dpi, hocr=hocr, text_objects=text_objects)
+        with PROFILER.timer('reportlab.page'):
+            pdf.showPage()
+    with PROFILER.timer('reportlab.save'):
+        pdf.save()
+
+
+def write_chunked_pdf(
+        pages: Iterable[tuple[str | None, etree._ElementTree[html.HtmlElement] | html.HtmlElement | None]],
+        savefile: str, chunk_size: int = 100, work_directory: str | None = None, title: str = '',
+        default_dpi: int = 300, text_objects: str = 'word', image_options: ImageOptions | None = None,
+        image_executor: Executor | None = None, image_workers: int | None = None, keep_chunks: bool = False,
+        cache: ResultCache | None = None
+) -> None:
+    """
+    Create a searchable PDF in chunks which survive an interrupted run.
+
+    Each range of `chunk_size` pages is rendered into its own PDF file inside
+    the work directory and recorded in the checkpoint file
+    :data:`CHECKPOINT_FILE` there, together with the digest of the image and
+    the hOCR data of each page. Running again with the same settings skips
+    the chunks already recorded for the same page contents. Finally, the chunks are
+    concatenated by copying their objects, which requires `pypdf`, available
+    by the ``overlay`` extra.
+
+    :param pages: The image path and the hOCR data for each page, see
+                  :func:`write_pdf`.
+    :param savefile: The PDF file to write.
+    :param chunk_size: The number of pages per chunk.
+    :param work_directory: The directory of the chunks and the checkpoint
+                           file. Defaults to `savefile` with a ``.chunks``
+                           suffix.
+    :param title: The title of the PDF document.
+    :param default_dpi: The image resolution to use if neither the image nor
+                        the hOCR page provide it.
+    :param text_objects: How to emit the text layer, see
+                         :data:`TEXT_OBJECT_MODES`.
+    :param image_options: If set, downsample and re-encode the images
+                          according to these settings.
+    :param image_executor: The executor to prepare the images in.
+    :param image_workers: The number of threads of the default thread pool.
+    :param keep_chunks: Keep the work directory after the PDF has been
+                        written.
+    :param cache: The cache of the rendered pages, see :func:`write_pdf`.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"Invalid chunk size {chunk_size}.")
+    if work_directory is None:
+        work_directory = savefile + '.chunks'
+    os.makedirs(work_directory, exist_ok=True)
+    checkpoint_path = os.path.join(work_directory, CHECKPOINT_FILE)
+    settings = {
+        'chunk_size': chunk_size,
+        'default_dpi': default_dpi,
+        'text_objects': text_objects,
+        'image_options': None if image_options is None else dataclasses.asdict(image_options),
+    }
+    checkpoint = _load_checkpoint(checkpoint_path, settings)
+    chunk_paths = []
+    iterator = iter(pages)
+    for index in itertools.count():
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            break
+        filename = f'chunk-{index:05d}.pdf'
+        path = os.path.join(work_directory, filename)
+        chunk_paths.append(path)
+        with PROFILER.timer('checkpoint.digest'):
+            digests = [_get_page_digest(*_read_page_data(image, hocr)) for image, hocr in chunk]
+        if _is_chunk_complete(checkpoint['chunks'].get(str(index)), path, digests, settings):
+            PROFILER.count('chunks.skipped')
+            continue
+        PROFILER.count('chunks.rendered')
+        temporary_path = path + '.tmp'
+        # The title is only set when concatenating, thus the chunks do not
+        # depend on it.
+        write_pdf(
+            pages=chunk, default_dpi=default_dpi, savefile=temporary_path, text_objects=text_objects,
+            image_options=image_options, image_executor=image_executor, image_workers=image_workers, cache=cache
+        )
+        os.replace(temporary_path, path)
+        checkpoint['chunks'][str(index)] = {'pages': digests, 'settings': settings, 'size': os.path.getsize(path)}
+        _write_json_atomically(checkpoint_path, checkpoint)
+    if not chunk_paths:
+        raise ValueError("No pages given.")
+    concatenate_pdfs(chunk_paths, savefile=savefile, title=title)
+    if not keep_chunks:
+        shutil.rmtree(work_directory)
+
+
+def _is_chunk_complete(
+        entry: dict[str, Any] | None, path: str, digests: list[str], settings: dict[str, Any]
+) -> bool:
+    if entry is None or entry.get('pages') != digests or entry.get('settings') != settings:
+        return False
+    return os.path.isfile(path) and os.path.getsize(path) == entry['size']
+
+
+def _load_checkpoint(path: str, settings: dict[str, Any]) -> dict[str, Any]:
+    try:
+        with open(path, encoding='utf-8') as fd:
+            checkpoint: dict[str, Any] = json.load(fd)
+    except (OSError, ValueError):
+        checkpoint = {}
+    if checkpoint.get('settings') != settings:
+        # Chunks rendered with other settings cannot be reused.
+        checkpoint = {'settings': settings, 'chunks': {}}
+    return checkpoint
+
+
+def _write_json_atomically(path: str, data: Any) -> None:
+    temporary_path = path + '.tmp'
+    with open(temporary_path, mode='w', encoding='utf-8') as fd:
+        json.dump(data, fd)
+    os.replace(temporary_path, path)
+
+
+def concatenate_pdfs(
+        paths: Iterable[str | BinaryIO], savefile: str | BinaryIO | StdoutWrapper, title: str = ''
+) -> None:
+    """
+    Concatenate the given PDF files by copying their objects, thus without
+    rendering or re-encoding any page.
+
+    This requires `pypdf`, which can be installed by the ``overlay`` extra.
+
+    :param paths: The PDF files to concatenate. They are read one after the
+                  other, thus may be created lazily.
+    :param savefile: The PDF file to write.
+    :param title: The title of the PDF document.
+    """
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for path in paths:
+        with PROFILER.timer('pdf.concatenate'):
+            writer.append(path)
+    writer.add_metadata({'/Title': title, '/Creator': 'hocr-tools'})
+    with PROFILER.timer('pdf.write'):
+        if isinstance(savefile, StdoutWrapper):
+            output = io.BytesIO()
+            writer.write(output)
+            savefile.write(output.getvalue())
+        else:
+            writer.write(savefile)
+
+
+def _read_page_data(
+        image: str | None, hocr: etree._ElementTree[html.HtmlElement] | html.HtmlElement | None
+) -> tuple[bytes, bytes]:
+    # The content of the image and the hOCR data of one page.
+    if hocr is None:
+        if image is None:
+            raise ValueError("Pages without an image require the hOCR data.")
+        hocr_data = bytes(read_source(os.path.splitext(image)[0] + '.hocr'))
+    else:
+        hocr_data = etree.tostring(hocr)
+    image_data = b'' if image is None else bytes(read_source(image))
+    return image_data, hocr_data
+
+
+def _get_page_digest(image_data: bytes, hocr_data: bytes) -> str:
+    digest = hashlib.sha256()
+    for data in (image_data, hocr_data):
+        digest.update(len(data).to_bytes(8, 'big'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def _iter_cached_pages(
+        pages: Iterable[tuple[str | None, etree._ElementTree[html.HtmlElement] | html.HtmlElement | None]],
+        cache: ResultCache, default_dpi: int, text_objects: str, image_options: ImageOptions | None,
+        image_executor: Executor | None
+) -> Generator[io.BytesIO, None, None]:
+    parameters = {
+        'default_dpi': default_dpi,
+        'text_objects': text_objects,
+        'image_options': None if image_options is None else dataclasses.asdict(image_options),
+    }
+    total_size = 0
+    for image, hocr in pages:
+        with PROFILER.timer('cache.key'):
+            image_data, hocr_data = _read_page_data(image, hocr)
+            key = cache.make_key('hocr_pdf.page', [image_data, hocr_data], parameters)
+        data = cache.get_bytes(key)
+        if data is None:
+            PROFILER.count('pages.rendered')
+            output = io.BytesIO()
+            write_pdf(
+                pages=[(image, hocr)], default_dpi=default_dpi, savefile=output, text_objects=text_objects,
+                image_options=image_options, image_executor=image_executor
+            )
+            data = output.getvalue()
+            cache.put_bytes(key, data)
+        total_size += len(data)
+        yield io.BytesIO(data)
+    if total_size > cache.max_size:
+        # The first pages have been evicted already, thus the next run would
+        # render all of them again.
+        logger.warning(
+            "The rendered pages take %d MiB, more than the cache size of %d MiB. Increase the cache size to reuse them.",
+            -(-total_size // (1024 * 1024)), cache.max_size // (1024 * 1024)
+        )
+
+
+def _prepare_pages(
+        pages: Iterable[tuple[str | None, Any]], default_dpi: float, options: ImageOptions,
+        executor: Executor | None = None, workers: int | None = None
+) -> Generator[tuple[str | None, Any, PreparedImage | None], None, None]:
+    from hocr_tools_lib.utils.image_utils import prepare_image
+
+    own_executor = executor is None
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    # Bound the number of images held in memory while the canvas is behind.
+    window = 2 * (workers or os.cpu_count() or 1)
+    pending: Deque[tuple[str | None, Any, Future[PreparedImage] | None]] = deque()
+    try:
+        for image, hocr in pages:
+            future = None if image is None else executor.submit(prepare_image, image, default_dpi, options)
+            pending.append((image, hocr, future))
+            if len(pending) >= window:
+                image, hocr, future = pending.popleft()
+                yield image, hocr, None if future is None else future.result()
+        while pending:
+            image, hocr, future = pending.popleft()
+            yield image, hocr, None if future is None else future.result()
+    finally:
+        for _, _, future in pending:
+            if future is not None:
+                future.cancel()
+        if own_executor:
+            executor.shutdown(wait=True)
+
+
+def _draw_prepared_image(pdf: Canvas, prepared: PreparedImage, name: str, width: float, height: float) -> None:
+    from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary, PDFName, PDFStream  # type: ignore[import-untyped]
+
+    dictionary = PDFDictionary({
+        'Type': PDFName('XObject'),
+        'Subtype': PDFName('Image'),
+        'Width': prepared.width,
+        'Height': prepared.height,
+        'BitsPerComponent': prepared.bits_per_component,
+        'ColorSpace': PDFName(prepared.color_space),
+        # `reportlab` does not apply its own filters if one is given.
+        'Filter': PDFArray([PDFName(prepared.filter)]),
+    })
+    if prepared.decode_params:
+        dictionary['DecodeParms'] = PDFDictionary({
+            # `reportlab` would write Python's spelling of booleans.
+            key: ('true' if value else 'false') if isinstance(value, bool) else value
+            for key, value in prepared.decode_params.items()
+        })
+    # Register and draw the image like `Canvas.drawImage` does.
+    pdf._doc.addForm(name, PDFStream(dictionary, prepared.data))
+    pdf._formsinuse.append(name)
+    pdf._currentPageHasImages = 1
+    pdf.saveState()
+    pdf.scale(width, height)
+    pdf._code.append(f'/{pdf._doc.getXObjectName(name)} Do')
+    pdf.restoreState()
+
+
+def get_page_size(
+        hocr: etree._ElementTree[html.HtmlElement] | html.HtmlElement, default_dpi: float = 300
+) -> tuple[float, float, float]:
+    """
+    Determine the page size from the hOCR data.
+
+    :param hocr: The hOCR page, or the document to use the first page of.
+    :param default_dpi: The resolution to use if the page does not declare it
+                        by the ``scan_res`` property.
+    :return: The width and the height in pixels, as given by the lower right
+             corner of the page bbox, and the resolution.
+    """
+    if isinstance(hocr, etree._Element) and hocr.get('class') == 'ocr_page':
+        page = hocr
+    else:
+        pages = hocr.xpath('.//*[@class="ocr_page"]')
+        if not pages:
+            raise ValueError("The hOCR data does not contain any page.")
+        page = pages[0]
+    bbox = get_bbox(page)
+    if bbox is None:
+        raise ValueError("The hOCR page does not declare its bbox.")
     dpi = default_dpi
-    for image in images:
-        im = Image.open(image)
-        w, h = im.size
-        try:
-            dpi = im.info['dpi'][0]
-        except KeyError:
-            pass
-        width = w * 72 / dpi
-        height = h * 72 / dpi
-        pdf.setPageSize((width, height))
-        pdf.drawImage(image, 0, 0, width=width, height=height)
-        add_text_layer(pdf, image, height, dpi)
-        pdf.showPage()
-        im.close()
-    pdf.save()
+    scan_res = get_prop(page, 'scan_res')
+    if scan_res:
+        dpi = float(scan_res.split()[0])
+    return bbox[2], bbox[3], dpi
+
 
+def merge_text_layer(
+        text_layer: str | BinaryIO, base: str | BinaryIO, savefile: str | BinaryIO | None = None
+) -> None:
+    """
+    Merge the text layer onto an existing PDF page by page.
 
-def add_text_layer(pdf: Canvas, image: str, height: float, dpi: int) -> None:
+    Each text layer page is scaled to the media box of the corresponding
+    existing page. This requires `pypdf`, which can be installed by the
+    ``overlay`` extra.
+
+    :param text_layer: The PDF holding the text layer.
+    :param base: The existing PDF, usually holding the scanned images.
+    :param savefile: If set, save the PDF file to this file instead of
+                     displaying it on stdout.
+    """
+    from pypdf import PdfReader, PdfWriter, Transformation
+
+    text_reader = PdfReader(text_layer)
+    writer = PdfWriter(clone_from=base)
+    if len(text_reader.pages) != len(writer.pages):
+        raise ValueError(
+            f"The text layer has {len(text_reader.pages)} pages, but the existing PDF has {len(writer.pages)} pages."
+        )
+    with PROFILER.timer('pdf.merge'):
+        for base_page, text_page in zip(writer.pages, text_reader.pages):
+            box = base_page.mediabox
+            transformation = Transformation().scale(
+                float(box.width) / float(text_page.mediabox.width),
+                float(box.height) / float(text_page.mediabox.height)
+            ).translate(float(box.left), float(box.bottom))
+            base_page.merge_transformed_page(text_page, transformation)
+    with PROFILER.timer('pdf.write'):
+        if savefile:
+            writer.write(savefile)
+        else:
+            output = io.BytesIO()
+            writer.write(output)
+            StdoutWrapper().write(output.getvalue())
+
+
+def add_text_layer(
+        pdf: Canvas, image: str | None, height: float, dpi: float,
+        hocr: etree._ElementTree[html.HtmlElement] | html.HtmlElement | None = None,
+        text_objects: str = 'word'
+) -> None:
     """
     Draw an invisible text layer for OCR data.
 
@@ -107,12 +746,22 @@ def add_text_layer(pdf: Canvas, image: str, height: float, dpi: int) -> None:
     :param image: The image path to determine the hOCR file from.
     :param height: The page height to use for positioning/scaling.
     :param dpi: The resolution to use for positioning/scaling.
+    :param hocr: The already parsed hOCR document or page to use instead of
+                 the hOCR file.
+    :param text_objects: How to emit the text layer, see
+                         :data:`TEXT_OBJECT_MODES`.
     """
+    get_display = _import_get_display()
     p1 = re.compile(r'bbox((\s+\d+){4})')
     p2 = re.compile(r'baseline((\s+[\d\.\-]+){2})')
-    hocr_file = os.path.splitext(image)[0] + ".hocr"
-    hocr = etree.parse(hocr_file, html.XHTMLParser())
-    for line in hocr.xpath('//*[@class="ocr_line"]'):
+    if hocr is None:
+        assert image is not None
+        hocr_file = os.path.splitext(image)[0] + ".hocr"
+        PROFILER.count_source(hocr_file)
+        with PROFILER.timer('html.parse'):
+            hocr = etree.parse(hocr_file, html.XHTMLParser())
+    for line in hocr.xpath('.//*[@class="ocr_line"]'):
+        PROFILER.count('elements')
         line_box_match = p1.search(line.attrib['title'])
         assert line_box_match is not None
         line_box_str = line_box_match.group(1).split()
@@ -129,6 +778,8 @@ def add_text_layer(pdf: Canvas, image: str, height: float, dpi: int) -> None:
             # If there are no words elements present, we switch to lines
             # as elements.
             xpath_elements = '.'
+        line_text = None
+        x0 = y0 = 0.0
         for word in line.xpath(xpath_elements):
             rawtext = word.text_content().strip()
             if rawtext == '':
@@ -144,15 +795,43 @@ def add_text_layer(pdf: Canvas, image: str, height: float, dpi: int) -> None:
                 baseline,
                 (box[0] + box[2]) / 2 - line_box[0]
             ) + line_box[3]
+            x = box[0] * 72 / dpi
+            y = height - b * 72 / dpi
+            box_width = (box[2] - box[0]) * 72 / dpi
+            rawtext = get_display(rawtext)
+            PROFILER.count('words')
+            if text_objects == 'line':
+                if line_text is None:
+                    line_text = pdf.beginText()
+                    line_text.setTextRenderMode(3)  # Double invisible.
+                    line_text.setFont('invisible', 8)
+                    line_text.setTextOrigin(x, y)
+                else:
+                    # Relative to the previous word, with the y axis pointing
+                    # downwards as expected by `reportlab`.
+                    line_text.moveCursor(x - x0, y0 - y)
+                x0, y0 = x, y
+                line_text.setHorizScale(100.0 * box_width / font_width)
+                line_text.textOut(rawtext)
+                continue
             text = pdf.beginText()
             text.setTextRenderMode(3)  # Double invisible.
             text.setFont('invisible', 8)
-            text.setTextOrigin(box[0] * 72 / dpi, height - b * 72 / dpi)
-            box_width = (box[2] - box[0]) * 72 / dpi
+            text.setTextOrigin(x, y)
             text.setHorizScale(100.0 * box_width / font_width)
-            rawtext = get_display(rawtext)
             text.textLine(rawtext)
             pdf.drawText(text)
+        if line_text is not None:
+            pdf.drawText(line_text)
+
+
+def _import_get_display() -> Callable[[str], str]:
+    try:
+        from bidi import get_display  # type: ignore[import-untyped]
+    except ImportError:
+        # For version < 0.5.
+        from bidi.algorithm import get_display  # type: ignore[import-untyped]
+    return get_display  # type: ignore[no-any-return]
 
 
 def polyval(poly: list[float], x: float) -> float:
@@ -187,6 +866,9 @@ x/UufAwjQT3O0R5De5K8LocwwuFzlQ82rlRQWk0FlVzW9YfVXan3IkiODY0M+Qn/zCHJzNJVwQpd
 KgsVW+2M2WxlpRCU3ORw4hBiqznoChwU9h0hIYUVfbVUSFA62YrLeYV8w+Htqyuo+lEPT1hqXqhb
 33s4126uHw91e18UPWzibOOTbZ1mfyZ2DM6SHmqFs/QPxKbPLw==
 """
+    from reportlab.pdfbase import pdfmetrics  # type: ignore[import-untyped]
+    from reportlab.pdfbase.ttfonts import TTFont  # type: ignore[import-untyped]
+
     uncompressed = bytearray(zlib.decompress(base64.b64decode(font)))
     ttf = io.BytesIO(uncompressed)
     ttf.name = '(invisible.ttf)'
@@ -195,21 +877,136 @@ KgsVW+2M2WxlpRCU3ORw4hBiqznoChwU9h0hIYUVfbVUSFA62YrLeYV8w+Htqyuo+lEPT1hqXqhb
 
 def main() -> None:
     parser = argparse.ArgumentParser(
-        description="Create a searchable PDF from a pile of hOCR and JPEG"
+        description="Create a searchable PDF from a pile of hOCR and JPEG, or a multi-page hOCR file"
     )
     parser.add_argument(
         "imgdir",
         help=(
-            "directory with the hOCR and JPEG files (corresponding "
-            "JPEG and hOCR files have to have the same name with "
-            "their respective file ending)"
+            "directory with the hOCR and JPEG, PNG or TIFF files (corresponding "
+            "image and hOCR files have to have the same name with "
+            "their respective file ending), or a multi-page hOCR file"
+        )
+    )
+    parser.add_argument(
+        "--manifest",
+        help=(
+            "file listing the image of each page of the multi-page hOCR file, one per line, "
+            "instead of the image property of the pages"
         )
     )
     parser.add_argument(
         "--savefile",
         help="Save to this file instead of outputting to stdout"
     )
+    parser.add_argument(
+        "--text-only",
+        action="store_true",
+        help=(
+            "only create the invisible text layer from the hOCR files, sizing the pages "
+            "from the page bbox and resolution, without embedding any images"
+        )
+    )
+    parser.add_argument(
+        "--merge-onto",
+        metavar="PDF",
+        help="merge the text layer onto the pages of this existing PDF, implies --text-only, requires pypdf"
+    )
+    parser.add_argument(
+        "--dpi",
+        type=int,
+        default=300,
+        help="resolution to use if neither the image nor the hOCR page declare it, default: %(default)s"
+    )
+    parser.add_argument(
+        "--text-objects",
+        choices=TEXT_OBJECT_MODES,
+        default="word",
+        help=(
+            "emit one PDF text object per word or per line, the latter creating "
+            "considerably smaller content streams, default: %(default)s"
+        )
+    )
+    parser.add_argument(
+        "--recompress",
+        action="store_true",
+        help=(
+            "re-encode the images before embedding them, detecting grayscale and bilevel pages "
+            "and encoding the latter with CCITT Group 4"
+        )
+    )
+    parser.add_argument(
+        "--target-dpi",
+        type=float,
+        help="downsample images with a higher resolution to this one, implies --recompress"
+    )
+    parser.add_argument(
+        "--jpeg-quality",
+        type=int,
+        default=75,
+        help="JPEG quality of re-encoded color and grayscale images, default: %(default)s"
+    )
+    parser.add_argument(
+        "--bilevel-compression",
+        choices=("ccitt", "flate"),
+        default="ccitt",
+        help="encoding of re-encoded bilevel images, default: %(default)s"
+    )
+    parser.add_argument(
+        "--image-workers",
+        type=int,
+        help="number of threads re-encoding the images, defaults to the number of processors"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help=(
+            "render this many pages at once into intermediate PDFs, which are skipped when running again "
+            "after an interruption and finally concatenated, requires --savefile and pypdf"
+        )
+    )
+    parser.add_argument(
+        "--work-directory",
+        help="directory of the intermediate PDFs, default: the save file with the suffix .chunks"
+    )
+    add_cache_arguments(
+        parser, max_size=PAGE_CACHE_SIZE,
+        description=(
+            "keep each rendered page including its image inside this directory and only render the changed pages "
+            "again, requires pypdf; --cache-size has to hold the whole book"
+        )
+    )
+    add_profile_arguments(parser)
     args = parser.parse_args()
-    if not os.path.isdir(args.imgdir):
-        sys.exit(f"ERROR: Given path '{args.imgdir}' is not a directory")
-    export_pdf(directory=args.imgdir, default_dpi=300, savefile=args.savefile)
+    if args.chunk_size is not None and not args.savefile:
+        parser.error("--chunk-size requires --savefile")
+    if args.chunk_size is not None and args.merge_onto:
+        parser.error("--chunk-size cannot be combined with --merge-onto")
+    cache = cache_from_arguments(args)
+    if os.path.isfile(args.imgdir):
+        images = read_manifest(args.manifest) if args.manifest else None
+    elif args.manifest:
+        sys.exit("ERROR: A manifest requires a multi-page hOCR file")
+    elif not os.path.isdir(args.imgdir):
+        sys.exit(f"ERROR: Given path '{args.imgdir}' is neither a directory nor a file")
+    image_options = None
+    if args.recompress or args.target_dpi:
+        from hocr_tools_lib.utils.image_utils import ImageOptions
+
+        image_options = ImageOptions(
+            target_dpi=args.target_dpi, jpeg_quality=args.jpeg_quality, bilevel_compression=args.bilevel_compression
+        )
+    with profiling_from_arguments(args):
+        if os.path.isfile(args.imgdir):
+            export_hocr_pdf(
+                hocr=args.imgdir, savefile=args.savefile, images=images, default_dpi=args.dpi,
+                text_objects=args.text_objects, text_only=args.text_only, merge_onto=args.merge_onto,
+                image_options=image_options, image_workers=args.image_workers, chunk_size=args.chunk_size,
+                work_directory=args.work_directory, cache=cache
+            )
+            return
+        export_pdf(
+            directory=args.imgdir, default_dpi=args.dpi, savefile=args.savefile, text_objects=args.text_objects,
+            text_only=args.text_only, merge_onto=args.merge_onto, image_options=image_options,
+            image_workers=args.image_workers, chunk_size=args.chunk_size, work_directory=args.work_directory,
+            cache=cache
+        )
@@ -0,0 +1,55 @@
+"""
+Convert an hOCR file into a binary ``.hocrx`` sidecar.
+
+The sidecar can be used instead of the hOCR file by ``hocr-eval-geom``,
+``hocr-lines`` and ``hocr-wordfreq`` to avoid parsing the HTML again.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from os import PathLike
+
+from hocr_tools_lib.utils.input_utils import parse_html
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
+from hocr_tools_lib.utils.sidecar_utils import SUFFIX, write_sidecar
+from hocr_tools_lib.utils.typing_utils import InputType
+
+
+def create_sidecar(hocr: InputType, output: PathLike[str] | str | None = None) -> str:
+    """
+    Create the sidecar for the given hOCR file.
+
+    :param hocr: hOCR file or content to convert.
+    :param output: The sidecar file to write. Defaults to the hOCR file with
+                   the suffix replaced by ``.hocrx``, required if the hOCR
+                   file is not given as path.
+    :return: The path of the sidecar file.
+    """
+    if output is None:
+        if not isinstance(hocr, (str, PathLike)):
+            raise ValueError("The output path is required if the input is not a path.")
+        output = os.path.splitext(os.fspath(hocr))[0] + SUFFIX
+    PROFILER.count_source(hocr)
+    with PROFILER.timer('html.parse'):
+        doc = parse_html(hocr)
+    with PROFILER.timer('serialize'):
+        write_sidecar(doc, output)
+    return os.fspath(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="convert an hOCR file into a binary .hocrx sidecar for faster analysis"
+    )
+    parser.add_argument("file", help="hOCR file")
+    parser.add_argument(
+        "-o", "--output",
+        help="sidecar file to write, default: the hOCR file with the suffix replaced by .hocrx"
+    )
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    with profiling_from_arguments(args):
+        create_sidecar(hocr=args.file, output=args.output)
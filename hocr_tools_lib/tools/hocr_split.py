@@ -6,33 +6,66 @@ from __future__ import annotations
 
 import argparse
 import re
-from os import PathLike
+from typing import Generator
 
 from lxml import etree, html
 
+from hocr_tools_lib.utils.input_utils import parse_html
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
+from hocr_tools_lib.utils.typing_utils import InputType
 
-def split(hocr: PathLike[str] | str, pattern: str = "base-%03d.html") -> None:
+
+def split(hocr: InputType, pattern: str = "base-%03d.html") -> None:
     """
     Split the given hOCR file into multiple pages.
 
-    :param hocr: hOCR file to split.
+    :param hocr: hOCR file or content to split.
     :param pattern: Naming pattern for the output files.
     """
     assert re.search('%[0-9]*d', pattern)
 
-    doc = etree.parse(hocr, html.XHTMLParser())
+    PROFILER.count_source(hocr)
+    with PROFILER.timer('html.parse'):
+        doc = parse_html(hocr, html.XHTMLParser())
+    for index, page_doc in enumerate(split_document(doc), start=1):
+        with PROFILER.timer('serialize'):
+            page_doc.write((pattern % index), pretty_print=True)
+
+
+def split_document(
+        doc: etree._ElementTree[html.HtmlElement]
+) -> Generator[etree._ElementTree[html.HtmlElement], None, None]:
+    """
+    Split the given parsed hOCR document into single pages.
+
+    The pages are swapped in place instead of copying the document, thus each
+    yielded document is only valid until the next one is requested. The
+    original document is restored once the generator has been exhausted or
+    closed.
+
+    :param doc: The parsed hOCR document to split.
+    :return: The document holding only the current page, for each page.
+    """
     pages = doc.xpath("//*[@class='ocr_page']")
     assert pages != []
+    PROFILER.count('pages', len(pages))
 
     container = pages[0].getparent()
-    index = 1
-    for new_page in pages:
-        container_pages = container.xpath("//*[@class='ocr_page']")
-        for page in container_pages:
-            container.remove(page)
-        container.append(new_page)
-        doc.write((pattern % index), pretty_print=True)
-        index += 1
+    # Detach all pages once, then add each of them for writing.
+    positions = [(page.getparent(), page.getparent().index(page)) for page in pages]
+    for page, (parent, _) in zip(pages, positions):
+        parent.remove(page)
+    try:
+        for new_page in pages:
+            container.append(new_page)
+            try:
+                yield doc
+            finally:
+                container.remove(new_page)
+    finally:
+        # Restore in document order, which keeps the recorded indices valid.
+        for page, (parent, position) in zip(pages, positions):
+            parent.insert(position, page)
 
 
 def main() -> None:
@@ -43,8 +76,10 @@ def main() -> None:
     parser.add_argument(
         "pattern", help="naming pattern, e.g. 'base-%%03d.html'"
     )
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    split(hocr=args.file, pattern=args.pattern)
+    with profiling_from_arguments(args):
+        split(hocr=args.file, pattern=args.pattern)
 
     args.file.close()
@@ -4,33 +4,43 @@ Calculate the word frequency inside an hOCR file.
 
 from __future__ import annotations
 
-import os
 import sys
 import re
 import argparse
 from typing import cast, Callable, Generator
 
-from lxml import html
+from hocr_tools_lib.utils.input_utils import parse_html
+from hocr_tools_lib.utils.profile_utils import add_profile_arguments, PROFILER, profiling_from_arguments
+from hocr_tools_lib.utils.sidecar_utils import open_sidecar
+from hocr_tools_lib.utils.typing_utils import InputType
 
 
 def word_frequencies(
-        hocr_in: os.PathLike[str] | str, case_insensitive: bool = False, spaces: bool = False, dehyphenate: bool = False,
-        max_hits: int = 10
+        hocr_in: InputType, case_insensitive: bool = False, spaces: bool = False,
+        dehyphenate: bool = False, max_hits: int = 10
 ) -> Generator[str, None, None]:
     """
     Determine the word frequencies.
 
-    :param hocr_in: hOCR file to analyze.
+    :param hocr_in: hOCR or ``.hocrx`` sidecar file or content to analyze.
     :param case_insensitive: Ignore the casing of the words.
     :param spaces: Split on spaces only.
     :param dehyphenate: Try to dehyphenate the text.
     :param max_hits: Number of hits to return.
     :return: Up to `max_hits` of the most used words.
     """
-    doc = html.parse(hocr_in)
-    body = doc.find('body')
-    assert body is not None
-    text = body.text_content().strip()
+    PROFILER.count_source(hocr_in)
+    sidecar = open_sidecar(hocr_in)
+    if sidecar is not None:
+        with sidecar:
+            # The body is always the first element.
+            text = sidecar.get_text(0).strip()
+    else:
+        with PROFILER.timer('html.parse'):
+            doc = parse_html(hocr_in)
+        body = doc.find('body')
+        assert body is not None
+        text = body.text_content().strip()
     if case_insensitive:
         text = text.lower()
     if dehyphenate:
@@ -44,10 +54,12 @@ def word_frequencies(
     separators = re.compile(r'\W+', re.UNICODE)
     if spaces:
         separators = re.compile(r'\s+', re.UNICODE)
-    for word in separators.split(text):
-        if word == '':
-            continue
-        word_counts[word] = word_counts[word] + 1 if word in word_counts else 1
+    with PROFILER.timer('wordfreq.count'):
+        for word in separators.split(text):
+            if word == '':
+                continue
+            word_counts[word] = word_counts[word] + 1 if word in word_counts else 1
+    PROFILER.count('words', sum(word_counts.values()))
 
     for idx, word in enumerate(
             sorted(word_counts, reverse=True, key=cast(Callable[[str], int], word_counts.get))
@@ -91,17 +103,19 @@ def main() -> None:
     )
     parser.add_argument(
         'hocr_in',
-        help="hOCR file to count frequency for (default: standard input)",
+        help="hOCR or .hocrx sidecar file to count frequency for (default: standard input)",
         type=argparse.FileType('r'),
         nargs='?',
         default=sys.stdin
     )
+    add_profile_arguments(parser)
     args = parser.parse_args()
 
-    results = word_frequencies(
-        hocr_in=args.hocr_in, case_insensitive=args.case_insensitive,
-        spaces=args.spaces, dehyphenate=args.dehyphenate, max_hits=args.max
-    )
-    print('\n'.join(results))
+    with profiling_from_arguments(args):
+        results = word_frequencies(
+            hocr_in=args.hocr_in, case_insensitive=args.case_insensitive,
+            spaces=args.spaces, dehyphenate=args.dehyphenate, max_hits=args.max
+        )
+        print('\n'.join(results))
 
     args.hocr_in.close()
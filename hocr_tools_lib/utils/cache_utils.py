@@ -0,0 +1,261 @@
+"""
+On-disk cache for results which only depend on the content of the input files.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable
+
+from hocr_tools_lib.utils.input_utils import BUFFER_TYPES
+from hocr_tools_lib.utils.profile_utils import PROFILER
+from hocr_tools_lib.utils.typing_utils import BufferType, InputType
+
+
+CACHE_VERSION = 1
+"""
+Version of the cache layout. Increase it to invalidate all existing entries
+after incompatible changes to the cached results.
+"""
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+"""
+Default upper bound for the cache size in bytes.
+"""
+
+SourceType = InputType
+"""
+Input which can be hashed: a path, a file object or the content.
+"""
+
+
+def read_source(source: SourceType) -> BufferType:
+    """
+    Read the complete content of the given source.
+
+    :param source: The path, file object or content to read. Text files are
+                   read from their binary buffer if available, as they might
+                   hold binary sidecars, otherwise text is encoded as UTF-8.
+    :return: The content. Content passed in is returned without copying.
+    """
+    if isinstance(source, BUFFER_TYPES):
+        return source
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, mode='rb') as fd:
+            return fd.read()
+    data = getattr(source, 'buffer', source).read()
+    if isinstance(data, str):
+        return data.encode('UTF-8')
+    return data
+
+
+class ResultCache:
+    """
+    Size-bounded on-disk cache with least-recently-used eviction.
+
+    Each entry is stored in its own file named by its key. Reading an entry
+    updates its modification time, which serves as the access time for the
+    eviction. The cache may be shared by multiple processes.
+    """
+
+    def __init__(self, directory: os.PathLike[str] | str, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        """
+        :param directory: The directory to store the entries in. Will be created
+                          if required.
+        :param max_size: Upper bound for the total size of all entries in bytes.
+        """
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self._size: int | None = None
+
+    @staticmethod
+    def make_key(namespace: str, inputs: Iterable[BufferType], parameters: dict[str, Any] | None = None) -> str:
+        """
+        Build the key for the given inputs.
+
+        :param namespace: Name of the operation, usually the tool name.
+        :param inputs: The content of all input files.
+        :param parameters: Further parameters influencing the result. Have to
+                           be serializable as JSON.
+        :return: The key.
+        """
+        # Imported here to not slow down the startup of the tools without a cache.
+        import hashlib
+
+        digest = hashlib.sha256()
+        digest.update(f"{CACHE_VERSION}:{namespace}:".encode('UTF-8'))
+        for data in inputs:
+            digest.update(hashlib.sha256(data).digest())
+        digest.update(json.dumps(parameters or {}, sort_keys=True).encode('UTF-8'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.directory.glob('??/*'):
+            if path.name.startswith('.'):
+                # Temporary file which is still being written.
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Removed by another process.
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def get_bytes(self, key: str) -> bytes | None:
+        """
+        Retrieve the raw entry for the given key.
+
+        :param key: The key to look up.
+        :return: The stored data, or ``None`` if not cached.
+        """
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            PROFILER.count('cache.misses')
+            return None
+        PROFILER.count('cache.hits')
+        return data
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        """
+        Store the raw entry for the given key, evicting the least recently used
+        entries if the cache gets too large.
+
+        :param key: The key to store the data for.
+        :param data: The data to store.
+        """
+        import tempfile
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first to never expose partial entries.
+        descriptor, temporary_name = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(descriptor, mode='wb') as fd:
+                fd.write(data)
+            os.replace(temporary_name, path)
+        except BaseException:
+            os.unlink(temporary_name)
+            raise
+
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        else:
+            self._size += len(data)
+        if self._size > self.max_size:
+            self.evict()
+
+    def get(self, key: str) -> Any | None:
+        """
+        Retrieve the entry for the given key.
+
+        :param key: The key to look up.
+        :return: The stored value, or ``None`` if not cached.
+        """
+        data = self.get_bytes(key)
+        if data is None:
+            return None
+        return json.loads(data)
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store the entry for the given key.
+
+        :param key: The key to store the value for.
+        :param value: The value to store. Has to be serializable as JSON.
+        """
+        self.put_bytes(key, json.dumps(value).encode('UTF-8'))
+
+    def discard(self, key: str) -> None:
+        """
+        Remove the entry for the given key, if it exists.
+
+        :param key: The key to remove.
+        """
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+        self._size = None
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache size is below
+        the configured maximum.
+        """
+        entries = sorted(self._entries())
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in entries:
+            if size <= self.max_size:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self._size = size
+
+    def clear(self) -> None:
+        """
+        Remove all entries.
+        """
+        for _, _, path in self._entries():
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        self._size = 0
+
+
+def add_cache_arguments(
+        parser: argparse.ArgumentParser, max_size: int = DEFAULT_MAX_SIZE, description: str | None = None
+) -> None:
+    """
+    Add the command line arguments to configure the cache.
+
+    :param parser: The parser to add the arguments to.
+    :param max_size: The default upper bound for the cache size in bytes.
+    :param description: The help of the cache directory argument, if the
+                        tool caches something else than its results.
+    """
+    group = parser.add_argument_group("result cache")
+    group.add_argument(
+        "--cache-dir",
+        help=description or "cache the results inside this directory, keyed by the input content"
+    )
+    group.add_argument(
+        "--cache-size",
+        type=int,
+        default=max_size // (1024 * 1024),
+        help="maximum cache size in MiB, default: %(default)s"
+    )
+    group.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="remove all cached results before running"
+    )
+
+
+def cache_from_arguments(args: argparse.Namespace) -> ResultCache | None:
+    """
+    Create the cache from the parsed command line arguments.
+
+    :param args: The arguments added by :func:`~add_cache_arguments`.
+    :return: The configured cache, or ``None`` if caching is disabled.
+    """
+    if not args.cache_dir:
+        return None
+    cache = ResultCache(directory=args.cache_dir, max_size=args.cache_size * 1024 * 1024)
+    if args.clear_cache:
+        cache.clear()
+    return cache
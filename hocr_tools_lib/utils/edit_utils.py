@@ -1,17 +1,43 @@
 from __future__ import annotations
 
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple, Sequence
 
-def edit_distance(a: str, b: str, threshold: int = 99999) -> int:
+from hocr_tools_lib.utils.profile_utils import PROFILER
+
+
+EDIT_OPERATIONS = ('equal', 'substitute', 'insert', 'delete')
+"""
+Operations of an edit script, see :class:`Edit`.
+"""
+
+# Maximum number of matrix cells to align at once with a full matrix.
+_BLOCK_CELLS = 4096
+
+
+def edit_distance(a: Sequence[Any], b: Sequence[Any], threshold: int = 99999) -> int:
     """
-    Determine the editing distance between the two strings.
+    Determine the editing distance between the two strings or other
+    sequences, like arrays of word ids.
 
-    :param a: The first string.
-    :param b: The second string.
+    :param a: The first sequence.
+    :param b: The second sequence, of the same type as `a`.
     :param threshold: Threshold on which to perform an early return.
     :return: The editing distance.
     """
+    if PROFILER.enabled:
+        PROFILER.count('edit_distance.calls')
+        if a == b:
+            return 0
+        with PROFILER.timer('edit_distance'):
+            return _edit_distance(a, b, threshold)
     if a == b:
         return 0
+    return _edit_distance(a, b, threshold)
+
+
+def _edit_distance(a: Sequence[Any], b: Sequence[Any], threshold: int) -> int:
     m = len(a)
     n = len(b)
     distances = [[threshold for j in range(n + 1)] for i in range(m + 1)]
@@ -31,11 +57,282 @@ def edit_distance(a: str, b: str, threshold: int = 99999) -> int:
             d = min(distances[i - 1][j] + 1, distances[i][j - 1] + 1,
                     distances[i - 1][j - 1] + cij)
             if d >= threshold:
+                PROFILER.count('edit_distance.cells', (i - 1) * n + j)
                 return d
             distances[i][j] = d
+    PROFILER.count('edit_distance.cells', m * n)
     return distances[m][n]
 
 
+class Edit(NamedTuple):
+    """
+    One operation of an edit script turning the first sequence into the second
+    one.
+    """
+
+    operation: str
+    """
+    The operation, see :data:`EDIT_OPERATIONS`.
+    """
+
+    a: Any
+    """
+    The item of the first sequence, `None` for insertions.
+    """
+
+    b: Any
+    """
+    The item of the second sequence, `None` for deletions.
+    """
+
+
+def align(a: Sequence[Any], b: Sequence[Any]) -> list[Edit]:
+    """
+    Determine an edit script with the minimum number of operations turning
+    the first sequence into the second one.
+
+    This uses the algorithm by Hirschberg, which splits the problem at the
+    optimal position of the middle item of `a` and only keeps two rows of
+    the distance matrix instead of the full matrix. Thus, the memory is
+    linear in the length of the sequences, while the number of computed
+    cells is about twice the one of :func:`edit_distance`.
+
+    :param a: The first sequence, for example a string or a list of words.
+    :param b: The second sequence, of the same type as `a`.
+    :return: The operations in sequence order. The number of operations other
+             than ``equal`` is the editing distance.
+    """
+    if PROFILER.enabled:
+        PROFILER.count('align.calls')
+        with PROFILER.timer('align'):
+            return _align_trimmed(a, b)
+    return _align_trimmed(a, b)
+
+
+def _align_trimmed(a: Sequence[Any], b: Sequence[Any]) -> list[Edit]:
+    # Common prefixes and suffixes are part of an optimal alignment, and
+    # usually make up most of the lines.
+    limit = min(len(a), len(b))
+    start = 0
+    while start < limit and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < limit - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    edits = [Edit('equal', item, item) for item in a[:start]]
+    _align(a[start:len(a) - end], b[start:len(b) - end], edits)
+    edits.extend(Edit('equal', item, item) for item in a[len(a) - end:])
+    return edits
+
+
+def _align(a: Sequence[Any], b: Sequence[Any], edits: list[Edit]) -> None:
+    m = len(a)
+    n = len(b)
+    if m == 0:
+        edits.extend(Edit('insert', None, item) for item in b)
+        return
+    if n == 0:
+        edits.extend(Edit('delete', item, None) for item in a)
+        return
+    if m == 1 or m * n <= _BLOCK_CELLS:
+        _align_block(a, b, edits)
+        return
+    middle = m // 2
+    upper = _get_last_row(a[:middle], b)
+    lower = _get_last_row(a[:middle - 1:-1], b[::-1])
+    split = min(range(n + 1), key=lambda j: upper[j] + lower[n - j])
+    _align(a[:middle], b[:split], edits)
+    _align(a[middle:], b[split:], edits)
+
+
+def _get_last_row(a: Sequence[Any], b: Sequence[Any]) -> list[int]:
+    # The distances of `a` to all prefixes of `b`.
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, start=1):
+        current = [i]
+        left = i
+        for j, y in enumerate(b):
+            left = min(previous[j + 1] + 1, left + 1, previous[j] + (x != y))
+            current.append(left)
+        previous = current
+    PROFILER.count('align.cells', len(a) * len(b))
+    return previous
+
+
+def _align_block(a: Sequence[Any], b: Sequence[Any], edits: list[Edit]) -> None:
+    m = len(a)
+    n = len(b)
+    distances = [list(range(n + 1))]
+    for i in range(1, m + 1):
+        previous = distances[-1]
+        current = [i]
+        x = a[i - 1]
+        for j in range(1, n + 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != b[j - 1])))
+        distances.append(current)
+    PROFILER.count('align.cells', m * n)
+
+    block: list[Edit] = []
+    i = m
+    j = n
+    while i > 0 or j > 0:
+        distance = distances[i][j]
+        if i > 0 and j > 0 and distance == distances[i - 1][j - 1] + (a[i - 1] != b[j - 1]):
+            i -= 1
+            j -= 1
+            block.append(Edit('equal' if a[i] == b[j] else 'substitute', a[i], b[j]))
+        elif i > 0 and distance == distances[i - 1][j] + 1:
+            i -= 1
+            block.append(Edit('delete', a[i], None))
+        else:
+            j -= 1
+            block.append(Edit('insert', None, b[j]))
+    edits.extend(reversed(block))
+
+
+@dataclass
+class ErrorStats:
+    """
+    Character and word error counts, which can be accumulated line by line
+    and merged across pages and documents.
+    """
+
+    characters: int = 0
+    """
+    Number of characters of the ground truth.
+    """
+
+    character_errors: int = 0
+    """
+    Number of character edits turning the ground truth into the actual text.
+    """
+
+    words: int = 0
+    """
+    Number of whitespace-separated words of the ground truth.
+    """
+
+    word_errors: int = 0
+    """
+    Number of word edits turning the ground truth into the actual text.
+    """
+
+    confusions: Counter[tuple[str, str]] = field(default_factory=Counter)
+    """
+    Number of character edits by the pair of the true and the actual
+    character, with an empty string for insertions and deletions
+    respectively. Matching characters are not counted.
+    """
+
+    @property
+    def cer(self) -> float:
+        """
+        The character error rate.
+        """
+        return self.character_errors / self.characters if self.characters else 0.0
+
+    @property
+    def wer(self) -> float:
+        """
+        The word error rate.
+        """
+        return self.word_errors / self.words if self.words else 0.0
+
+    def add(self, truth: str, actual: str) -> int:
+        """
+        Align and count the given pair of texts.
+
+        :param truth: The true text.
+        :param actual: The actual text.
+        :return: The number of character errors, which is the editing distance.
+        """
+        errors = 0
+        confusions = self.confusions
+        for operation, a, b in align(truth, actual):
+            if operation != 'equal':
+                errors += 1
+                confusions[a or '', b or ''] += 1
+        truth_words = truth.split()
+        self.characters += len(truth)
+        self.character_errors += errors
+        self.words += len(truth_words)
+        self.word_errors += sum(edit.operation != 'equal' for edit in align(truth_words, actual.split()))
+        return errors
+
+    def merge(self, other: ErrorStats) -> None:
+        """
+        Add the counts of the given statistics to these ones.
+
+        :param other: The statistics to add.
+        """
+        self.characters += other.characters
+        self.character_errors += other.character_errors
+        self.words += other.words
+        self.word_errors += other.word_errors
+        self.confusions.update(other.confusions)
+
+    def most_common(self, count: int | None = None) -> list[tuple[str, str, int]]:
+        """
+        Get the most frequent character confusions.
+
+        :param count: The maximum number of confusions, `None` for all.
+        :return: The true character, the actual character and the number of
+                 occurrences for each confusion, most frequent first.
+        """
+        return [(a, b, number) for (a, b), number in self.confusions.most_common(count)]
+
+    def format_report(self, confusions: int = 10) -> str:
+        """
+        Format the statistics as lines of names and values, followed by the
+        most frequent character confusions.
+
+        :param confusions: The number of character confusions to include.
+        :return: The formatted report.
+        """
+        lines = [
+            f"characters {self.characters}",
+            f"character_errors {self.character_errors}",
+            f"cer {self.cer:.4f}",
+            f"words {self.words}",
+            f"word_errors {self.word_errors}",
+            f"wer {self.wer:.4f}",
+        ]
+        if confusions > 0:
+            lines.extend(f"confusion {a!r} {b!r} {count}" for a, b, count in self.most_common(confusions))
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Convert the statistics into a JSON-serializable dictionary.
+
+        :return: The counts, the rates and the confusions as list of
+                 :meth:`most_common` entries.
+        """
+        return {
+            'characters': self.characters,
+            'character_errors': self.character_errors,
+            'cer': self.cer,
+            'words': self.words,
+            'word_errors': self.word_errors,
+            'wer': self.wer,
+            'confusions': [list(entry) for entry in self.most_common()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ErrorStats:
+        """
+        Restore the statistics from the output of :meth:`to_dict`.
+
+        :param data: The dictionary to read.
+        :return: The restored statistics.
+        """
+        return cls(
+            characters=data['characters'], character_errors=data['character_errors'],
+            words=data['words'], word_errors=data['word_errors'],
+            confusions=Counter({(a, b): number for a, b, number in data['confusions']})
+        )
+
+
 # def remove_tex(text):
 #     text_file = os.popen(f"echo {text} | detex")
 #     text_plain = text_file.read()
@@ -0,0 +1,268 @@
+"""
+Downsample, classify and re-encode page images for embedding into PDF files.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Union
+
+from PIL import features, Image, ImageChops, TiffImagePlugin
+
+from hocr_tools_lib.utils.profile_utils import PROFILER
+
+
+logger = logging.getLogger(__name__)
+del logging
+
+IMAGE_KINDS = ('color', 'gray', 'bilevel')
+"""
+Kinds of page images, each encoded differently.
+"""
+
+BILEVEL_COMPRESSIONS = ('ccitt', 'flate')
+"""
+Supported encodings of bilevel images: CCITT Group 4 or Flate.
+"""
+
+GRAY_TOLERANCE = 16
+"""
+Maximum difference between the color channels of a pixel to still consider it
+gray.
+"""
+
+MAX_COLOR_FRACTION = 0.005
+"""
+Maximum fraction of colored pixels, for example noise, in a grayscale image.
+"""
+
+MAX_MID_TONE_FRACTION = 0.05
+"""
+Maximum fraction of pixels neither close to black nor to white in a bilevel
+image, usually from anti-aliased glyph edges.
+"""
+
+_DETECTION_SIZE = (512, 512)
+
+DecodeParamsType = Dict[str, Union[int, bool]]
+"""
+Parameters of the PDF decode filter.
+"""
+
+
+@dataclass(frozen=True)
+class ImageOptions:
+    """
+    Settings of the image stage.
+    """
+
+    target_dpi: float | None = None
+    """
+    Downsample images with a higher resolution to this one. `None` keeps the
+    resolution.
+    """
+
+    jpeg_quality: int = 75
+    """
+    Quality of color and grayscale images, from 1 to 95.
+    """
+
+    detect_kind: bool = True
+    """
+    Detect grayscale and bilevel content in images of other modes. If
+    disabled, only the image mode determines the kind.
+    """
+
+    bilevel_compression: str = 'ccitt'
+    """
+    Encoding of bilevel images, see :data:`BILEVEL_COMPRESSIONS`. Falls back
+    to Flate if Pillow has been built without `libtiff`.
+    """
+
+
+@dataclass
+class PreparedImage:
+    """
+    Encoded image data ready to be embedded as PDF image XObject.
+    """
+
+    original_width: int
+    """
+    Width of the source image in pixels, which the hOCR coordinates refer to.
+    """
+
+    original_height: int
+    """
+    Height of the source image in pixels.
+    """
+
+    dpi: float
+    """
+    Resolution of the source image.
+    """
+
+    width: int
+    """
+    Width of the encoded image in pixels.
+    """
+
+    height: int
+    """
+    Height of the encoded image in pixels.
+    """
+
+    kind: str
+    """
+    The kind of the image, see :data:`IMAGE_KINDS`.
+    """
+
+    data: bytes
+    """
+    The encoded image data.
+    """
+
+    filter: str
+    """
+    The PDF filter to decode the data with.
+    """
+
+    decode_params: DecodeParamsType | None = None
+    """
+    Parameters of the PDF filter.
+    """
+
+    @property
+    def color_space(self) -> str:
+        """
+        The PDF color space of the image.
+        """
+        return 'DeviceRGB' if self.kind == 'color' else 'DeviceGray'
+
+    @property
+    def bits_per_component(self) -> int:
+        """
+        The number of bits per color component.
+        """
+        return 1 if self.kind == 'bilevel' else 8
+
+
+def detect_kind(image: Image.Image) -> str:
+    """
+    Detect whether the given image holds color, grayscale or bilevel content.
+
+    The detection runs on a reduced copy of the image.
+
+    :param image: The image to analyze.
+    :return: The kind of the image, see :data:`IMAGE_KINDS`.
+    """
+    if image.mode == '1':
+        return 'bilevel'
+    sample = image.copy()
+    # Nearest neighbour sampling does not introduce any new mid-tones.
+    sample.thumbnail(_DETECTION_SIZE, Image.NEAREST)
+    if sample.mode not in ('L', 'RGB'):
+        sample = sample.convert('RGB')
+    pixels = sample.width * sample.height
+    if sample.mode == 'RGB':
+        red, green, blue = sample.split()
+        chroma = ImageChops.lighter(
+            ImageChops.lighter(ImageChops.difference(red, green), ImageChops.difference(green, blue)),
+            ImageChops.difference(red, blue)
+        )
+        if sum(chroma.histogram()[GRAY_TOLERANCE + 1:]) > pixels * MAX_COLOR_FRACTION:
+            return 'color'
+        sample = sample.convert('L')
+    if sum(sample.histogram()[64:192]) > pixels * MAX_MID_TONE_FRACTION:
+        return 'gray'
+    return 'bilevel'
+
+
+def _get_kind_from_mode(image: Image.Image) -> str:
+    if image.mode == '1':
+        return 'bilevel'
+    if image.mode in ('L', 'LA', 'I', 'I;16', 'F'):
+        return 'gray'
+    return 'color'
+
+
+def _encode_bilevel(image: Image.Image, compression: str) -> tuple[bytes, str, DecodeParamsType | None]:
+    if compression == 'ccitt' and features.check('libtiff'):  # type: ignore[no-untyped-call]
+        output = io.BytesIO()
+        # Write a single strip, which is the plain Group 4 stream PDF expects.
+        image.save(output, format='TIFF', compression='group4', tiffinfo={278: image.height})
+        output.seek(0)
+        with Image.open(output) as tiff:
+            assert isinstance(tiff, TiffImagePlugin.TiffImageFile)
+            offsets = tiff.tag_v2[273]
+            byte_counts = tiff.tag_v2[279]
+            # The fax codec of `libtiff` encodes the stored bits as they are,
+            # thus with BlackIsZero (1) the runs of 1 bits are the white ones,
+            # which PDF readers need to know about.
+            black_is_1 = tiff.tag_v2.get(262, 0) == 1
+        if len(offsets) == 1:
+            data = output.getvalue()[offsets[0]:offsets[0] + byte_counts[0]]
+            params: DecodeParamsType = {'K': -1, 'Columns': image.width, 'Rows': image.height}
+            if black_is_1:
+                params['BlackIs1'] = True
+            return data, 'CCITTFaxDecode', params
+        logger.warning('Unexpected multi-strip Group 4 data, using Flate instead.')
+    elif compression == 'ccitt':
+        logger.warning('Pillow has been built without libtiff, using Flate instead of CCITT Group 4.')
+    # Pillow packs the bits of mode 1 like PDF does with 1 being white.
+    return zlib.compress(image.tobytes()), 'FlateDecode', None
+
+
+def prepare_image(path: str, default_dpi: float = 300, options: ImageOptions | None = None) -> PreparedImage:
+    """
+    Downsample, classify and encode the given image.
+
+    This is independent of any other state, thus can run in a thread or
+    process pool.
+
+    :param path: The image file to prepare.
+    :param default_dpi: The resolution to use if the image does not provide
+                        it.
+    :param options: The settings to use. Defaults to the default settings.
+    :return: The prepared image.
+    """
+    if options is None:
+        options = ImageOptions()
+    if options.bilevel_compression not in BILEVEL_COMPRESSIONS:
+        raise ValueError(f"Unknown bilevel compression {options.bilevel_compression!r}.")
+    with PROFILER.timer('image.prepare'), Image.open(path) as image:
+        width, height = image.size
+        try:
+            dpi = float(image.info['dpi'][0])
+        except KeyError:
+            dpi = default_dpi
+        kind = detect_kind(image) if options.detect_kind else _get_kind_from_mode(image)
+
+        size = (width, height)
+        if options.target_dpi and dpi > options.target_dpi:
+            scale = options.target_dpi / dpi
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+
+        unchanged = size == (width, height) and (kind, image.mode) in {('color', 'RGB'), ('gray', 'L')}
+        if unchanged and image.format == 'JPEG':
+            # Nothing to change, thus avoid the generation loss.
+            with open(path, mode='rb') as fd:
+                data = fd.read()
+            return PreparedImage(width, height, dpi, width, height, kind, data, 'DCTDecode')
+
+        if kind == 'bilevel':
+            gray = image.convert('L')
+            if size != gray.size:
+                gray = gray.resize(size, Image.LANCZOS)
+            bilevel = gray.point([0] * 128 + [255] * 128, mode='1')
+            data, filter_name, params = _encode_bilevel(bilevel, options.bilevel_compression)
+            return PreparedImage(width, height, dpi, size[0], size[1], kind, data, filter_name, params)
+
+        converted = image.convert('RGB' if kind == 'color' else 'L')
+        if size != converted.size:
+            converted = converted.resize(size, Image.LANCZOS)
+        output = io.BytesIO()
+        converted.save(output, format='JPEG', quality=options.jpeg_quality, optimize=True)
+        return PreparedImage(width, height, dpi, size[0], size[1], kind, output.getvalue(), 'DCTDecode')
@@ -0,0 +1,139 @@
+"""
+Parse documents from paths, file objects and in-memory buffers.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+from typing import Any, cast, Generator, IO
+
+from lxml import etree, html
+
+from hocr_tools_lib.utils.profile_utils import PROFILER
+from hocr_tools_lib.utils.typing_utils import InputType
+
+
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+"""
+Types of in-memory document content, see
+:data:`~hocr_tools_lib.utils.typing_utils.BufferType`.
+"""
+
+
+def is_buffer(source: Any) -> bool:
+    """
+    Check whether the given input holds the content itself.
+
+    :param source: The input to check.
+    :return: Whether the input is a bytes-like object or a memory map.
+    """
+    return isinstance(source, BUFFER_TYPES)
+
+
+def parse_html(
+        source: InputType, parser: etree.XMLParser | etree.HTMLParser | None = None
+) -> etree._ElementTree[html.HtmlElement]:
+    """
+    Parse the given document.
+
+    Bytes-like objects and memory maps are handed to `lxml` directly, thus are
+    neither decoded nor copied into a file object first.
+
+    :param source: A path, a file object or the content.
+    :param parser: The parser to use. Defaults to the HTML parser of
+                   :mod:`lxml.html`.
+    :return: The parsed document as element tree.
+    """
+    if parser is None:
+        parser = html.html_parser
+    if not isinstance(source, BUFFER_TYPES):
+        return etree.parse(source, parser)  # type: ignore[arg-type]
+    try:
+        root = etree.fromstring(source, parser)
+    except ValueError:
+        # Older versions of `lxml` only accept `bytes` and `str`.
+        if isinstance(source, bytes):
+            raise
+        root = etree.fromstring(bytes(source), parser)
+    return cast("etree._ElementTree[html.HtmlElement]", root.getroottree())
+
+
+CHUNK_SIZE = 64 * 1024
+"""
+Number of bytes to feed to the incremental parser at once.
+"""
+
+
+def iter_pages(source: InputType, html_parser: bool = False) -> Generator[html.HtmlElement, None, None]:
+    """
+    Parse the given document incrementally and yield each page as soon as it
+    has been parsed completely.
+
+    The pages are detached from the document before being yielded, thus only
+    the pages still referenced by the caller are kept in memory instead of the
+    whole document.
+
+    :param source: A path, a file object or the content.
+    :param html_parser: Use the HTML parser instead of the XML one, for hOCR
+                        files which are not well-formed XHTML.
+    :return: The pages in document order.
+    """
+    parser: etree.XMLPullParser | etree.HTMLPullParser
+    if html_parser:
+        parser = etree.HTMLPullParser(events=("end",))
+    else:
+        parser = etree.XMLPullParser(events=("end",))
+    parser.set_element_class_lookup(html.HtmlElementClassLookup())
+
+    def read_events() -> Generator[html.HtmlElement, None, None]:
+        for _, element in parser.read_events():
+            if element.get("class") == "ocr_page":
+                parent = element.getparent()
+                if parent is not None:
+                    parent.remove(element)
+                yield cast(html.HtmlElement, element)
+
+    if isinstance(source, BUFFER_TYPES):
+        # Release the view afterwards, memory maps cannot be closed before.
+        with memoryview(source) as view:
+            for offset in range(0, len(view), CHUNK_SIZE):
+                with PROFILER.timer("html.parse"):
+                    parser.feed(bytes(view[offset:offset + CHUNK_SIZE]))
+                yield from read_events()
+    else:
+        fd: IO[Any]
+        if isinstance(source, (str, os.PathLike)):
+            fd = open(source, mode="rb")
+        else:
+            fd = source  # type: ignore[assignment]
+        try:
+            while True:
+                chunk = fd.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                with PROFILER.timer("html.parse"):
+                    parser.feed(chunk)
+                yield from read_events()
+        finally:
+            if fd is not source:
+                fd.close()
+    with PROFILER.timer("html.parse"):
+        parser.close()
+    yield from read_events()
+
+
+def get_directory(source: InputType) -> str:
+    """
+    Get the directory relative paths inside the given document refer to.
+
+    :param source: A path, a file object or the content.
+    :return: The directory of the document file, or an empty string for the
+             current working directory if it is not known.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.dirname(source)
+    name = getattr(source, "name", None)
+    if isinstance(name, str):
+        return os.path.dirname(name)
+    return ""
@@ -0,0 +1,204 @@
+"""
+Match two sets of boxes one-to-one by their overlap.
+
+The boxes are compared by their intersection over union (IoU). Only boxes
+which overlap at all can be matched, thus :func:`get_overlap_graph` first
+finds these pairs by sweeping over the boxes from top to bottom instead of
+comparing all pairs. :func:`match_boxes` then determines the matching with
+the largest total IoU, which splits into small independent problems for the
+connected parts of the graph::
+
+    edges = get_overlap_graph(truths, actuals, min_iou=0.5)
+    for threshold in [0.5, 0.75, 0.9]:
+        matches = match_boxes(edges, min_iou=threshold)
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, List, Tuple
+
+from hocr_tools_lib.utils.profile_utils import PROFILER
+from hocr_tools_lib.utils.rectangle_utils import area, intersection_over_union, RectangleType
+
+
+EdgeType = Tuple[int, int, float]
+"""
+A pair of overlapping boxes: the index of the first box, the index of the
+second box and their intersection over union.
+"""
+
+EdgeListType = List[EdgeType]
+"""
+Sparse graph of the overlapping boxes, see :func:`get_overlap_graph`.
+"""
+
+
+def get_overlap_graph(
+        truths: list[RectangleType | None], actuals: list[RectangleType | None], min_iou: float = 0.0
+) -> EdgeListType:
+    """
+    Find the pairs of overlapping boxes of the two sets.
+
+    The boxes are visited ordered by their top edge, comparing each box with
+    the boxes of the other set which have started above and did not end yet.
+    For boxes arranged in lines or columns, these are only a few.
+
+    :param truths: The first set of boxes. Missing boxes never overlap.
+    :param actuals: The second set of boxes.
+    :param min_iou: Lower bound for the intersection over union of the pairs
+                    to keep.
+    :return: The pairs with a positive intersection over union of at least
+             `min_iou`, ordered by the index of the first box.
+    """
+    events = [
+        (box[1], side, index, box)
+        for side, boxes in enumerate((truths, actuals))
+        for index, box in enumerate(boxes)
+        if box is not None and area(box) > 0
+    ]
+    events.sort(key=lambda event: event[0])
+    active: tuple[list[tuple[int, RectangleType]], list[tuple[int, RectangleType]]] = ([], [])
+    edges: EdgeListType = []
+    compared = 0
+    for top, side, index, box in events:
+        others = [(other_index, other) for other_index, other in active[1 - side] if other[3] > top]
+        active[1 - side][:] = others
+        compared += len(others)
+        for other_index, other in others:
+            if other[0] >= box[2] or box[0] >= other[2]:
+                continue
+            value = intersection_over_union(box, other)
+            if value > 0 and value >= min_iou:
+                edges.append((index, other_index, value) if side == 0 else (other_index, index, value))
+        active[side].append((index, box))
+    PROFILER.count('overlap_graph.comparisons', compared)
+    edges.sort()
+    return edges
+
+
+def _get_components(edges: EdgeListType) -> list[EdgeListType]:
+    # Union-find on the nodes, with the second set offset to keep them apart.
+    parents: dict[tuple[int, int], tuple[int, int]] = {}
+
+    def find(node: tuple[int, int]) -> tuple[int, int]:
+        root = node
+        while parents.get(root, root) != root:
+            root = parents[root]
+        while node != root:
+            node, parents[node] = parents[node], root
+        return root
+
+    for first, second, _ in edges:
+        parents[find((0, first))] = find((1, second))
+    components: dict[tuple[int, int], EdgeListType] = {}
+    for edge in edges:
+        components.setdefault(find((0, edge[0])), []).append(edge)
+    return list(components.values())
+
+
+def get_assignment(weights: list[list[float]]) -> list[tuple[int, int]]:
+    """
+    Assign the rows to the columns with the largest total weight, using the
+    Hungarian algorithm in O(n²m) for n rows and m columns.
+
+    :param weights: The weight of each row and column, with at most as many
+                    rows as columns.
+    :return: The row and column index of each row, ordered by the column.
+    """
+    rows = len(weights)
+    columns = len(weights[0]) if rows else 0
+    if rows > columns:
+        raise ValueError(f"Got {rows} rows for {columns} columns.")
+    infinity = float('inf')
+    # Potentials of the rows and columns and the row assigned to each column,
+    # with the row and column 0 as virtual start.
+    row_potentials = [0.0] * (rows + 1)
+    column_potentials = [0.0] * (columns + 1)
+    assigned = [0] * (columns + 1)
+    previous = [0] * (columns + 1)
+    for row in range(1, rows + 1):
+        assigned[0] = row
+        column = 0
+        slack = [infinity] * (columns + 1)
+        used = [False] * (columns + 1)
+        while assigned[column] != 0:
+            used[column] = True
+            current_row = assigned[column]
+            row_weights = weights[current_row - 1]
+            row_potential = row_potentials[current_row]
+            delta = infinity
+            next_column = 0
+            for j in range(1, columns + 1):
+                if used[j]:
+                    continue
+                cost = -row_weights[j - 1] - row_potential - column_potentials[j]
+                if cost < slack[j]:
+                    slack[j] = cost
+                    previous[j] = column
+                if slack[j] < delta:
+                    delta = slack[j]
+                    next_column = j
+            for j in range(columns + 1):
+                if used[j]:
+                    row_potentials[assigned[j]] += delta
+                    column_potentials[j] -= delta
+                else:
+                    slack[j] -= delta
+            column = next_column
+        # Flip the assignments along the augmenting path.
+        while column != 0:
+            previous_column = previous[column]
+            assigned[column] = assigned[previous_column]
+            column = previous_column
+    return [(assigned[j] - 1, j - 1) for j in range(1, columns + 1) if assigned[j]]
+
+
+def _match_component(edges: EdgeListType) -> Iterable[EdgeType]:
+    if len(edges) == 1:
+        return edges
+    firsts = sorted({edge[0] for edge in edges})
+    seconds = sorted({edge[1] for edge in edges})
+    transpose = len(firsts) > len(seconds)
+    if transpose:
+        firsts, seconds = seconds, firsts
+    first_indices = {index: position for position, index in enumerate(firsts)}
+    second_indices = {index: position for position, index in enumerate(seconds)}
+    # Missing edges get a weight of zero and are dropped afterwards.
+    weights = [[0.0] * len(seconds) for _ in firsts]
+    values = {}
+    for first, second, value in edges:
+        if transpose:
+            first, second = second, first
+        weights[first_indices[first]][second_indices[second]] = value
+        values[first, second] = value
+    result = []
+    for row, column in get_assignment(weights):
+        pair = (firsts[row], seconds[column])
+        if pair in values:
+            value = values[pair]
+            result.append((pair[1], pair[0], value) if transpose else (pair[0], pair[1], value))
+    return result
+
+
+def match_boxes(edges: EdgeListType, min_iou: float = 0.0) -> EdgeListType:
+    """
+    Determine the one-to-one matching of the boxes with the largest total
+    intersection over union.
+
+    Each connected part of the graph is matched on its own, which usually
+    consists of a single pair only.
+
+    :param edges: The overlapping pairs, see :func:`get_overlap_graph`.
+    :param min_iou: Only match pairs with at least this intersection over
+                    union.
+    :return: The matched pairs, ordered by the index of the first box.
+    """
+    if min_iou > 0:
+        edges = [edge for edge in edges if edge[2] >= min_iou]
+    matches: EdgeListType = []
+    components = _get_components(edges)
+    PROFILER.count('match_boxes.components', len(components))
+    for component in components:
+        matches.extend(_match_component(component))
+    matches.sort()
+    return matches
@@ -3,11 +3,16 @@ from __future__ import annotations
 import re
 from typing import cast
 
+from lxml import etree
 from lxml.html import HtmlElement
 
+from hocr_tools_lib.utils.profile_utils import PROFILER
 from hocr_tools_lib.utils.rectangle_utils import RectangleType
 
 
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
 def get_prop(node: HtmlElement, name: str, strip_value: bool = False) -> str | None:
     """
     Get the requested property from the node title.
@@ -37,6 +42,14 @@ def get_bbox(node: HtmlElement) -> RectangleType | None:
     :param node: The node to run on.
     :return: The bounding box, or ``None`` if not found.
     """
+    if PROFILER.enabled:
+        PROFILER.count('get_bbox.calls')
+        with PROFILER.timer('get_bbox'):
+            return _get_bbox(node)
+    return _get_bbox(node)
+
+
+def _get_bbox(node: HtmlElement) -> RectangleType | None:
     bbox = get_prop(node, 'bbox')
     if not bbox:
         return None
@@ -55,4 +68,48 @@ def get_text(node: HtmlElement) -> str:
     """
     text_nodes = node.xpath(".//text()")
     s = "".join([text for text in text_nodes])
-    return re.sub(r'\s+', ' ', s)
+    return _WHITESPACE_PATTERN.sub(' ', s)
+
+
+def get_texts(node: HtmlElement, class_name: str) -> list[tuple[HtmlElement, str]]:
+    """
+    Get the text of all elements with the given class at once.
+
+    This collects the text fragments of the subtree in a single pass and
+    joins the fragments of each matching element once, instead of querying
+    the text nodes of each element separately like :func:`get_text` does.
+
+    :param node: The node to run on, usually a page.
+    :param class_name: The exact value of the ``class`` attribute.
+    :return: The matching elements in document order, including the given
+             node itself, together with their text as returned by
+             :func:`get_text`.
+    """
+    if PROFILER.enabled:
+        PROFILER.count('get_texts.calls')
+        with PROFILER.timer('get_texts'):
+            return _get_texts(node, class_name)
+    return _get_texts(node, class_name)
+
+
+def _get_texts(node: HtmlElement, class_name: str) -> list[tuple[HtmlElement, str]]:
+    result: list[tuple[HtmlElement, str]] = []
+    fragments: list[str] = []
+    # The first fragment and the result index of the open matching elements.
+    starts: list[tuple[int, int]] = []
+    for event, element in etree.iterwalk(node, events=('start', 'end', 'comment', 'pi')):
+        if event == 'start':
+            if element.get('class') == class_name:
+                # Reserve the slot to keep the document order.
+                starts.append((len(fragments), len(result)))
+                result.append((element, ''))
+            if element.text:
+                fragments.append(element.text)
+            continue
+        # Comments and processing instructions only contribute their tail.
+        if event == 'end' and element.get('class') == class_name:
+            start, index = starts.pop()
+            result[index] = (element, _WHITESPACE_PATTERN.sub(' ', ''.join(fragments[start:])))
+        if element.tail and element is not node:
+            fragments.append(element.tail)
+    return result
@@ -0,0 +1,260 @@
+"""
+Lightweight instrumentation with named timers and counters.
+
+All tools report into the global :data:`PROFILER`, which is disabled by
+default. Call sites on hot paths check :attr:`Profiler.enabled` themselves
+before reporting, so a disabled profiler only costs an attribute lookup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import sys
+import time
+from contextlib import contextmanager
+from types import TracebackType
+from typing import Any, ContextManager, Iterator
+
+
+class _Timer:
+    __slots__ = ('_profiler', '_name', '_start')
+
+    def __init__(self, profiler: Profiler, name: str) -> None:
+        self._profiler = profiler
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc_value: BaseException | None,
+            traceback: TracebackType | None
+    ) -> None:
+        self._profiler.add_time(self._name, time.perf_counter() - self._start)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc_value: BaseException | None,
+            traceback: TracebackType | None
+    ) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Profiler:
+    """
+    Collect the durations of named stages and the values of named counters.
+
+    Nested timers are recorded independently, thus the durations of a stage
+    include the durations of all stages nested inside it.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        """
+        Whether to record anything.
+        """
+
+        self.timers: dict[str, list[float]] = {}
+        """
+        The number of calls and the total duration in seconds for each stage.
+        """
+
+        self.counters: dict[str, int] = {}
+        """
+        The value of each counter.
+        """
+
+    def timer(self, name: str) -> _Timer | _NullTimer:
+        """
+        Measure the duration of the enclosed block.
+
+        :param name: The name of the stage.
+        :return: The context manager to measure the block with.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def add_time(self, name: str, duration: float) -> None:
+        """
+        Record a call of the given stage.
+
+        :param name: The name of the stage.
+        :param duration: The duration of the call in seconds.
+        """
+        entry = self.timers.get(name)
+        if entry is None:
+            self.timers[name] = [1, duration]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Increase the given counter, if enabled.
+
+        :param name: The name of the counter.
+        :param value: The value to add.
+        """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def count_source(self, source: Any) -> None:
+        """
+        Add the size of the given input to the ``bytes_read`` counter, if
+        enabled and the size can be determined without reading it.
+
+        :param source: The path, file object or data.
+        """
+        if not self.enabled:
+            return
+        if isinstance(source, memoryview):
+            size = source.nbytes
+        elif isinstance(source, (bytes, bytearray, mmap.mmap)):
+            size = len(source)
+        elif isinstance(source, str):
+            size = os.path.getsize(source) if os.path.isfile(source) else len(source.encode('UTF-8'))
+        elif isinstance(source, os.PathLike):
+            size = os.path.getsize(source)
+        elif hasattr(source, 'getbuffer'):
+            # In-memory buffers like `io.BytesIO`.
+            size = source.getbuffer().nbytes
+        else:
+            try:
+                size = os.fstat(source.fileno()).st_size
+            except (AttributeError, OSError, ValueError):
+                return
+        self.count('bytes_read', size)
+
+    def merge(self, report: dict[str, Any]) -> None:
+        """
+        Add the values of another report, for example from a worker process.
+
+        :param report: The report as returned by :meth:`~report`.
+        """
+        for name, timer in report['timers'].items():
+            entry = self.timers.setdefault(name, [0, 0.0])
+            entry[0] += timer['calls']
+            entry[1] += timer['seconds']
+        for name, value in report['counters'].items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def reset(self) -> None:
+        """
+        Remove all recorded values.
+        """
+        self.timers.clear()
+        self.counters.clear()
+
+    def report(self) -> dict[str, Any]:
+        """
+        Get the recorded values.
+
+        :return: The timers with their calls and seconds, as well as the
+                 counters.
+        """
+        return {
+            'timers': {
+                name: {'calls': int(calls), 'seconds': seconds}
+                for name, (calls, seconds) in sorted(self.timers.items())
+            },
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+    def format_report(self) -> str:
+        """
+        Format the recorded values as a human-readable table.
+
+        :return: The table.
+        """
+        lines = [f"{'stage':<32}{'calls':>12}{'seconds':>12}"]
+        for name, (calls, seconds) in sorted(self.timers.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<32}{int(calls):>12}{seconds:>12.4f}")
+        if self.counters:
+            lines.append('')
+            lines.append(f"{'counter':<32}{'value':>12}")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{name:<32}{value:>12}")
+        return '\n'.join(lines)
+
+
+PROFILER = Profiler()
+"""
+The profiler all tools report into.
+"""
+
+
+@contextmanager
+def profiling(print_report: bool = False, json_file: str | None = None) -> Iterator[Profiler]:
+    """
+    Enable the global profiler for the enclosed block and write the report
+    afterwards, even if the block fails. Does nothing if no output is
+    requested.
+
+    :param print_report: Whether to print the report as a table to stderr.
+    :param json_file: Write the report as JSON to this file.
+    :return: The global profiler.
+    """
+    if not print_report and not json_file:
+        yield PROFILER
+        return
+    PROFILER.reset()
+    PROFILER.enabled = True
+    try:
+        with PROFILER.timer('total'):
+            yield PROFILER
+    finally:
+        PROFILER.enabled = False
+        if print_report:
+            print(PROFILER.format_report(), file=sys.stderr)
+        if json_file:
+            import json
+
+            with open(json_file, mode='w', encoding='UTF-8') as fd:
+                json.dump(PROFILER.report(), fd, indent=2)
+                fd.write('\n')
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the command line arguments to enable profiling.
+
+    :param parser: The parser to add the arguments to.
+    """
+    group = parser.add_argument_group("profiling")
+    group.add_argument(
+        "--profile",
+        action="store_true",
+        help="print the time spent per stage and further counters to stderr"
+    )
+    group.add_argument(
+        "--profile-json",
+        metavar="FILE",
+        help="write the time spent per stage and further counters as JSON to this file"
+    )
+
+
+def profiling_from_arguments(args: argparse.Namespace) -> ContextManager[Profiler]:
+    """
+    Create the profiling context from the parsed command line arguments.
+
+    :param args: The arguments added by :func:`~add_profile_arguments`.
+    :return: The context manager of :func:`~profiling`.
+    """
+    return profiling(print_report=args.profile, json_file=args.profile_json)
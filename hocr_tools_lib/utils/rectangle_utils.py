@@ -45,6 +45,17 @@ def relative_overlap(u: RectangleType | None, v: RectangleType | None) -> float:
     return float(i) / m
 
 
+def intersection_over_union(u: RectangleType | None, v: RectangleType | None) -> float:
+    """
+    Intersection over union (IoU) of the two rectangles, zero for missing or
+    empty rectangles.
+    """
+    i = area(intersect(u, v))
+    if i <= 0:
+        return 0.0
+    return float(i) / (area(u) + area(v) - i)
+
+
 def mostly_non_overlapping(
         boxes: list[RectangleType | None],
         significant_overlap: float = 0.2
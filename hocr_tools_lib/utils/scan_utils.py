@@ -0,0 +1,215 @@
+"""
+Scan the geometry of hOCR documents without building the document tree.
+
+Tools only looking at the classes and the bounding boxes of the elements do
+not need the element tree with all its text nodes. :func:`scan_geometry`
+runs the HTML parser of `lxml` with a parser target instead, which only
+receives the start and end tags, and records each element with a ``class``
+attribute into compact arrays::
+
+    scan = scan_geometry("book.hocr")
+    for page in scan.find("ocr_page"):
+        lines = [scan.get_bbox(index) for index in scan.find("ocr_line", page, scan.ends[page])]
+
+The records provide the same lookup methods as
+:class:`~hocr_tools_lib.utils.sidecar_utils.Sidecar`, thus code working on
+sidecars works on scans as well.
+"""
+
+from __future__ import annotations
+
+import re
+from array import array
+from typing import cast, Mapping
+
+from lxml import etree
+
+from hocr_tools_lib.utils.input_utils import BUFFER_TYPES
+from hocr_tools_lib.utils.rectangle_utils import RectangleType
+from hocr_tools_lib.utils.sidecar_utils import MISSING
+from hocr_tools_lib.utils.typing_utils import InputType
+
+
+_BBOX_PATTERN = re.compile(r'(?:^|;)\s*bbox\s+(-?\d+)\s+(-?\d+)\s+(-?\d+)\s+(-?\d+)\s*(?:;|$)')
+_NO_BBOX = (MISSING, MISSING, MISSING, MISSING)
+
+RECORD_SIZE = 8
+"""
+Number of values per element in :attr:`GeometryScan.records`: the parent,
+the end, the depth, the class and the four coordinates of the bounding box.
+"""
+
+
+class GeometryScan:
+    """
+    The elements with a ``class`` attribute of a document, in document order.
+    """
+
+    def __init__(self, records: array[int], class_names: list[str], meta_names: list[str]) -> None:
+        """
+        :param records: The values of the elements, see :data:`RECORD_SIZE`.
+        :param class_names: The distinct values of the ``class`` attributes.
+        :param meta_names: The ``name`` attributes of the ``meta`` elements.
+        """
+        self.records = records
+        """
+        The values of all elements, :data:`RECORD_SIZE` per element.
+        """
+
+        self.parents: array[int] = records[0::RECORD_SIZE]
+        """
+        The index of the closest ancestor with a ``class`` attribute, ``-1``
+        for none.
+        """
+
+        self.ends: array[int] = records[1::RECORD_SIZE]
+        """
+        The index after the last descendant of each element.
+        """
+
+        self.depths: array[int] = records[2::RECORD_SIZE]
+        """
+        The number of ancestors with a ``class`` attribute.
+        """
+
+        self.classes: array[int] = records[3::RECORD_SIZE]
+        """
+        The index of the ``class`` attribute in :attr:`class_names`.
+        """
+
+        self.class_names = class_names
+        """
+        The distinct values of the ``class`` attributes.
+        """
+
+        self.meta_names = meta_names
+        """
+        The ``name`` attributes of the ``meta`` elements.
+        """
+
+    @property
+    def count(self) -> int:
+        """
+        The number of elements.
+        """
+        return len(self.parents)
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def find(self, class_name: str, start: int = 0, end: int | None = None) -> list[int]:
+        """
+        Find the elements with the given ``class`` attribute.
+
+        :param class_name: The exact value of the ``class`` attribute.
+        :param start: The first element index to look at.
+        :param end: The element index to stop at. Use ``scan.ends[index]`` to
+                    search within the given element and its descendants.
+        :return: The matching element indices in document order.
+        """
+        try:
+            class_id = self.class_names.index(class_name)
+        except ValueError:
+            return []
+        classes = self.classes
+        return [index for index in range(start, self.count if end is None else end) if classes[index] == class_id]
+
+    def get_bbox(self, index: int) -> RectangleType | None:
+        """
+        Get the bounding box of the given element.
+
+        :param index: The element index.
+        :return: The bounding box, or ``None`` if not set.
+        """
+        offset = RECORD_SIZE * index + 4
+        x0, y0, x1, y1 = self.records[offset:offset + 4]
+        if x0 == MISSING:
+            return None
+        return x0, y0, x1, y1
+
+
+def _parse_bbox(title: str) -> tuple[int, int, int, int]:
+    # Most titles start with the box, which is cheaper to split.
+    values = title.split(';', 1)[0].split()
+    try:
+        if len(values) == 5 and values[0] == 'bbox':
+            return int(values[1]), int(values[2]), int(values[3]), int(values[4])
+    except ValueError:
+        return _NO_BBOX
+    match = _BBOX_PATTERN.search(title)
+    if match is None:
+        return _NO_BBOX
+    x0, y0, x1, y1 = match.groups()
+    return int(x0), int(y0), int(x1), int(y1)
+
+
+class _ScanTarget:
+    # Parser target collecting the records, see the `lxml` documentation on
+    # parser targets. Without a `data` method, the parser skips all text.
+    # This runs for each element, thus each record is added at once.
+
+    def __init__(self) -> None:
+        self._records: array[int] = array('i')
+        self._extend = self._records.extend
+        self._class_ids: dict[str, int] = {}
+        self._meta_names: list[str] = []
+        self._stack: list[int] = []
+        self._count = 0
+        self._current = -1
+
+    def start(self, tag: str, attrib: Mapping[str, str]) -> None:
+        class_name = attrib.get('class')
+        if class_name is None:
+            if tag == 'meta':
+                name = attrib.get('name')
+                if name is not None:
+                    self._meta_names.append(name)
+            self._stack.append(-1)
+            return
+        class_ids = self._class_ids
+        class_id = class_ids.get(class_name)
+        if class_id is None:
+            class_id = class_ids[class_name] = len(class_ids)
+        title = attrib.get('title')
+        index = self._count
+        self._count = index + 1
+        parent = self._current
+        depth = self._records[RECORD_SIZE * parent + 2] + 1 if parent >= 0 else 0
+        self._extend((parent, 0, depth, class_id, *(_parse_bbox(title) if title else _NO_BBOX)))
+        self._stack.append(index)
+        self._current = index
+
+    def end(self, tag: str) -> None:
+        index = self._stack.pop()
+        if index >= 0:
+            offset = RECORD_SIZE * index
+            self._records[offset + 1] = self._count
+            self._current = self._records[offset]
+
+    def close(self) -> GeometryScan:
+        return GeometryScan(self._records, list(self._class_ids), self._meta_names)
+
+
+def scan_geometry(source: InputType) -> GeometryScan:
+    """
+    Scan the classes and bounding boxes of the given hOCR document.
+
+    This uses the same HTML parser as
+    :func:`~hocr_tools_lib.utils.input_utils.parse_html`, but neither builds
+    the element tree nor keeps any text.
+
+    :param source: A path, a file object or the content.
+    :return: The elements with a ``class`` attribute.
+    """
+    # The stubs require the optional methods of parser targets as well.
+    parser = etree.HTMLParser(target=_ScanTarget())  # type: ignore[call-overload]
+    if not isinstance(source, BUFFER_TYPES):
+        return cast(GeometryScan, etree.parse(source, parser))
+    try:
+        return cast(GeometryScan, etree.fromstring(source, parser))
+    except ValueError:
+        # Older versions of `lxml` only accept `bytes` and `str`.
+        if isinstance(source, bytes):
+            raise
+        parser = etree.HTMLParser(target=_ScanTarget())  # type: ignore[call-overload]
+        return cast(GeometryScan, etree.fromstring(bytes(source), parser))
@@ -0,0 +1,407 @@
+"""
+Compact binary sidecar format (``.hocrx``) for parsed hOCR documents.
+
+Parsing the HTML usually dominates the runtime of the analysis tools. A
+sidecar stores the parts of the document they need as flat little-endian
+columns, which are memory-mapped and used without copying:
+
+* The header: the magic ``HOCRX\\0\\r\\n``, the format version (``uint32``),
+  the number of elements (``uint32``) and the sizes of the class table, the
+  text and the titles in bytes (``uint64`` each).
+* For each element: the index of its parent element (``int32``, ``-1`` for
+  the root), the index after its last descendant (``int32``), the index of
+  its ``class`` attribute in the class table (``int32``), its bounding box
+  (4 × ``int32``, :data:`MISSING` if unset), its ``x_wconf`` (``float32``,
+  NaN if unset) and the start and end offsets of its text and of its
+  ``title`` attribute (2 × ``int64`` each).
+* The class table as NUL-separated UTF-8 strings, the text of the document as
+  UTF-8 and the ``title`` attributes as UTF-8.
+
+The elements are the ``body`` (always index 0) and all of its descendants
+with a ``class`` attribute, in document order. Thus the descendants of an
+element are the elements up to its end index, and the text of an element
+equals its ``text_content()``. Each section starts at a multiple of 8 bytes.
+
+A sidecar is a snapshot: it has to be recreated when the hOCR file changes.
+"""
+
+from __future__ import annotations
+
+import io
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, BinaryIO, Sequence
+
+from lxml.etree import _Element, _ElementTree
+from lxml.html import HtmlElement
+
+from hocr_tools_lib.utils.input_utils import BUFFER_TYPES
+from hocr_tools_lib.utils.rectangle_utils import RectangleType
+
+
+MAGIC = b"HOCRX\x00\r\n"
+"""
+The first bytes of each sidecar file.
+"""
+
+VERSION = 1
+"""
+The version of the format written by :func:`write_sidecar`.
+"""
+
+MISSING = -2 ** 31
+"""
+Coordinate value stored for elements without a bounding box.
+"""
+
+SUFFIX = ".hocrx"
+"""
+The file name suffix of sidecar files.
+"""
+
+_HEADER = struct.Struct("<8sIIQQQ")
+_COLUMNS = [
+    # Name, type code, values per element.
+    ("parents", "i", 1),
+    ("ends", "i", 1),
+    ("classes", "i", 1),
+    ("bboxes", "i", 4),
+    ("confidences", "f", 1),
+    ("text_offsets", "q", 2),
+    ("title_offsets", "q", 2),
+]
+
+
+def _padding(size: int) -> int:
+    return -size % 8
+
+
+def _parse_title(title: str) -> tuple[tuple[int, int, int, int] | None, float]:
+    bbox = None
+    confidence = math.nan
+    for prop in title.split(";"):
+        key, _, value = prop.strip().partition(" ")
+        try:
+            if key == "bbox":
+                values = [int(x) for x in value.split()]
+                if len(values) == 4:
+                    bbox = (values[0], values[1], values[2], values[3])
+            elif key == "x_wconf":
+                confidence = float(value)
+        except ValueError:
+            pass
+    return bbox, confidence
+
+
+def write_sidecar(document: HtmlElement | _ElementTree, target: os.PathLike[str] | str | BinaryIO) -> None:
+    """
+    Write the sidecar for the given parsed document.
+
+    :param document: The document or its root element.
+    :param target: The path or binary file object to write to.
+    """
+    root = document.getroot() if isinstance(document, _ElementTree) else document
+    body = root.find("body")
+    if body is None:
+        body = root
+
+    columns: dict[str, array[Any]] = {name: array(code) for name, code, _ in _COLUMNS}
+    parents = columns["parents"]
+    ends = columns["ends"]
+    bboxes = columns["bboxes"]
+    text_offsets = columns["text_offsets"]
+    class_ids: dict[str, int] = {}
+    text = bytearray()
+    titles = bytearray()
+
+    def start(node: _Element, parent: int) -> int:
+        index = len(parents)
+        parents.append(parent)
+        ends.append(0)
+        columns["classes"].append(class_ids.setdefault(node.get("class", ""), len(class_ids)))
+        title = node.get("title", "")
+        bbox, confidence = _parse_title(title)
+        bboxes.extend(bbox or (MISSING, MISSING, MISSING, MISSING))
+        columns["confidences"].append(confidence)
+        text_offsets.extend((len(text), 0))
+        encoded_title = title.encode("UTF-8")
+        columns["title_offsets"].extend((len(titles), len(titles) + len(encoded_title)))
+        titles.extend(encoded_title)
+        return index
+
+    # Iterative depth-first walk, as `lxml.etree.iterwalk` skips the tails of comments.
+    stack = [(body, iter(body), start(body, -1))]
+    if body.text:
+        text.extend(body.text.encode("UTF-8"))
+    while stack:
+        node, children, index = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            if node.get("class") is not None or node is body:
+                ends[index] = len(parents)
+                text_offsets[2 * index + 1] = len(text)
+            if stack and node.tail:
+                text.extend(node.tail.encode("UTF-8"))
+            continue
+        if not isinstance(child.tag, str):
+            # Comments and processing instructions.
+            if child.tail:
+                text.extend(child.tail.encode("UTF-8"))
+            continue
+        child_index = index
+        if child.get("class") is not None:
+            child_index = start(child, index)
+        if child.text:
+            text.extend(child.text.encode("UTF-8"))
+        stack.append((child, iter(child), child_index))
+
+    class_table = b"\x00".join(name.encode("UTF-8") for name in class_ids)
+    chunks: list[bytes | bytearray] = [_HEADER.pack(MAGIC, VERSION, len(parents), len(class_table), len(text), len(titles))]
+    for name, _, _ in _COLUMNS:
+        column = columns[name]
+        if sys.byteorder != "little":  # pragma: no cover
+            column.byteswap()
+        data = column.tobytes()
+        chunks.extend((data, bytes(_padding(len(data)))))
+    for section in (class_table, text, titles):
+        chunks.extend((section, bytes(_padding(len(section)))))
+
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, mode="wb") as fd:
+            fd.writelines(chunks)
+    else:
+        target.writelines(chunks)
+
+
+class Sidecar:
+    """
+    Read-only view of a sidecar.
+
+    The columns are memory views into the underlying buffer, indexed by the
+    element index. They, and slices of them, must not be used after closing
+    the sidecar.
+    """
+
+    def __init__(self, buffer: Any, mapping: mmap.mmap | None = None) -> None:
+        """
+        :param buffer: The bytes-like content of the sidecar.
+        :param mapping: The memory map backing the buffer, if any. Will be
+                        closed together with the sidecar.
+        :raises ValueError: The buffer does not hold a supported sidecar.
+        """
+        self._mapping = mapping
+        self._views: list[memoryview] = []
+        view = self._view(memoryview(buffer).cast("B"))
+        if len(view) < _HEADER.size:
+            self.close()
+            raise ValueError("Not an hOCR sidecar")
+        magic, version, count, classes_size, text_size, titles_size = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not an hOCR sidecar of version {VERSION}")
+        self.count: int = count
+        """
+        The number of elements.
+        """
+
+        sizes = [count * width * array(code).itemsize for _, code, width in _COLUMNS]
+        sizes += [classes_size, text_size, titles_size]
+        if _HEADER.size + sum(size + _padding(size) for size in sizes) > len(view):
+            self.close()
+            raise ValueError("Truncated hOCR sidecar")
+        offset = _HEADER.size
+        columns: dict[str, Sequence[Any]] = {}
+        for (name, code, _), size in zip(_COLUMNS, sizes):
+            columns[name] = self._column(view, offset, size, code)
+            offset += size + _padding(size)
+        sections = []
+        for size in sizes[len(_COLUMNS):]:
+            sections.append(self._view(view[offset:offset + size]))
+            offset += size + _padding(size)
+
+        self.parents: Sequence[int] = columns["parents"]
+        """
+        The index of the parent of each element, ``-1`` for the root.
+        """
+
+        self.ends: Sequence[int] = columns["ends"]
+        """
+        The index after the last descendant of each element.
+        """
+
+        self.classes: Sequence[int] = columns["classes"]
+        """
+        The index of the ``class`` attribute of each element in
+        :attr:`class_names`.
+        """
+
+        self.bboxes: Sequence[int] = columns["bboxes"]
+        """
+        The flat bounding boxes, 4 values per element.
+        """
+
+        self.confidences: Sequence[float] = columns["confidences"]
+        """
+        The ``x_wconf`` of each element, NaN if unset.
+        """
+
+        self.text_offsets: Sequence[int] = columns["text_offsets"]
+        """
+        The flat start and end offsets of the text of each element in
+        :attr:`text`.
+        """
+
+        self.title_offsets: Sequence[int] = columns["title_offsets"]
+        """
+        The flat start and end offsets of the title of each element in
+        :attr:`titles`.
+        """
+
+        self.class_names: list[str] = bytes(sections[0]).decode("UTF-8").split("\x00")
+        """
+        The distinct ``class`` attributes.
+        """
+
+        self.text: memoryview = sections[1]
+        """
+        The UTF-8 text of the document.
+        """
+
+        self.titles: memoryview = sections[2]
+        """
+        The UTF-8 ``title`` attributes.
+        """
+
+    def _view(self, view: memoryview) -> memoryview:
+        self._views.append(view)
+        return view
+
+    def _column(self, view: memoryview, offset: int, size: int, code: str) -> Sequence[Any]:
+        if sys.byteorder != "little":  # pragma: no cover
+            column = array(code, view[offset:offset + size])
+            column.byteswap()
+            return column
+        return self._view(view[offset:offset + size].cast(code))  # type: ignore[call-overload]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> Sidecar:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Release the views and the memory map.
+        """
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+
+    def find(self, class_name: str, start: int = 0, end: int | None = None) -> list[int]:
+        """
+        Find the elements with the given ``class`` attribute.
+
+        :param class_name: The exact value of the ``class`` attribute.
+        :param start: The first element index to look at.
+        :param end: The element index to stop at. Use
+                    ``sidecar.ends[index]`` to search within the given element
+                    and its descendants.
+        :return: The matching element indices in document order.
+        """
+        try:
+            class_id = self.class_names.index(class_name)
+        except ValueError:
+            return []
+        classes = self.classes
+        return [index for index in range(start, self.count if end is None else end) if classes[index] == class_id]
+
+    def get_bbox(self, index: int) -> RectangleType | None:
+        """
+        Get the bounding box of the given element.
+
+        :param index: The element index.
+        :return: The bounding box, or ``None`` if not set.
+        """
+        x0, y0, x1, y1 = self.bboxes[4 * index:4 * index + 4]
+        if x0 == MISSING:
+            return None
+        return x0, y0, x1, y1
+
+    def get_text(self, index: int) -> str:
+        """
+        Get the text of the given element.
+
+        :param index: The element index.
+        :return: The text, equal to ``text_content()`` of the element.
+        """
+        return str(self.text[self.text_offsets[2 * index]:self.text_offsets[2 * index + 1]], "UTF-8")
+
+    def get_title(self, index: int) -> str:
+        """
+        Get the ``title`` attribute of the given element.
+
+        :param index: The element index.
+        :return: The title, empty if not set.
+        """
+        return str(self.titles[self.title_offsets[2 * index]:self.title_offsets[2 * index + 1]], "UTF-8")
+
+
+def _map_file(fileno: int) -> mmap.mmap | None:
+    try:
+        mapping = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # Empty files, pipes and other unmappable files.
+        return None
+    if mapping[:len(MAGIC)] != MAGIC:
+        mapping.close()
+        return None
+    return mapping
+
+
+def open_sidecar(source: Any) -> Sidecar | None:
+    """
+    Open the given source as a sidecar if it is one.
+
+    Files are memory-mapped, bytes-like objects including memory maps and
+    :class:`io.BytesIO` instances are used without copying. Memory maps
+    passed in are not closed together with the sidecar.
+
+    :param source: A path, a file object or bytes.
+    :return: The sidecar, or ``None`` if the source is not a sidecar, thus
+             should be parsed as hOCR.
+    """
+    if isinstance(source, io.BytesIO):
+        source = source.getbuffer()
+    if isinstance(source, BUFFER_TYPES):
+        if bytes(source[:len(MAGIC)]) != MAGIC:
+            return None
+        return Sidecar(source)
+
+    if isinstance(source, (str, os.PathLike)):
+        try:
+            with open(source, mode="rb") as fd:
+                if fd.read(len(MAGIC)) != MAGIC:
+                    return None
+                mapping = _map_file(fd.fileno())
+        except OSError:
+            return None
+    else:
+        try:
+            fileno = source.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+        mapping = _map_file(fileno)
+    if mapping is None:
+        return None
+    return Sidecar(mapping, mapping=mapping)
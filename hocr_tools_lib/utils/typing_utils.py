@@ -1,3 +1,7 @@
+import mmap
+import os
+from typing import Union
+
 try:
     from _typeshed import SupportsRead
 except ImportError:
@@ -26,7 +30,20 @@ except ImportError:
             ...
 
 
+BufferType = Union[bytes, bytearray, memoryview, mmap.mmap]
+"""
+In-memory document content which is parsed without copying.
+"""
+
+InputType = Union[str, "os.PathLike[str]", BufferType, SupportsRead[str], SupportsRead[bytes]]
+"""
+Document input: a path, a file object or the content itself.
+"""
+
+
 __all__ = [
+    "BufferType",
+    "InputType",
     "SupportsRead",
     "SupportsReadClose",
 ]
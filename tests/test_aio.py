@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from hocr_tools_lib import aio
+from hocr_tools_lib.tools.hocr_lines import lines
+from hocr_tools_lib.tools.hocr_wordfreq import word_frequencies
+from tests import TestCase
+
+
+class AioTestCase(TestCase):
+    def run_with_runner(self, coroutine_function: object, **kwargs: object) -> object:
+        async def run() -> object:
+            async with aio.Runner(**kwargs) as runner:  # type: ignore[arg-type]
+                return await coroutine_function(runner)  # type: ignore[operator]
+
+        return asyncio.run(run())
+
+    def test_tools(self) -> None:
+        filename = self.get_data_file('tess.hocr')
+
+        async def run(runner: aio.Runner) -> None:
+            content = await aio.read_file(filename)
+            from_path, from_content, frequencies, checks, evaluation = await asyncio.gather(
+                aio.lines(filename, runner=runner),
+                aio.lines(content, runner=runner),
+                aio.word_frequencies(content, max_hits=3, runner=runner),
+                aio.check(content, runner=runner),
+                aio.evaluate(filename, content, runner=runner),
+            )
+            self.assertEqual(list(lines(filename)), from_path)
+            self.assertEqual(from_path, from_content)
+            self.assertEqual(list(word_frequencies(filename, max_hits=3)), frequencies)
+            self.assertTrue(checks)
+            self.assertTrue(all(ok for ok, _ in checks))
+            self.assertEqual((None, 0, 0, 0), evaluation)
+
+            with TemporaryDirectory() as directory:
+                output = Path(directory) / 'tess.hocrx'
+                self.assertEqual(str(output), await aio.create_sidecar(content, output, runner=runner))
+                self.assertEqual(from_path, await aio.lines(output, runner=runner))
+
+                await aio.write_file(Path(directory) / 'tess.hocr', content)
+                self.assertEqual(from_path, await aio.lines(Path(directory) / 'tess.hocr', runner=runner))
+
+        self.run_with_runner(run, max_concurrency=2)
+
+    def test_errors(self) -> None:
+        async def run(runner: aio.Runner) -> None:
+            with self.assertRaises(OSError):
+                await aio.lines('/does/not/exist.hocr', runner=runner)
+            # The slot of the failed call has been released again.
+            self.assertEqual(37, len(await aio.lines(self.get_data_file('tess.hocr'), runner=runner)))
+
+        self.run_with_runner(run, max_concurrency=1)
+
+    def test_concurrency_limit(self) -> None:
+        lock = threading.Lock()
+        active = [0]
+        maximum = [0]
+        release = threading.Event()
+
+        def work() -> None:
+            with lock:
+                active[0] += 1
+                maximum[0] = max(maximum[0], active[0])
+            release.wait(timeout=30)
+            with lock:
+                active[0] -= 1
+
+        async def run(runner: aio.Runner) -> None:
+            tasks = [asyncio.ensure_future(runner.run(work)) for _ in range(6)]
+            await asyncio.sleep(0.1)
+            release.set()
+            await asyncio.gather(*tasks)
+
+        self.run_with_runner(run, max_concurrency=2)
+        self.assertEqual(2, maximum[0])
+
+    def test_cancellation(self) -> None:
+        started = threading.Event()
+        release = threading.Event()
+        calls: list[str] = []
+
+        def work(name: str) -> None:
+            calls.append(name)
+            started.set()
+            release.wait(timeout=30)
+
+        async def run(runner: aio.Runner) -> None:
+            running = asyncio.ensure_future(runner.run(work, 'running'))
+            waiting = asyncio.ensure_future(runner.run(work, 'waiting'))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 30)
+            await asyncio.sleep(0.05)
+
+            waiting.cancel()
+            running.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiting
+            with self.assertRaises(asyncio.CancelledError):
+                await running
+
+            # The cancelled call still occupies the only slot until it has
+            # finished, thus the next call has to wait.
+            following = asyncio.ensure_future(runner.run(work, 'following'))
+            await asyncio.sleep(0.1)
+            self.assertFalse(following.done())
+            self.assertEqual(['running'], calls)
+
+            release.set()
+            await following
+
+        self.run_with_runner(run, max_concurrency=1)
+        self.assertEqual(['running', 'following'], calls)
+
+    def test_process_pool(self) -> None:
+        filename = self.get_data_file('tess.hocr')
+
+        async def run(runner: aio.Runner) -> list[str]:
+            return await aio.lines(filename, runner=runner)
+
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = self.run_with_runner(run, executor=executor, max_concurrency=1)
+        self.assertEqual(list(lines(filename)), result)
+
+    def test_default_runner(self) -> None:
+        runner = aio.Runner(max_concurrency=1)
+        self.addCleanup(runner.close)
+        aio.set_default_runner(runner)
+        self.addCleanup(aio.set_default_runner, None)
+        self.assertIs(runner, aio.get_default_runner())
+
+        result = asyncio.run(aio.lines(self.get_data_file('tess.hocr')))
+        self.assertEqual(37, len(result))
+        # Each event loop gets its own slots.
+        result = asyncio.run(aio.lines(self.get_data_file('tess.hocr')))
+        self.assertEqual(37, len(result))
+
+    def test_closed_loop(self) -> None:
+        release = threading.Event()
+        runner = aio.Runner(max_concurrency=1)
+        self.addCleanup(runner.close)
+
+        async def start() -> None:
+            # Leave the loop while the only slot is still occupied.
+            asyncio.ensure_future(runner.run(release.wait, 30))
+            await asyncio.sleep(0.05)
+
+        asyncio.run(start())
+        release.set()
+
+        async def run() -> list[str]:
+            return await aio.lines(self.get_data_file('tess.hocr'), runner=runner)
+
+        self.assertEqual(37, len(asyncio.run(asyncio.wait_for(run(), timeout=30))))
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import contextlib
+import subprocess
+import sys
+from importlib.metadata import distribution
+from io import StringIO
+from unittest import mock
+
+from hocr_tools_lib import cli
+from tests import TestCase
+
+
+class CliTestCase(TestCase):
+    def test_commands(self) -> None:
+        scripts = {
+            entry_point.name: entry_point.value for entry_point in distribution('hocr-tools-lib').entry_points
+            if entry_point.group == 'console_scripts' and entry_point.name.startswith('hocr-')
+        }
+        self.assertEqual(
+            {
+                f'hocr-{name}': target for name, (target, _) in cli.COMMANDS.items()
+                if target.startswith('hocr_tools_lib.tools.')
+            },
+            scripts
+        )
+
+    def test_help(self) -> None:
+        for argv in [[], ['-h'], ['--help']]:
+            with self.subTest(argv=argv):
+                stdout = StringIO()
+                with contextlib.redirect_stdout(stdout):
+                    cli.main(argv)
+                self.assertIn('\n  extract-images  extract the images', stdout.getvalue())
+
+    def test_unknown_command(self) -> None:
+        stderr = StringIO()
+        with contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit) as context:
+            cli.main(['lnes'])
+        self.assertEqual(2, context.exception.code)
+        self.assertIn("unknown command 'lnes', did you mean 'lines'?", stderr.getvalue())
+
+    def test_dispatch(self) -> None:
+        filename = self.get_data_file('tess.hocr')
+        stdout = StringIO()
+        with mock.patch('sys.argv', ['hocr']), contextlib.redirect_stdout(stdout):
+            cli.main(['lines', filename])
+            self.assertEqual(['hocr lines', filename], sys.argv)
+        self.assertEqual(37, len(stdout.getvalue().splitlines()))
+
+        stdout = StringIO()
+        with mock.patch('sys.argv', ['hocr']), contextlib.redirect_stdout(stdout):
+            with self.assertRaises(SystemExit):
+                cli.main(['lines', '--help'])
+        self.assertTrue(stdout.getvalue().startswith('usage: hocr lines '), stdout.getvalue())
+
+    def test_lazy_imports(self) -> None:
+        code = (
+            'import sys\n'
+            'from hocr_tools_lib.tools import hocr_eval, hocr_pdf\n'
+            'print(sorted(name for name in ["PIL", "bidi", "reportlab"] if name in sys.modules))\n'
+        )
+        output = subprocess.check_output([sys.executable, '-c', code], text=True)
+        self.assertEqual('[]\n', output)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from hocr_tools_lib import pipeline
+from hocr_tools_lib.tools.hocr_combine import combine
+from hocr_tools_lib.utils.image_utils import ImageOptions
+from tests import chdir, TestCase
+
+
+class PipelineTestCase(TestCase):
+    def test_stages(self) -> None:
+        filename = self.get_data_file('tess.hocr')
+        dc = self.get_data_file('hocr_merge_dc/dcsample2.xml')
+
+        instance = pipeline.Pipeline.combine([filename, filename])
+        self.assertEqual(combine([filename, filename]).encode('UTF-8'), instance.tostring())
+        self.assertEqual(2, len(instance.pages))
+
+        instance.merge_dc(dc)
+        merged = instance.tostring()
+        self.assertIn(b'name="DC.title" content="UKOLN"', merged)
+        self.assertEqual(2, len(instance.pages))
+
+        self.assertIs(instance, instance.check())
+        self.assertTrue(instance.check_results)
+        self.assertTrue(all(ok for ok, _ in instance.check_results))
+
+    def test_check_strict(self) -> None:
+        instance = pipeline.Pipeline.load(b'<html><body><p>no pages</p></body></html>')
+        with self.assertRaises(pipeline.CheckFailedError) as context:
+            instance.check(strict=True)
+        self.assertIn('has a page', context.exception.failures)
+        self.assertFalse(all(ok for ok, _ in instance.check_results))
+
+    def test_split(self) -> None:
+        filename = self.get_data_file('hocr_split/test.hocr')
+        instance = pipeline.Pipeline.load(filename)
+        before = instance.tostring()
+
+        with TemporaryDirectory() as directory, chdir(directory):
+            with mock.patch.object(pipeline, 'parse_html', side_effect=AssertionError):
+                filenames = instance.split('test-%03d.hocr')
+            self.assertEqual(['test-001.hocr', 'test-002.hocr'], filenames)
+            for name in filenames:
+                content = (Path(directory) / name).read_text()
+                self.assertEqual(1, content.count('ocr_page'), content)
+
+        # The sink does not modify the document.
+        self.assertEqual(before, instance.tostring())
+
+    def test_export_pdf(self) -> None:
+        filename = self.get_data_file('tess.hocr')
+        instance = pipeline.Pipeline.combine([filename, filename])
+
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'book.pdf'
+            instance.export_pdf(str(path), title='book')
+            content = path.read_bytes()
+            self.assertTrue(content.startswith(b'%PDF'))
+            self.assertEqual(2, content.count(b'/Type /Page\n'))
+
+            instance.export_pdf(str(path), text_only=True)
+            text_only = path.read_bytes()
+
+            instance.export_pdf(str(path), image_options=ImageOptions(target_dpi=150))
+            recompressed = path.read_bytes()
+        self.assertEqual(2, text_only.count(b'/Type /Page\n'))
+        self.assertNotIn(b'/XObject', text_only)
+        self.assertLess(len(text_only) * 10, len(content))
+        self.assertEqual(2, recompressed.count(b'/CCITTFaxDecode'))
+        self.assertLess(len(recompressed) * 5, len(content))
+
+        with self.assertRaises(ValueError):
+            instance.export_pdf('book.pdf', images=[self.get_data_file('alice_1.png')])
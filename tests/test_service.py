@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import http.client
+import json
+import sys
+import threading
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import skipIf
+
+from hocr_tools_lib import client, service
+from tests import TestCase
+
+
+class ServiceTestCase(TestCase):
+    def start(
+            self, max_requests: int | None = None, unix_socket: str | None = None, token: str | None = None
+    ) -> service.Service:
+        instance = service.Service(workers=0, max_requests=max_requests)
+        server = service.create_server(instance, port=0, unix_socket=unix_socket, token=token)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def stop() -> None:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+            instance.close()
+
+        self.addCleanup(stop)
+        if unix_socket is None:
+            self.port: int = server.socket.getsockname()[1]
+        return instance
+
+    def request(self, operation: str, **arguments: object) -> object:
+        return client.request(operation, arguments, port=self.port, timeout=30)
+
+    def post(self, body: bytes, headers: dict[str, str]) -> int:
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        try:
+            connection.request('POST', '/', body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        finally:
+            connection.close()
+        return response.status
+
+    def test_operations(self) -> None:
+        self.start()
+        filename = self.get_data_file('tess.hocr')
+
+        result = self.request('lines', hocr=filename)
+        self.assertIsInstance(result, list)
+        self.assertEqual(37, len(result))  # type: ignore[arg-type]
+
+        result = self.request('check', hocr=filename)
+        self.assertIsInstance(result, list)
+        self.assertTrue(all(test['ok'] for test in result))  # type: ignore[attr-defined]
+
+        result = self.request('eval', truth=filename, actual=filename)
+        self.assertEqual({'segmentation_errors': 0, 'segmentation_ocr_errors': 0, 'ocr_errors': 0}, result)
+
+        result = self.request('eval-matches', truth=filename, actual=filename, thresholds=[0.5, 0.9])
+        self.assertEqual([1.0, 1.0], [stats['f1'] for stats in result])  # type: ignore[attr-defined]
+
+        result = self.request('eval', truth=filename, actual=filename, stats=True)
+        self.assertEqual(0, result['stats']['character_errors'])  # type: ignore[index]
+
+    def test_status(self) -> None:
+        self.start()
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        try:
+            connection.request('GET', '/')
+            response = connection.getresponse()
+            data = json.loads(response.read())
+        finally:
+            connection.close()
+        self.assertEqual(200, response.status)
+        self.assertEqual(sorted(service.OPERATIONS), data['operations'])
+
+    def test_errors(self) -> None:
+        self.start()
+
+        with self.assertRaises(client.ServiceError) as context:
+            self.request('lnes')
+        self.assertEqual(404, context.exception.status)
+        self.assertEqual("Unknown operation 'lnes'", str(context.exception))
+
+        with self.assertRaises(client.ServiceError) as context:
+            self.request('lines', unknown=1)
+        self.assertEqual(400, context.exception.status)
+
+        with self.assertRaises(client.ServiceError) as context:
+            self.request('lines', hocr='/does/not/exist.hocr')
+        self.assertEqual(500, context.exception.status)
+
+        with self.assertRaises(client.ServiceError) as context:
+            self.request('pdf', savefile='/tmp/book.pdf')
+        self.assertEqual(400, context.exception.status)
+
+        headers = {'Content-Type': 'application/json'}
+        self.assertEqual(400, self.post(b'{"arguments": {}}', headers))
+        self.assertEqual(415, self.post(b'{"operation": "lines"}', {}))
+        self.assertEqual(415, self.post(b'{"operation": "lines"}', {'Content-Type': 'text/plain'}))
+        self.assertEqual(400, self.post(b'', dict(headers, **{'Content-Length': '-1'})))
+
+    def test_access(self) -> None:
+        self.start(token='secret')
+        filename = self.get_data_file('tess.hocr')
+
+        with self.assertRaises(client.ServiceError) as context:
+            self.request('lines', hocr=filename)
+        self.assertEqual(401, context.exception.status)
+        result = client.request('lines', {'hocr': filename}, port=self.port, timeout=30, token='secret')
+        self.assertEqual(37, len(result))
+
+        # Requests addressed to other hosts are rejected, for example after DNS rebinding.
+        body = b'{"operation": "lines", "arguments": {}}'
+        headers = {'Content-Type': 'application/json', 'Authorization': 'Bearer secret'}
+        self.assertEqual(403, self.post(body, dict(headers, Host='attacker.example')))
+        self.assertEqual(403, self.post(body, dict(headers, Host=f'attacker.example:{self.port}')))
+        self.assertEqual(400, self.post(body, dict(headers, Host=f'localhost:{self.port}')))
+
+    def test_busy(self) -> None:
+        instance = self.start(max_requests=1)
+        # Occupy the only slot, as a long-running request would do.
+        self.assertTrue(instance._slots.acquire(blocking=False))
+        try:
+            with self.assertRaises(client.ServiceError) as context:
+                self.request('lines', hocr=self.get_data_file('tess.hocr'))
+            self.assertEqual(503, context.exception.status)
+        finally:
+            instance._slots.release()
+        self.assertEqual(37, len(self.request('lines', hocr=self.get_data_file('tess.hocr'))))  # type: ignore[arg-type]
+
+    @skipIf(sys.platform == 'win32', 'Unix sockets are not available on Windows.')
+    def test_unix_socket(self) -> None:
+        with TemporaryDirectory() as directory:
+            path = str(Path(directory) / 'hocr.sock')
+            self.start(unix_socket=path)
+            result = client.request('lines', {'hocr': self.get_data_file('tess.hocr')}, unix_socket=path, timeout=30)
+            self.assertEqual(37, len(result))
+            self.doCleanups()
@@ -48,3 +48,16 @@ class HocrCheckTestCase(TestCase):
                     hocr_check.Checker(hocr_file=path).check()
                 stderr = stderr_io.getvalue()
                 self.assertIn('not ok', stderr)
+
+    def test_fast(self) -> None:
+        directory = self.get_data_directory()
+        paths = sorted((directory / 'hocr_check').rglob('*ok-*html'))
+        paths += [directory / 'tess.hocr', directory / 'sample.html', directory / 'litver.html']
+        for path in paths:
+            with self.subTest(path=path):
+                expected = hocr_check.CollectingChecker(hocr_file=path)
+                expected.check()
+                with mock.patch.object(hocr_check, 'parse_html', side_effect=AssertionError):
+                    checker = hocr_check.CollectingChecker(hocr_file=path, fast=True)
+                checker.check()
+                self.assertEqual(expected.results, checker.results)
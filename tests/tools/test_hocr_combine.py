@@ -38,3 +38,11 @@ class HocrCombineTestCase(TestCase):
 
         # Check whether number ocr_lines in self-combined result is doubled.
         self.assertEqual(original_count * 2, merged_count)
+
+    def test_buffers(self) -> None:
+        filename = self.get_data_file('sample.html')
+        content = self.get_data_content('sample.html')
+        self.assertEqual(
+            hocr_combine.combine([filename, filename]),
+            hocr_combine.combine([content, memoryview(content)])
+        )
@@ -3,10 +3,16 @@ from __future__ import annotations
 import contextlib
 import subprocess
 from io import StringIO
+from pathlib import Path
 from tempfile import TemporaryDirectory
 from unittest import mock
 
+from lxml import html
+from PIL import Image
+
 from hocr_tools_lib.tools import hocr_cut
+from hocr_tools_lib.utils.input_utils import parse_html
+from hocr_tools_lib.utils.node_utils import get_bbox, get_prop
 from tests import TestCase
 
 
@@ -58,3 +64,134 @@ class HocrCutTestCase(TestCase):
                 b'',
                 (directory / 'litver.cut.png').read_bytes()
             )
+            for side in hocr_cut.SIDES:
+                doc = parse_html(str(directory / f'litver.{side}.hocr'))
+                page = doc.xpath("//*[@class='ocr_page']")[0]
+                self.assertEqual(f'litver.{side}.png', get_prop(page, 'image', strip_value=True))
+                with Image.open(directory / f'litver.{side}.png') as image:
+                    self.assertEqual((0, 0) + image.size, get_bbox(page))
+                for line in page.xpath(".//*[@class='ocr_line']"):
+                    bbox = get_bbox(line)
+                    assert bbox is not None
+                    self.assertTrue(0 <= bbox[0] <= bbox[2] <= image.size[0], bbox)
+
+    def test_cut_page(self) -> None:
+        page = html.fromstring(
+            '<div class="ocr_page" title="image page.png; bbox 0 0 1000 500">'
+            '<div class="ocr_carea" title="bbox 100 100 420 300">'
+            '<span class="ocr_line" title="bbox 100 100 400 150; baseline 0 -5">'
+            '<span class="ocrx_word" title="bbox 100 100 200 150">left</span></span><br/>'
+            '<span class="ocr_line" title="bbox 120 250 420 300">'
+            '<span class="ocrx_word" title="bbox 120 250 420 300">left</span></span><br/>'
+            '</div>'
+            '<div class="ocr_carea" title="bbox 380 100 900 400">'
+            '<span class="ocr_line" title="bbox 380 100 520 150">'
+            '<span class="ocrx_word" title="bbox 380 100 520 150; x_bboxes 380 100 450 150 460 100 520 150">ab</span>'
+            '</span><br/>'
+            '<span class="ocr_line" title="bbox 440 300 900 400">'
+            '<span class="ocrx_word" title="bbox 440 300 900 400">right</span></span><br/>'
+            '</div>'
+            '</div>'
+        )
+        page_cut = hocr_cut.find_cut(page)
+        self.assertEqual((430, 420, 440), (page_cut.position, page_cut.middle_left, page_cut.middle_right))
+        # Relative to the middle of the page, while the halves are split at the cut.
+        self.assertEqual(['left', 'left', 'left', 'right'], [side for _, side in page_cut.lines])
+
+        left = hocr_cut.cut_page(page, page_cut, 'left', image='page.left.png')
+        self.assertEqual('image "page.left.png"; bbox 0 0 430 500', left.get('title'))
+        self.assertEqual(
+            [(100, 100, 400, 150), (120, 250, 420, 300)],
+            [get_bbox(line) for line in left.xpath(".//*[@class='ocr_line']")]
+        )
+        self.assertEqual(1, len(left.xpath("//*[@class='ocr_carea']")))
+
+        right = hocr_cut.cut_page(page, page_cut, 'right')
+        self.assertEqual('image page.png; bbox 0 0 570 500', right.get('title'))
+        careas = right.xpath("//*[@class='ocr_carea']")
+        self.assertEqual([(0, 100, 470, 400)], [get_bbox(carea) for carea in careas])
+        self.assertEqual(
+            ['bbox 0 100 90 150; x_bboxes 0 100 20 150 30 100 90 150', 'bbox 10 300 470 400'],
+            [word.get('title') for word in right.xpath("//*[@class='ocrx_word']")]
+        )
+        self.assertEqual(2, len(right.xpath("//br")))
+        # The original page is unchanged.
+        self.assertEqual(4, len(page.xpath("//*[@class='ocr_line']")))
+
+    def test_multiple_pages(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            pages = []
+            for index, middle in enumerate((300, 700)):
+                Image.new('L', (1000, 200), 'white').save(directory / f'page-{index}.png')
+                pages.append(
+                    f'<div class="ocr_page" title="image page-{index}.png; bbox 0 0 1000 200">'
+                    f'<span class="ocr_line" title="bbox 10 10 {middle - 10} 50">a</span>'
+                    f'<span class="ocr_line" title="bbox {middle + 10} 10 990 50">b</span>'
+                    '</div>'
+                )
+            (directory / 'book.hocr').write_text('<html><body>' + ''.join(pages) + '</body></html>')
+
+            hocr_cut.cut(str(directory / 'book.hocr'), workers=2)
+
+            for index, middle in enumerate((300, 700)):
+                with Image.open(directory / f'page-{index}.left.png') as image:
+                    self.assertEqual((middle, 200), image.size)
+                with Image.open(directory / f'page-{index}.right.png') as image:
+                    self.assertEqual((1000 - middle, 200), image.size)
+                doc = parse_html(str(directory / f'page-{index}.right.hocr'))
+                self.assertEqual(1, len(doc.xpath("//*[@class='ocr_page']")))
+                self.assertEqual(
+                    [(10, 10, 990 - middle, 50)], [get_bbox(line) for line in doc.xpath("//*[@class='ocr_line']")]
+                )
+
+            hocr_cut.cut(str(directory / 'book.hocr'), write_hocr=False)
+
+            # Pages without an image are skipped entirely.
+            for path in directory.glob('page-*.*.*'):
+                path.unlink()
+            (directory / 'page-1.png').unlink()
+            with self.assertLogs(hocr_cut.logger, level='WARNING'):
+                hocr_cut.cut(str(directory / 'book.hocr'))
+            self.assertEqual(
+                ['page-0.left.hocr', 'page-0.left.png', 'page-0.right.hocr', 'page-0.right.png'],
+                sorted(path.name for path in directory.glob('page-*.*.*'))
+            )
+
+    def test_get_coverage(self) -> None:
+        coverage = hocr_cut.get_coverage([(2, 0, 5, 1), (4, 0, 8, 1), (-3, 0, 1, 1), (9, 0, 20, 1)], width=10)
+        self.assertEqual([1, 0, 1, 1, 2, 1, 1, 1, 0, 1], list(coverage))
+
+    def test_columns(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            Image.new('L', (1200, 600), 'white').save(directory / 'news.png')
+            # A headline across all columns, then three columns with gutters
+            # around 400 and 800, the second one being narrower.
+            lines = ['<span class="ocr_line" title="bbox 100 50 1100 90">headline</span>']
+            for top in range(100, 500, 50):
+                for start, end in ((100, 370), (430, 760), (820, 1100)):
+                    lines.append(
+                        f'<span class="ocr_line" title="bbox {start} {top} {end} {top + 40}">'
+                        f'<span class="ocrx_word" title="bbox {start} {top} {end} {top + 40}">text</span></span>'
+                    )
+            page_html = '<div class="ocr_page" title="image news.png; bbox 0 0 1200 600">' + ''.join(lines) + '</div>'
+            (directory / 'news.hocr').write_text(f'<html><body>{page_html}</body></html>')
+            page = parse_html(str(directory / 'news.hocr')).xpath("//*[@class='ocr_page']")[0]
+            self.assertEqual([400, 790], hocr_cut.find_columns(page, 3))
+            with self.assertRaises(ValueError):
+                hocr_cut.find_columns(page, 1)
+
+            hocr_cut.cut(str(directory / 'news.hocr'), debug=True, columns=3)
+
+            self.assertTrue((directory / 'news.cut.png').is_file())
+            for index, (width, start) in enumerate(((400, 100), (390, 30), (410, 30)), start=1):
+                with Image.open(directory / f'news.col{index}.png') as image:
+                    self.assertEqual((width, 600), image.size)
+                doc = parse_html(str(directory / f'news.col{index}.hocr'))
+                page = doc.xpath("//*[@class='ocr_page']")[0]
+                self.assertEqual(f'news.col{index}.png', get_prop(page, 'image', strip_value=True))
+                boxes = [get_bbox(line) for line in page.xpath(".//*[@class='ocr_line']")]
+                # The headline stays in the column it overlaps most.
+                self.assertEqual(9 if index == 2 else 8, len(boxes))
+                self.assertEqual({start}, {box[0] for box in boxes if box is not None and box[1] >= 100})
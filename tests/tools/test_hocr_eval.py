@@ -1,11 +1,20 @@
 from __future__ import annotations
 
 import contextlib
+import dataclasses
+import json
+import os
+import shutil
 import subprocess
 from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest import mock
 
-from hocr_tools_lib.tools import hocr_eval
+from hocr_tools_lib.tools import hocr_eval, hocr_generate
+from hocr_tools_lib.utils.cache_utils import ResultCache
+from hocr_tools_lib.utils.edit_utils import ErrorStats
+from hocr_tools_lib.utils.profile_utils import profiling
 from tests import TestCase
 
 
@@ -25,10 +34,91 @@ class HocrEvalTestCase(TestCase):
             stdout=subprocess.PIPE, stderr=subprocess.PIPE,
         )
 
+    def test_cache(self) -> None:
+        tess_hocr = self.get_data_file('tess.hocr')
+        sample_html = self.get_data_file('sample.html')
+        _, *expected = hocr_eval.evaluate(truth=sample_html, actual=tess_hocr)
+
+        with TemporaryDirectory() as directory:
+            cache = ResultCache(directory)
+            _, *result = hocr_eval.evaluate(truth=sample_html, actual=tess_hocr, cache=cache)
+            self.assertEqual(expected, result)
+
+            with mock.patch.object(hocr_eval, 'parse_html', side_effect=AssertionError) as parse_mock:
+                _, *result = hocr_eval.evaluate(truth=sample_html, actual=tess_hocr, cache=cache)
+                self.assertEqual(expected, result)
+                parse_mock.assert_not_called()
+
+                # Changed parameters.
+                with mock.patch.object(hocr_eval, 'HTOL', 50), self.assertRaises(AssertionError):
+                    hocr_eval.evaluate(truth=sample_html, actual=tess_hocr, cache=cache)
+
+    def test_buffers(self) -> None:
+        tess_hocr = self.get_data_file('tess.hocr')
+        sample_html = self.get_data_file('sample.html')
+        _, *expected = hocr_eval.evaluate(truth=sample_html, actual=tess_hocr)
+        truth = self.get_data_content('sample.html')
+        actual = memoryview(self.get_data_content('tess.hocr'))
+
+        _, *result = hocr_eval.evaluate(truth=truth, actual=actual)
+        self.assertEqual(expected, result)
+        with TemporaryDirectory() as directory:
+            cache = ResultCache(directory)
+            _, *result = hocr_eval.evaluate(truth=truth, actual=actual, cache=cache)
+            self.assertEqual(expected, result)
+            # The same content given as paths hits the cache.
+            with mock.patch.object(hocr_eval, 'parse_html', side_effect=AssertionError):
+                _, *result = hocr_eval.evaluate(truth=sample_html, actual=tess_hocr, cache=cache)
+            self.assertEqual(expected, result)
+
+    def test_multiple_pages(self) -> None:
+        configuration = hocr_generate.Configuration(pages=3, images=False, overlap_rate=0.2)
+        with TemporaryDirectory() as directory:
+            book = hocr_generate.generate(Path(directory) / 'book', configuration, single_file=True)
+            pages = hocr_generate.generate(Path(directory) / 'pages', configuration)
+
+            _, *book_result = hocr_eval.evaluate(book.truth[0], book.actual[0])
+            page_results = [hocr_eval.evaluate(truth, actual)[1:] for truth, actual in zip(pages.truth, pages.actual)]
+        # Each page is only compared with its own lines.
+        self.assertEqual([sum(values) for values in zip(*page_results)], book_result)
+        self.assertNotEqual(0, book_result[2])
+
+    def test_stats(self) -> None:
+        tess_hocr = self.get_data_file('tess.hocr')
+        sample_html = self.get_data_file('sample.html')
+        _, *expected = hocr_eval.evaluate(truth=sample_html, actual=tess_hocr)
+
+        stats = ErrorStats()
+        _, *result = hocr_eval.evaluate(truth=sample_html, actual=tess_hocr, stats=stats)
+        self.assertEqual(expected, result)
+        # All lines are matched, thus each character error is an OCR error.
+        self.assertEqual(expected[2], stats.character_errors)
+        self.assertLess(0, stats.word_errors)
+        self.assertEqual(stats.character_errors, sum(count for _, _, count in stats.most_common()))
+
+        with TemporaryDirectory() as directory:
+            cache = ResultCache(directory)
+            # Results without statistics do not satisfy requests with them.
+            hocr_eval.evaluate(truth=sample_html, actual=tess_hocr, cache=cache)
+            cached_stats = ErrorStats()
+            hocr_eval.evaluate(truth=sample_html, actual=tess_hocr, cache=cache, stats=cached_stats)
+            self.assertEqual(stats, cached_stats)
+            with mock.patch.object(hocr_eval, 'parse_html', side_effect=AssertionError):
+                hocr_eval.evaluate(truth=sample_html, actual=tess_hocr, cache=cache, stats=cached_stats)
+            self.assertEqual(2 * stats.characters, cached_stats.characters)
+            self.assertEqual(2 * stats.character_errors, cached_stats.character_errors)
+
     def test_main(self) -> None:
         tess_hocr = self.get_data_file('tess.hocr')
         sample_html = self.get_data_file('sample.html')
 
+        stdout = StringIO()
+        with mock.patch('sys.argv', ['hocr-eval', '--stats', sample_html, tess_hocr]):
+            with contextlib.redirect_stdout(stdout):
+                hocr_eval.main()
+        self.assertRegex(stdout.getvalue(), r'\ncer 0\.\d+\n')
+        self.assertIn('\nconfusion ', stdout.getvalue())
+
         stdout = StringIO()
         with mock.patch('sys.argv', ['hocr-eval', tess_hocr, sample_html]):
             with contextlib.redirect_stdout(stdout):
@@ -38,3 +128,196 @@ class HocrEvalTestCase(TestCase):
         with mock.patch('sys.argv', ['hocr-eval', sample_html, sample_html]):
             with contextlib.redirect_stdout(stdout):
                 hocr_eval.main()
+
+
+class CorpusTestCase(TestCase):
+    def _create_corpus(self, directory: Path) -> None:
+        for name in ['a/0001', 'a/0002', 'b/0003']:
+            truth = directory / 'truth' / f'{name}.html'
+            truth.parent.mkdir(parents=True, exist_ok=True)
+            truth.write_bytes(self.get_data_content('sample.html'))
+            actual = directory / 'actual' / f'{name}.hocr'
+            actual.parent.mkdir(parents=True, exist_ok=True)
+            actual.write_bytes(self.get_data_content('tess.hocr'))
+        # Without counterpart.
+        (directory / 'actual' / 'b' / '0004.hocr').write_bytes(self.get_data_content('tess.hocr'))
+
+    def test_pair_directories(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            self._create_corpus(directory)
+
+            with self.assertLogs(hocr_eval.logger, level='WARNING'):
+                entries = hocr_eval.pair_directories(directory / 'truth', directory / 'actual')
+        self.assertEqual(
+            [
+                ('a/0001.html', 'a/0001.hocr'),
+                ('a/0002.html', 'a/0002.hocr'),
+                ('b/0003.html', 'b/0003.hocr'),
+            ],
+            [
+                (
+                    Path(entry.truth).relative_to(directory / 'truth').as_posix(),
+                    Path(entry.actual).relative_to(directory / 'actual').as_posix(),
+                )
+                for entry in entries
+            ]
+        )
+        self.assertEqual([None] * 3, [entry.image for entry in entries])
+        self.assertEqual(['a/0001', 'a/0002', 'b/0003'], [entry.key for entry in entries])
+
+    def test_read_manifest(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            manifest = Path(temp_directory) / 'manifest.tsv'
+            manifest.write_text('# Comment\ntruth.html\tactual.hocr\n\n/abs/t.html\t/abs/a.hocr\timage.png\n')
+            entries = hocr_eval.read_manifest(manifest)
+        self.assertEqual(
+            [
+                hocr_eval.CorpusEntry(
+                    truth=str(Path(temp_directory) / 'truth.html'),
+                    actual=str(Path(temp_directory) / 'actual.hocr'), key='actual',
+                ),
+                hocr_eval.CorpusEntry(
+                    truth='/abs/t.html', actual='/abs/a.hocr',
+                    image=str(Path(temp_directory) / 'image.png'), key='/abs/a',
+                ),
+            ],
+            entries
+        )
+
+        with TemporaryDirectory() as temp_directory:
+            manifest = Path(temp_directory) / 'manifest.tsv'
+            manifest.write_text('truth.html\n')
+            with self.assertRaisesRegex(ValueError, r'manifest\.tsv:1: Expected 2 or 3'):
+                hocr_eval.read_manifest(manifest)
+
+    def test_evaluate_corpus(self) -> None:
+        _, *expected = hocr_eval.evaluate(
+            truth=self.get_data_file('sample.html'), actual=self.get_data_file('tess.hocr')
+        )
+        entries = [
+            hocr_eval.CorpusEntry(truth=self.get_data_file('sample.html'), actual=self.get_data_file('tess.hocr')),
+            hocr_eval.CorpusEntry(truth=self.get_data_file('sample.html'), actual='/does/not/exist.hocr'),
+        ]
+        for workers in [1, 2]:
+            with self.subTest(workers=workers):
+                # Logs of worker processes do not reach the current process.
+                with self.assertLogs(hocr_eval.logger, level='WARNING') if workers == 1 else contextlib.nullcontext():
+                    result = hocr_eval.evaluate_corpus(entries * 2, workers=workers)
+                self.assertEqual(4, len(result.pages))
+                page = result.pages[0]
+                self.assertEqual(
+                    expected,
+                    [page.segmentation_errors, page.segmentation_ocr_errors, page.ocr_errors]
+                )
+                self.assertIsNone(page.error)
+                self.assertRegex(result.pages[1].error or '', r'^OSError: ')
+                totals = result.totals()
+                self.assertEqual(2, totals['pages'])
+                self.assertEqual(2, totals['failed'])
+                self.assertEqual(2 * expected[2], totals['ocr_errors'])
+                self.assertIsNone(result.total_stats())
+
+    def test_evaluate_corpus_stats(self) -> None:
+        stats = ErrorStats()
+        hocr_eval.evaluate(truth=self.get_data_file('sample.html'), actual=self.get_data_file('tess.hocr'), stats=stats)
+        entries = [
+            hocr_eval.CorpusEntry(truth=self.get_data_file('sample.html'), actual=self.get_data_file('tess.hocr')),
+            hocr_eval.CorpusEntry(truth=self.get_data_file('sample.html'), actual='/does/not/exist.hocr'),
+        ] * 2
+        with self.assertLogs(hocr_eval.logger, level='WARNING'):
+            result = hocr_eval.evaluate_corpus(entries, workers=1, stats=True)
+        self.assertEqual(stats, result.pages[0].stats)
+        self.assertIsNone(result.pages[1].stats)
+        stats.merge(stats)
+        self.assertEqual(stats, result.total_stats())
+
+    def test_evaluate_corpus_profiling(self) -> None:
+        entries = [
+            hocr_eval.CorpusEntry(truth=self.get_data_file('sample.html'), actual=self.get_data_file('tess.hocr')),
+        ] * 3
+        for workers in [1, 2]:
+            with self.subTest(workers=workers):
+                with profiling(json_file=os.devnull) as profiler:
+                    hocr_eval.evaluate_corpus(entries, workers=workers)
+                report = profiler.report()
+                # The values of the worker processes are merged.
+                self.assertEqual(3, report['timers']['html.parse']['calls'])
+                self.assertEqual(3, report['counters']['pages'])
+                self.assertEqual(
+                    3 * (len(self.get_data_content('sample.html')) + len(self.get_data_content('tess.hocr'))),
+                    report['counters']['bytes_read']
+                )
+
+    def test_error_images(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            entry = hocr_eval.CorpusEntry(
+                truth=self.get_data_file('sample.html'), actual=self.get_data_file('tess.hocr'),
+                image=self.get_data_file('alice_1.png'),
+            )
+            hocr_eval.evaluate_corpus([entry], workers=1)
+            self.assertEqual([], list(Path(temp_directory).iterdir()))
+
+            hocr_eval.evaluate_corpus([entry], workers=1, error_image_directory=temp_directory)
+            self.assertEqual(['tess.errors.png'], [path.name for path in Path(temp_directory).iterdir()])
+
+    def test_error_images_same_name(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            for name in ['a', 'b']:
+                (directory / 'truth' / name).mkdir(parents=True)
+                (directory / 'actual' / name).mkdir(parents=True)
+                (directory / 'images' / name).mkdir(parents=True)
+                shutil.copy(self.get_data_file('sample.html'), directory / 'truth' / name / 'p001.html')
+                shutil.copy(self.get_data_file('tess.hocr'), directory / 'actual' / name / 'p001.hocr')
+                shutil.copy(self.get_data_file('alice_1.png'), directory / 'images' / name / 'p001.png')
+            entries = hocr_eval.pair_directories(directory / 'truth', directory / 'actual', directory / 'images')
+            # Keys outside of the directory are escaped instead.
+            entries.append(dataclasses.replace(entries[0], key='../p001'))
+
+            hocr_eval.evaluate_corpus(entries, workers=1, error_image_directory=directory / 'errors')
+            self.assertEqual(
+                ['..%2Fp001.errors.png', 'a/p001.errors.png', 'b/p001.errors.png'],
+                sorted(path.relative_to(directory / 'errors').as_posix() for path in (directory / 'errors').rglob('*.png'))
+            )
+
+    def test_main(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            self._create_corpus(directory)
+            json_path = directory / 'result.json'
+            csv_path = directory / 'result.csv'
+
+            stdout = StringIO()
+            with mock.patch(
+                    'sys.argv',
+                    [
+                        'hocr-eval', '--corpus', '-j', '1', '--json', str(json_path), '--csv', str(csv_path),
+                        str(directory / 'truth'), str(directory / 'actual')
+                    ]
+            ):
+                with contextlib.redirect_stdout(stdout), self.assertLogs(hocr_eval.logger, level='WARNING'):
+                    hocr_eval.main()
+
+            self.assertIn('pages 3\nfailed 0\n', stdout.getvalue())
+            data = json.loads(json_path.read_text())
+            self.assertEqual(3, len(data['pages']))
+            self.assertEqual(3, data['total']['pages'])
+            self.assertNotIn('stats', data['total'])
+            rows = csv_path.read_text().splitlines()
+            self.assertEqual(5, len(rows))
+            self.assertTrue(rows[-1].startswith('TOTAL,'), rows[-1])
+
+            # The summary goes to stderr when writing the results to stdout.
+            stdout = StringIO()
+            stderr = StringIO()
+            with mock.patch(
+                    'sys.argv',
+                    ['hocr-eval', '--corpus', '-j', '1', '--stats', '--json', '-', str(directory / 'truth'), str(directory / 'actual')]
+            ):
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr), \
+                        self.assertLogs(hocr_eval.logger, level='WARNING'):
+                    hocr_eval.main()
+            self.assertEqual(3, json.loads(stdout.getvalue())['total']['pages'])
+            self.assertIn('pages 3\nfailed 0\n', stderr.getvalue())
+            self.assertRegex(stderr.getvalue(), r'\ncer 0\.\d+\n')
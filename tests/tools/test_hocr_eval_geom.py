@@ -3,9 +3,12 @@ from __future__ import annotations
 import contextlib
 import subprocess
 from io import StringIO
+from tempfile import TemporaryDirectory
 from unittest import mock
 
-from hocr_tools_lib.tools import hocr_eval_geom
+from hocr_tools_lib.tools import hocr_eval_geom, hocr_sidecar
+from hocr_tools_lib.utils.cache_utils import ResultCache
+from hocr_tools_lib.utils.rectangle_utils import RectangleType
 from tests import TestCase
 
 
@@ -29,6 +32,121 @@ class HocrEvalGeomTestCase(TestCase):
             stdout=subprocess.PIPE, stderr=subprocess.PIPE,
         )
 
+    def test_cache(self) -> None:
+        tess_hocr = self.get_data_file('tess.hocr')
+        sample_html = self.get_data_file('sample.html')
+        expected = list(hocr_eval_geom.evaluate_geometries(tess_hocr, sample_html))
+
+        with TemporaryDirectory() as directory:
+            cache = ResultCache(directory)
+            self.assertEqual(expected, list(hocr_eval_geom.evaluate_geometries(tess_hocr, sample_html, cache=cache)))
+            with mock.patch.object(hocr_eval_geom, 'parse_html', side_effect=AssertionError) as parse_mock:
+                self.assertEqual(expected, list(hocr_eval_geom.evaluate_geometries(tess_hocr, sample_html, cache=cache)))
+            parse_mock.assert_not_called()
+
+            stdout = subprocess.check_output(
+                ['hocr-eval-geom', '--cache-dir', directory, tess_hocr, sample_html],
+                stderr=subprocess.PIPE
+            )
+            self.assertEqual(
+                ''.join(f'{truth.to_tuple()} {actual.to_tuple()}\n' for truth, actual in expected),
+                stdout.decode('UTF-8')
+            )
+
+    def test_sidecar(self) -> None:
+        tess_hocr = self.get_data_file('tess.hocr')
+        sample_html = self.get_data_file('sample.html')
+        expected = list(hocr_eval_geom.evaluate_geometries(tess_hocr, sample_html))
+
+        with TemporaryDirectory() as directory:
+            tess_sidecar = hocr_sidecar.create_sidecar(tess_hocr, f'{directory}/tess.hocrx')
+            sample_sidecar = hocr_sidecar.create_sidecar(sample_html, f'{directory}/sample.hocrx')
+            self.assertEqual(expected, list(hocr_eval_geom.evaluate_geometries(tess_sidecar, sample_html)))
+            with mock.patch.object(hocr_eval_geom, 'parse_html', side_effect=AssertionError):
+                self.assertEqual(expected, list(hocr_eval_geom.evaluate_geometries(tess_sidecar, sample_sidecar)))
+
+            stdout = subprocess.check_output(
+                ['hocr-eval-geom', '--cache-dir', directory, tess_sidecar, sample_sidecar],
+                stderr=subprocess.PIPE
+            )
+            self.assertEqual(
+                ''.join(f'{truth.to_tuple()} {actual.to_tuple()}\n' for truth, actual in expected),
+                stdout.decode('UTF-8')
+            )
+
+    def test_fast(self) -> None:
+        tess_hocr = self.get_data_file('tess.hocr')
+        sample_html = self.get_data_file('sample.html')
+        expected = list(hocr_eval_geom.evaluate_geometries(tess_hocr, sample_html))
+
+        with mock.patch.object(hocr_eval_geom, 'parse_html', side_effect=AssertionError):
+            self.assertEqual(expected, list(hocr_eval_geom.evaluate_geometries(tess_hocr, sample_html, fast=True)))
+        stdout = subprocess.check_output(['hocr-eval-geom', '--fast', tess_hocr, sample_html], stderr=subprocess.PIPE)
+        self.assertEqual(
+            ''.join(f'{truth.to_tuple()} {actual.to_tuple()}\n' for truth, actual in expected),
+            stdout.decode('UTF-8')
+        )
+
+    def test_boxstats_multiple_close_matches(self) -> None:
+        stats = hocr_eval_geom.boxstats([(0, 0, 100, 10)], [(0, 0, 100, 10), (1, 0, 100, 10)])
+        self.assertEqual((1, 0, 0.0, 1), stats.to_tuple())
+
+    def test_parse_thresholds(self) -> None:
+        self.assertEqual(list(hocr_eval_geom.DEFAULT_THRESHOLDS), hocr_eval_geom.parse_thresholds('0.5:0.95:0.05'))
+        self.assertEqual([0.5, 0.75], hocr_eval_geom.parse_thresholds('0.5,0.75'))
+        self.assertEqual([0.3], hocr_eval_geom.parse_thresholds('0.3:0.3:0.1'))
+        with self.assertRaises(ValueError):
+            hocr_eval_geom.parse_thresholds('0.5:0.9:0')
+
+    def test_match_page(self) -> None:
+        truths: list[RectangleType | None] = [(0, 0, 100, 10), (0, 20, 100, 30), (0, 40, 100, 50), None]
+        # Shifted by 10 %, split into two halves and missing.
+        actuals: list[RectangleType | None] = [(10, 0, 110, 10), (0, 20, 50, 30), (50, 20, 100, 30)]
+        iou = 90 / 110
+        result = hocr_eval_geom.match_page(truths, actuals, [0.45, 0.5, 0.9])
+        self.assertEqual(
+            [(0.45, 2, 4, 3, iou + 0.5), (0.5, 2, 4, 3, iou + 0.5), (0.9, 0, 4, 3, 0.0)],
+            [stats.to_tuple() for stats in result]
+        )
+        self.assertAlmostEqual(2 / 3, result[0].precision)
+        self.assertAlmostEqual(0.5, result[0].recall)
+        self.assertAlmostEqual(4 / 7, result[0].f1)
+        self.assertAlmostEqual((iou + 0.5) / 2, result[0].mean_iou)
+        self.assertEqual(0.0, result[2].f1)
+        self.assertEqual([], hocr_eval_geom.match_page(truths, actuals, []))
+
+    def test_evaluate_matches(self) -> None:
+        tess_hocr = self.get_data_file('tess.hocr')
+        sample_html = self.get_data_file('sample.html')
+        expected = hocr_eval_geom.evaluate_matches(sample_html, sample_html)
+        self.assertEqual(list(hocr_eval_geom.DEFAULT_THRESHOLDS), [stats.threshold for stats in expected])
+        self.assertTrue(all(stats.f1 == 1.0 and stats.mean_iou == 1.0 for stats in expected))
+
+        expected = hocr_eval_geom.evaluate_matches(sample_html, tess_hocr, thresholds=[0.5, 0.99])
+        self.assertLess(0, expected[0].matches)
+        self.assertEqual(0, expected[1].matches)
+        with mock.patch.object(hocr_eval_geom, 'parse_html', side_effect=AssertionError):
+            self.assertEqual(expected, hocr_eval_geom.evaluate_matches(sample_html, tess_hocr, thresholds=[0.5, 0.99], fast=True))
+        with TemporaryDirectory() as directory:
+            cache = ResultCache(directory)
+            self.assertEqual(expected, hocr_eval_geom.evaluate_matches(sample_html, tess_hocr, thresholds=[0.5, 0.99], cache=cache))
+            with mock.patch.object(hocr_eval_geom, 'parse_html', side_effect=AssertionError):
+                self.assertEqual(
+                    expected, hocr_eval_geom.evaluate_matches(sample_html, tess_hocr, thresholds=[0.5, 0.99], cache=cache)
+                )
+
+        stdout = StringIO()
+        with mock.patch('sys.argv', ['hocr-eval-geom', '-t', '0.5,0.99', sample_html, tess_hocr]):
+            with contextlib.redirect_stdout(stdout):
+                hocr_eval_geom.main()
+        self.assertEqual(
+            [
+                f'0.5 {expected[0].precision:.4f} {expected[0].recall:.4f} {expected[0].f1:.4f} {expected[0].mean_iou:.4f}',
+                '0.99 0.0000 0.0000 0.0000 0.0000',
+            ],
+            stdout.getvalue().splitlines()
+        )
+
     def test_main(self) -> None:
         tess_hocr = self.get_data_file('tess.hocr')
         sample_html = self.get_data_file('sample.html')
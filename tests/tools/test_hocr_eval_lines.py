@@ -3,9 +3,12 @@ from __future__ import annotations
 import contextlib
 import subprocess
 from io import StringIO
+from tempfile import TemporaryDirectory
 from unittest import mock
 
 from hocr_tools_lib.tools import hocr_eval_lines
+from hocr_tools_lib.utils.cache_utils import ResultCache
+from hocr_tools_lib.utils.edit_utils import ErrorStats
 from tests import TestCase
 
 
@@ -30,6 +33,100 @@ class HocrEvalLinesTestCase(TestCase):
             with contextlib.redirect_stdout(stdout):
                 hocr_eval_lines.main()
 
+    def test_cache(self) -> None:
+        tess_hocr = self.get_data_file('tess.hocr')
+        sample_txt = self.get_data_file('sample.txt')
+
+        with TemporaryDirectory() as directory:
+            cache = ResultCache(directory)
+            with open(sample_txt) as tfile:
+                self.assertEqual((0, 7), hocr_eval_lines.evaluate_lines(tfile, tess_hocr, cache=cache))
+            with open(sample_txt) as tfile, mock.patch.object(hocr_eval_lines, 'parse_html', side_effect=AssertionError) as parse_mock:
+                self.assertEqual((0, 7), hocr_eval_lines.evaluate_lines(tfile, tess_hocr, cache=cache))
+            parse_mock.assert_not_called()
+
+    def test_stats(self) -> None:
+        tess_hocr = self.get_data_file('tess.hocr')
+        sample_txt = self.get_data_file('sample.txt')
+
+        stats = ErrorStats()
+        with open(sample_txt) as tfile:
+            self.assertEqual((0, 7), hocr_eval_lines.evaluate_lines(tfile, tess_hocr, stats=stats))
+        self.assertEqual(7, stats.character_errors)
+        self.assertLess(0, stats.words)
+
+        with TemporaryDirectory() as directory:
+            cache = ResultCache(directory)
+            for _ in range(2):
+                cached_stats = ErrorStats()
+                with open(sample_txt) as tfile:
+                    hocr_eval_lines.evaluate_lines(tfile, tess_hocr, cache=cache, stats=cached_stats)
+                self.assertEqual(stats, cached_stats)
+
+        stdout = StringIO()
+        with mock.patch('sys.argv', ['hocr-eval-lines', '--stats', '--confusions', '1', sample_txt, tess_hocr]):
+            with contextlib.redirect_stdout(stdout):
+                hocr_eval_lines.main()
+        self.assertIn('\ncharacter_errors 7\n', stdout.getvalue())
+        self.assertEqual(1, stdout.getvalue().count('\nconfusion '))
+
+    def test_get_word_ids(self) -> None:
+        ids: dict[str, int] = {'b': 0}
+        lines = hocr_eval_lines.get_word_ids(['a b', '', 'b  c a'], ids)
+        self.assertEqual([[1, 0], [], [0, 2, 1]], [list(line) for line in lines])
+        self.assertEqual({'a': 1, 'b': 0, 'c': 2}, ids)
+
+    def test_words(self) -> None:
+        tess_hocr = self.get_data_file('tess.hocr')
+        sample_txt = self.get_data_file('sample.txt')
+
+        line_results: list[hocr_eval_lines.LineResult] = []
+        with open(sample_txt) as tfile:
+            result = hocr_eval_lines.evaluate_lines(tfile, tess_hocr, words=True, line_results=line_results)
+        self.assertEqual((0, 4), result)
+        self.assertEqual(4, sum(line.errors for line in line_results))
+        self.assertEqual(
+            hocr_eval_lines.LineResult(
+                'the use of a book, thought Alice without pictures or conversation?',
+                'the use of a book, thought Alice Without pictures or conversation?',
+                1, 11
+            ),
+            line_results[4]
+        )
+
+        with TemporaryDirectory() as directory:
+            cache = ResultCache(directory)
+            for _ in range(2):
+                cached_results: list[hocr_eval_lines.LineResult] = []
+                with open(sample_txt) as tfile:
+                    self.assertEqual(
+                        result,
+                        hocr_eval_lines.evaluate_lines(
+                            tfile, tess_hocr, cache=cache, words=True, line_results=cached_results
+                        )
+                    )
+                self.assertEqual(line_results, cached_results)
+            # Character errors are cached separately.
+            with open(sample_txt) as tfile:
+                self.assertEqual((0, 7), hocr_eval_lines.evaluate_lines(tfile, tess_hocr, cache=cache))
+
+    def test_unmatched_lines(self) -> None:
+        line_results: list[hocr_eval_lines.LineResult] = []
+        result = hocr_eval_lines.evaluate_lines(
+            StringIO('a b c\nd e\n\nf\n'),
+            b'<html><body><span class="ocr_line">a b x</span><span class="ocr_line">f</span></body></html>',
+            words=True, line_results=line_results
+        )
+        self.assertEqual((2, 1), result)
+        self.assertEqual(
+            [
+                hocr_eval_lines.LineResult('a b c', 'a b x', 1, 3),
+                hocr_eval_lines.LineResult('f', 'f', 0, 1),
+                hocr_eval_lines.LineResult('d e', '', 2, 2),
+            ],
+            line_results
+        )
+
     def test_output(self) -> None:
         tess_hocr = self.get_data_file('tess.hocr')
         sample_txt = self.get_data_file('sample.txt')
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import subprocess
+from pathlib import Path
 from tempfile import TemporaryDirectory
 from unittest import mock
 
 from hocr_tools_lib.tools import hocr_extract_images
+from hocr_tools_lib.utils.typing_utils import BufferType
 from tests import chdir, TestCase
 
 
@@ -73,6 +75,24 @@ class HocrExtractImagesTestCase(TestCase):
                     extra_args='', stdin=stdin,
                 )
 
+    def test_buffers(self) -> None:
+        content = self.get_data_content('tess.hocr')
+        cases: list[tuple[BufferType, bool]] = [
+            (content, False), (memoryview(content), False), (content, True), (memoryview(content), True),
+        ]
+        for source, unicode_dammit in cases:
+            with self.subTest(source=type(source).__name__, unicode_dammit=unicode_dammit):
+                with TemporaryDirectory() as directory:
+                    self.get_data_file_copy('alice_1.png', directory)
+                    with chdir(directory):
+                        hocr_extract_images.extract_images(
+                            hocr=source, basename=directory, unicode_dammit=unicode_dammit
+                        )
+                    self.assertEqual(37, len(list(Path(directory).glob('line-*.png'))))
+                    self.assertEqual(
+                        '1 Down the Rabbit-Hole', (Path(directory) / 'line-001.txt').read_text().strip()
+                    )
+
     def test_main(self) -> None:
         with TemporaryDirectory() as directory:
             tess_hocr = self.get_data_file_copy('tess.hocr', directory)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import contextlib
+import subprocess
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from PIL import Image
+
+from hocr_tools_lib.tools import hocr_check, hocr_eval_lines, hocr_generate, hocr_lines
+from tests import TestCase
+
+
+class HocrGenerateTestCase(TestCase):
+    def test_deterministic(self) -> None:
+        configuration = hocr_generate.Configuration(pages=3, unicode_ratio=0.2, rtl_ratio=0.2, seed=42)
+        first = list(hocr_generate.generate_pages(configuration))
+        second = list(hocr_generate.generate_pages(configuration))
+        self.assertEqual(first, second)
+
+        configuration.seed = 43
+        third = list(hocr_generate.generate_pages(configuration))
+        self.assertNotEqual(first, third)
+
+    def test_generate(self) -> None:
+        configuration = hocr_generate.Configuration(pages=2, paragraphs=3, lines=4, words=5, width=1000, height=1400)
+        with TemporaryDirectory() as directory:
+            files = hocr_generate.generate(directory, configuration)
+
+            self.assertEqual(
+                ['page-0001.hocr', 'page-0002.hocr'], [path.name for path in files.truth]
+            )
+            self.assertEqual(
+                ['actual/page-0001.hocr', 'actual/page-0002.hocr'],
+                [path.relative_to(directory).as_posix() for path in files.actual]
+            )
+            self.assertEqual(
+                ['truth/page-0001.txt', 'truth/page-0002.txt'],
+                [path.relative_to(directory).as_posix() for path in files.text]
+            )
+            for image_path in files.images:
+                with Image.open(image_path) as image:
+                    self.assertEqual((1000, 1400), image.size)
+                    self.assertEqual('JPEG', image.format)
+                    self.assertEqual((300, 300), tuple(round(value) for value in image.info['dpi']))
+
+            for path in files.truth + files.actual:
+                with self.subTest(path=path):
+                    stderr = StringIO()
+                    with contextlib.redirect_stderr(stderr):
+                        hocr_check.Checker(hocr_file=path).check()
+                    self.assertNotIn('not ok', stderr.getvalue())
+                    lines = list(hocr_lines.lines(path))
+                    self.assertEqual(12, len(lines))
+                    self.assertEqual([5] * 12, [len(line.split(' ')) for line in lines])
+
+            truth_lines = list(hocr_lines.lines(files.truth[0]))
+            self.assertEqual('\n'.join(truth_lines) + '\n', files.text[0].read_text(encoding='utf-8'))
+
+    def test_single_file(self) -> None:
+        configuration = hocr_generate.Configuration(pages=3, images=False)
+        with TemporaryDirectory() as directory:
+            files = hocr_generate.generate(directory, configuration, single_file=True)
+            self.assertEqual(['book.hocr'], [path.name for path in files.truth])
+            self.assertEqual([], files.images)
+            self.assertEqual([], list(Path(directory, 'truth').glob('*.jpg')))
+            content = files.truth[0].read_text(encoding='utf-8')
+            self.assertEqual(3, content.count("class='ocr_page'"))
+            self.assertEqual(1, content.count('<body>'))
+
+    def test_error_rate(self) -> None:
+        for error_rate in [0.0, 0.02, 0.1]:
+            with self.subTest(error_rate=error_rate):
+                configuration = hocr_generate.Configuration(pages=4, error_rate=error_rate, images=False)
+                with TemporaryDirectory() as directory:
+                    files = hocr_generate.generate(directory, configuration, single_file=True)
+                    characters = sum(len(line) - line.count(' ') for line in files.text[0].read_text().splitlines())
+                    with open(files.text[0]) as tfile:
+                        _, ocr_errors = hocr_eval_lines.evaluate_lines(tfile, files.actual[0])
+                # The edit distance may be lower than the number of injected errors.
+                self.assertLessEqual(ocr_errors, error_rate * characters * 1.3)
+                self.assertGreaterEqual(ocr_errors, error_rate * characters * 0.6)
+
+    def test_properties(self) -> None:
+        configuration = hocr_generate.Configuration(unicode_ratio=0.3, rtl_ratio=0.3, baseline=False, x_wconf=False)
+        truth, actual, _ = next(hocr_generate.generate_pages(configuration))
+        self.assertNotIn('baseline', truth)
+        self.assertNotIn('x_wconf', truth)
+        self.assertIn("dir='rtl'", truth)
+        self.assertRegex(truth, '[À-ɏ]')
+
+        configuration = hocr_generate.Configuration()
+        truth, actual, _ = next(hocr_generate.generate_pages(configuration))
+        self.assertIn('; baseline 0.001 -', truth)
+        self.assertIn('; x_wconf ', truth)
+        self.assertNotIn("dir='rtl'", truth)
+
+    def test_overlap_rate(self) -> None:
+        configuration = hocr_generate.Configuration(overlap_rate=0.5)
+        with TemporaryDirectory() as directory:
+            files = hocr_generate.generate(directory, configuration)
+            stderr = StringIO()
+            with contextlib.redirect_stderr(stderr):
+                hocr_check.Checker(hocr_file=files.truth[0]).check()
+            self.assertIn('not ok', stderr.getvalue())
+
+    def test_subprocess(self) -> None:
+        with TemporaryDirectory() as directory:
+            subprocess.check_call(
+                ['hocr-generate', '--pages', '2', '--columns', '2', '--no-images', '--seed', '3', directory],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            )
+            self.assertEqual(2, len(list(Path(directory, 'actual').glob('*.hocr'))))
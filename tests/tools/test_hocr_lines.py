@@ -3,9 +3,10 @@ from __future__ import annotations
 import contextlib
 from io import StringIO
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest import mock
 
-from hocr_tools_lib.tools import hocr_lines
+from hocr_tools_lib.tools import hocr_lines, hocr_sidecar
 from tests import TestCase
 
 
@@ -20,6 +21,14 @@ class HocrLinesTestCase(TestCase):
             lines[0]
         )
 
+    def test_sidecar(self) -> None:
+        filename = self.get_data_file('tess.hocr')
+        expected = list(hocr_lines.lines(filename))
+        with TemporaryDirectory() as directory:
+            sidecar = hocr_sidecar.create_sidecar(filename, f'{directory}/tess.hocrx')
+            with mock.patch.object(hocr_lines, 'parse_html', side_effect=AssertionError):
+                self.assertEqual(expected, list(hocr_lines.lines(sidecar)))
+
     def test_main(self) -> None:
         filename = self.get_data_file('tess.hocr')
         stdout = StringIO()
@@ -1,15 +1,27 @@
 from __future__ import annotations
 
+import base64
 import contextlib
+import copy
+import re
 import shutil
 import subprocess
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from typing import Any, cast, Generator
 from unittest import mock
 
 import requests
+from lxml import etree, html
+from PIL import Image, ImageStat
+from pypdf import PdfReader
+from pypdf.generic import DictionaryObject
 from hocr_tools_lib.tools import hocr_pdf
+from hocr_tools_lib.utils.cache_utils import ResultCache
+from hocr_tools_lib.utils.image_utils import ImageOptions
 from tests import TestCase
 
 
@@ -71,3 +83,337 @@ class HocrPdfTestCase(TestCase):
             with mock.patch('sys.argv', ['hocr-pdf', str(directory)]):
                 with contextlib.redirect_stdout(stdout):
                     hocr_pdf.main()
+
+    def _create_files(self, directory: Path) -> None:
+        with Image.open(self.get_data_file('alice_1.png')) as image:
+            image.convert('RGB').save(directory / 'alice_1.jpg')
+        (directory / 'alice_1.hocr').write_bytes(self.get_data_content('tess.hocr'))
+
+    def _get_content_streams(self, pdf_path: Path) -> bytes:
+        content = pdf_path.read_bytes()
+        streams = []
+        pattern = rb'/Filter \[ /ASCII85Decode /FlateDecode \] /Length \d+\s*>>\s*stream\r?\n(.*?)endstream'
+        for match in re.finditer(pattern, content, re.DOTALL):
+            streams.append(zlib.decompress(base64.a85decode(match.group(1).strip(), adobe=True)))
+        return b''.join(streams)
+
+    def test_text_objects(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            self._create_files(directory)
+
+            streams = {}
+            for mode in hocr_pdf.TEXT_OBJECT_MODES:
+                pdf_path = directory / f'{mode}.pdf'
+                hocr_pdf.export_pdf(directory=str(directory), savefile=str(pdf_path), text_objects=mode)
+                streams[mode] = self._get_content_streams(pdf_path)
+
+            with self.assertRaises(ValueError):
+                hocr_pdf.export_pdf(directory=str(directory), savefile=str(directory / 'x.pdf'), text_objects='page')
+
+        words = re.findall(rb'\((.*?)\) Tj', streams['word'])
+        self.assertLess(100, len(words))
+        self.assertEqual(words, re.findall(rb'\((.*?)\) Tj', streams['line']))
+
+        # Each text object sets the invisible render mode once.
+        self.assertEqual(len(words), streams['word'].count(b' 3 Tr '))
+        self.assertEqual(37, streams['line'].count(b' 3 Tr '))
+        self.assertEqual(37, streams['line'].count(b' 8 Tf '))
+        self.assertEqual(len(words) - 37, streams['line'].count(b' Td '))
+        self.assertLess(len(streams['line']) * 1.5, len(streams['word']))
+
+    def test_text_only(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            (directory / 'alice_1.hocr').write_bytes(self.get_data_content('tess.hocr'))
+            (directory / 'alice_2.hocr').write_bytes(self.get_data_content('tess.hocr'))
+
+            pdf_path = directory / 'text.pdf'
+            with mock.patch('sys.argv', ['hocr-pdf', '--text-only', '--dpi', '200', '--savefile', str(pdf_path), str(directory)]):
+                hocr_pdf.main()
+
+            reader = PdfReader(pdf_path)
+            self.assertEqual(2, len(reader.pages))
+            for page in reader.pages:
+                self.assertEqual([0, 0, 2488 * 72 / 200, 3507 * 72 / 200], [float(value) for value in page.mediabox])
+                self.assertNotIn('/XObject', cast(DictionaryObject, page['/Resources']))
+                self.assertIn('Rabbit-Hole', page.extract_text())
+            self.assertLess(pdf_path.stat().st_size, 50_000)
+
+    def test_merge_onto(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            (directory / 'alice_1.hocr').write_bytes(self.get_data_content('tess.hocr'))
+            base_path = directory / 'scan.pdf'
+            with Image.open(self.get_data_file('alice_1.png')) as image:
+                image.convert('L').save(base_path, resolution=150)
+
+            pdf_path = directory / 'merged.pdf'
+            hocr_pdf.export_pdf(directory=str(directory), savefile=str(pdf_path), merge_onto=str(base_path))
+
+            reader = PdfReader(pdf_path)
+            self.assertEqual(1, len(reader.pages))
+            page = reader.pages[0]
+            self.assertEqual(list(PdfReader(base_path).pages[0].mediabox), list(page.mediabox))
+            self.assertIn('/XObject', cast(DictionaryObject, page['/Resources']))
+            text = page.extract_text()
+            self.assertIn('Rabbit-Hole', text)
+
+            (directory / 'alice_2.hocr').write_bytes(self.get_data_content('tess.hocr'))
+            with self.assertRaises(ValueError):
+                hocr_pdf.export_pdf(directory=str(directory), savefile=str(pdf_path), merge_onto=str(base_path))
+
+            with self.assertRaises(FileNotFoundError):
+                hocr_pdf.export_pdf(directory=str(directory / 'missing'), text_only=True)
+
+    def test_recompress(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            self._create_files(directory)
+            original_path = directory / 'original.pdf'
+            hocr_pdf.export_pdf(directory=str(directory), savefile=str(original_path))
+
+            pdf_path = directory / 'recompressed.pdf'
+            with mock.patch(
+                    'sys.argv',
+                    ['hocr-pdf', '--target-dpi', '150', '--image-workers', '2', '--savefile', str(pdf_path), str(directory)]
+            ):
+                hocr_pdf.main()
+
+            original_page = PdfReader(original_path).pages[0]
+            page = PdfReader(pdf_path).pages[0]
+            self.assertEqual(list(original_page.mediabox), list(page.mediabox))
+            self.assertEqual(original_page.extract_text(), page.extract_text())
+            image = page.images[0].image
+            assert image is not None
+            self.assertEqual(((1244, 1754), '1'), (image.size, image.mode))
+            # Mostly white paper.
+            self.assertGreater(ImageStat.Stat(image.convert('L')).mean[0], 200)
+            self.assertLess(pdf_path.stat().st_size, original_path.stat().st_size / 10)
+
+            options = ImageOptions(detect_kind=False, jpeg_quality=50)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                hocr_pdf.write_pdf(
+                    pages=[(str(directory / 'alice_1.jpg'), None)] * 3, savefile=str(pdf_path),
+                    image_options=options, image_executor=executor
+                )
+            reader = PdfReader(pdf_path)
+            self.assertEqual(3, len(reader.pages))
+            for page in reader.pages:
+                image = page.images[0].image
+                assert image is not None
+                self.assertEqual(((2488, 3507), 'RGB'), (image.size, image.mode))
+
+    def _create_multi_page_file(self, directory: Path) -> Path:
+        document = etree.parse(self.get_data_file('tess.hocr'))
+        first_page = document.xpath('//*[@class="ocr_page"]')[0]
+        second_page = copy.deepcopy(first_page)
+        first_page.set('title', first_page.get('title').replace('alice_1.png', 'page-1.png'))
+        second_page.set('title', second_page.get('title').replace('alice_1.png', 'page-2.tif').replace('ppageno 0', 'ppageno 1'))
+        second_page.set('id', 'page_2')
+        first_page.addnext(second_page)
+        hocr_path = directory / 'book.hocr'
+        document.write(str(hocr_path), xml_declaration=True, encoding='UTF-8')
+
+        with Image.open(self.get_data_file('alice_1.png')) as image:
+            image.save(directory / 'page-1.png', dpi=(300, 300))
+            image.convert('1').save(directory / 'page-2.tif', compression='group4', dpi=(200, 200))
+        return hocr_path
+
+    def test_multi_page(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            hocr_path = self._create_multi_page_file(directory)
+
+            pdf_path = directory / 'book.pdf'
+            with mock.patch('sys.argv', ['hocr-pdf', '--savefile', str(pdf_path), str(hocr_path)]):
+                hocr_pdf.main()
+            reader = PdfReader(pdf_path)
+            self.assertEqual('book', reader.metadata.title if reader.metadata else None)
+            self.assertEqual(
+                [597.1, 895.7], [round(float(page.mediabox.width), 1) for page in reader.pages]
+            )
+            for page in reader.pages:
+                self.assertIn('Rabbit-Hole', page.extract_text())
+
+            # The manifest lists the images by the physical page number.
+            (directory / 'manifest.txt').write_text('# Scans\npage-2.tif\n\npage-1.png\n')
+            with mock.patch(
+                    'sys.argv',
+                    ['hocr-pdf', '--manifest', str(directory / 'manifest.txt'), '--savefile', str(pdf_path), str(hocr_path)]
+            ):
+                hocr_pdf.main()
+            self.assertEqual(
+                [895.7, 597.1], [round(float(page.mediabox.width), 1) for page in PdfReader(pdf_path).pages]
+            )
+
+            with self.assertRaises(hocr_pdf.NoImagesFoundError):
+                hocr_pdf.export_hocr_pdf(hocr_path.read_bytes(), savefile=str(pdf_path), images=[str(directory / 'page-1.png')])
+
+            # Images of other formats are found within directories as well.
+            (directory / 'page-1.hocr').write_bytes(self.get_data_content('tess.hocr'))
+            (directory / 'page-2.hocr').write_bytes(self.get_data_content('tess.hocr'))
+            hocr_pdf.export_pdf(str(directory), savefile=str(pdf_path))
+            self.assertEqual(2, len(PdfReader(pdf_path).pages))
+
+    def test_mixed_dpi(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            hocr = etree.parse(self.get_data_file('tess.hocr'), html.XHTMLParser())
+            with Image.open(self.get_data_file('alice_1.png')) as image:
+                image.save(directory / 'page-1.png', dpi=(200, 200))
+                image.save(directory / 'page-2.png')
+            pages = [(str(directory / 'page-1.png'), hocr), (str(directory / 'page-2.png'), hocr)]
+            pdf_path = directory / 'book.pdf'
+
+            def get_widths() -> list[float]:
+                return [round(float(page.mediabox.width), 1) for page in PdfReader(pdf_path).pages]
+
+            # The page without a resolution uses the default one instead of the
+            # resolution of the previous page.
+            hocr_pdf.write_pdf(pages=pages, savefile=str(pdf_path), default_dpi=300)
+            self.assertEqual([895.7, 597.1], get_widths())
+            hocr_pdf.write_pdf(pages=pages, savefile=str(pdf_path), default_dpi=300, cache=ResultCache(directory / 'cache'))
+            self.assertEqual([895.7, 597.1], get_widths())
+            hocr_pdf.write_pdf(pages=pages, savefile=str(pdf_path), default_dpi=300, chunk_size=1)
+            self.assertEqual([895.7, 597.1], get_widths())
+
+    def test_chunked(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            hocr = etree.parse(self.get_data_file('tess.hocr'), html.XHTMLParser())
+            pages = [(None, hocr)] * 5
+            pdf_path = directory / 'book.pdf'
+            work_directory = directory / 'work'
+
+            def interrupted_pages() -> Generator[tuple[None, Any], None, None]:
+                yield from pages[:3]
+                raise KeyboardInterrupt()
+
+            with self.assertRaises(KeyboardInterrupt):
+                hocr_pdf.write_pdf(
+                    pages=interrupted_pages(), savefile=str(pdf_path), chunk_size=2, work_directory=str(work_directory)
+                )
+            self.assertFalse(pdf_path.exists())
+            self.assertEqual(['checkpoint.json', 'chunk-00000.pdf'], sorted(path.name for path in work_directory.iterdir()))
+            first_chunk = (work_directory / 'chunk-00000.pdf').read_bytes()
+
+            # Only the remaining chunks are rendered when running again.
+            with mock.patch.object(hocr_pdf, 'write_pdf', wraps=hocr_pdf.write_pdf) as write_pdf:
+                hocr_pdf.write_chunked_pdf(
+                    pages=pages, savefile=str(pdf_path), chunk_size=2, work_directory=str(work_directory),
+                    title='book', keep_chunks=True
+                )
+            self.assertEqual(2, write_pdf.call_count)
+            self.assertEqual(first_chunk, (work_directory / 'chunk-00000.pdf').read_bytes())
+            reader = PdfReader(pdf_path)
+            self.assertEqual(5, len(reader.pages))
+            self.assertEqual('book', reader.metadata.title if reader.metadata else None)
+            for page in reader.pages:
+                self.assertIn('Rabbit-Hole', page.extract_text())
+
+            # Other settings invalidate all chunks.
+            with mock.patch.object(hocr_pdf, 'write_pdf', wraps=hocr_pdf.write_pdf) as write_pdf:
+                hocr_pdf.write_chunked_pdf(
+                    pages=pages, savefile=str(pdf_path), chunk_size=2, work_directory=str(work_directory),
+                    text_objects='line'
+                )
+            self.assertEqual(3, write_pdf.call_count)
+            self.assertEqual(5, len(PdfReader(pdf_path).pages))
+            self.assertFalse(work_directory.exists())
+
+            with self.assertRaises(ValueError):
+                hocr_pdf.write_pdf(pages=pages, chunk_size=2)
+
+            stderr = StringIO()
+            with mock.patch(
+                    'sys.argv',
+                    [
+                        'hocr-pdf', '--chunk-size', '2', '--merge-onto', str(pdf_path), '--savefile', str(pdf_path),
+                        self.get_data_file('tess.hocr')
+                    ]
+            ), contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit):
+                hocr_pdf.main()
+            self.assertIn('--chunk-size cannot be combined with --merge-onto', stderr.getvalue())
+
+    def test_chunked_changed_pages(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            for index in range(3):
+                content = self.get_data_content('tess.hocr').replace(b'Rabbit-Hole', f'Rabbit-Hole-{index}'.encode())
+                (directory / f'page-{index}.hocr').write_bytes(content)
+            pdf_path = directory / 'book.pdf'
+            work_directory = directory / 'work'
+
+            def export(**kwargs: Any) -> list[str]:
+                pages = [(None, html.parse(str(directory / f'page-{index}.hocr'))) for index in range(3)]
+                hocr_pdf.write_chunked_pdf(
+                    pages=pages, savefile=str(pdf_path), chunk_size=2, work_directory=str(work_directory),
+                    keep_chunks=True, **kwargs
+                )
+                return [
+                    re.search(r'Rabbit-\S+', page.extract_text()).group(0)  # type: ignore[union-attr]
+                    for page in PdfReader(pdf_path).pages
+                ]
+
+            self.assertEqual(['Rabbit-Hole-0', 'Rabbit-Hole-1', 'Rabbit-Hole-2'], export())
+
+            # Pages without images are recognized by their content.
+            content = (directory / 'page-1.hocr').read_bytes().replace(b'Rabbit-Hole-1', b'Rabbit-Warren')
+            (directory / 'page-1.hocr').write_bytes(content)
+            with mock.patch.object(hocr_pdf, 'write_pdf', wraps=hocr_pdf.write_pdf) as write_pdf:
+                self.assertEqual(['Rabbit-Hole-0', 'Rabbit-Warren', 'Rabbit-Hole-2'], export())
+            self.assertEqual(1, write_pdf.call_count)
+
+            # Other settings render all chunks again, while the title is only
+            # set when concatenating them.
+            with mock.patch.object(hocr_pdf, 'write_pdf', wraps=hocr_pdf.write_pdf) as write_pdf:
+                export(text_objects='line')
+            self.assertEqual(2, write_pdf.call_count)
+            with mock.patch.object(hocr_pdf, 'write_pdf', wraps=hocr_pdf.write_pdf) as write_pdf:
+                export(text_objects='line', title='book')
+            self.assertEqual(0, write_pdf.call_count)
+            reader = PdfReader(pdf_path)
+            self.assertEqual('book', reader.metadata.title if reader.metadata else None)
+
+    def test_cache(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            for index in range(3):
+                content = self.get_data_content('tess.hocr').replace(b'Rabbit-Hole', f'Rabbit-Hole-{index}'.encode())
+                (directory / f'page-{index}.hocr').write_bytes(content)
+            cache = ResultCache(directory / 'cache')
+            pdf_path = directory / 'book.pdf'
+
+            def export() -> int:
+                with mock.patch.object(hocr_pdf, 'write_pdf', wraps=hocr_pdf.write_pdf) as write_pdf:
+                    hocr_pdf.export_pdf(str(directory), savefile=str(pdf_path), text_only=True, cache=cache)
+                # Without the call of `export_pdf` itself.
+                return write_pdf.call_count - 1
+
+            self.assertEqual(3, export())
+            self.assertEqual(0, export())
+
+            # Only the changed page is rendered again.
+            content = (directory / 'page-1.hocr').read_bytes().replace(b'Rabbit-Hole-1', b'Rabbit-Warren')
+            (directory / 'page-1.hocr').write_bytes(content)
+            self.assertEqual(1, export())
+            reader = PdfReader(pdf_path)
+            self.assertEqual(directory.name, reader.metadata.title if reader.metadata else None)
+            self.assertEqual(
+                ['Rabbit-Hole-0', 'Rabbit-Warren', 'Rabbit-Hole-2'],
+                [re.search(r'Rabbit-\S+', page.extract_text()).group(0) for page in reader.pages]  # type: ignore[union-attr]
+            )
+
+            # Other settings do not reuse the cached pages.
+            with mock.patch.object(hocr_pdf, 'write_pdf', wraps=hocr_pdf.write_pdf) as write_pdf:
+                hocr_pdf.export_pdf(
+                    str(directory), savefile=str(pdf_path), text_only=True, text_objects='line', cache=cache
+                )
+            self.assertEqual(4, write_pdf.call_count)
+
+            # A cache too small for the book evicts its first pages during the run.
+            small_cache = ResultCache(directory / 'small-cache', max_size=1)
+            with self.assertLogs(hocr_pdf.logger, level='WARNING') as logs:
+                hocr_pdf.export_pdf(str(directory), savefile=str(pdf_path), text_only=True, cache=small_cache)
+            self.assertIn('more than the cache size', logs.output[0])
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import mmap
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from hocr_tools_lib.tools import hocr_eval_geom, hocr_lines, hocr_sidecar, hocr_wordfreq
+from hocr_tools_lib.utils.sidecar_utils import MAGIC
+from tests import TestCase
+
+
+class HocrSidecarTestCase(TestCase):
+    def test_create_sidecar(self) -> None:
+        with TemporaryDirectory() as directory:
+            filename = self.get_data_file_copy('tess.hocr', directory)
+            result = hocr_sidecar.create_sidecar(filename)
+            self.assertEqual(str(Path(directory) / 'tess.hocrx'), result)
+            self.assertTrue(Path(result).read_bytes().startswith(MAGIC))
+
+    def test_main(self) -> None:
+        filename = self.get_data_file('tess.hocr')
+        with TemporaryDirectory() as directory:
+            output = Path(directory) / 'out.hocrx'
+            with mock.patch('sys.argv', ['hocr-sidecar', '-o', str(output), filename]):
+                hocr_sidecar.main()
+            self.assertTrue(output.read_bytes().startswith(MAGIC))
+
+    def test_memory_mapped(self) -> None:
+        with TemporaryDirectory() as directory:
+            filename = self.get_data_file_copy('tess.hocr', directory)
+            result = hocr_sidecar.create_sidecar(filename)
+            expected_geometries = list(hocr_eval_geom.evaluate_geometries(result, result))
+            with open(result, mode='rb') as fd, mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+                # Memory maps are sidecars like their files, not hOCR.
+                self.assertEqual(list(hocr_lines.lines(result)), list(hocr_lines.lines(mapping)))
+                self.assertEqual(37, len(list(hocr_lines.lines(mapping))))
+                self.assertEqual(
+                    list(hocr_wordfreq.word_frequencies(result)), list(hocr_wordfreq.word_frequencies(mapping))
+                )
+                self.assertTrue(expected_geometries)
+                self.assertEqual(expected_geometries, list(hocr_eval_geom.evaluate_geometries(mapping, mapping)))
+                self.assertFalse(mapping.closed)
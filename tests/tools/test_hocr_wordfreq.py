@@ -2,9 +2,10 @@ from __future__ import annotations
 
 import contextlib
 from io import StringIO
+from tempfile import TemporaryDirectory
 from unittest import mock
 
-from hocr_tools_lib.tools import hocr_wordfreq
+from hocr_tools_lib.tools import hocr_sidecar, hocr_wordfreq
 from tests import TestCase
 
 
@@ -35,6 +36,16 @@ class HocrWordfreqTestCase(TestCase):
             frequencies[0]
         )
 
+    def test_sidecar(self) -> None:
+        filename = self.get_data_file('sample.html')
+        expected = list(hocr_wordfreq.word_frequencies(hocr_in=filename, dehyphenate=True))
+        with TemporaryDirectory() as directory:
+            sidecar = hocr_sidecar.create_sidecar(filename, f'{directory}/sample.hocrx')
+            with mock.patch.object(hocr_wordfreq, 'parse_html', side_effect=AssertionError):
+                self.assertEqual(expected, list(hocr_wordfreq.word_frequencies(hocr_in=sidecar, dehyphenate=True)))
+                with open(sidecar) as fd:
+                    self.assertEqual(expected, list(hocr_wordfreq.word_frequencies(hocr_in=fd, dehyphenate=True)))
+
     def test_main(self) -> None:
         filename = self.get_data_file('sample.html')
         stdout = StringIO()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import os
+import time
+from io import BytesIO, StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from hocr_tools_lib.utils import cache_utils
+from tests import TestCase
+
+
+class ReadSourceTestCase(TestCase):
+    def test_read_source(self) -> None:
+        filename = self.get_data_file('sample.html')
+        expected = self.get_data_content('sample.html')
+        self.assertEqual(expected, cache_utils.read_source(filename))
+        self.assertEqual(expected, cache_utils.read_source(Path(filename)))
+        self.assertEqual(expected, cache_utils.read_source(BytesIO(expected)))
+        self.assertEqual(b'\xc3\xa4', cache_utils.read_source(StringIO('\xe4')))
+
+
+class ResultCacheTestCase(TestCase):
+    def test_make_key(self) -> None:
+        make_key = cache_utils.ResultCache.make_key
+        key = make_key('tool', [b'a', b'b'], {'x': 1, 'y': 2})
+        self.assertEqual(key, make_key('tool', [b'a', b'b'], {'y': 2, 'x': 1}))
+        self.assertNotEqual(key, make_key('other', [b'a', b'b'], {'x': 1, 'y': 2}))
+        self.assertNotEqual(key, make_key('tool', [b'ab', b''], {'x': 1, 'y': 2}))
+        self.assertNotEqual(key, make_key('tool', [b'a', b'b'], {'x': 1, 'y': 3}))
+
+    def test_get_put(self) -> None:
+        with TemporaryDirectory() as directory:
+            cache = cache_utils.ResultCache(directory)
+            self.assertIsNone(cache.get('abcdef'))
+            cache.put('abcdef', [1, 2.5, None])
+            self.assertEqual([1, 2.5, None], cache.get('abcdef'))
+            self.assertEqual([1, 2.5, None], cache_utils.ResultCache(directory).get('abcdef'))
+
+            cache.discard('abcdef')
+            self.assertIsNone(cache.get('abcdef'))
+            cache.discard('abcdef')
+
+    def test_clear(self) -> None:
+        with TemporaryDirectory() as directory:
+            cache = cache_utils.ResultCache(directory)
+            for key in ['aa1', 'aa2', 'bb1']:
+                cache.put_bytes(key, b'data')
+            cache.clear()
+            for key in ['aa1', 'aa2', 'bb1']:
+                self.assertIsNone(cache.get_bytes(key))
+
+    def test_lru_eviction(self) -> None:
+        with TemporaryDirectory() as directory:
+            cache = cache_utils.ResultCache(directory, max_size=30)
+            now = time.time()
+            for index, key in enumerate(['aa1', 'aa2', 'bb1']):
+                cache.put_bytes(key, b'0123456789')
+                # Make the order independent of the file system timestamp resolution.
+                os.utime(Path(directory) / key[:2] / key, (now - 100 + index, now - 100 + index))
+            # Access the oldest entry to make it the most recently used one.
+            self.assertEqual(b'0123456789', cache.get_bytes('aa1'))
+
+            cache.put_bytes('cc1', b'0123456789')
+            self.assertIsNone(cache.get_bytes('aa2'))
+            for key in ['aa1', 'bb1', 'cc1']:
+                self.assertEqual(b'0123456789', cache.get_bytes(key), key)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import random
+from unittest import mock
+
+from hocr_tools_lib.utils import edit_utils
+from hocr_tools_lib.utils.edit_utils import align, edit_distance, Edit, ErrorStats
+from tests import TestCase
+
+
+class AlignTestCase(TestCase):
+    def test_edits(self) -> None:
+        self.assertEqual([], align('', ''))
+        self.assertEqual([Edit('insert', None, 'a')], align('', 'a'))
+        self.assertEqual([Edit('delete', 'a', None)], align('a', ''))
+        self.assertEqual(
+            [
+                Edit('substitute', 'k', 's'), Edit('equal', 'i', 'i'), Edit('equal', 't', 't'),
+                Edit('equal', 't', 't'), Edit('substitute', 'e', 'i'), Edit('equal', 'n', 'n'),
+                Edit('insert', None, 'g'),
+            ],
+            align('kitten', 'sitting')
+        )
+        self.assertEqual(
+            [Edit('equal', 'a', 'a'), Edit('substitute', 'b', 'x'), Edit('equal', 'c', 'c')],
+            align(['a', 'b', 'c'], ['a', 'x', 'c'])
+        )
+
+    def test_compared_to_edit_distance(self) -> None:
+        rng = random.Random(42)
+        # Small blocks to split even short sequences.
+        with mock.patch.object(edit_utils, '_BLOCK_CELLS', 16):
+            for _ in range(300):
+                a = ''.join(rng.choice('ab c') for _ in range(rng.randint(0, 60)))
+                b = ''.join(rng.choice('ab c') for _ in range(rng.randint(0, 60)))
+                edits = align(a, b)
+                self.assertEqual(a, ''.join(edit.a or '' for edit in edits))
+                self.assertEqual(b, ''.join(edit.b or '' for edit in edits))
+                self.assertEqual(edit_distance(a, b), sum(edit.operation != 'equal' for edit in edits))
+
+
+class ErrorStatsTestCase(TestCase):
+    def test_add(self) -> None:
+        stats = ErrorStats()
+        self.assertEqual(2, stats.add('hello world', 'helo wrld'))
+        self.assertEqual(0, stats.add('foo', 'foo'))
+        self.assertEqual(3, stats.add('bar', ''))
+        self.assertEqual(17, stats.characters)
+        self.assertEqual(5, stats.character_errors)
+        self.assertEqual(4, stats.words)
+        self.assertEqual(3, stats.word_errors)
+        self.assertAlmostEqual(5 / 17, stats.cer)
+        self.assertAlmostEqual(3 / 4, stats.wer)
+        self.assertEqual(
+            [('a', '', 1), ('b', '', 1), ('l', '', 1), ('o', '', 1), ('r', '', 1)], sorted(stats.most_common())
+        )
+        self.assertEqual(0.0, ErrorStats().cer)
+
+    def test_merge_and_dict(self) -> None:
+        first = ErrorStats()
+        first.add('abc', 'abd')
+        second = ErrorStats()
+        second.add('xc', 'xd')
+        first.merge(second)
+        self.assertEqual(5, first.characters)
+        self.assertEqual([('c', 'd', 2)], first.most_common())
+        self.assertEqual(first, ErrorStats.from_dict(first.to_dict()))
+        self.assertIn("confusion 'c' 'd' 2", first.format_report())
+        self.assertNotIn('confusion', first.format_report(confusions=0))
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import io
+import zlib
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from PIL import Image, ImageDraw
+
+from hocr_tools_lib.utils import image_utils
+from tests import TestCase
+
+
+class DetectKindTestCase(TestCase):
+    def test_detect_kind(self) -> None:
+        text = Image.new('RGB', (400, 300), 'white')
+        draw = ImageDraw.Draw(text)
+        draw.rectangle((50, 50, 350, 80), fill='black')
+        self.assertEqual('bilevel', image_utils.detect_kind(text))
+        self.assertEqual('bilevel', image_utils.detect_kind(text.convert('1')))
+
+        gray = Image.linear_gradient('L').resize((400, 300))
+        self.assertEqual('gray', image_utils.detect_kind(gray))
+        self.assertEqual('gray', image_utils.detect_kind(gray.convert('RGB')))
+
+        color = text.copy()
+        ImageDraw.Draw(color).rectangle((50, 100, 350, 250), fill='red')
+        self.assertEqual('color', image_utils.detect_kind(color))
+
+
+class PrepareImageTestCase(TestCase):
+    def test_prepare_image(self) -> None:
+        with TemporaryDirectory() as temp_directory:
+            directory = Path(temp_directory)
+            with Image.open(self.get_data_file('alice_1.png')) as image:
+                image.convert('RGB').save(directory / 'alice_1.jpg', dpi=(300, 300))
+                image.convert('L').save(directory / 'gray.jpg')
+            jpg_path = str(directory / 'alice_1.jpg')
+
+            prepared = image_utils.prepare_image(jpg_path)
+            self.assertEqual(('bilevel', 'CCITTFaxDecode'), (prepared.kind, prepared.filter))
+            self.assertEqual((2488, 3507, 300), (prepared.original_width, prepared.original_height, prepared.dpi))
+            self.assertEqual((2488, 3507), (prepared.width, prepared.height))
+            self.assertEqual(('DeviceGray', 1), (prepared.color_space, prepared.bits_per_component))
+            self.assertEqual({'K': -1, 'Columns': 2488, 'Rows': 3507, 'BlackIs1': True}, prepared.decode_params)
+            self.assertLess(len(prepared.data), Path(jpg_path).stat().st_size / 5)
+
+            options = image_utils.ImageOptions(target_dpi=150, bilevel_compression='flate')
+            prepared = image_utils.prepare_image(jpg_path, options=options)
+            self.assertEqual(('bilevel', 'FlateDecode'), (prepared.kind, prepared.filter))
+            self.assertEqual((2488, 3507, 300), (prepared.original_width, prepared.original_height, prepared.dpi))
+            self.assertEqual((1244, 1754), (prepared.width, prepared.height))
+            self.assertEqual(1754 * ((1244 + 7) // 8), len(zlib.decompress(prepared.data)))
+
+            # Unchanged JPEG images are passed through.
+            options = image_utils.ImageOptions(detect_kind=False)
+            prepared = image_utils.prepare_image(str(directory / 'gray.jpg'), default_dpi=200, options=options)
+            self.assertEqual(('gray', 'DCTDecode', 200), (prepared.kind, prepared.filter, prepared.dpi))
+            self.assertEqual((directory / 'gray.jpg').read_bytes(), prepared.data)
+
+            options = image_utils.ImageOptions(detect_kind=False, target_dpi=100, jpeg_quality=50)
+            prepared = image_utils.prepare_image(jpg_path, options=options)
+            self.assertEqual(('color', 'DCTDecode', 'DeviceRGB'), (prepared.kind, prepared.filter, prepared.color_space))
+            with Image.open(io.BytesIO(prepared.data)) as image:
+                self.assertEqual(((829, 1169), 'RGB'), (image.size, image.mode))
+
+            with self.assertRaises(ValueError):
+                image_utils.prepare_image(jpg_path, options=image_utils.ImageOptions(bilevel_compression='jbig2'))
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import mmap
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+
+from lxml import html
+
+from hocr_tools_lib.utils import input_utils
+from hocr_tools_lib.utils.input_utils import get_directory, is_buffer, iter_pages, parse_html
+from hocr_tools_lib.utils.typing_utils import BufferType, InputType
+from tests import TestCase
+
+
+class ParseHtmlTestCase(TestCase):
+    def test_sources(self) -> None:
+        filename = self.get_data_file('tess.hocr')
+        content = self.get_data_content('tess.hocr')
+        with open(filename, mode='rb') as fd, mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            sources: list[InputType] = [
+                filename, Path(filename), BytesIO(content),
+                content, bytearray(content), memoryview(content), mapping,
+            ]
+            for source in sources:
+                with self.subTest(source=type(source).__name__):
+                    doc = parse_html(source)
+                    self.assertIsInstance(doc.getroot(), html.HtmlElement)
+                    self.assertEqual(37, len(doc.xpath("//*[@class='ocr_line']")))
+
+    def test_parser(self) -> None:
+        content = self.get_data_content('tess.hocr')
+        buffers: list[BufferType] = [content, memoryview(content)]
+        for source in buffers:
+            with self.subTest(source=type(source).__name__):
+                doc = parse_html(source, html.XHTMLParser())
+                self.assertEqual(
+                    37, len(doc.xpath("//x:*[@class='ocr_line']", namespaces={'x': 'http://www.w3.org/1999/xhtml'}))
+                )
+
+    def test_is_buffer(self) -> None:
+        self.assertTrue(is_buffer(b'<html/>'))
+        self.assertTrue(is_buffer(memoryview(b'<html/>')))
+        self.assertFalse(is_buffer('<html/>'))
+        self.assertFalse(is_buffer(BytesIO(b'<html/>')))
+
+
+class IterPagesTestCase(TestCase):
+    def test_sources(self) -> None:
+        filename = self.get_data_file('hocr_split/test.hocr')
+        content = self.get_data_content('hocr_split/test.hocr')
+        with open(filename, mode='rb') as fd, mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            sources: list[InputType] = [filename, Path(filename), BytesIO(content), content, memoryview(content), mapping]
+            for source in sources:
+                with self.subTest(source=type(source).__name__):
+                    pages = list(iter_pages(source))
+                    self.assertEqual(['Page 1', 'Page 2'], [page.text for page in pages])
+                    for page in pages:
+                        self.assertIsInstance(page, html.HtmlElement)
+                        self.assertIsNone(page.getparent())
+
+        pages = list(iter_pages(self.get_data_file('litver.html'), html_parser=True))
+        self.assertEqual(1, len(pages))
+        self.assertTrue(pages[0].xpath("boolean(.//*[@class='ocr_line'])"))
+
+    def test_incremental(self) -> None:
+        body = ''.join(f'<div class="ocr_page">Page {index}</div>' for index in range(1, 101))
+        content = f'<html><body>{body}</body></html>'.encode()
+        source = BytesIO(content)
+        with mock.patch.object(input_utils, 'CHUNK_SIZE', 100):
+            pages = iter_pages(source)
+            self.assertEqual('Page 1', next(pages).text)
+            # The first page is available before the whole document has been read.
+            self.assertLess(source.tell(), len(content) / 10)
+            self.assertEqual(99, len(list(pages)))
+
+
+class GetDirectoryTestCase(TestCase):
+    def test_get_directory(self) -> None:
+        filename = self.get_data_file('tess.hocr')
+        self.assertEqual(str(Path(filename).parent), get_directory(filename))
+        self.assertEqual(str(Path(filename).parent), get_directory(Path(filename)))
+        with open(filename) as fd:
+            self.assertEqual(str(Path(filename).parent), get_directory(fd))
+        self.assertEqual('', get_directory(b'<html/>'))
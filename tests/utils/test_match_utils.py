@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import itertools
+import random
+
+from hocr_tools_lib.utils.match_utils import get_assignment, get_overlap_graph, match_boxes
+from hocr_tools_lib.utils.rectangle_utils import intersection_over_union, RectangleType
+from tests import TestCase
+
+
+class GetOverlapGraphTestCase(TestCase):
+    def test_compared_to_all_pairs(self) -> None:
+        rng = random.Random(42)
+
+        def get_box() -> RectangleType | None:
+            if rng.random() < 0.1:
+                return None
+            x = rng.randint(0, 50)
+            y = rng.randint(0, 50)
+            return x, y, x + rng.randint(0, 20), y + rng.randint(0, 20)
+
+        for _ in range(100):
+            truths = [get_box() for _ in range(rng.randint(0, 15))]
+            actuals = [get_box() for _ in range(rng.randint(0, 15))]
+            for min_iou in [0.0, 0.3]:
+                expected = []
+                for (i, truth), (j, actual) in itertools.product(enumerate(truths), enumerate(actuals)):
+                    value = intersection_over_union(truth, actual)
+                    if value > 0 and value >= min_iou:
+                        expected.append((i, j, value))
+                self.assertEqual(expected, get_overlap_graph(truths, actuals, min_iou=min_iou))
+
+    def test_touching(self) -> None:
+        self.assertEqual([], get_overlap_graph([(0, 0, 10, 10)], [(10, 0, 20, 10), (0, 10, 10, 20)]))
+        self.assertEqual([(0, 0, 50 / 150)], get_overlap_graph([(0, 0, 10, 10)], [(5, 0, 15, 10)]))
+
+
+class GetAssignmentTestCase(TestCase):
+    def test_compared_to_permutations(self) -> None:
+        rng = random.Random(42)
+        for _ in range(200):
+            rows = rng.randint(0, 4)
+            columns = rng.randint(rows, 5)
+            weights = [[rng.choice([0.0, rng.random()]) for _ in range(columns)] for _ in range(rows)]
+            expected = max(
+                sum(weights[row][column] for row, column in enumerate(permutation))
+                for permutation in itertools.permutations(range(columns), rows)
+            )
+            assignment = get_assignment(weights)
+            self.assertEqual(rows, len({row for row, _ in assignment}))
+            self.assertEqual(rows, len({column for _, column in assignment}))
+            self.assertAlmostEqual(expected, sum(weights[row][column] for row, column in assignment))
+
+    def test_too_many_rows(self) -> None:
+        with self.assertRaises(ValueError):
+            get_assignment([[1.0], [1.0]])
+
+
+class MatchBoxesTestCase(TestCase):
+    def test_one_to_one(self) -> None:
+        # The greedy choice of the best pair (0, 0) is not the best matching.
+        edges = [(0, 0, 0.8), (0, 1, 0.7), (1, 0, 0.6), (2, 2, 0.5)]
+        self.assertEqual([(0, 1, 0.7), (1, 0, 0.6), (2, 2, 0.5)], match_boxes(edges))
+        self.assertEqual([(0, 0, 0.8)], match_boxes(edges, min_iou=0.75))
+        # More boxes of the second set in one part.
+        self.assertEqual([(0, 2, 0.9)], match_boxes([(0, 1, 0.2), (0, 2, 0.9), (0, 3, 0.1)]))
+        self.assertEqual([(1, 0, 0.9)], match_boxes([(1, 0, 0.9), (2, 0, 0.2), (3, 0, 0.1)]))
+        self.assertEqual([], match_boxes([]))
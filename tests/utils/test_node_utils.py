@@ -20,3 +20,28 @@ class GetPropTestCase(TestCase):
             with self.subTest(input_value=input_value):
                 div = self.get_div(input_value)
                 self.assertEqual('alice_1.png', node_utils.get_prop(node=div, name='image', strip_value=True))
+
+
+class GetTextsTestCase(TestCase):
+    def test_compared_to_get_text(self) -> None:
+        for name in ['tess.hocr', 'sample.html', 'litver.html']:
+            for class_name in ['ocr_page', 'ocr_par', 'ocr_line', 'ocrx_word']:
+                with self.subTest(name=name, class_name=class_name):
+                    root = html.parse(self.get_data_file(name)).getroot()
+                    elements = root.xpath(f"descendant-or-self::*[@class='{class_name}']")
+                    self.assertEqual(
+                        [(element, node_utils.get_text(element)) for element in elements],
+                        node_utils.get_texts(root, class_name)
+                    )
+
+    def test_nested(self) -> None:
+        div = html.fromstring(
+            '<div class="x">a<span class="x"> b <!-- c -->d<b>e</b>f</span>g<?pi h?>i</div>'
+        )
+        self.assertEqual(
+            [(div, 'a b defgi'), (div[0], ' b def')],
+            node_utils.get_texts(div, 'x')
+        )
+        # The tail of the given node does not belong to it.
+        self.assertEqual([(div[0], ' b def')], node_utils.get_texts(div[0], 'x'))
+        self.assertEqual([], node_utils.get_texts(div, 'y'))
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import contextlib
+import json
+from io import BytesIO, StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from hocr_tools_lib.tools import hocr_lines
+from hocr_tools_lib.utils import profile_utils
+from hocr_tools_lib.utils.edit_utils import edit_distance
+from tests import TestCase
+
+
+class ProfilerTestCase(TestCase):
+    def test_disabled(self) -> None:
+        profiler = profile_utils.Profiler()
+        with profiler.timer('stage'):
+            profiler.count('counter')
+        profiler.count_source(b'abc')
+        self.assertEqual({'timers': {}, 'counters': {}}, profiler.report())
+
+    def test_enabled(self) -> None:
+        profiler = profile_utils.Profiler()
+        profiler.enabled = True
+        for _ in range(3):
+            with profiler.timer('stage'):
+                profiler.count('counter', 2)
+        profiler.count_source(b'abc')
+        profiler.count_source(BytesIO(b'abcd'))
+        profiler.count_source(self.get_data_file('sample.html'))
+        profiler.count_source(object())
+
+        report = profiler.report()
+        self.assertEqual(['stage'], list(report['timers']))
+        self.assertEqual(3, report['timers']['stage']['calls'])
+        self.assertGreater(report['timers']['stage']['seconds'], 0)
+        self.assertEqual(
+            {'bytes_read': 7 + len(self.get_data_content('sample.html')), 'counter': 6},
+            report['counters']
+        )
+        self.assertRegex(profiler.format_report(), r'stage +3 +\d+\.\d{4}\n\ncounter +value\nbytes_read ')
+
+        profiler.reset()
+        self.assertEqual({'timers': {}, 'counters': {}}, profiler.report())
+
+    def test_merge(self) -> None:
+        profiler = profile_utils.Profiler()
+        profiler.add_time('stage', 1.5)
+        profiler.counters['counter'] = 1
+        profiler.merge({
+            'timers': {'stage': {'calls': 2, 'seconds': 1.0}, 'other': {'calls': 1, 'seconds': 0.5}},
+            'counters': {'counter': 2, 'other': 3},
+        })
+        self.assertEqual(
+            {
+                'timers': {'other': {'calls': 1, 'seconds': 0.5}, 'stage': {'calls': 3, 'seconds': 2.5}},
+                'counters': {'counter': 3, 'other': 3},
+            },
+            profiler.report()
+        )
+
+
+class ProfilingTestCase(TestCase):
+    def test_utils(self) -> None:
+        with profile_utils.profiling(json_file=None, print_report=False) as profiler:
+            self.assertFalse(profiler.enabled)
+
+        stderr = StringIO()
+        with contextlib.redirect_stderr(stderr):
+            with profile_utils.profiling(print_report=True) as profiler:
+                self.assertTrue(profiler.enabled)
+                edit_distance('kitten', 'sitting')
+                edit_distance('abc', 'abc')
+                edit_distance('abcdef', 'uvwxyz', threshold=2)
+        self.assertFalse(profiler.enabled)
+        counters = profiler.report()['counters']
+        self.assertEqual(3, counters['edit_distance.calls'])
+        self.assertEqual(6 * 7 + 2, counters['edit_distance.cells'])
+        self.assertEqual(2, profiler.report()['timers']['edit_distance']['calls'])
+        self.assertIn('edit_distance.cells', stderr.getvalue())
+        self.assertIn('total', stderr.getvalue())
+
+    def test_report_on_error(self) -> None:
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'profile.json'
+            with self.assertRaises(ValueError):
+                with profile_utils.profiling(json_file=str(path)) as profiler:
+                    profiler.count('counter')
+                    raise ValueError('Failure')
+            data = json.loads(path.read_text())
+        self.assertEqual({'counter': 1}, data['counters'])
+        self.assertEqual(['total'], list(data['timers']))
+
+    def test_main(self) -> None:
+        filename = self.get_data_file('tess.hocr')
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'profile.json'
+            stdout = StringIO()
+            with mock.patch('sys.argv', ['hocr-lines', '--profile-json', str(path), filename]):
+                with contextlib.redirect_stdout(stdout):
+                    hocr_lines.main()
+            data = json.loads(path.read_text())
+        self.assertEqual(['get_texts', 'html.parse', 'total'], sorted(data['timers']))
+        self.assertEqual(len(self.get_data_content('tess.hocr')), data['counters']['bytes_read'])
+        self.assertEqual(37, data['counters']['elements'])
+        self.assertEqual(37, len(stdout.getvalue().splitlines()))
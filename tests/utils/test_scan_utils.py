@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from lxml import html
+
+from hocr_tools_lib.utils.node_utils import get_bbox
+from hocr_tools_lib.utils.scan_utils import scan_geometry
+from hocr_tools_lib.utils.typing_utils import InputType
+from tests import TestCase
+
+
+class ScanGeometryTestCase(TestCase):
+    def test_compared_to_tree(self) -> None:
+        for name in ['tess.hocr', 'sample.html', 'litver.html']:
+            with self.subTest(name=name):
+                path = self.get_data_file(name)
+                doc = html.parse(path)
+                elements = [
+                    node for node in doc.iter()
+                    if isinstance(node.tag, str) and node.get('class') is not None
+                ]
+                sources: list[InputType] = [path, Path(path).read_bytes(), memoryview(Path(path).read_bytes())]
+                for source in sources:
+                    scan = scan_geometry(source)
+                    self.assertEqual(len(elements), len(scan))
+                    for index, node in enumerate(elements):
+                        self.assertEqual(get_bbox(node), scan.get_bbox(index))
+                        self.assertEqual(node.get('class'), scan.class_names[scan.classes[index]])
+                        ancestors = [ancestor for ancestor in node.iterancestors() if ancestor.get('class') is not None]
+                        self.assertEqual(len(ancestors), scan.depths[index])
+                        parent = scan.parents[index]
+                        self.assertEqual(elements[parent] if ancestors else None, ancestors[0] if ancestors else None)
+                        self.assertEqual(
+                            len(list(node.xpath('descendant::*[@class]'))), scan.ends[index] - index - 1
+                        )
+
+    def test_structure(self) -> None:
+        scan = scan_geometry(
+            b'<html><head><meta name="ocr-system" content="test"><meta charset="utf-8"></head><body>a<!-- c -->'
+            b'<div class="ocr_page" title="image \'x.png\'; bbox 0 0 100 100">'
+            b'<p><span class="ocr_line" title="baseline 0 0; bbox 1 2 3 4">c<b>d</b></span>'
+            b'<span class="ocrx_word" title="x_wconf 93">g</span></p>'
+            b'<span class="ocr_line" title="bbox 1 2 x 4"></span>'
+            b'</div><div class="ocr_page" title="bbox 0 0 5 5"></div></body></html>'
+        )
+        self.assertEqual(['ocr-system'], scan.meta_names)
+        self.assertEqual(['ocr_page', 'ocr_line', 'ocrx_word'], scan.class_names)
+        self.assertEqual([0, 4], scan.find('ocr_page'))
+        self.assertEqual([1, 3], scan.find('ocr_line', 0, scan.ends[0]))
+        self.assertEqual([], scan.find('ocr_line', 4, scan.ends[4]))
+        self.assertEqual([], scan.find('ocr_carea'))
+        self.assertEqual([-1, 0, 0, 0, -1], list(scan.parents))
+        self.assertEqual([4, 2, 3, 4, 5], list(scan.ends))
+        self.assertEqual([0, 1, 1, 1, 0], list(scan.depths))
+        self.assertEqual(
+            [(0, 0, 100, 100), (1, 2, 3, 4), None, None, (0, 0, 5, 5)],
+            [scan.get_bbox(index) for index in range(len(scan))]
+        )
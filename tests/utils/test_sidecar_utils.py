@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import math
+from io import BytesIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from lxml import html
+
+from hocr_tools_lib.utils.node_utils import get_bbox
+from hocr_tools_lib.utils.sidecar_utils import open_sidecar, write_sidecar
+from tests import TestCase
+
+
+class SidecarTestCase(TestCase):
+    def test_round_trip(self) -> None:
+        for name in ['tess.hocr', 'sample.html']:
+            with self.subTest(name=name):
+                doc = html.parse(self.get_data_file(name))
+                body = doc.getroot().find('body')
+                assert body is not None
+                elements = [body] + [
+                    node for node in body.iterdescendants()
+                    if isinstance(node.tag, str) and node.get('class') is not None
+                ]
+                target = BytesIO()
+                write_sidecar(doc, target)
+
+                sidecar = open_sidecar(target.getvalue())
+                assert sidecar is not None
+                with sidecar:
+                    self.assertEqual(len(elements), len(sidecar))
+                    for index, node in enumerate(elements):
+                        self.assertEqual(node.text_content(), sidecar.get_text(index))
+                        self.assertEqual(get_bbox(node), sidecar.get_bbox(index))
+                        self.assertEqual(node.get('title', ''), sidecar.get_title(index))
+                        self.assertEqual(node.get('class', ''), sidecar.class_names[sidecar.classes[index]])
+                        parent = sidecar.parents[index]
+                        if parent >= 0:
+                            self.assertIn(elements[parent], node.iterancestors())
+                        self.assertEqual(
+                            len(list(node.xpath('descendant::*[@class]'))), sidecar.ends[index] - index - 1
+                        )
+
+    def test_structure(self) -> None:
+        doc = html.fromstring(
+            '<html><body>a<!-- comment -->b'
+            '<div class="ocr_page" title="bbox 0 0 100 100; ppageno 0">'
+            '<span class="ocr_line" title="bbox 1 2 3 4">c<b>d</b>e</span>f'
+            '<span class="ocrx_word" title="x_wconf 93">g</span>'
+            '</div>h</body></html>'
+        )
+        target = BytesIO()
+        write_sidecar(doc, target)
+        sidecar = open_sidecar(target)
+        assert sidecar is not None
+        with sidecar:
+            self.assertEqual(4, len(sidecar))
+            self.assertEqual('abcdefgh', sidecar.get_text(0))
+            self.assertEqual('cde', sidecar.get_text(2))
+            self.assertEqual([-1, 0, 1, 1], list(sidecar.parents))
+            self.assertEqual([4, 4, 3, 4], list(sidecar.ends))
+            self.assertEqual([2], sidecar.find('ocr_line'))
+            self.assertEqual([3], sidecar.find('ocrx_word', 1, sidecar.ends[1]))
+            self.assertEqual([], sidecar.find('ocr_par'))
+            self.assertEqual((1, 2, 3, 4), sidecar.get_bbox(2))
+            self.assertIsNone(sidecar.get_bbox(3))
+            self.assertTrue(math.isnan(sidecar.confidences[2]))
+            self.assertEqual(93, sidecar.confidences[3])
+            self.assertEqual('bbox 0 0 100 100; ppageno 0', sidecar.get_title(1))
+
+    def test_open_sidecar(self) -> None:
+        filename = self.get_data_file('tess.hocr')
+        self.assertIsNone(open_sidecar(filename))
+        with open(filename) as fd:
+            self.assertIsNone(open_sidecar(fd))
+        self.assertIsNone(open_sidecar(b''))
+
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'tess.hocrx'
+            write_sidecar(html.parse(filename), path)
+            sidecar = open_sidecar(path)
+            assert sidecar is not None
+            with sidecar:
+                self.assertEqual(37, len(sidecar.find('ocr_line')))
+            with open(path) as fd:
+                sidecar = open_sidecar(fd)
+                assert sidecar is not None
+                sidecar.close()
+
+            data = path.read_bytes()
+            for size in [10, 43, len(data) - 1]:
+                with self.subTest(size=size), self.assertRaises(ValueError):
+                    open_sidecar(data[:size])